@@ -0,0 +1,37 @@
+"""Report the throughput of getting and setting properties on a CSS declaration."""
+
+import argparse
+import timeit
+
+from colosseum.declaration import CSS
+
+# Statements to time, and the setup they need.
+CASES = [
+    ("get (initial)", "style.width"),
+    ("get (set)", "style.height"),
+    ("get (derived)", "style.text_align"),
+    ("get (directional)", "style.margin"),
+    ("set (unchanged)", "style.height = 10"),
+    ("set (changed)", "style.height = 10; style.height = 20"),
+    ("set (directional)", "style.margin = (1, 2)"),
+    ("delete", "style.height = 10; del style.height"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    for label, statement in CASES:
+        style = CSS(height=10)
+        elapsed = min(
+            timeit.repeat(
+                statement, number=args.number, repeat=5, globals={"style": style}
+            )
+        )
+        print(f"{label:>20}: {args.number / elapsed / 1e6:.2f}M ops/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare the throughput of recursive and iterative layout of deep documents."""
+
+import argparse
+import sys
+import time
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+from tests.utils import Display, ExampleNode
+
+
+def build_chain(depth):
+    root = node = ExampleNode(style=CSS(display=BLOCK, padding_top=1))
+    for i in range(depth):
+        child = ExampleNode(style=CSS(display=BLOCK, padding_top=1))
+        child.parent = node
+        node.children.append(child)
+        node = child
+    return root
+
+
+def recursive_layout_tree(*args):
+    "Drive the layout generators on the Python stack, one call per level."
+    for child in engine.layout_box(*args):
+        recursive_layout_tree(*child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--nodes", type=int, default=100_000)
+    parser.add_argument(
+        "--recursion-limit",
+        type=int,
+        default=sys.getrecursionlimit(),
+        help="The recursion limit for the recursive driver.",
+    )
+    args = parser.parse_args()
+    sys.setrecursionlimit(args.recursion_limit)
+
+    for depth in [10, 1_000, 10_000]:
+        root = build_chain(depth)
+        repeat = max(1, args.nodes // (depth + 1))
+        # Every box of the chain is laid out on each pass.
+        nodes = (depth + 1) * repeat
+
+        results = []
+        for driver in [recursive_layout_tree, engine.layout_tree]:
+            with mock.patch("colosseum.engine.layout_tree", driver):
+                try:
+                    start = time.perf_counter()
+                    for i in range(repeat):
+                        layout(Display(dpi=96, width=1024, height=768), root)
+                    elapsed = time.perf_counter() - start
+                except RecursionError:
+                    results.append("RecursionError")
+                else:
+                    results.append(f"{nodes / elapsed / 1e3:.1f}k boxes/s")
+
+        print(f"depth {depth:>6}: recursive {results[0]}; iterative {results[1]}")
+
+
+if __name__ == "__main__":
+    main()
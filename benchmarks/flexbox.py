@@ -0,0 +1,90 @@
+"""Report the time taken to lay out flex rows of many items, and to lay them
+out again when the height of the row, or one item, changes, with and
+without the retained item measurements."""
+
+import argparse
+import time
+from unittest import mock
+
+from colosseum.constants import BLOCK, FLEX, INLINE, WRAP
+from colosseum.declaration import CSS
+from colosseum.engine import FlexMeasurements, layout
+from tests.utils import Display, ExampleNode
+
+
+class UncachedMeasurements(FlexMeasurements):
+    "Flex measurements that measure every item on every layout."
+
+    def start(self, context):
+        self.__init__()
+        super().start(context)
+
+
+def build_toolbar(n_items):
+    "A document holding a wrapping row of buttons."
+    items = []
+    for i in range(n_items):
+        text = ExampleNode(style=CSS(display=INLINE))
+        text.intrinsic.width = 20 + (i * 7) % 60
+        text.intrinsic.height = 12
+        items.append(
+            ExampleNode(
+                style=CSS(display=BLOCK, padding=4, margin=2, flex_grow=i % 3),
+                children=[text],
+            )
+        )
+    toolbar = ExampleNode(style=CSS(display=FLEX, flex_wrap=WRAP), children=items)
+    return ExampleNode(style=CSS(display=BLOCK), children=[toolbar])
+
+
+def measure(root, repeat, change=None):
+    """Return the time taken to lay out the document, in seconds.
+
+    If ``change`` is given, it is called with the toolbar and the iteration
+    before each incremental layout.
+    """
+    display = Display(dpi=96, width=1024, height=768)
+    layout(display, root)
+    toolbar = root.children[0]
+    start = time.perf_counter()
+    for i in range(repeat):
+        if change is not None:
+            change(toolbar, i)
+        layout(display, root, incremental=change is not None)
+    return (time.perf_counter() - start) / repeat
+
+
+def change_height(toolbar, i):
+    toolbar.style.height = 500 + i % 2
+
+
+def change_item(toolbar, i):
+    toolbar.children[len(toolbar.children) // 2].children[0].style.width = 40 + i % 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n_items in [100, 1_000]:
+        full = measure(build_toolbar(n_items), args.repeat)
+        height = measure(build_toolbar(n_items), args.repeat, change_height)
+        item = measure(build_toolbar(n_items), args.repeat, change_item)
+        with mock.patch("colosseum.engine.FlexMeasurements", UncachedMeasurements):
+            uncached_height = measure(
+                build_toolbar(n_items), args.repeat, change_height
+            )
+            uncached_item = measure(build_toolbar(n_items), args.repeat, change_item)
+
+        print(f"{n_items:>6} items: full layout {full * 1000:8.1f}ms")
+        print(
+            f"{'':>6}  height changed {height * 1000:8.1f}ms"
+            f" (uncached {uncached_height * 1000:8.1f}ms);"
+            f" one item changed {item * 1000:8.1f}ms"
+            f" (uncached {uncached_item * 1000:8.1f}ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare the time taken to place floats with and without an exclusion index."""
+
+import argparse
+import time
+from unittest import mock
+
+from colosseum.constants import BLOCK, LEFT, RIGHT
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+from tests.utils import Display, ExampleNode
+
+
+class NaiveExclusions:
+    "Float exclusions that scan every float that has been placed."
+
+    def __init__(self, width):
+        self.width = width
+        self.floats = []
+        self._float_top = 0
+        self.left_bottom = 0
+        self.right_bottom = 0
+
+    @property
+    def bottom(self):
+        return max(self.left_bottom, self.right_bottom)
+
+    def clearance(self, clear):
+        if clear is LEFT:
+            return self.left_bottom
+        elif clear is RIGHT:
+            return self.right_bottom
+        else:
+            return self.bottom
+
+    def place(self, side, width, height, y):
+        y = max(y, self._float_top, 0)
+        while True:
+            left, right = 0, self.width
+            for float_side, float_x, float_y, float_width, float_height in self.floats:
+                if float_y <= y < float_y + float_height or y < float_y < y + height:
+                    if float_side is LEFT:
+                        left = max(left, float_x + float_width)
+                    else:
+                        right = min(right, float_x)
+
+            if right - left >= width or (left <= 0 and right >= self.width):
+                break
+
+            y = min(
+                float_y + float_height
+                for _, _, float_y, _, float_height in self.floats
+                if float_y + float_height > y
+            )
+
+        x = left if side is LEFT else right - width
+        if height > 0:
+            self.floats.append((side, x, y, width, height))
+
+        self._float_top = y
+        if side is LEFT:
+            self.left_bottom = max(self.left_bottom, y + height)
+        else:
+            self.right_bottom = max(self.right_bottom, y + height)
+        return x, y
+
+
+def build_gallery(size):
+    "A block container with floats of assorted sizes."
+    return ExampleNode(
+        style=CSS(display=BLOCK),
+        children=[
+            ExampleNode(
+                style=CSS(
+                    display=BLOCK,
+                    float=RIGHT if i % 7 == 0 else LEFT,
+                    width=50 + (i * 37) % 100,
+                    height=20 + (i * 53) % 60,
+                    margin=2,
+                )
+            )
+            for i in range(size)
+        ],
+    )
+
+
+def position(node):
+    return node.layout.absolute_content_left, node.layout.absolute_content_top
+
+
+def measure(root, repeat):
+    "Return the time taken to lay out the document, in seconds."
+    display = Display(dpi=96, width=1024, height=768)
+    start = time.perf_counter()
+    for i in range(repeat):
+        layout(display, root)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in [100, 1_000, 5_000]:
+        root = build_gallery(size)
+        indexed = measure(root, args.repeat)
+        positions = [position(child) for child in root.children]
+
+        with mock.patch("colosseum.engine.FloatExclusions", NaiveExclusions):
+            naive = measure(root, args.repeat)
+
+        # Both approaches place the floats in the same position.
+        assert positions == [position(child) for child in root.children]
+
+        print(
+            f"{size:>6} floats: indexed {indexed * 1000:8.1f}ms;"
+            f" naive {naive * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
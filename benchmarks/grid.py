@@ -0,0 +1,112 @@
+"""Report the time taken to place the items of large grids, with the
+sparse and dense auto-placement, using the occupancy bitmap of the engine
+and a scan of every cell; and the time taken to lay the grids out."""
+
+import argparse
+import time
+from unittest import mock
+
+from colosseum.constants import BLOCK, GRID, INLINE, ROW, ROW_DENSE
+from colosseum.declaration import CSS
+from colosseum.engine import GridOccupancy, GridPlacement, layout
+from tests.utils import Display, ExampleNode
+
+
+class ScanningOccupancy(GridOccupancy):
+    "A grid occupancy that tests every cell, from the start of the grid."
+
+    def advance(self):
+        pass
+
+    def fit(self, major, major_span, minor, minor_span):
+        limit = self.limit if self.limit is not None else minor + 1
+        for start in range(minor, limit - minor_span + 1):
+            if self.fits(major, major_span, start, minor_span):
+                return start
+        return None
+
+    def fits(self, major, major_span, minor, minor_span):
+        for i in range(major, major + major_span):
+            if i < len(self.tracks):
+                for j in range(minor, minor + minor_span):
+                    if self.tracks[i] >> j & 1:
+                        return False
+        return True
+
+
+def build_grid(n_items, flow):
+    "A document holding a grid of auto-placed items, some spanning tracks."
+    items = []
+    for i in range(n_items):
+        text = ExampleNode(style=CSS(display=INLINE))
+        text.intrinsic.width = 20 + (i * 7) % 60
+        text.intrinsic.height = 12
+        items.append(
+            ExampleNode(
+                style=CSS(
+                    display=BLOCK,
+                    grid_column_start="span 3" if i % 5 == 0 else "auto",
+                    grid_row_start="span 2" if i % 7 == 0 else "auto",
+                ),
+                children=[text],
+            )
+        )
+
+    grid = ExampleNode(
+        style=CSS(
+            display=GRID,
+            grid_template_columns="repeat(8, auto)",
+            grid_auto_flow=flow,
+        ),
+        children=items,
+    )
+    return ExampleNode(style=CSS(display=BLOCK), children=[grid])
+
+
+def measure_placement(root, repeat):
+    """Return the time taken to place the items of the grid, in seconds.
+
+    The computed styles of the items are evaluated before the placement is
+    timed.
+    """
+    grid = root.children[0]
+    for item in grid.children:
+        item.style.computed
+    start = time.perf_counter()
+    for i in range(repeat):
+        GridPlacement(grid, grid.children)
+    return (time.perf_counter() - start) / repeat
+
+
+def measure_layout(root, repeat):
+    "Return the time taken to lay out the document, in seconds."
+    display = Display(dpi=96, width=1024, height=768)
+    start = time.perf_counter()
+    for i in range(repeat):
+        layout(display, root)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for flow in [ROW, ROW_DENSE]:
+        print(f"{flow}:")
+        for n_items in [1_000, 10_000]:
+            root = build_grid(n_items, flow)
+            placed = measure_placement(root, args.repeat)
+            with mock.patch("colosseum.engine.GridOccupancy", ScanningOccupancy):
+                scanned = measure_placement(root, 1)
+            laid_out = measure_layout(root, args.repeat)
+            print(
+                f"{n_items:>6} items: placed in {placed * 1000:8.1f}ms"
+                f" ({placed / n_items * 1e6:5.2f}us per item;"
+                f" scanning {scanned * 1000:8.1f}ms);"
+                f" laid out in {laid_out * 1000:8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
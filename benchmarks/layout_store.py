@@ -0,0 +1,64 @@
+"""Compare the memory used per node by Box and by a LayoutStore."""
+
+import argparse
+import tracemalloc
+
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.dimensions import Box, LayoutStore
+from colosseum.engine import layout
+from tests.utils import Display, ExampleNode
+
+
+def build_document(size):
+    style = CSS(display=BLOCK, height=10, margin=2, padding=1)
+    return ExampleNode(
+        style=CSS(display=BLOCK),
+        children=[ExampleNode(style=style) for i in range(size)],
+    )
+
+
+def measure(nodes, make_box):
+    "Return the memory allocated to provide a laid out box for each node."
+    for node in nodes:
+        node.layout = None
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for node in nodes:
+        node.layout = make_box(node)
+    layout(Display(dpi=96, width=1024, height=768), nodes[0])
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--nodes", type=int, default=20_000)
+    args = parser.parse_args()
+
+    root = build_document(args.nodes)
+    nodes = [root] + root.children
+
+    # Lay the document out once before measuring, so that the allocations
+    # made by the first layout (of caches, and of the computed styles)
+    # aren't charged to whichever kind of box is measured first.
+    measure(nodes, Box)
+
+    box_bytes = measure(nodes, Box)
+
+    store = LayoutStore()
+    stored_bytes = measure(nodes, store.box)
+
+    print(f"{len(nodes)} nodes")
+    print(f"Box:         {box_bytes / len(nodes):8.1f} bytes/node")
+    print(
+        f"LayoutStore: {stored_bytes / len(nodes):8.1f} bytes/node "
+        f"({store.nbytes / len(nodes):.1f} bytes/node in columns)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Report the time taken to lay out many paragraphs of text, and to break
+them into lines again as the width of the document changes, with and
+without the retained inline content."""
+
+import argparse
+import time
+from unittest import mock
+
+from colosseum.constants import BLOCK, INLINE
+from colosseum.declaration import CSS
+from colosseum.engine import InlineContent, layout
+from tests.utils import Display, ExampleNode
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while seven wizards box"
+    " jovially and sphinx of black quartz judges my vow"
+).split()
+
+
+class TextDisplay(Display):
+    "A display that measures text, as slowly as a native toolkit might."
+
+    def measure_text(self, font, text):
+        return sum(6 + ord(c) % 5 for c in text), 14
+
+
+class UnretainedContent(InlineContent):
+    "Inline content that is divided and measured again on every layout."
+
+    def __init__(self, key=None):
+        super().__init__(object())
+
+
+def build_document(n_paragraphs, n_words=80):
+    "A document holding paragraphs of styled runs of text."
+    paragraphs = []
+    for i in range(n_paragraphs):
+        runs = []
+        for j in range(0, n_words, 10):
+            text = ExampleNode(style=CSS(display=INLINE))
+            text.intrinsic.text = " ".join(
+                WORDS[(i * 3 + j + k) % len(WORDS)] for k in range(10)
+            )
+            runs.append(text)
+        paragraphs.append(
+            ExampleNode(style=CSS(display=BLOCK, margin_bottom=8), children=runs)
+        )
+    return ExampleNode(style=CSS(display=BLOCK), children=paragraphs)
+
+
+def measure(root, repeat, resize=False):
+    """Return the time taken to lay out the document, in seconds.
+
+    When resizing, the width of the document changes before each
+    incremental layout.
+    """
+    display = TextDisplay(dpi=96, width=1024, height=768)
+    layout(display, root)
+    start = time.perf_counter()
+    for i in range(repeat):
+        if resize:
+            root.style.width = 600 + (i * 37) % 400
+        layout(display, root, incremental=resize)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n_paragraphs in [100, 1_000]:
+        full = measure(build_document(n_paragraphs), args.repeat)
+        resized = measure(build_document(n_paragraphs), args.repeat, resize=True)
+        with mock.patch("colosseum.engine.InlineContent", UnretainedContent):
+            unretained = measure(build_document(n_paragraphs), args.repeat, resize=True)
+
+        print(f"{n_paragraphs:>6} paragraphs: full layout {full * 1000:8.1f}ms")
+        print(
+            f"{'':>6}  resized: {resized * 1000:8.1f}ms"
+            f" (unretained content {unretained * 1000:8.1f}ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
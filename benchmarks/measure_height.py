@@ -0,0 +1,70 @@
+"""Report the time taken to measure the heights of the rows of a long
+virtualized list at several widths, with and without the retained
+heights."""
+
+import argparse
+import time
+
+from colosseum.constants import BLOCK, INLINE
+from colosseum.declaration import CSS
+from colosseum.engine import height_measurer, measure_height, scratch_layout
+from tests.utils import Display, ExampleNode
+
+MESSAGES = [
+    "Hello",
+    "See you tomorrow at the usual place",
+    "The quick brown fox jumps over the lazy dog, again and again",
+    "ok",
+    "Could you send me the notes from the meeting when you have a moment?",
+]
+
+
+class TextDisplay(Display):
+    "A display that measures text."
+
+    def measure_text(self, font, text):
+        return 7 * len(text), 14
+
+
+def build_list(size):
+    "A list of rows, each holding one of a few messages."
+    rows = []
+    for i in range(size):
+        text = ExampleNode(style=CSS(display=INLINE))
+        text.intrinsic.text = MESSAGES[i % len(MESSAGES)]
+        rows.append(ExampleNode(style=CSS(display=BLOCK, padding=8), children=[text]))
+    return ExampleNode(style=CSS(display=BLOCK), children=rows)
+
+
+def measure(root, widths, retained):
+    "Return the time taken to measure every row at every width, in seconds."
+    display = TextDisplay(dpi=96, width=1024, height=768)
+    height_measurer(display).clear()
+    start = time.perf_counter()
+    for width in widths:
+        for row in root.children:
+            if retained:
+                measure_height(row, width, display)
+            else:
+                scratch_layout(display, row, width)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-w", "--widths", type=int, default=5)
+    args = parser.parse_args()
+
+    widths = [200 + 100 * i for i in range(args.widths)]
+    for size in [1_000, 10_000]:
+        root = build_list(size)
+        retained = measure(root, widths, retained=True)
+        scratch = measure(root, widths, retained=False)
+        print(
+            f"{size:>6} rows: retained {retained * 1000:8.1f}ms;"
+            f" laid out {scratch * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Report the memory used per node by a styled, laid out document.
+
+The boxes, sizes and declarations of the nodes are also copied into plain
+objects that keep their attributes in a ``__dict__``, as they were before
+those classes used ``__slots__``, to compare the memory they use.
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+from tests.utils import Display, ExampleNode
+
+
+def build_document(size, breadth=10):
+    "Build a document of (approximately) the given size, breadth first."
+    root = ExampleNode(style=CSS(display=BLOCK))
+    nodes = [root]
+    parents = [root]
+    while len(nodes) < size:
+        parent = parents.pop(0)
+        for i in range(breadth):
+            child = ExampleNode(
+                style=CSS(display=BLOCK, height=10, margin=(1, 2), padding=3)
+            )
+            child.parent = parent
+            parent.children.append(child)
+            nodes.append(child)
+            parents.append(child)
+
+    return root, nodes
+
+
+class Unslotted:
+    "A plain object, which keeps its attributes in a ``__dict__``."
+
+
+def slot_names(cls):
+    "Return the (mangled) names of the slots of a class and its bases."
+    names = []
+    for base in cls.__mro__:
+        slots = base.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name in ("__dict__", "__weakref__"):
+                continue
+            if name.startswith("__") and not name.endswith("__"):
+                name = f"_{base.__name__.lstrip('_')}{name}"
+            names.append(name)
+    return names
+
+
+def copy_slots(obj, copy):
+    "Copy the slot values of an object onto another object."
+    for name in slot_names(type(obj)):
+        try:
+            value = object.__getattribute__(obj, name)
+        except AttributeError:
+            continue
+        object.__setattr__(copy, name, value)
+    return copy
+
+
+def measure_copies(objects, make_copy):
+    "Return the memory allocated to copy each of the objects."
+    copies = [None] * len(objects)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i, obj in enumerate(objects):
+        copies[i] = copy_slots(obj, make_copy(obj))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--nodes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    root, nodes = build_document(args.nodes)
+    layout(Display(dpi=96, width=1024, height=768), root)
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{len(nodes)} nodes: {(after - before) / len(nodes):.1f} bytes/node")
+
+    objects = []
+    for node in nodes:
+        objects.extend([node.layout, node.intrinsic, node.style])
+
+    slotted = measure_copies(objects, lambda obj: object.__new__(type(obj)))
+    unslotted = measure_copies(objects, lambda obj: Unslotted())
+    print(
+        "Box, Size and CSS:"
+        f" {slotted / len(nodes):.1f} bytes/node with __slots__,"
+        f" {unslotted / len(nodes):.1f} bytes/node without"
+        f" ({(unslotted - slotted) / len(nodes):+.1f} bytes/node)"
+    )
+
+
+if __name__ == "__main__":
+    main()
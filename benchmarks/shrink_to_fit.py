@@ -0,0 +1,101 @@
+"""Report the time taken to lay out nested shrink-to-fit boxes, and to lay
+them out again when one run of text changes, with and without the retained
+content widths."""
+
+import argparse
+import time
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import BLOCK, INLINE, LEFT
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+from tests.utils import Display, ExampleNode
+
+content_widths = engine.content_widths
+
+
+class TextDisplay(Display):
+    "A display that measures text."
+
+    def measure_text(self, font, text):
+        return 7 * len(text), 14
+
+
+def unretained_content_widths(node, context, sized=True):
+    "Measure the content of a box, discarding any retained widths."
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.layout is not None:
+            current.layout._content_widths = None
+        stack.extend(current.children)
+    return content_widths(node, context, sized)
+
+
+def build_document(depth, breadth):
+    "Floats nested ``depth`` deep, each holding paragraphs of text."
+    node = ExampleNode(style=CSS(display=INLINE))
+    node.intrinsic.text = "the innermost words"
+    for i in range(depth):
+        paragraphs = []
+        for j in range(breadth):
+            text = ExampleNode(style=CSS(display=INLINE))
+            text.intrinsic.text = f"paragraph {j} of level {i}"
+            paragraphs.append(ExampleNode(style=CSS(display=BLOCK), children=[text]))
+        node = ExampleNode(
+            style=CSS(display=BLOCK, float=LEFT, padding=2),
+            children=[*paragraphs, node],
+        )
+    return ExampleNode(style=CSS(display=BLOCK), children=[node])
+
+
+def innermost(root):
+    node = root
+    while node.children:
+        node = node.children[-1]
+    return node
+
+
+def measure(root, repeat, change=False):
+    """Return the time taken to lay out the document, in seconds.
+
+    When changing, the innermost text changes before each incremental
+    layout.
+    """
+    display = TextDisplay(dpi=96, width=1024, height=768)
+    layout(display, root)
+    start = time.perf_counter()
+    for i in range(repeat):
+        if change:
+            innermost(root).intrinsic.text = f"the innermost words, {i} times"
+        layout(display, root, incremental=change)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for depth in [10, 50, 200]:
+        full = measure(build_document(depth, 5), args.repeat)
+        changed = measure(build_document(depth, 5), args.repeat, change=True)
+        with mock.patch("colosseum.engine.content_widths", unretained_content_widths):
+            unretained = measure(build_document(depth, 5), args.repeat)
+            unretained_changed = measure(
+                build_document(depth, 5), args.repeat, change=True
+            )
+
+        print(
+            f"{depth:>6} levels: full layout {full * 1000:8.1f}ms"
+            f" (unretained {unretained * 1000:8.1f}ms)"
+        )
+        print(
+            f"{'':>6}  changed: {changed * 1000:8.1f}ms"
+            f" (unretained {unretained_changed * 1000:8.1f}ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
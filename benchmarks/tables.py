@@ -0,0 +1,90 @@
+"""Report the time taken to lay out large tables, and to lay them out again
+when one cell changes, with and without the column width cache."""
+
+import argparse
+import time
+from unittest import mock
+
+from colosseum.constants import AUTO, BLOCK, FIXED, INLINE, TABLE, TABLE_CELL, TABLE_ROW
+from colosseum.declaration import CSS
+from colosseum.engine import TableColumns, layout
+from tests.utils import Display, ExampleNode
+
+
+class UncachedColumns(TableColumns):
+    "Table columns that measure every cell on every layout."
+
+    def measure(self, *args):
+        self.__init__()
+        super().measure(*args)
+
+
+def build_table(n_rows, table_layout):
+    "A document holding a table of five columns."
+    rows = []
+    for i in range(n_rows):
+        cells = []
+        for j in range(5):
+            text = ExampleNode(style=CSS(display=INLINE))
+            text.intrinsic.width = 20 + (i * 7 + j * 13) % 80
+            text.intrinsic.height = 12
+            cells.append(
+                ExampleNode(style=CSS(display=TABLE_CELL, padding=2), children=[text])
+            )
+        rows.append(ExampleNode(style=CSS(display=TABLE_ROW), children=cells))
+
+    table = ExampleNode(
+        style=CSS(
+            display=TABLE,
+            table_layout=table_layout,
+            width=800 if table_layout is FIXED else AUTO,
+            border_spacing=2,
+        ),
+        children=rows,
+    )
+    return ExampleNode(style=CSS(display=BLOCK), children=[table])
+
+
+def measure(root, repeat, incremental=False):
+    """Return the time taken to lay out the document, in seconds.
+
+    For an incremental layout, one cell changes width before each layout.
+    """
+    display = Display(dpi=96, width=1024, height=768)
+    layout(display, root)
+    changed = root.children[0].children[len(root.children[0].children) // 2]
+    start = time.perf_counter()
+    for i in range(repeat):
+        if incremental:
+            changed.children[2].style.width = 40 + i % 2
+        layout(display, root, incremental=incremental)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n_rows in [1_000, 10_000]:
+        auto = measure(build_table(n_rows, AUTO), args.repeat)
+        fixed = measure(build_table(n_rows, FIXED), args.repeat)
+        changed = measure(build_table(n_rows, AUTO), args.repeat, incremental=True)
+        changed_fixed = measure(
+            build_table(n_rows, FIXED), args.repeat, incremental=True
+        )
+        with mock.patch("colosseum.engine.TableColumns", UncachedColumns):
+            uncached = measure(build_table(n_rows, AUTO), args.repeat, incremental=True)
+
+        print(
+            f"{n_rows:>6} rows: auto {auto * 1000:8.1f}ms; fixed {fixed * 1000:8.1f}ms"
+        )
+        print(
+            f"{'':>6}  one cell changed: auto {changed * 1000:8.1f}ms"
+            f" (uncached columns {uncached * 1000:8.1f}ms);"
+            f" fixed {changed_fixed * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 class Color:
-    pass
+    __slots__ = ()
 
 
 class rgb(Color):
     "A representation of an RGBA color"
 
+    __slots__ = ("r", "g", "b", "a")
+
     def __init__(self, r, g, b, a=1.0):
         self.r = r
         self.g = g
@@ -22,6 +24,8 @@ class rgb(Color):
 class hsl(Color):
     "A representation of an HSLA color"
 
+    __slots__ = ("h", "s", "l", "a")
+
     def __init__(self, h, s, l, a=1.0):  # noqa: E741
         self.h = h
         self.s = s
@@ -3,12 +3,15 @@ from .validators import (
     is_border_spacing,
     is_color,
     is_cursor,
+    is_grid_line,
     is_integer,
     is_length,
     is_number,
     is_percentage,
     is_quote,
     is_rect,
+    is_track_list,
+    is_track_size,
 )
 
 
@@ -78,6 +81,28 @@ class OtherProperty:
 HTML4 = "html4"
 HTML5 = "html5"
 
+######################################################################
+# Invalidation classes
+#
+# How much of the rendering of a node is invalidated by a change to a
+# property. The classes are ordered, so the strongest of a number of
+# changes is the greatest of their classes.
+######################################################################
+PAINT = 1  # Only the appearance of the box changes
+POSITION = 2  # The box moves, but its size (and the layout of others) doesn't
+LAYOUT = 3  # The geometry of the box, and possibly others, changes
+FORMATTING = 4  # The box changes how it, and the children of its parent, are formatted
+
+######################################################################
+# Measurement modes
+#
+# How an available size constrains the size of a node that is measured
+# by its host (see ``Size.measure``).
+######################################################################
+UNDEFINED = "undefined"  # The size is unconstrained
+EXACTLY = "exactly"  # The node is exactly the available size
+AT_MOST = "at-most"  # The node is no larger than the available size
+
 ######################################################################
 # Common constants
 ######################################################################
@@ -262,6 +287,13 @@ MAX_SIZE_CHOICES = Choices(None, validators=[is_length, is_percentage])
 # 10.8 Leading and half-leading
 ######################################################################
 # line_height
+
+LINE_HEIGHT_CHOICES = Choices(
+    NORMAL,
+    validators=[is_number, is_length, is_percentage],
+    explicit_defaulting_constants=[INHERIT],
+)
+
 # vertical_align
 
 ######################################################################
@@ -645,7 +677,6 @@ COLUMN_REVERSE = "column-reverse"
 
 FLEX_DIRECTION_CHOICES = Choices(ROW, ROW_REVERSE, COLUMN, COLUMN_REVERSE)
 
-NOWRAP = "no-wrap"
 WRAP = "wrap"
 WRAP_REVERSE = "wrap-reverse"
 
@@ -693,24 +724,29 @@ ALIGN_CONTENT_CHOICES = Choices(
 # Grid template (CSS-grid-1, Section 7)
 ######################################################################
 
-GRID_TEMPLATE_CHOICES = Choices(None)  # track_list=True, auto_track_list=True)
+MIN_CONTENT = "min-content"
+MAX_CONTENT = "max-content"
+
+GRID_TEMPLATE_CHOICES = Choices(None, validators=[is_track_list])
 
 GRID_TEMPLATE_AREA_CHOICES = Choices(None)  # strings=True), initial=None
 
-GRID_AUTO_CHOICES = Choices(AUTO)  # track_sizes=True)
+GRID_AUTO_CHOICES = Choices(validators=[is_track_size])
 
 DENSE = "dense"
+ROW_DENSE = "row dense"
+COLUMN_DENSE = "column dense"
 
-GRID_AUTO_FLOW_CHOICES = Choices(ROW, COLUMN, DENSE)
+GRID_AUTO_FLOW_CHOICES = Choices(ROW, COLUMN, DENSE, ROW_DENSE, COLUMN_DENSE)
 
 ######################################################################
 # Grid placement (CSS-grid-1, Section 8)
 ######################################################################
 
-GRID_PLACEMENT_CHOICES = Choices(AUTO)  # grid_line=True)
+GRID_PLACEMENT_CHOICES = Choices(AUTO, validators=[is_grid_line])
 
 ######################################################################
 # Grid alignment (CSS-grid-1, Section 10)
 ######################################################################
 
-GRID_GAP_CHOICES = Choices(validators=[is_percentage])
+GRID_GAP_CHOICES = Choices(validators=[is_length, is_percentage])
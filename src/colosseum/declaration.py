@@ -1,11 +1,15 @@
+from contextlib import contextmanager, nullcontext
+
 from . import engine as css_engine
 from . import parser
 from .constants import (  # noqa
+    ABSOLUTE,
     ALIGN_CONTENT_CHOICES,
     ALIGN_ITEMS_CHOICES,
     ALIGN_SELF_CHOICES,
     AUTO,
     BACKGROUND_COLOR_CHOICES,
+    BLOCK,
     BORDER_COLLAPSE_CHOICES,
     BORDER_COLOR_CHOICES,
     BORDER_SPACING_CHOICES,
@@ -20,6 +24,7 @@ from .constants import (  # noqa
     DIRECTION_CHOICES,
     DISPLAY_CHOICES,
     EMPTY_CELLS_CHOICES,
+    FIXED,
     FLEX_BASIS_CHOICES,
     FLEX_DIRECTION_CHOICES,
     FLEX_GROW_CHOICES,
@@ -27,6 +32,7 @@ from .constants import (  # noqa
     FLEX_START,
     FLEX_WRAP_CHOICES,
     FLOAT_CHOICES,
+    FORMATTING,
     GRID_AUTO_CHOICES,
     GRID_AUTO_FLOW_CHOICES,
     GRID_GAP_CHOICES,
@@ -35,9 +41,13 @@ from .constants import (  # noqa
     GRID_TEMPLATE_CHOICES,
     INITIAL,
     INLINE,
+    INLINE_BLOCK,
+    INLINE_TABLE,
     INVERT,
     JUSTIFY_CONTENT_CHOICES,
+    LAYOUT,
     LETTER_SPACING_CHOICES,
+    LINE_HEIGHT_CHOICES,
     LTR,
     MARGIN_CHOICES,
     MAX_SIZE_CHOICES,
@@ -55,6 +65,8 @@ from .constants import (  # noqa
     PAGE_BREAK_AFTER_CHOICES,
     PAGE_BREAK_BEFORE_CHOICES,
     PAGE_BREAK_INSIDE_CHOICES,
+    PAINT,
+    POSITION,
     POSITION_CHOICES,
     QUOTES_CHOICES,
     ROW,
@@ -63,7 +75,16 @@ from .constants import (  # noqa
     SIZE_CHOICES,
     STATIC,
     STRETCH,
+    TABLE,
+    TABLE_CAPTION,
+    TABLE_CELL,
+    TABLE_COLUMN,
+    TABLE_COLUMN_GROUP,
+    TABLE_FOOTER_GROUP,
+    TABLE_HEADER_GROUP,
     TABLE_LAYOUT_CHOICES,
+    TABLE_ROW,
+    TABLE_ROW_GROUP,
     TEXT_ALIGN_CHOICES,
     TEXT_DECORATION_CHOICES,
     TEXT_INDENT_CHOICES,
@@ -93,16 +114,84 @@ from .wrappers import (
 
 _CSS_PROPERTIES = set()
 
+# The initial value of every (non-shorthand) property, keyed by name.
+_CSS_INITIAL_VALUES = {}
+
+# The invalidation class (PAINT, POSITION or LAYOUT) of every property,
+# keyed by name.
+_CSS_INVALIDATION = {}
+
+# The declarations whose layout invalidation has been deferred by the
+# active batch(), or None if there is no active batch.
+_batched = None
+
+
+def _property_values(obj):
+    """Return the dictionary storing the explicitly set property values of obj.
+
+    The storage is created on first use, so the property definitions can be
+    used by any class, not just CSS.
+    """
+    try:
+        return obj._values
+    except AttributeError:
+        obj._values = {}
+        return obj._values
+
+
+def _invalidate(obj, invalidation):
+    """Record a change to a property of obj that needs the given invalidation.
+
+    Objects that don't track invalidation classes are marked as dirty.
+    """
+    invalidate = getattr(obj, "invalidate", None)
+    if invalidate is None:
+        obj.dirty = True
+    else:
+        invalidate(invalidation)
+
+
+def _batch(obj):
+    "Batch the invalidation caused by changes to obj, if obj supports it."
+    batch = getattr(obj, "batch", None)
+    return nullcontext() if batch is None else batch()
 
-def validated_shorthand_property(name, parser, wrapper):
+
+@contextmanager
+def batch():
+    """Defer the layout invalidation of every declaration to the end of the block.
+
+    However many declarations are changed in the block, the layout is
+    invalidated once, at the end of the block, and every ancestor of the
+    affected nodes is visited at most once. Batches can be nested; the
+    layout is invalidated at the end of the outermost batch.
+    """
+    global _batched
+    if _batched is not None:
+        yield
+        return
+
+    _batched = []
+    try:
+        yield
+    finally:
+        styles, _batched = _batched, None
+        visited = set()
+        for style in styles:
+            if style._deferred:
+                invalidation, style._deferred = style._deferred, None
+                style._dirty_layout(visited, invalidation)
+
+
+def validated_shorthand_property(name, parser, wrapper, invalidation=LAYOUT):
     """Define the shorthand CSS font property."""
 
     def getter(self):
         properties = {}
         for property_name in wrapper.VALID_KEYS:
             try:
-                properties[property_name] = getattr(self, f"_{property_name}")
-            except AttributeError:
+                properties[property_name] = self._values[property_name]
+            except (AttributeError, KeyError):
                 pass
 
         # This is the only place we use the wrapper as a convenience for the user
@@ -115,56 +204,181 @@ def validated_shorthand_property(name, parser, wrapper):
         except ValidationError:
             raise ValueError(f"Invalid value '{value}' for CSS property '{name}'!")
 
-        # Reset non declared properties to initial values
-        used_properties = shorthand_dict.keys()
-        for property_name in wrapper.VALID_KEYS:
-            if property_name in used_properties:
-                setattr(self, property_name, shorthand_dict[property_name])
-            else:
-                delattr(self, property_name)
+        with _batch(self):
+            # Reset non declared properties to initial values
+            used_properties = shorthand_dict.keys()
+            for property_name in wrapper.VALID_KEYS:
+                if property_name in used_properties:
+                    setattr(self, property_name, shorthand_dict[property_name])
+                else:
+                    delattr(self, property_name)
 
-        # We do not explicitely set the shorthand property as it is stored in the
-        # individual properties it represents
-        self.dirty = True
+            # We do not explicitely set the shorthand property as it is stored in
+            # the individual properties it represents
+            _invalidate(self, invalidation)
 
     def deleter(self):
-        for property_name in wrapper.VALID_KEYS:
-            try:
-                delattr(self, property_name)
-                self.dirty = True
-            except AttributeError:
-                # Attribute doesn't exist
-                pass
+        with _batch(self):
+            for property_name in wrapper.VALID_KEYS:
+                try:
+                    delattr(self, property_name)
+                    _invalidate(self, invalidation)
+                except AttributeError:
+                    # Attribute doesn't exist
+                    pass
 
     _CSS_PROPERTIES.add(name)
+    _CSS_INVALIDATION[name] = invalidation
     return property(getter, setter, deleter)
 
 
-def unvalidated_property(name, choices, initial):
-    "Define a simple CSS property attribute."
-    initial = choices.validate(initial)
+# Templates for the accessors of CSS properties. The accessors of every
+# property are generated from these templates (see _compile_property), so
+# the property name is a constant in the generated code, rather than a value
+# that must be looked up (and formatted) on every access.
+_GETTER_TEMPLATE = """
+def getter(self):
+    try:
+        return self._values.get({name!r}, initial)
+    except AttributeError:
+        return initial
+"""
+
+# The initial value is derived from the value of another property.
+_DERIVED_GETTER_TEMPLATE = """
+def getter(self):
+    try:
+        if {name!r} in self._values:
+            return self._values[{name!r}]
+    except AttributeError:
+        pass
 
-    def getter(self):
-        return getattr(self, f"_{name}", initial)
+    try:
+        return initial.value(self)
+    except AttributeError:
+        return initial
+"""
 
-    def setter(self, value):
-        if value != getattr(self, f"_{name}", initial):
-            setattr(self, f"_{name}", value)
-            self.dirty = True
+_SETTER_TEMPLATE = """
+def setter(self, value):
+    try:
+        values = self._values
+    except AttributeError:
+        values = _property_values(self)
 
-    def deleter(self):
-        try:
-            delattr(self, f"_{name}")
-            self.dirty = True
-        except AttributeError:
-            # Attribute doesn't exist
-            pass
+    if value != values.get({name!r}, initial):
+        values[{name!r}] = value
+        _invalidate(self, invalidation)
+"""
+
+_VALIDATED_SETTER_TEMPLATE = """
+def setter(self, value):
+    try:
+        value = choices.validate(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid value '{{value}}' for CSS property {name!r}; Valid values are: {{choices}}"
+        )
+
+    try:
+        values = self._values
+    except AttributeError:
+        values = _property_values(self)
+
+    if value != values.get({name!r}, initial):
+        values[{name!r}] = value
+        _invalidate(self, invalidation)
+"""
+
+_DELETER_TEMPLATE = """
+def deleter(self):
+    try:
+        del self._values[{name!r}]
+    except (AttributeError, KeyError):
+        # Attribute doesn't exist
+        return
+    _invalidate(self, invalidation)
+"""
+
+_DIRECTIONAL_TEMPLATE = """
+def getter(self):
+    return (
+        getattr(self, {top!r}, initial),
+        getattr(self, {right!r}, initial),
+        getattr(self, {bottom!r}, initial),
+        getattr(self, {left!r}, initial),
+    )
+
+def setter(self, value):
+    if isinstance(value, tuple):
+        if len(value) == 4:
+            top, right, bottom, left = value
+        elif len(value) == 3:
+            top, right, bottom = value
+            left = right
+        elif len(value) == 2:
+            top, right = value
+            bottom, left = top, right
+        elif len(value) == 1:
+            top = right = bottom = left = value[0]
+        else:
+            raise ValueError(
+                "Invalid value for {name!r}; value must be an number, or a 1-4 tuple."
+            )
+    else:
+        top = right = bottom = left = value
+
+    with _batch(self):
+        self.{top} = top
+        self.{right} = right
+        self.{bottom} = bottom
+        self.{left} = left
+
+def deleter(self):
+    with _batch(self):
+        del self.{top}
+        del self.{right}
+        del self.{bottom}
+        del self.{left}
+"""
+
+
+def _compile_property(name, source, **namespace):
+    """Generate the accessors of a property from source, and return the property.
+
+    source must define ``getter``, ``setter`` and ``deleter`` functions;
+    namespace provides the globals those functions can refer to.
+    """
+    namespace["_property_values"] = _property_values
+    namespace["_invalidate"] = _invalidate
+    namespace["_batch"] = _batch
+    exec(compile(source, f"<property {name}>", "exec"), namespace)
+    return property(namespace["getter"], namespace["setter"], namespace["deleter"])
+
+
+def _is_derived(initial):
+    "Is the initial value derived from another property (see OtherProperty)?"
+    return callable(getattr(initial, "value", None))
+
+
+def unvalidated_property(name, choices, initial, invalidation=LAYOUT):
+    "Define a simple CSS property attribute."
+    initial = choices.validate(initial)
 
     _CSS_PROPERTIES.add(name)
-    return property(getter, setter, deleter)
+    _CSS_INITIAL_VALUES[name] = initial
+    _CSS_INVALIDATION[name] = invalidation
+    return _compile_property(
+        name,
+        _GETTER_TEMPLATE.format(name=name)
+        + _SETTER_TEMPLATE.format(name=name)
+        + _DELETER_TEMPLATE.format(name=name),
+        initial=initial,
+        invalidation=invalidation,
+    )
 
 
-def validated_property(name, choices, initial):
+def validated_property(name, choices, initial, invalidation=LAYOUT):
     "Define a simple CSS property attribute."
     try:
         initial = choices.validate(initial)
@@ -185,100 +399,64 @@ def validated_property(name, choices, initial):
                 f'Initial value "{initial}" does not have a value attribute!'
             )
 
-    def getter(self):
-        try:
-            # Get initial value from other property value. See OtherProperty.
-            initial_value = initial.value(self)
-        except AttributeError:
-            initial_value = initial
-
-        return getattr(self, f"_{name}", initial_value)
-
-    def setter(self, value):
-        try:
-            value = choices.validate(value)
-        except ValueError:
-            raise ValueError(
-                f"Invalid value '{value}' for CSS property '{name}'; Valid values are: {choices}"
-            )
-
-        if value != getattr(self, f"_{name}", initial):
-            setattr(self, f"_{name}", value)
-            self.dirty = True
-
-    def deleter(self):
-        try:
-            delattr(self, f"_{name}")
-            self.dirty = True
-        except AttributeError:
-            # Attribute doesn't exist
-            pass
+    getter = _DERIVED_GETTER_TEMPLATE if _is_derived(initial) else _GETTER_TEMPLATE
 
     _CSS_PROPERTIES.add(name)
-    return property(getter, setter, deleter)
+    _CSS_INITIAL_VALUES[name] = initial
+    _CSS_INVALIDATION[name] = invalidation
+    return _compile_property(
+        name,
+        getter.format(name=name)
+        + _VALIDATED_SETTER_TEMPLATE.format(name=name)
+        + _DELETER_TEMPLATE.format(name=name),
+        choices=choices,
+        initial=initial,
+        invalidation=invalidation,
+    )
 
 
-def directional_property(name, initial):
+def directional_property(name, initial, invalidation=LAYOUT):
     "Define a property attribute that proxies for top/right/bottom/left alternatives."
-
-    def getter(self):
-        return (
-            getattr(self, name % "_top", initial),
-            getattr(self, name % "_right", initial),
-            getattr(self, name % "_bottom", initial),
-            getattr(self, name % "_left", initial),
-        )
-
-    def setter(self, value):
-        if isinstance(value, tuple):
-            if len(value) == 4:
-                setattr(self, name % "_top", value[0])
-                setattr(self, name % "_right", value[1])
-                setattr(self, name % "_bottom", value[2])
-                setattr(self, name % "_left", value[3])
-            elif len(value) == 3:
-                setattr(self, name % "_top", value[0])
-                setattr(self, name % "_right", value[1])
-                setattr(self, name % "_bottom", value[2])
-                setattr(self, name % "_left", value[1])
-            elif len(value) == 2:
-                setattr(self, name % "_top", value[0])
-                setattr(self, name % "_right", value[1])
-                setattr(self, name % "_bottom", value[0])
-                setattr(self, name % "_left", value[1])
-            elif len(value) == 1:
-                setattr(self, name % "_top", value[0])
-                setattr(self, name % "_right", value[0])
-                setattr(self, name % "_bottom", value[0])
-                setattr(self, name % "_left", value[0])
-            else:
-                raise ValueError(
-                    "Invalid value for '%s'; value must be an number, or a 1-4 tuple."
-                    % (name % "")
-                )
-        else:
-            setattr(self, name % "_top", value)
-            setattr(self, name % "_right", value)
-            setattr(self, name % "_bottom", value)
-            setattr(self, name % "_left", value)
-
-    def deleter(self):
-        delattr(self, name % "_top")
-        delattr(self, name % "_right")
-        delattr(self, name % "_bottom")
-        delattr(self, name % "_left")
-
     _CSS_PROPERTIES.add(name % "")
     _CSS_PROPERTIES.add(name % "_top")
     _CSS_PROPERTIES.add(name % "_right")
     _CSS_PROPERTIES.add(name % "_bottom")
     _CSS_PROPERTIES.add(name % "_left")
-    return property(getter, setter, deleter)
+    _CSS_INVALIDATION[name % ""] = invalidation
+    return _compile_property(
+        name % "",
+        _DIRECTIONAL_TEMPLATE.format(
+            name=name % "",
+            top=name % "_top",
+            right=name % "_right",
+            bottom=name % "_bottom",
+            left=name % "_left",
+        ),
+        initial=initial,
+    )
 
 
 class CSS:
+    # The values of the properties that have been explicitly set are stored
+    # in a dictionary, keyed by property name. Most declarations only set a
+    # handful of properties, so this is more compact than an attribute (or
+    # slot) for every property.
+    __slots__ = (
+        "_node",
+        "_values",
+        "_computed",
+        "_invalidation",
+        "_batch_depth",
+        "_deferred",
+    )
+
     def __init__(self, **style):
         self._node = None
+        self._values = {}
+        self._computed = None
+        self._invalidation = None
+        self._batch_depth = 0
+        self._deferred = None
         self.update(**style)
 
     ######################################################################
@@ -326,24 +504,30 @@ class CSS:
 
     # 8.5.2 Border color
     border_top_color = validated_property(
-        "border_top_color", choices=BORDER_COLOR_CHOICES, initial=OtherProperty("color")
+        "border_top_color",
+        choices=BORDER_COLOR_CHOICES,
+        initial=OtherProperty("color"),
+        invalidation=PAINT,
     )
     border_right_color = validated_property(
         "border_right_color",
         choices=BORDER_COLOR_CHOICES,
         initial=OtherProperty("color"),
+        invalidation=PAINT,
     )
     border_bottom_color = validated_property(
         "border_bottom_color",
         choices=BORDER_COLOR_CHOICES,
         initial=OtherProperty("color"),
+        invalidation=PAINT,
     )
     border_left_color = validated_property(
         "border_left_color",
         choices=BORDER_COLOR_CHOICES,
         initial=OtherProperty("color"),
+        invalidation=PAINT,
     )
-    border_color = directional_property("border%s_color", initial=0)
+    border_color = directional_property("border%s_color", initial=0, invalidation=PAINT)
 
     # 8.5.3 Border style
     border_top_style = validated_property(
@@ -379,25 +563,41 @@ class CSS:
 
     # 9. Visual formatting model #########################################
     # 9.2.4 The display property
-    display = validated_property("display", choices=DISPLAY_CHOICES, initial=INLINE)
+    display = validated_property(
+        "display", choices=DISPLAY_CHOICES, initial=INLINE, invalidation=FORMATTING
+    )
 
     # 9.3 Positioning schemes
-    position = validated_property("position", choices=POSITION_CHOICES, initial=STATIC)
+    position = validated_property(
+        "position", choices=POSITION_CHOICES, initial=STATIC, invalidation=FORMATTING
+    )
 
     # 9.3.2 Box offsets
-    top = validated_property("top", choices=BOX_OFFSET_CHOICES, initial=AUTO)
-    bottom = validated_property("bottom", choices=BOX_OFFSET_CHOICES, initial=AUTO)
-    left = validated_property("left", choices=BOX_OFFSET_CHOICES, initial=AUTO)
-    right = validated_property("right", choices=BOX_OFFSET_CHOICES, initial=AUTO)
+    top = validated_property(
+        "top", choices=BOX_OFFSET_CHOICES, initial=AUTO, invalidation=POSITION
+    )
+    bottom = validated_property(
+        "bottom", choices=BOX_OFFSET_CHOICES, initial=AUTO, invalidation=POSITION
+    )
+    left = validated_property(
+        "left", choices=BOX_OFFSET_CHOICES, initial=AUTO, invalidation=POSITION
+    )
+    right = validated_property(
+        "right", choices=BOX_OFFSET_CHOICES, initial=AUTO, invalidation=POSITION
+    )
 
     # 9.5.1 Positioning the float
-    float = validated_property("float", choices=FLOAT_CHOICES, initial=None)
+    float = validated_property(
+        "float", choices=FLOAT_CHOICES, initial=None, invalidation=FORMATTING
+    )
 
     # 9.5.2 Controlling flow next to floats
     clear = validated_property("clear", choices=CLEAR_CHOICES, initial=None)
 
     # 9.9 Layered Presentation
-    z_index = validated_property("z_index", choices=Z_INDEX_CHOICES, initial=AUTO)
+    z_index = validated_property(
+        "z_index", choices=Z_INDEX_CHOICES, initial=AUTO, invalidation=PAINT
+    )
 
     # 9.10 Text Direction
     direction = validated_property("direction", choices=DIRECTION_CHOICES, initial=LTR)
@@ -427,7 +627,9 @@ class CSS:
     )
 
     # 10.8 Leading and half-leading
-    # line_height
+    line_height = validated_property(
+        "line_height", choices=LINE_HEIGHT_CHOICES, initial=NORMAL
+    )
     # vertical_align
 
     # 11. Visual effects #################################################
@@ -435,11 +637,13 @@ class CSS:
     overflow = validated_property("overflow", choices=OVERFLOW_CHOICES, initial=VISIBLE)
 
     # 11.1.2 Clip
-    clip = validated_property("clip", choices=CLIP_CHOICES, initial=AUTO)
+    clip = validated_property(
+        "clip", choices=CLIP_CHOICES, initial=AUTO, invalidation=PAINT
+    )
 
     # 11.2 Visibility
     visibility = validated_property(
-        "visibility", choices=VISIBILITY_CHOICES, initial=VISIBLE
+        "visibility", choices=VISIBILITY_CHOICES, initial=VISIBLE, invalidation=PAINT
     )
 
     # 12. Visual effects #################################################
@@ -479,11 +683,16 @@ class CSS:
 
     # 14. Colors and backgrounds #########################################
     # 14.1 Foreground color
-    color = validated_property("color", choices=COLOR_CHOICES, initial=default)
+    color = validated_property(
+        "color", choices=COLOR_CHOICES, initial=default, invalidation=PAINT
+    )
 
     # 14.2.1 Background properties
     background_color = validated_property(
-        "background_color", choices=BACKGROUND_COLOR_CHOICES, initial=default
+        "background_color",
+        choices=BACKGROUND_COLOR_CHOICES,
+        initial=default,
+        invalidation=PAINT,
     )
     # background_image
     # background_repeat
@@ -523,7 +732,10 @@ class CSS:
 
     # 16.3 Decoration
     text_decoration = validated_property(
-        "text_decoration", choices=TEXT_DECORATION_CHOICES, initial=None
+        "text_decoration",
+        choices=TEXT_DECORATION_CHOICES,
+        initial=None,
+        invalidation=PAINT,
     )
 
     # 16.4 Letter and word spacing
@@ -563,25 +775,33 @@ class CSS:
         "border_spacing", choices=BORDER_SPACING_CHOICES, initial=0
     )
     empty_cells = validated_property(
-        "empty_cells", choices=EMPTY_CELLS_CHOICES, initial=SHOW
+        "empty_cells", choices=EMPTY_CELLS_CHOICES, initial=SHOW, invalidation=PAINT
     )
 
     # 18. User interface #################################################
     # 18.1 Cursors
-    cursor = validated_property("cursor", CURSOR_CHOICES, initial=AUTO)
+    cursor = validated_property(
+        "cursor", CURSOR_CHOICES, initial=AUTO, invalidation=PAINT
+    )
 
     # 18.4 Dynamic outlines
     outline_width = validated_property(
-        "outline_width", choices=OUTLINE_WIDTH_CHOICES, initial=MEDIUM
+        "outline_width",
+        choices=OUTLINE_WIDTH_CHOICES,
+        initial=MEDIUM,
+        invalidation=PAINT,
     )
     outline_style = validated_property(
-        "outline_style", choices=OUTLINE_STYLE_CHOICES, initial=None
+        "outline_style", choices=OUTLINE_STYLE_CHOICES, initial=None, invalidation=PAINT
     )
     outline_color = validated_property(
-        "outline_color", choices=OUTLINE_COLOR_CHOICES, initial=INVERT
+        "outline_color",
+        choices=OUTLINE_COLOR_CHOICES,
+        initial=INVERT,
+        invalidation=PAINT,
     )
     outline = validated_shorthand_property(
-        "outline", parser=parser.outline, wrapper=Outline
+        "outline", parser=parser.outline, wrapper=Outline, invalidation=PAINT
     )
 
     ######################################################################
@@ -590,44 +810,74 @@ class CSS:
 
     # 5. Ordering and orientation ########################################
     # 5.1 Flex flow direction
-    # flex_direction = validated_property('flex_direction', choices=FLEX_DIRECTION_CHOICES, initial=ROW)
+    flex_direction = validated_property(
+        "flex_direction", choices=FLEX_DIRECTION_CHOICES, initial=ROW
+    )
 
     # 5.2 Flex line wrapping
-    # flex_wrap = validated_property('flex_wrap', choices=FLEX_WRAP_CHOICES, initial=NOWRAP)
+    flex_wrap = validated_property(
+        "flex_wrap", choices=FLEX_WRAP_CHOICES, initial=NOWRAP
+    )
 
     # 5.3 Flex direction and wrap
     # flex_flow =
 
     # 5.4 Display order
-    # order = validated_property('order', choices=ORDER_CHOICES, initial=0)
+    # The order of the items is part of the box tree of their container.
+    order = validated_property(
+        "order", choices=ORDER_CHOICES, initial=0, invalidation=FORMATTING
+    )
 
     # 7. Flexibility #####################################################
     # 7.2 Components of flexibility
-    # flex_grow = validated_property('flex_grow', choices=FLEX_GROW_CHOICES, initial=0)
-    # flex_shrink = validated_property('flex_shrink', choices=FLEX_SHRINK_CHOICES, initial=1)
-    # flex_basis = validated_property('flex_basis', choices=FLEX_BASIS_CHOICES, initial=AUTO)
+    flex_grow = validated_property("flex_grow", choices=FLEX_GROW_CHOICES, initial=0)
+    flex_shrink = validated_property(
+        "flex_shrink", choices=FLEX_SHRINK_CHOICES, initial=1
+    )
+    flex_basis = validated_property(
+        "flex_basis", choices=FLEX_BASIS_CHOICES, initial=AUTO
+    )
 
     # 7.1 The 'flex' shorthand
     # flex =
 
     # 8. Alignment #######################################################
     # 8.2 Axis alignment
-    # justify_content = validated_property('justify_content', choices=JUSTIFY_CONTENT_CHOICES, initial=FLEX_START)
+    justify_content = validated_property(
+        "justify_content", choices=JUSTIFY_CONTENT_CHOICES, initial=FLEX_START
+    )
 
     # 8.3 Cros-axis alignment
-    # align_items = validated_property('align_items', choices=ALIGN_ITEMS_CHOICES, initial=STRETCH)
-    # align_self = validated_property('align_self', choices=ALIGN_SELF_CHOICES, initial=AUTO)
+    align_items = validated_property(
+        "align_items", choices=ALIGN_ITEMS_CHOICES, initial=STRETCH
+    )
+    align_self = validated_property(
+        "align_self", choices=ALIGN_SELF_CHOICES, initial=AUTO
+    )
 
     # 8.4 Packing flex lines
-    # align_content = validated_property('align_content', choices=ALIGN_CONTENT_CHOICES, initial=STRETCH)
+    align_content = validated_property(
+        "align_content", choices=ALIGN_CONTENT_CHOICES, initial=STRETCH
+    )
 
     ######################################################################
     # Grid properties
     ######################################################################
     # 7. Defining the grid ###############################################
     # 7.2 Explicit track sizing
-    # grid_template_columns = validated_property('grid_template_columns', choices=GRID_TEMPLATE_CHOICES, initial=None)
-    # grid_template_rows = validated_property('grid_template_rows', choices=GRID_TEMPLATE_CHOICES, initial=None)
+    # The number of explicit tracks is part of the placement of the items.
+    grid_template_columns = validated_property(
+        "grid_template_columns",
+        choices=GRID_TEMPLATE_CHOICES,
+        initial=None,
+        invalidation=FORMATTING,
+    )
+    grid_template_rows = validated_property(
+        "grid_template_rows",
+        choices=GRID_TEMPLATE_CHOICES,
+        initial=None,
+        invalidation=FORMATTING,
+    )
 
     # 7.3 Named Areas
     # grid_template_areas = validated_property('grid_template_areas', choices=GRID_TEMPLATE_AREA_CHOICES, initial=None)
@@ -636,21 +886,51 @@ class CSS:
     # grid_template =
 
     # 7.6 Implicit track sizing
-    # grid_auto_columns = validated_property('grid_auto_columns', choices=GRID_AUTO_CHOICES, initial=AUTO)
-    # grid_auto_rows = validated_property('grid_auto_rows', choices=GRID_AUTO_CHOICES, initial=AUTO)
+    grid_auto_columns = validated_property(
+        "grid_auto_columns", choices=GRID_AUTO_CHOICES, initial=AUTO
+    )
+    grid_auto_rows = validated_property(
+        "grid_auto_rows", choices=GRID_AUTO_CHOICES, initial=AUTO
+    )
 
     # 7.7 Automatic placement
-    # grid_auto_flow = validated_property('grid_auto_flow', choices=GRID_AUTO_FLOW_CHOICES, initial=ROW)
+    grid_auto_flow = validated_property(
+        "grid_auto_flow",
+        choices=GRID_AUTO_FLOW_CHOICES,
+        initial=ROW,
+        invalidation=FORMATTING,
+    )
 
     # 7.8 Grid definition shorthand
     # grid =
 
     # 8. Placing grid items ##############################################
     # 8.3 Line-based placement
-    # grid_row_start = validated_property('grid_row_start', choices=GRID_PLACEMENT_CHOICES, initial=AUTO)
-    # grid_column_start = validated_property('grid_column_start', choices=GRID_PLACEMENT_CHOICES, initial=AUTO)
-    # grid_row_end = validated_property('grid_row_end', choices=GRID_PLACEMENT_CHOICES, initial=AUTO)
-    # grid_column_end = validated_property('grid_column_end', choices=GRID_PLACEMENT_CHOICES, initial=AUTO)
+    # The placement of the items is part of the box tree of their grid.
+    grid_row_start = validated_property(
+        "grid_row_start",
+        choices=GRID_PLACEMENT_CHOICES,
+        initial=AUTO,
+        invalidation=FORMATTING,
+    )
+    grid_column_start = validated_property(
+        "grid_column_start",
+        choices=GRID_PLACEMENT_CHOICES,
+        initial=AUTO,
+        invalidation=FORMATTING,
+    )
+    grid_row_end = validated_property(
+        "grid_row_end",
+        choices=GRID_PLACEMENT_CHOICES,
+        initial=AUTO,
+        invalidation=FORMATTING,
+    )
+    grid_column_end = validated_property(
+        "grid_column_end",
+        choices=GRID_PLACEMENT_CHOICES,
+        initial=AUTO,
+        invalidation=FORMATTING,
+    )
 
     # 8.4 Placement shorthands
     # grid_row =
@@ -659,8 +939,12 @@ class CSS:
 
     # 10. Alignment and spacing ##########################################
     # 10.1 Gutters
-    # grid_row_gap = validated_property('grid_row_gap', choices=GRID_GAP_CHOICES, initial=0)
-    # grid_column_gap = validated_property('grid_column_gap', choices=GRID_GAP_CHOICES, initial=0)
+    grid_row_gap = validated_property(
+        "grid_row_gap", choices=GRID_GAP_CHOICES, initial=0
+    )
+    grid_column_gap = validated_property(
+        "grid_column_gap", choices=GRID_GAP_CHOICES, initial=0
+    )
     # grid_gap =
 
     ######################################################################
@@ -668,14 +952,138 @@ class CSS:
     ######################################################################
     @property
     def dirty(self):
-        if self._node:
+        if self._node and self._node.layout:
             return self._node.layout.dirty
 
     @dirty.setter
     def dirty(self, value):
-        if self._node:
+        if value:
+            # The style has changed; any computed snapshot is out of date.
+            self._computed = None
+            self._dirty_layout()
+        elif self._node and self._node.layout:
             self._node.layout.dirty = value
 
+    def _dirty_layout(self, visited=None, invalidation=LAYOUT):
+        """Mark the layout affected by the declaration as dirty.
+
+        ``visited`` is passed on to ``Box._dirty_ancestors()``. If the
+        changes only move the box (see ``POSITION``), the box is
+        translated by the next layout, rather than being laid out again.
+        If they change how the box is formatted (see ``FORMATTING``), the
+        parent is dirtied as well.
+        """
+        if self._node:
+            layout = self._node.layout
+            parent = getattr(self._node, "parent", None)
+            if invalidation is FORMATTING and parent is not None and parent.layout:
+                # The parent classifies the box tree of its children, so it
+                # must be laid out again, even if the node is a relayout
+                # boundary.
+                if layout:
+                    layout._dirty = True
+                    layout._discard_content_widths()
+                layout = parent.layout
+            elif not layout:
+                # A node that isn't displayed has no layout to dirty;
+                # the layout of the parent must be evaluated instead.
+                if parent is not None:
+                    layout = parent.layout
+
+            if layout:
+                if invalidation is POSITION and layout is self._node.layout:
+                    layout._dirty_position(visited)
+                else:
+                    layout._dirty = True
+                    layout._dirty_ancestors(visited)
+
+    ######################################################################
+    # Track the invalidation class of changes to the declaration
+    ######################################################################
+    @property
+    def invalidation(self):
+        """The strongest invalidation class of the changes to the declaration.
+
+        This is PAINT, POSITION, LAYOUT or FORMATTING, or None if no property
+        has changed since the invalidation was last cleared. A change that only needs
+        the node to be repainted doesn't mark the layout as dirty, so the
+        layout can be skipped entirely. Set the invalidation to None once
+        the changes have been rendered.
+        """
+        return self._invalidation
+
+    @invalidation.setter
+    def invalidation(self, value):
+        self._invalidation = value
+
+    def invalidate(self, invalidation):
+        "Record a change to a property with the given invalidation class."
+        if self._invalidation is None or invalidation > self._invalidation:
+            self._invalidation = invalidation
+
+        self._computed = None
+        if invalidation is FORMATTING:
+            self._discard_classification()
+        if invalidation is not PAINT:
+            if self._batch_depth or _batched is not None:
+                # Record the strongest of the deferred changes.
+                if not self._deferred:
+                    self._deferred = invalidation
+                    if _batched is not None:
+                        _batched.append(self)
+                elif invalidation > self._deferred:
+                    self._deferred = invalidation
+            else:
+                self._dirty_layout(invalidation=invalidation)
+
+    def _discard_classification(self):
+        """Discard the formatting classification of the node, and of its parent.
+
+        The layout of the parent is dirtied along with the rest of the
+        layout (see ``_dirty_layout()``), so that it can be deferred by a
+        batch.
+        """
+        if self._node:
+            if self._node.layout:
+                self._node.layout._classification = None
+
+            parent = getattr(self._node, "parent", None)
+            if parent is not None and parent.layout:
+                parent.layout._classification = None
+
+    @contextmanager
+    def batch(self):
+        """Defer the layout invalidation of the declaration to the end of the block.
+
+        However many properties are changed in the block, the layout is
+        invalidated at most once. Batches can be nested, and can be used
+        inside a batch of many declarations (see ``batch()``).
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._deferred:
+                if _batched is None:
+                    invalidation, self._deferred = self._deferred, None
+                    self._dirty_layout(invalidation=invalidation)
+                else:
+                    _batched.append(self)
+
+    ######################################################################
+    # Obtain a snapshot of the computed style
+    ######################################################################
+    @property
+    def computed(self):
+        """An immutable snapshot of the value of every property.
+
+        The snapshot is cached until any property of the declaration changes.
+        """
+        if self._computed is None:
+            self._computed = ComputedStyle(self)
+        return self._computed
+
     ######################################################################
     # Obtain the layout module
     ######################################################################
@@ -687,25 +1095,24 @@ class CSS:
     ######################################################################
     def update(self, **styles):
         "Set multiple styles on the CSS definition."
-        for name, value in styles.items():
-            name = name.replace("-", "_")
-            if name not in _CSS_PROPERTIES:
-                raise NameError(f"Unknown CSS style '{name}'")
+        with self.batch():
+            for name, value in styles.items():
+                name = name.replace("-", "_")
+                if name not in _CSS_PROPERTIES:
+                    raise NameError(f"Unknown CSS style '{name}'")
 
-            if value is None:
-                delattr(self, name)
-            else:
-                setattr(self, name, value)
+                if value is None:
+                    delattr(self, name)
+                else:
+                    setattr(self, name, value)
 
     def copy(self, node=None):
         "Create a duplicate of this style declaration."
         dup = CSS()
         dup._node = node
-        for style in _CSS_PROPERTIES:
-            try:
-                setattr(dup, style, getattr(self, f"_{style}"))
-            except AttributeError:
-                pass
+        with dup.batch():
+            for name, value in self._values.items():
+                setattr(dup, name, value)
         return dup
 
     def __getitem__(self, name):
@@ -732,30 +1139,99 @@ class CSS:
             raise KeyError(name)
 
     def items(self):
-        result = []
-        for name in _CSS_PROPERTIES:
-            try:
-                result.append((name, getattr(self, f"_{name}")))
-            except AttributeError:
-                pass
-        return result
+        return list(self._values.items())
 
     def keys(self):
-        result = set()
-        for name in _CSS_PROPERTIES:
-            if hasattr(self, f"_{name}"):
-                result.add(name)
-        return result
+        return set(self._values)
 
     ######################################################################
     # Get the rendered form of the style declaration
     ######################################################################
     def __str__(self):
-        non_default = []
-        for name in _CSS_PROPERTIES:
-            try:
-                non_default.append((name.replace("_", "-"), getattr(self, f"_{name}")))
-            except AttributeError:
-                pass
+        non_default = [
+            (name.replace("_", "-"), value) for name, value in self._values.items()
+        ]
 
         return "; ".join(f"{name}: {value}" for name, value in sorted(non_default))
+
+
+class ComputedStyle:
+    """An immutable snapshot of the value of every property of a declaration.
+
+    Initial values (including those that are derived from another
+    property) are resolved when the snapshot is built, so reading a value
+    from the snapshot is a plain attribute lookup. The layout engine reads
+    the snapshot, rather than the declaration, for every style lookup.
+    """
+
+    __slots__ = tuple(sorted(_CSS_INITIAL_VALUES)) + ("_layout_key",)
+
+    # The properties that were defined by CSS when the snapshot class was
+    # created, and their initial values.
+    _INITIAL_VALUES = dict(_CSS_INITIAL_VALUES)
+
+    # Properties whose initial value is derived from another property.
+    _DERIVED = {
+        name for name, initial in _INITIAL_VALUES.items() if _is_derived(initial)
+    }
+
+    # Properties that can affect layout; that is, that aren't paint-only.
+    _LAYOUT_PROPERTIES = tuple(
+        name for name in sorted(_INITIAL_VALUES) if _CSS_INVALIDATION[name] != PAINT
+    )
+
+    # 9.7 The computed display of a box that is floated, or absolutely
+    # positioned. Any display that isn't listed is unchanged.
+    _BLOCKIFIED = {
+        INLINE_TABLE: TABLE,
+        INLINE: BLOCK,
+        TABLE_ROW_GROUP: BLOCK,
+        TABLE_COLUMN: BLOCK,
+        TABLE_COLUMN_GROUP: BLOCK,
+        TABLE_HEADER_GROUP: BLOCK,
+        TABLE_FOOTER_GROUP: BLOCK,
+        TABLE_ROW: BLOCK,
+        TABLE_CELL: BLOCK,
+        TABLE_CAPTION: BLOCK,
+        INLINE_BLOCK: BLOCK,
+    }
+
+    def __init__(self, style):
+        values = style._values
+        for name, initial in self._INITIAL_VALUES.items():
+            if name in self._DERIVED:
+                value = getattr(style, name)
+            else:
+                value = values.get(name, initial)
+            object.__setattr__(self, name, value)
+
+        # 9.7 Relationships between 'display', 'position', and 'float'
+        if self.display is not None:
+            if self.position is ABSOLUTE or self.position is FIXED:
+                object.__setattr__(self, "float", None)
+                object.__setattr__(
+                    self, "display", self._BLOCKIFIED.get(self.display, self.display)
+                )
+            elif self.float is not None:
+                object.__setattr__(
+                    self, "display", self._BLOCKIFIED.get(self.display, self.display)
+                )
+
+        # A hashable summary of the values that can affect layout. Two
+        # snapshots with equal layout keys produce the same layout.
+        object.__setattr__(
+            self,
+            "_layout_key",
+            tuple(getattr(self, name) for name in self._LAYOUT_PROPERTIES),
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Computed styles can't be modified")
+
+    def __delattr__(self, name):
+        raise AttributeError("Computed styles can't be modified")
+
+    def __eq__(self, other):
+        return other.__class__ == self.__class__ and all(
+            getattr(self, name) == getattr(other, name) for name in self._INITIAL_VALUES
+        )
@@ -1,3 +1,8 @@
+from array import array
+
+from .constants import ABSOLUTE, AT_MOST, AUTO, EXACTLY, FIXED, UNDEFINED
+
+
 class Size:
     """Representation of the size of a node in the DOM.
 
@@ -11,8 +16,28 @@ class Size:
     exact_height: If True, the height is exact. If False,
         the height is the minimum allowed width.
     ratio: The height between height and width. width = height * ratio
+    text: The text of the node, if it is a run of text. The text is
+        measured by the display, and broken into lines by the layout.
+    measure: A callable that measures the node, in place of a width and
+        height that are computed up front (see ``measured()``).
     """
 
+    # The number of measurements of a node that are retained.
+    MAX_MEASUREMENTS = 16
+
+    __slots__ = (
+        "_node",
+        "_width",
+        "_height",
+        "_exact_width",
+        "_exact_height",
+        "_ratio",
+        "_is_replaced",
+        "_text",
+        "_measure",
+        "_measurements",
+    )
+
     def __init__(self, node):
         self._node = node
         self._width = None
@@ -22,6 +47,10 @@ class Size:
 
         self._ratio = None
         self._is_replaced = False
+        self._text = None
+
+        self._measure = None
+        self._measurements = []
 
     @property
     def dirty(self):
@@ -29,6 +58,8 @@ class Size:
 
     @dirty.setter
     def dirty(self, value):
+        if value:
+            self._measurements = []
         self._node.layout.dirty = value
 
     @property
@@ -91,8 +122,85 @@ class Size:
             self._is_replaced = value
             self.dirty = True
 
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        if self._text != value:
+            self._text = value
+            self.dirty = True
+
+    @property
+    def measure(self):
+        return self._measure
+
+    @measure.setter
+    def measure(self, value):
+        if self._measure != value:
+            self._measure = value
+            self.dirty = True
+
+    def measured(self, available_width, width_mode, available_height, height_mode):
+        """The (width, height) of the node, measured in the available space.
+
+        The node is measured by calling ``measure(available_width,
+        width_mode, available_height, height_mode)``, which returns the
+        (width, height) of the node. The mode of each axis is UNDEFINED (in
+        which case the available size is None), EXACTLY or AT_MOST.
+
+        As in Yoga, the most recent measurements are retained until the size
+        is dirtied, and a measurement is reused for any constraints that it
+        satisfies, not just the constraints that it was made with.
+        """
+        for measurement in self._measurements:
+            if _satisfies(
+                available_width,
+                width_mode,
+                measurement[0],
+                measurement[1],
+                measurement[4],
+            ) and _satisfies(
+                available_height,
+                height_mode,
+                measurement[2],
+                measurement[3],
+                measurement[5],
+            ):
+                return measurement[4], measurement[5]
+
+        width, height = self._measure(
+            available_width, width_mode, available_height, height_mode
+        )
+        self._measurements.append(
+            (available_width, width_mode, available_height, height_mode, width, height)
+        )
+        if len(self._measurements) > self.MAX_MEASUREMENTS:
+            del self._measurements[0]
+        return width, height
+
+
+def _satisfies(available, mode, measured_available, measured_mode, measured):
+    """Does a measurement along one axis satisfy the given constraint?
+
+    A measurement satisfies the constraint that it was made with; an exact
+    size that it measured; an upper bound that an unconstrained measurement
+    fits in; and a tighter upper bound that it still fits in.
+    """
+    if mode is measured_mode and available == measured_available:
+        return True
+    elif mode is EXACTLY:
+        return available == measured
+    elif mode is AT_MOST:
+        return measured <= available and (
+            measured_mode is UNDEFINED
+            or (measured_mode is AT_MOST and available < measured_available)
+        )
+    return False
+
 
-class Box:
+class BaseBox:
     """Describe the layout of a box displaying a node in the DOM.
 
     Stored properties
@@ -105,8 +213,12 @@ class Box:
     content_top: The top position of the content box, relative to the block container
     content_left: The left position of the content box, relative to the block container
 
-    origin_top: The absolute position of the top of the block container
-    origin_left: The absolute position of the left of the block container
+    origin_top: The absolute position of the top of the block container.
+        Unless explicitly set, the origin is the absolute position of the
+        content box of the parent, evaluated when it is first read.
+    origin_left: The absolute position of the left of the block container.
+        Unless explicitly set, the origin is the absolute position of the
+        content box of the parent, evaluated when it is first read.
 
     margin_top: The top margin of the box
     margin_right: The right margin of the box
@@ -128,6 +240,11 @@ class Box:
     border_bottom_width: The width of the bottom border of the box
     border_left_width: The width of the left border of the box
 
+    lines: The line boxes of a block container that establishes an inline
+        formatting context; None for any other box.
+    fragments: The fragments of a run of text, one for each line it is
+        broken across; None for any other box.
+
     Computed properties
     ~~~~~~~~~~~~~~~~~~~
     border_box_width: The width of the border box.
@@ -160,12 +277,63 @@ class Box:
     absolute_content_bottom: The bottom position of the box, relative to the block container
     absolute_content_right: The right position of the box, relative to the block container
 
+    The geometry of the box (the size and position of its content box, and
+    the widths of its margins, collapse extents, borders and padding) is
+    stored by a subclass: in the slots of a ``Box``, or in a row of a
+    ``LayoutStore`` for a ``StoredBox``.
     """
 
+    __slots__ = (
+        "node",
+        "visible",
+        "__origin_top",
+        "__origin_left",
+        "__origin_generation",
+        "__computed_origin_top",
+        "__computed_origin_left",
+        "_dirty",
+        "_dirty_descendants",
+        "_layout_inputs",
+        "_layout_basis",
+        "_layout_top",
+        "_layout_left",
+        "_relative_offset",
+        "_moved",
+        "_content_widths",
+        "_classification",
+        "_container",
+        "_positioned",
+        "lines",
+        "fragments",
+    )
+
     def __init__(self, node):
         self.node = node
         self._reset()
 
+        # The formatting classification of the box, and of the box tree of
+        # its children; None until the box is laid out. This describes the
+        # structure of the document, rather than its geometry, so it is
+        # retained when the geometry is reset (see ``CSS.invalidate()``).
+        self._classification = None
+
+        # The anonymous box that contains this box, if the box has been
+        # wrapped in one by the parent; None if the box is contained by
+        # the box of its parent node.
+        self._container = None
+
+        # If the box is a containing block for absolutely positioned
+        # descendants, the queue of those descendants (see
+        # ``engine.queue_positioned()``); otherwise None.
+        self._positioned = None
+
+        # The widths of the content of the box, as measured by the most
+        # recent intrinsic sizing of the box (see ``engine.content_widths()``);
+        # None once the box, or any of its descendants, has been dirtied.
+        # The content of a box doesn't change when it is laid out again, so
+        # the widths are retained when the geometry is reset by a layout.
+        self._content_widths = None
+
     def __repr__(self):
         return f"<Box ({self.content_width}x{self.content_height} @ {self.absolute_content_left},{self.absolute_content_top})>"
 
@@ -177,7 +345,7 @@ class Box:
     #         self._absolute_margin_left == value._absolute_margin_left
     #     ])
 
-    def _reset(self):
+    def _reset(self, origin=True):
         # Some properties describing whether this node exists in
         # layout *at all*.
         self.visible = True
@@ -193,10 +361,16 @@ class Box:
         self._content_top = 0
         self._content_left = 0
 
-        # Set and initial value for the origin that is
-        # guaranteed to be != any actual value
-        self.__origin_top = None
-        self.__origin_left = None
+        # The explicitly set origin of the box; None if the origin is
+        # inherited from the parent. When a box is laid out again, any
+        # explicitly set origin is retained.
+        if origin:
+            self.__origin_top = None
+            self.__origin_left = None
+
+        # The box has moved; any cached origin is no longer valid.
+        self.__origin_generation = None
+        BaseBox._generation += 1
 
         # Margins of the box
         self._margin_top = 0
@@ -224,44 +398,129 @@ class Box:
 
         # Current state of layout calculations
         self._dirty = True
-
-        # Set the origin via properties; this forces the calculation of
-        # absolute positions.
-        self._origin_top = 0
-        self._origin_left = 0
+        self._dirty_descendants = False
+
+        # The sizing contexts (describing the containing block) used by the
+        # most recent layout of this box, and the position of the content
+        # box at the end of that layout (before the parent offset the box
+        # into its flow). These allow a clean box to be reused on an
+        # incremental layout. A percentage height is resolved against the
+        # specified height of the parent, so that is recorded too.
+        self._layout_inputs = None
+        self._layout_basis = None
+        self._layout_top = 0
+        self._layout_left = 0
+
+        # The (top, left) relative offsets applied by the most recent layout
+        # of a relatively positioned box (or None), and whether the offsets
+        # have changed since. A box that has only moved is translated by
+        # the next layout, rather than being laid out again.
+        self._relative_offset = None
+        self._moved = False
+
+        # The line boxes of the box, and the fragments of its text, as
+        # placed by the most recent layout of its block container.
+        self.lines = None
+        self.fragments = None
 
     def reset(self):
-        self._reset()
-        for child in self.node.children:
-            if child.layout:
-                child.layout.reset()
+        # Walk the descendants from an explicit stack, so that very deep
+        # documents can be reset.
+        stack = [self]
+        while stack:
+            box = stack.pop()
+            box._reset()
+            box._content_widths = None
+            # Once the box has been laid out, its children may be wrapped
+            # in anonymous boxes, which must be reset as well.
+            if box._classification is None:
+                children = box.node.children
+            else:
+                children = box._classification.boxes
+            stack.extend(child.layout for child in reversed(children) if child.layout)
 
     ######################################################################
     # Origin handling
+    #
+    # Rather than pushing every change in position down to the descendants
+    # of a box, the origin of a box is evaluated when it is first read, and
+    # cached until the position of any box changes. Moving a box is O(1);
+    # the cost of evaluating absolute positions is only paid for the boxes
+    # that are actually queried.
     ######################################################################
+    # A counter that is incremented whenever the position of any box changes.
+    _generation = 0
+
+    def _evaluate_origin(self):
+        # Find the boxes between this box and the closest ancestor
+        # with a valid origin, then evaluate them from the top down.
+        stale = []
+        box = self
+        while box is not None and box.__origin_generation != BaseBox._generation:
+            stale.append(box)
+            box = box._parent
+
+        for box in reversed(stale):
+            parent = box._parent
+            if box.__origin_top is not None:
+                box.__computed_origin_top = box.__origin_top
+            elif parent is None:
+                box.__computed_origin_top = 0
+            else:
+                box.__computed_origin_top = (
+                    parent.__computed_origin_top + parent._content_top
+                )
+
+            if box.__origin_left is not None:
+                box.__computed_origin_left = box.__origin_left
+            elif parent is None:
+                box.__computed_origin_left = 0
+            else:
+                box.__computed_origin_left = (
+                    parent.__computed_origin_left + parent._content_left
+                )
+
+            box.__origin_generation = BaseBox._generation
+
     @property
     def _origin_top(self):
-        return self.__origin_top
+        if self.__origin_generation != BaseBox._generation:
+            self._evaluate_origin()
+        return self.__computed_origin_top
 
     @_origin_top.setter
     def _origin_top(self, value):
         if value != self.__origin_top:
             self.__origin_top = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout._origin_top = self.absolute_content_top
+            BaseBox._generation += 1
 
     @property
     def _origin_left(self):
-        return self.__origin_left
+        if self.__origin_generation != BaseBox._generation:
+            self._evaluate_origin()
+        return self.__computed_origin_left
 
     @_origin_left.setter
     def _origin_left(self, value):
         if value != self.__origin_left:
             self.__origin_left = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout._origin_left = self.absolute_content_left
+            BaseBox._generation += 1
+
+    @property
+    def origin_top(self):
+        return self._origin_top
+
+    @origin_top.setter
+    def origin_top(self, value):
+        self._origin_top = value
+
+    @property
+    def origin_left(self):
+        return self._origin_left
+
+    @origin_left.setter
+    def origin_left(self, value):
+        self._origin_left = value
 
     ######################################################################
     # Core properties
@@ -274,9 +533,7 @@ class Box:
     def content_top(self, value):
         if value != self._content_top:
             self._content_top = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout._origin_top = self.absolute_content_top
+            BaseBox._generation += 1
 
     @property
     def content_left(self):
@@ -286,9 +543,7 @@ class Box:
     def content_left(self, value):
         if value != self._content_left:
             self._content_left = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout._origin_left = self.absolute_content_left
+            BaseBox._generation += 1
 
     @property
     def margin_top(self):
@@ -366,6 +621,17 @@ class Box:
         if isinstance(value, int) and value > self._collapse_left:
             self._collapse_left = value
 
+    ######################################################################
+    # Margin box dimensions
+    ######################################################################
+    @property
+    def margin_box_width(self):
+        return self.margin_left + self.border_box_width + self.margin_right
+
+    @property
+    def margin_box_height(self):
+        return self.margin_top + self.border_box_height + self.margin_bottom
+
     ######################################################################
     # Border box dimensions
     ######################################################################
@@ -418,7 +684,7 @@ class Box:
     @property
     def absolute_border_box_top(self):
         return (
-            self.__origin_top
+            self._origin_top
             + self._content_top
             - self.padding_top
             - self.border_top_width
@@ -427,7 +693,7 @@ class Box:
     @property
     def absolute_border_box_right(self):
         return (
-            self.__origin_left
+            self._origin_left
             + self._content_left
             + self.content_width
             + self.padding_right
@@ -437,7 +703,7 @@ class Box:
     @property
     def absolute_border_box_bottom(self):
         return (
-            self.__origin_top
+            self._origin_top
             + self._content_top
             + self.content_height
             + self.padding_bottom
@@ -447,7 +713,7 @@ class Box:
     @property
     def absolute_border_box_left(self):
         return (
-            self.__origin_left
+            self._origin_left
             + self._content_left
             - self.padding_left
             - self.border_left_width
@@ -482,12 +748,12 @@ class Box:
 
     @property
     def absolute_padding_box_top(self):
-        return self.__origin_top + self._content_top - self.padding_top
+        return self._origin_top + self._content_top - self.padding_top
 
     @property
     def absolute_padding_box_right(self):
         return (
-            self.__origin_left
+            self._origin_left
             + self._content_left
             + self.content_width
             + self.padding_right
@@ -496,7 +762,7 @@ class Box:
     @property
     def absolute_padding_box_bottom(self):
         return (
-            self.__origin_top
+            self._origin_top
             + self._content_top
             + self.content_height
             + self.padding_bottom
@@ -504,7 +770,7 @@ class Box:
 
     @property
     def absolute_padding_box_left(self):
-        return self.__origin_left + self._content_left - self.padding_left
+        return self._origin_left + self._content_left - self.padding_left
 
     ######################################################################
     # Content box dimensions
@@ -519,19 +785,19 @@ class Box:
 
     @property
     def absolute_content_top(self):
-        return self.__origin_top + self._content_top
+        return self._origin_top + self._content_top
 
     @property
     def absolute_content_right(self):
-        return self.__origin_left + self._content_left + self.content_width
+        return self._origin_left + self._content_left + self.content_width
 
     @property
     def absolute_content_bottom(self):
-        return self.__origin_top + self._content_top + self.content_height
+        return self._origin_top + self._content_top + self.content_height
 
     @property
     def absolute_content_left(self):
-        return self.__origin_left + self._content_left
+        return self._origin_left + self._content_left
 
     ######################################################################
     # Layout dirtiness tracking.
@@ -539,6 +805,14 @@ class Box:
     # If dirty == True, the layout is known to be invalid.
     # If dirty == False, the layout is known to be good.
     # If dirty is None, the layout is currently being evaluated.
+    #
+    # Dirtying a box also dirties the boxes that contain it, up to the
+    # first relayout boundary - a box whose size can't be altered by the
+    # layout of its children. The ancestors of that boundary are flagged
+    # as having dirty descendants, so a layout pass can find the dirty
+    # boxes without visiting any clean subtrees. The cost of dirtying a
+    # box is proportional to its depth in the document, not to the size
+    # of the subtree it contains.
     ######################################################################
     @property
     def dirty(self):
@@ -546,8 +820,277 @@ class Box:
 
     @dirty.setter
     def dirty(self, value):
-        if value != self._dirty:
-            self._dirty = value
-            for child in self.node.children:
-                if child.layout:
-                    child.layout.dirty = value
+        self._dirty = value
+        if value:
+            self._dirty_ancestors()
+
+    def _dirty_ancestors(self, visited=None):
+        """Dirty (or flag) the ancestors of this box, as required by a change.
+
+        If ``visited`` is provided, it is a set of the ids of boxes whose
+        ancestors have already been dirtied; the walk stops at any of them,
+        and the boxes that are walked are added to it. This allows a number
+        of boxes to be dirtied while visiting each ancestor at most once.
+        """
+        self._discard_content_widths()
+
+        box = self
+        parent = box._parent
+        while parent is not None and not box.is_relayout_boundary:
+            if visited is not None:
+                if id(box) in visited:
+                    return
+                visited.add(id(box))
+            parent._dirty = True
+            box = parent
+            parent = box._parent
+
+        while parent is not None and not parent._dirty_descendants:
+            parent._dirty_descendants = True
+            parent = parent._parent
+
+    def _discard_content_widths(self):
+        """Discard the content widths of this box, and of the boxes containing it.
+
+        A relayout boundary doesn't stop the walk, as the intrinsic widths
+        of a box depend on its content even if its size doesn't. A box
+        whose content widths are known has measured the content of each
+        of its children, so the walk stops at the first ancestor whose
+        content widths have already been discarded. The content is measured
+        from the nodes, so the walk follows the parents of the nodes; the
+        anonymous boxes that wrap each box (which are measured as flex or
+        grid items) are discarded along the way.
+        """
+        box = self
+        while True:
+            box._content_widths = None
+            container = box._container
+            while container is not None:
+                container._content_widths = None
+                container = container._container
+
+            parent = getattr(box.node, "parent", None)
+            box = None if parent is None else parent.layout
+            if box is None or box._content_widths is None:
+                break
+
+    def _dirty_position(self, visited=None):
+        """Record a change to the relative offsets of the box.
+
+        Relative positioning doesn't alter the size of the box, or the
+        layout of any other box. If the box has been laid out as a
+        relatively positioned box, it is only flagged as moved, and its
+        ancestors as having dirty descendants, so the next layout can find
+        it and translate it. Otherwise, the box is dirtied.
+        """
+        if self._dirty is not False or self._relative_offset is None:
+            self._dirty = True
+            self._dirty_ancestors(visited)
+            return
+
+        self._moved = True
+        parent = self._parent
+        while parent is not None and not parent._dirty_descendants:
+            parent._dirty_descendants = True
+            parent = parent._parent
+
+    @property
+    def _parent(self):
+        if self._container is not None:
+            return self._container
+
+        parent = getattr(self.node, "parent", None)
+        if parent is not None:
+            return parent.layout
+
+    @property
+    def is_relayout_boundary(self):
+        """Can the size of this box be altered by the layout of its children?
+
+        A box with a definite width and height has an outer size that is
+        independent of its content. An absolutely positioned box is taken
+        out of the flow, so its size never alters the layout of its
+        containing block.
+        """
+        style = self.node.style
+        return (style.width is not AUTO and style.height is not AUTO) or (
+            style.position is ABSOLUTE or style.position is FIXED
+        )
+
+
+class Box(BaseBox):
+    "A box whose geometry is stored in slots of the box."
+
+    __slots__ = (
+        "content_width",
+        "content_height",
+        "_content_top",
+        "_content_left",
+        "_margin_top",
+        "_margin_right",
+        "_margin_bottom",
+        "_margin_left",
+        "_collapse_top",
+        "_collapse_right",
+        "_collapse_bottom",
+        "_collapse_left",
+        "border_top_width",
+        "border_right_width",
+        "border_bottom_width",
+        "border_left_width",
+        "padding_top",
+        "padding_right",
+        "padding_bottom",
+        "padding_left",
+    )
+
+
+class LayoutStore:
+    """Contiguous, array-backed storage for the geometry of many boxes.
+
+    Each geometry attribute of a box (the size and position of the content
+    box, and the width of the margin, collapse, border and padding edges)
+    is stored in a typed array - a column - indexed by the row that has
+    been allocated to the box. For very large documents, this is much more
+    compact than storing each value as an attribute of a Python object, and
+    allows an entire column to be handed to a renderer without copying.
+
+    AUTO values are stored as NaN.
+    """
+
+    __slots__ = ("_columns", "_free")
+
+    COLUMNS = [
+        "content_width",
+        "content_height",
+        "content_top",
+        "content_left",
+        "margin_top",
+        "margin_right",
+        "margin_bottom",
+        "margin_left",
+        "collapse_top",
+        "collapse_right",
+        "collapse_bottom",
+        "collapse_left",
+        "border_top_width",
+        "border_right_width",
+        "border_bottom_width",
+        "border_left_width",
+        "padding_top",
+        "padding_right",
+        "padding_bottom",
+        "padding_left",
+    ]
+
+    def __init__(self):
+        self._columns = [array("d") for name in self.COLUMNS]
+        self._free = []
+
+    def __len__(self):
+        "The number of rows that are currently allocated."
+        return len(self._columns[0]) - len(self._free)
+
+    @property
+    def nbytes(self):
+        "The size of the storage used by the columns, in bytes."
+        return sum(column.itemsize * len(column) for column in self._columns)
+
+    def allocate(self):
+        "Allocate a row in the store, returning the index of the row."
+        if self._free:
+            return self._free.pop()
+
+        for column in self._columns:
+            column.append(0.0)
+        return len(self._columns[0]) - 1
+
+    def release(self, row):
+        "Return a row to the store, so that it can be re-used."
+        self._free.append(row)
+
+    def column(self, name):
+        """Return the array storing the given attribute.
+
+        The array is returned without copying; the value for a box is at
+        the index given by the box's ``row``. Rows that have been released
+        contain stale values.
+        """
+        return self._columns[self.COLUMNS.index(name)]
+
+    def box(self, node):
+        "Create a new box for the node, with geometry stored in this store."
+        return StoredBox(node, self)
+
+
+class StoredAttribute:
+    "A geometry attribute of a box, stored in a column of a LayoutStore."
+
+    __slots__ = ("index",)
+
+    def __init__(self, column):
+        self.index = LayoutStore.COLUMNS.index(column)
+
+    def __get__(self, box, owner=None):
+        if box is None:
+            return self
+
+        value = box.store._columns[self.index][box.row]
+        if value != value:  # NaN
+            return AUTO
+
+        int_value = int(value)
+        return int_value if value == int_value else value
+
+    def __set__(self, box, value):
+        box.store._columns[self.index][box.row] = (
+            float("nan") if value is AUTO else value
+        )
+
+
+class StoredBox(BaseBox):
+    """A box whose geometry is stored in a row of a LayoutStore.
+
+    A stored box behaves exactly like a Box; it is a view over a row
+    of the store. When the box is no longer needed, ``release()`` should
+    be invoked to return the row to the store.
+
+    The layout engine releases the box of a node that is no longer
+    displayed; if the node becomes visible again, its new box is allocated
+    from the store of its parent's box.
+    """
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, node, store):
+        self.store = store
+        self.row = store.allocate()
+        super().__init__(node)
+
+    def release(self):
+        self.store.release(self.row)
+
+    content_width = StoredAttribute("content_width")
+    content_height = StoredAttribute("content_height")
+    _content_top = StoredAttribute("content_top")
+    _content_left = StoredAttribute("content_left")
+
+    _margin_top = StoredAttribute("margin_top")
+    _margin_right = StoredAttribute("margin_right")
+    _margin_bottom = StoredAttribute("margin_bottom")
+    _margin_left = StoredAttribute("margin_left")
+
+    _collapse_top = StoredAttribute("collapse_top")
+    _collapse_right = StoredAttribute("collapse_right")
+    _collapse_bottom = StoredAttribute("collapse_bottom")
+    _collapse_left = StoredAttribute("collapse_left")
+
+    border_top_width = StoredAttribute("border_top_width")
+    border_right_width = StoredAttribute("border_right_width")
+    border_bottom_width = StoredAttribute("border_bottom_width")
+    border_left_width = StoredAttribute("border_left_width")
+
+    padding_top = StoredAttribute("padding_top")
+    padding_right = StoredAttribute("padding_right")
+    padding_bottom = StoredAttribute("padding_bottom")
+    padding_left = StoredAttribute("padding_left")
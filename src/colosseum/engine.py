@@ -1,211 +1,4353 @@
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+
 from .constants import (
     ABSOLUTE,
+    AT_MOST,
     AUTO,
     BLOCK,
+    CENTER,
+    COLLAPSE,
+    COLUMN,
+    COLUMN_DENSE,
+    COLUMN_REVERSE,
+    CONTENT,
+    EXACTLY,
     FIXED,
+    FLEX,
+    FLEX_END,
+    FLEX_START,
+    GRID,
     HTML5,
     INHERIT,
     INLINE,
     INLINE_BLOCK,
+    INLINE_FLEX,
+    INLINE_GRID,
     INLINE_TABLE,
+    LEFT,
     LIST_ITEM,
     LTR,
+    MAX_CONTENT,
     MEDIUM,
+    MIN_CONTENT,
+    NORMAL,
+    NOWRAP,
+    PRE,
+    PRE_WRAP,
     RELATIVE,
+    RIGHT,
+    ROW,
+    ROW_REVERSE,
+    SPACE_AROUND,
+    SPACE_BETWEEN,
+    STATIC,
+    STRETCH,
     TABLE,
     TABLE_CAPTION,
     TABLE_CELL,
+    TABLE_COLUMN,
+    TABLE_COLUMN_GROUP,
+    TABLE_FOOTER_GROUP,
+    TABLE_HEADER_GROUP,
+    TABLE_ROW,
+    TABLE_ROW_GROUP,
     THICK,
     THIN,
+    TOP,
+    UNDEFINED,
+    VISIBLE,
+    WRAP_REVERSE,
 )
-from .dimensions import Box
+from .dimensions import Box, LayoutStore, Size
+from .units import Percent
+from .wrappers import Fr
 
 
 def is_block_level_element(node):
     # 9.2.1 P1
+    display = node.style.computed.display
     return (
-        node.style.display is BLOCK
-        or node.style.display is LIST_ITEM
-        or node.style.display is TABLE
+        display is BLOCK
+        or display is LIST_ITEM
+        or display is TABLE
+        or display is FLEX
+        or display is GRID
     )
 
 
 def is_block_container(node):
     # 9.2.1 P2
+    display = node.style.computed.display
     return (
-        node.style.display is BLOCK
-        or node.style.display is LIST_ITEM
-        or node.style.display is INLINE_BLOCK
-        or node.style.display is TABLE_CELL
-        or node.style.display is TABLE_CAPTION  # 9.4.1 P1
+        display is BLOCK
+        or display is LIST_ITEM
+        or display is INLINE_BLOCK
+        or display is TABLE_CELL
+        or display is TABLE_CAPTION  # 9.4.1 P1
     ) and not node.intrinsic.is_replaced
 
 
 def is_inline_level_element(node):
     # 9.2.2 P1
+    display = node.style.computed.display
     return (
-        node.style.display is INLINE
-        or node.style.display is INLINE_TABLE
-        or node.style.display is INLINE_BLOCK
+        display is INLINE
+        or display is INLINE_TABLE
+        or display is INLINE_BLOCK
+        or display is INLINE_FLEX
+        or display is INLINE_GRID
     )
 
 
 def is_inline_block_element(node):
-    return node.style.display is INLINE_BLOCK
+    return node.style.computed.display is INLINE_BLOCK
+
+
+def is_inline_element(node):
+    return node.style.computed.display is INLINE
+
+
+def is_float_positioned_element(node):
+    return node.style.computed.float is not None
+
+
+def is_absolute_positioned_element(node):
+    position = node.style.computed.position
+    return position is ABSOLUTE or position is FIXED
+
+
+def establishes_containing_block(node):
+    # 10.1 P4; the root establishes the initial containing block.
+    if getattr(node, "parent", None) is None:
+        return True
+    return node.style.computed.position is not STATIC
+
+
+def containing_block_of(node):
+    """The node that establishes the containing block of an absolutely
+    positioned node (10.1 P4).
+
+    FIXME: The containing block of a fixed position box is the viewport,
+    rather than the root; the root is used, so fixed boxes are laid out
+    with the rest of the document.
+    """
+    parent = node.parent
+    if node.style.computed.position is FIXED:
+        while parent.parent is not None:
+            parent = parent.parent
+    else:
+        while not establishes_containing_block(parent):
+            parent = parent.parent
+    return parent
+
+
+# 17.2 The displays of the internal table boxes, and of the columns.
+TABLE_ROW_GROUPS = {TABLE_ROW_GROUP, TABLE_HEADER_GROUP, TABLE_FOOTER_GROUP}
+TABLE_INTERNAL_DISPLAYS = TABLE_ROW_GROUPS | {TABLE_ROW, TABLE_CELL}
+TABLE_COLUMN_DISPLAYS = {TABLE_COLUMN, TABLE_COLUMN_GROUP}
+
+# The displays of the table boxes that each kind of table box contains.
+TABLE_PARTS = {
+    TABLE: TABLE_ROW_GROUPS | {TABLE_ROW, TABLE_CAPTION},
+    INLINE_TABLE: TABLE_ROW_GROUPS | {TABLE_ROW, TABLE_CAPTION},
+    TABLE_ROW_GROUP: {TABLE_ROW},
+    TABLE_HEADER_GROUP: {TABLE_ROW},
+    TABLE_FOOTER_GROUP: {TABLE_ROW},
+    TABLE_ROW: {TABLE_CELL},
+}
+
+
+def is_table_part(node):
+    """Is the node part of a table, other than the table itself? (17.2)
+
+    Floated and absolutely positioned boxes are never part of a table.
+    """
+    display = node.style.computed.display
+    return (
+        (
+            display in TABLE_INTERNAL_DISPLAYS
+            or display in TABLE_COLUMN_DISPLAYS
+            or display is TABLE_CAPTION
+        )
+        and not is_float_positioned_element(node)
+        and not is_absolute_positioned_element(node)
+    )
+
+
+def establishes_inline_formatting_context(node):
+    if is_block_container(node):
+        for child in node.children:
+            if is_block_level_element(child) or is_table_part(child):
+                return False
+        return True
+    elif node.style.computed.display in TABLE_PARTS:
+        # Tables, row groups and rows contain table boxes.
+        return False
+    elif establishes_flex_formatting_context(
+        node
+    ) or establishes_grid_formatting_context(node):
+        # A flex (or grid) container contains flex (or grid) items.
+        return False
+    else:
+        return True
+
+
+def establishes_table_formatting_context(node):
+    # 17.4
+    display = node.style.computed.display
+    return display is TABLE or display is INLINE_TABLE
+
+
+def establishes_flex_formatting_context(node):
+    # CSS Flexbox 3
+    display = node.style.computed.display
+    return display is FLEX or display is INLINE_FLEX
+
+
+def is_flex_item(node):
+    # CSS Flexbox 4
+    parent = getattr(node, "parent", None)
+    return (
+        parent is not None
+        and establishes_flex_formatting_context(parent)
+        and not is_absolute_positioned_element(node)
+    )
+
+
+def establishes_grid_formatting_context(node):
+    # CSS Grid 5.1
+    display = node.style.computed.display
+    return display is GRID or display is INLINE_GRID
+
+
+def is_grid_item(node):
+    # CSS Grid 6
+    parent = getattr(node, "parent", None)
+    return (
+        parent is not None
+        and establishes_grid_formatting_context(parent)
+        and not is_absolute_positioned_element(node)
+    )
+
+
+def establishes_block_formatting_context(node):
+    # 9.4.1 P1
+    if getattr(node, "parent", None) is None:
+        return True
+    style = node.style.computed
+    return (
+        is_flex_item(node)  # CSS Flexbox 3
+        or is_grid_item(node)  # CSS Grid 6.2
+        or is_float_positioned_element(node)
+        or is_absolute_positioned_element(node)
+        or style.display is INLINE_BLOCK
+        or style.display is TABLE_CELL
+        or style.display is TABLE_CAPTION
+        or (is_block_level_element(node) and style.overflow is not VISIBLE)
+    )
+
+
+###########################################################################
+# Formatting classification
+#
+# How a box, and the box tree of its children, are formatted only depends
+# on the display, float and position of the box and its children, on
+# whether the box is replaced, and on the list of children. Rather than
+# evaluating the predicates above on every layout, the classification is
+# evaluated when a box is laid out, and retained until one of those changes.
+###########################################################################
+# Display categories; a box may belong to more than one.
+BLOCK_LEVEL = 1  # 9.2.1 P1
+BLOCK_CONTAINER = 2  # 9.2.1 P2
+INLINE_LEVEL = 4  # 9.2.2 P1
+INLINE_ELEMENT = 8
+INLINE_BLOCK_ELEMENT = 16
+FLOAT_POSITIONED = 32
+ABSOLUTE_POSITIONED = 64
+TABLE_BOX = 128  # 17.4
+TABLE_INTERNAL = 256  # 17.2
+FLEX_BOX = 512  # CSS Flexbox 3
+GRID_BOX = 1024  # CSS Grid 5.1
+
+
+def display_category(node):
+    "The display categories of a node, as a combination of flags."
+    category = 0
+    display = node.style.computed.display
+    if is_block_level_element(node) or display is TABLE_CAPTION:  # 17.4 P2
+        category |= BLOCK_LEVEL
+    if is_block_container(node):
+        category |= BLOCK_CONTAINER
+    if is_inline_level_element(node):
+        category |= INLINE_LEVEL
+    if is_inline_element(node):
+        category |= INLINE_ELEMENT
+    if is_inline_block_element(node):
+        category |= INLINE_BLOCK_ELEMENT
+    if is_float_positioned_element(node):
+        category |= FLOAT_POSITIONED
+    if is_absolute_positioned_element(node):
+        category |= ABSOLUTE_POSITIONED
+    if establishes_table_formatting_context(node):
+        category |= TABLE_BOX
+    elif display in TABLE_INTERNAL_DISPLAYS:
+        category |= TABLE_INTERNAL
+    if establishes_flex_formatting_context(node):
+        category |= FLEX_BOX
+    if establishes_grid_formatting_context(node):
+        category |= GRID_BOX
+    return category
+
+
+class Classification:
+    """The formatting classification of a box, and of its children.
+
+    ``category`` is the display category of the box; ``inline`` is True if
+    the box establishes an inline formatting context; ``boxes`` is the box
+    tree of the children, including any anonymous boxes, in the order they
+    are laid out; ``flow`` are the boxes that are in the normal flow (that is,
+    that aren't floated or absolutely positioned); and ``hidden`` are the
+    children that don't generate a box. The ``columns`` of a table retain
+    the measurements of its cells between layouts (see ``TableColumns``),
+    and the ``flex`` measurements of a flex container, those of its items
+    (see ``FlexMeasurements``); the items are laid out in their ``order``.
+    The ``grid`` of a grid container is the placement of its items (see
+    ``GridPlacement``). The ``content`` of a box that establishes an inline
+    formatting context, or of a run of text, is its divided content (see
+    ``InlineContent``), which is evaluated when the box is laid out.
+    Anonymous boxes are retained with the classification, so they are only
+    rebuilt when the box tree changes.
+    """
+
+    __slots__ = (
+        "category",
+        "replaced",
+        "children",
+        "inline",
+        "boxes",
+        "flow",
+        "hidden",
+        "columns",
+        "flex",
+        "grid",
+        "content",
+    )
+
+    def __init__(self, node):
+        self.category = display_category(node)
+        self.replaced = node.intrinsic.is_replaced
+        # A copy of the child list, so that changes to it can be detected.
+        self.children = list(node.children)
+        self.inline = establishes_inline_formatting_context(node)
+        if self.inline:
+            self.boxes = [
+                child
+                for child in self.children
+                if child.style.computed.display is not None
+            ]
+        elif node.style.computed.display in TABLE_PARTS:
+            self.boxes = anonymize_table(node, self.children)
+        elif self.category & (FLEX_BOX | GRID_BOX):
+            # CSS Flexbox 5.4, CSS Grid 9 - The items are laid out in their
+            # order.
+            self.boxes = sorted(
+                anonymize(node, self.children),
+                key=lambda box: box.style.computed.order,
+            )
+        else:
+            self.boxes = anonymize(node, self.children)
+        self.flow = [
+            box
+            for box in self.boxes
+            if not is_float_positioned_element(box)
+            and not is_absolute_positioned_element(box)
+        ]
+        self.hidden = [
+            child for child in self.children if child.style.computed.display is None
+        ]
+        self.columns = TableColumns() if self.category & TABLE_BOX else None
+        self.flex = FlexMeasurements() if self.category & FLEX_BOX else None
+        self.grid = (
+            GridPlacement(node, self.boxes) if self.category & GRID_BOX else None
+        )
+        self.content = None
+
+
+def classify(node):
+    """The formatting classification of a displayed node.
+
+    Changes to the display, float or position of the node, or of its
+    children, discard the classification (see ``CSS.invalidate()``);
+    changes to the list of children are detected here.
+    """
+    classification = node.layout._classification
+    if (
+        classification is None
+        or classification.replaced is not node.intrinsic.is_replaced
+        or classification.children != node.children
+    ):
+        classification = node.layout._classification = Classification(node)
+    return classification
+
+
+class Viewport:
+    def __init__(self, display, root):
+        self.display = display
+        self.children = [root]
+        self.layout = self.display
+
+
+class DummyFont:
+    def __init__(self, size):
+        self.size = size
+
+    @property
+    def em(self):
+        return self.size
+
+    @property
+    def ex(self):
+        return 0.65 * self.size
+
+    @property
+    def ch(self):
+        return 0.71 * self.size
+
+    def __eq__(self, other):
+        return isinstance(other, DummyFont) and self.size == other.size
+
+    def __hash__(self):
+        return hash(self.size)
+
+
+class SizingContext:
+    """The context in which lengths along one axis of a box are resolved.
+
+    A box is laid out with a horizontal and a vertical context, describing
+    the display, the font, and the size of the containing block along that
+    axis. The children of a box share the same pair of contexts, so the
+    contexts are only created once for each containing block.
+    """
+
+    __slots__ = ("display", "font", "size")
+
+    def __init__(self, display, font, size):
+        self.display = display
+        self.font = font
+        self.size = size
+
+    def __repr__(self):
+        return f"<SizingContext {self.size} on {self.display}, {self.font}>"
+
+    def __eq__(self, other):
+        return (
+            self.__class__ == other.__class__
+            and self.display is other.display
+            and self.font == other.font
+            and self.size == other.size
+        )
+
+    def __hash__(self):
+        return hash((id(self.display), self.font, self.size))
+
+
+def sizing_contexts(display, font, containing_block):
+    "The (horizontal, vertical) sizing contexts of a containing block."
+    return (
+        SizingContext(display, font, containing_block.layout.content_width),
+        SizingContext(display, font, containing_block.layout.content_height),
+    )
+
+
+def height_basis(node):
+    """The basis of a percentage height of node: the specified height of its parent.
+
+    See ``calculate_block_non_replaced_normal_flow_height()``.
+    """
+    parent = getattr(node, "parent", None)
+    return parent.style.computed.height if parent is not None else None
+
+
+def layout(display, node, standard=HTML5, incremental=False, cache=None):
+    """Lay out the document rooted at node on the given display.
+
+    By default, all layout state is discarded, and every box in the
+    document is laid out from scratch. If ``incremental`` is True, the
+    geometry computed by the previous layout is retained; only boxes that
+    have been dirtied (and the ancestors whose size they affect) are laid
+    out again, and clean subtrees whose containing block hasn't changed are
+    reused as-is. If the children of a node are altered, the layout of that
+    node must be marked as dirty. Changes to properties that only affect
+    painting don't dirty the layout (see ``CSS.invalidation``).
+
+    If a ``LayoutCache`` is provided, the layout of any subtree that is
+    identical to a subtree laid out previously is copied from the cache.
+    """
+    containing_block = Viewport(display, node)
+    font = DummyFont(-1)  # FIXME: default font
+
+    if not incremental:
+        node.layout.reset()
+
+    # The root is positioned at the origin of the viewport.
+    node.layout._origin_top = 0
+    node.layout._origin_left = 0
+
+    # 10.1 1
+    if cache is not None:
+        cache._discard_layout_state()
+    layout_tree(
+        display,
+        node,
+        containing_block,
+        containing_block,
+        font,
+        sizing_contexts(display, font, containing_block),
+        cache,
+    )
+
+    # The full collapsed extent of the top margin on the root element
+    # must be displayed, so move the default content position so that it is.
+    node.layout.content_top += node.layout.collapse_top
+
+    # In HTML5, the final content height of the root element is fitted
+    # to the the display.
+    # FIXME: Find the actual line in the standard that causes this.
+    # It might be in the HTML5 spec, rather than the CSS spec.
+    if standard is HTML5:
+        node.layout.content_height = (
+            display.content_height
+            - node.layout.collapse_top
+            - node.layout.collapse_bottom
+        )
+
+    # Section 9.6 - The positioned descendants of the root are laid out once
+    # the size of the root is final.
+    drive_layout(layout_positioned(display, node, containing_block, font, cache))
+    if cache is not None:
+        cache._discard_layout_state()
+
+
+class AnonymousBox:
+    """A box that isn't generated by a node of the document.
+
+    An anonymous box has a style, an intrinsic size and a layout, so it can
+    be laid out like any other box. The children of an anonymous box remain
+    the children of the node that generated them; the anonymous box is only
+    part of the box tree (see ``Classification``).
+    """
+
+    display = None
+
+    def __init__(self, parent):
+        # The declaration module imports the engine, so it can't be
+        # imported until the engine is in use.
+        from .declaration import CSS
+
+        self.parent = parent
+        self.children = []
+        self.intrinsic = Size(self)
+        self.layout = Box(self)
+        self.style = CSS(display=self.display)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}:{id(self)} {str(self.layout)}>"
+
+    def append(self, child):
+        self.children.append(child)
+
+
+class AnonymousBlockBox(AnonymousBox):
+    "9.2.1.1 Anonymous block boxes"
+
+    display = BLOCK
+
+
+class AnonymousInlineBox(AnonymousBox):
+    "9.2.2.1 Anonymous inline boxes"
+
+    display = INLINE
+
+
+class AnonymousTable(AnonymousBox):
+    "17.2.1 Anonymous table objects"
+
+    display = TABLE
+
+
+class AnonymousTableRow(AnonymousBox):
+    "17.2.1 Anonymous table objects"
+
+    display = TABLE_ROW
+
+
+class AnonymousTableCell(AnonymousBox):
+    "17.2.1 Anonymous table objects"
+
+    display = TABLE_CELL
+
+
+def anonymize(node, children):
+    """Build the box tree of the children of a block formatting context.
+
+    If a block container has both block-level and inline-level children,
+    each run of inline-level children is wrapped in an anonymous block box
+    (9.2.1.1), and each run of table boxes that isn't in a table is wrapped
+    in an anonymous table (17.2.1). Children that aren't displayed don't
+    generate a box.
+    """
+    anon_block = None
+    anon_table = None
+    boxes = []
+    for child in children:
+        if child.style.computed.display is None:
+            continue
+
+        if is_table_part(child):
+            anon_block = None
+            if anon_table is None:
+                anon_table = AnonymousTable(node)
+                boxes.append(anon_table)
+            anon_table.append(child)
+        elif is_block_level_element(child):
+            anon_block = anon_table = None
+            boxes.append(child)
+        else:
+            anon_table = None
+            if anon_block is None:
+                anon_block = AnonymousBlockBox(node)
+                boxes.append(anon_block)
+            anon_block.append(child)
+
+    return boxes
+
+
+def anonymize_table(node, children):
+    """Build the box tree of the children of a table, row group or row.
+
+    Children that belong in the box are kept; runs of cells that aren't in
+    a row are wrapped in an anonymous row, and runs of any other children
+    in an anonymous cell (17.2.1). Columns don't generate a box; they are
+    found by the layout of the table (see ``table_columns()``). Absolutely
+    positioned children are out of the flow of the table; they are kept as
+    they are, and queued on their containing block when the box is laid
+    out.
+    """
+    parts = TABLE_PARTS[node.style.computed.display]
+    anon_row = None
+    anon_cell = None
+    boxes = []
+    for child in children:
+        display = child.style.computed.display
+        if display is None or (
+            display in TABLE_COLUMN_DISPLAYS and is_table_part(child)
+        ):
+            continue
+
+        if is_absolute_positioned_element(child):
+            boxes.append(child)
+            continue
+
+        if display in parts and is_table_part(child):
+            anon_row = anon_cell = None
+            boxes.append(child)
+            continue
+
+        # The cells of a row are its boxes; anywhere else, cells are
+        # wrapped in an anonymous row.
+        if TABLE_CELL in parts:
+            row, cells = node, boxes
+        else:
+            if anon_row is None:
+                anon_row = AnonymousTableRow(node)
+                anon_cell = None
+                boxes.append(anon_row)
+            row, cells = anon_row, anon_row.children
+
+        if display is TABLE_CELL and is_table_part(child):
+            anon_cell = None
+            cells.append(child)
+        else:
+            if anon_cell is None:
+                anon_cell = AnonymousTableCell(row)
+                cells.append(anon_cell)
+            anon_cell.append(child)
+
+    return boxes
+
+
+class _Signature:
+    """The structure, styles and intrinsic sizes of a subtree, as a hashable key.
+
+    Signatures are built from the bottom up, and the signature of each
+    child is part of the signature of its parent. The hash is evaluated
+    once, when the signature is created, so hashing a signature doesn't
+    require a walk of the subtree.
+    """
+
+    __slots__ = ("key", "hash")
+
+    def __init__(self, key):
+        self.key = key
+        self.hash = hash(key)
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        return self is other or (self.hash == other.hash and self.key == other.key)
+
+
+class LayoutCache:
+    """A cache of the layouts of subtrees of a document.
+
+    A document often contains many identical subtrees: the rows of a list,
+    cards, toolbar buttons. When a cache is provided to ``layout()``, the
+    geometry of each subtree that is laid out is stored, keyed by the
+    computed styles and intrinsic sizes of the subtree, the size of the
+    containing block, the display and the font. If an identical subtree
+    is laid out in the same conditions, the stored geometry is copied,
+    rather than being computed again.
+
+    Once the cache holds ``maxsize`` subtrees, the least recently used
+    subtree is discarded. ``hits`` and ``misses`` count the lookups that
+    found (and didn't find) a stored layout.
+    """
+
+    # The attributes of a box that are stored in the cache.
+    COLUMNS = LayoutStore.COLUMNS + [
+        "_layout_inputs",
+        "_layout_basis",
+        "_layout_top",
+        "_layout_left",
+        "_relative_offset",
+        "lines",
+        "fragments",
+    ]
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+        # The signature, and cache entry, of every node that has been
+        # evaluated during the current layout, keyed by id.
+        self._signatures = {}
+        self._entries_by_node = {}
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        "Discard every stored layout, and reset the counters."
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _discard_layout_state(self):
+        "Discard the state that is only valid during a single layout."
+        self._signatures.clear()
+        self._entries_by_node.clear()
+
+    def _signature(self, node):
+        "The signature of the subtree rooted at node."
+        signatures = self._signatures
+        try:
+            return signatures[id(node)]
+        except KeyError:
+            pass
+
+        # Evaluate the signatures of the subtree from the bottom up.
+        stack = [(node, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if id(current) in signatures:
+                continue
+
+            if expanded:
+                intrinsic = current.intrinsic
+                signatures[id(current)] = _Signature(
+                    (
+                        current.style.computed._layout_key,
+                        intrinsic.width,
+                        intrinsic.height,
+                        intrinsic.ratio,
+                        intrinsic.is_replaced,
+                        intrinsic.text,
+                        intrinsic.measure,
+                        tuple(signatures[id(child)] for child in current.children),
+                    )
+                )
+            else:
+                stack.append((current, True))
+                stack.extend((child, False) for child in current.children)
+
+        return signatures[id(node)]
+
+    def _key(self, node, sizing):
+        "The key of the layout of node in the given sizing contexts."
+        # A percentage height is resolved against the height of the parent.
+        return (self._signature(node), sizing, height_basis(node))
+
+    def _store(self, key, node):
+        """Store the layout of the subtree rooted at node.
+
+        The entry for each node holds the geometry of its box, and the entries
+        of the boxes of its children (including any anonymous boxes), so each
+        entry is only evaluated once. If any child
+        wasn't laid out (because its previous layout was reused), the layout
+        isn't stored. Nor is the layout of a containing block of positioned
+        descendants, as they are queued on it during the layout, nor that of
+        a flex or grid container, as it resizes its items once they are laid
+        out.
+        """
+        classification = node.layout._classification
+        if (
+            node.layout._positioned
+            or classification.flex is not None
+            or classification.grid is not None
+        ):
+            return
+
+        children = []
+        for child in node.layout._classification.boxes:
+            try:
+                entry = self._entries_by_node[id(child)]
+            except KeyError:
+                return
+
+            entry = self._resized(child, entry)
+
+            # The position of the child, once offset by the parent.
+            children.append(
+                (entry, child.layout.content_top, child.layout.content_left)
+            )
+
+        box = node.layout
+        entry = (tuple(getattr(box, name) for name in self.COLUMNS), tuple(children))
+        self._entries_by_node[id(node)] = entry
+
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def _resized(self, node, entry):
+        """The entry of a box, as it has been resized by its block container.
+
+        A run of text (or an inline box) is resized, once its own layout has
+        been stored, when it is broken into lines; the content of an inline
+        box is moved along with it (see ``layout_lines()``).
+        """
+        box = node.layout
+        if box.fragments is None and not is_inline_container(node):
+            return entry
+
+        children = tuple(
+            (
+                self._resized(child, child_entry),
+                child.layout.content_top,
+                child.layout.content_left,
+            )
+            for child, (child_entry, top, left) in zip(
+                box._classification.boxes, entry[1]
+            )
+        )
+        return (tuple(getattr(box, name) for name in self.COLUMNS), children)
+
+    def _restore(self, key, node):
+        """Copy a stored layout to the subtree rooted at node.
+
+        Returns False if there is no stored layout for the key.
+        """
+        try:
+            entry = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        self._cache.move_to_end(key)
+        self._entries_by_node[id(node)] = entry
+
+        stack = [(node, entry, None, None)]
+        while stack:
+            node, (geometry, children), content_top, content_left = stack.pop()
+            box = node.layout
+            for name, value in zip(self.COLUMNS, geometry):
+                setattr(box, name, value)
+            box._dirty = False
+            box._dirty_descendants = False
+
+            # The stored geometry is the layout of the box; it must then be
+            # offset into position by its parent.
+            if content_top is not None:
+                box.content_top = content_top
+                box.content_left = content_left
+
+            # The box tree of an identical subtree has the same structure,
+            # but it is built from the children of this node.
+            classification = classify(node)
+            for child in classification.hidden:
+                discard_box(child)
+
+            anonymous = isinstance(node, AnonymousBox)
+            for child, child_entry in zip(classification.boxes, children):
+                if child.layout is None:
+                    child.layout = new_box(child)
+                child.layout._container = box if anonymous else None
+                stack.append((child, *child_entry))
+
+        return True
+
+
+###########################################################################
+# Measuring subtrees
+#
+# The height of a subtree at a given width can be found without committing
+# a layout to the boxes of the document, so a virtualized list can find the
+# heights of rows that it hasn't laid out. The subtree is laid out in
+# scratch boxes, which are discarded once the height is known; the height
+# is retained, so the subtree is only laid out again once it changes.
+###########################################################################
+class ScratchViewport(Viewport):
+    """The viewport in which a subtree is measured.
+
+    The viewport is as wide as the width the subtree is measured at, and as
+    tall as the display.
+    """
+
+    def __init__(self, display, root, width):
+        super().__init__(display, root)
+        self.layout = self
+        self.content_width = width
+        self.content_height = display.content_height
+
+
+def scratch_layout(display, node, width, cache=None):
+    """Lay out a subtree in scratch boxes, returning the height of its margin box.
+
+    The boxes of the subtree are replaced by new boxes while the subtree is
+    laid out, and restored once it has been, so the layout of the document
+    is untouched. The retained content widths of the boxes (see
+    ``content_widths()``) are shared with the scratch boxes, as they don't
+    depend on the layout. Any absolutely positioned descendant whose
+    containing block is outside the subtree is queued on that containing
+    block by the layout; the queue is restored as well.
+    """
+    boxes = []
+    positioned = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        box = current.layout
+        boxes.append((current, box))
+        current.layout = Box(current)
+        if box is not None:
+            current.layout._content_widths = box._content_widths
+        if current is not node and current.style.computed.position in (
+            ABSOLUTE,
+            FIXED,
+        ):
+            positioned.append(current)
+        stack.extend(current.children)
+
+    subtree = {id(current) for current, box in boxes}
+    queues = []
+    for current in positioned:
+        container = containing_block_of(current)
+        if id(container) not in subtree and container.layout is not None:
+            queue = container.layout._positioned
+            queues.append(
+                (
+                    container.layout,
+                    queue,
+                    id(current),
+                    None if queue is None else queue.get(id(current)),
+                )
+            )
+
+    try:
+        viewport = ScratchViewport(display, node, width)
+        font = DummyFont(-1)  # FIXME: default font
+        layout_tree(
+            display,
+            node,
+            viewport,
+            viewport,
+            font,
+            sizing_contexts(display, font, viewport),
+            cache,
+        )
+        return 0 if node.layout is None else node.layout.margin_box_height
+    finally:
+        for current, box in boxes:
+            current.layout = box
+        for box, queue, key, entry in reversed(queues):
+            box._positioned = queue
+            if queue is not None:
+                if entry is None:
+                    queue.pop(key, None)
+                else:
+                    queue[key] = entry
+
+
+class HeightMeasurer:
+    """The heights of the subtrees that have been measured on a display.
+
+    Each height is retained, keyed by the signature of the subtree (see
+    ``LayoutCache``) and the width it was measured at; the signature
+    changes whenever the styles, intrinsic sizes or children of the subtree
+    change, so it serves as the version of the subtree. A subtree that is
+    measured again at the same width, or any identical subtree, isn't laid
+    out again. The layouts of the subtrees are stored in a ``LayoutCache``,
+    so an identical subtree is copied, rather than being laid out again,
+    at any width.
+
+    Once ``maxsize`` heights are retained, the least recently used height
+    is discarded. ``hits`` and ``misses`` count the lookups that found (and
+    didn't find) a retained height.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._heights = OrderedDict()
+        self._layouts = LayoutCache(maxsize)
+
+    def __len__(self):
+        return len(self._heights)
+
+    def clear(self):
+        "Discard every retained height and layout, and reset the counters."
+        self._heights.clear()
+        self._layouts.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def height(self, display, node, width):
+        "The height of the margin box of a subtree, at the given width."
+        cache = self._layouts
+        try:
+            key = cache._key(node, width)
+            try:
+                height = self._heights[key]
+            except KeyError:
+                self.misses += 1
+                height = self._heights[key] = scratch_layout(
+                    display, node, width, cache
+                )
+                if len(self._heights) > self.maxsize:
+                    self._heights.popitem(last=False)
+            else:
+                self.hits += 1
+                self._heights.move_to_end(key)
+        finally:
+            cache._discard_layout_state()
+        return height
+
+
+# The height measurer of each display.
+_height_measurers = WeakKeyDictionary()
+
+
+def height_measurer(display):
+    "The height measurer of a display, which is retained between measurements."
+    try:
+        return _height_measurers[display]
+    except KeyError:
+        measurer = _height_measurers[display] = HeightMeasurer()
+        return measurer
+
+
+def measure_height(node, width, display):
+    """The height of a subtree, laid out in a containing block of the given width.
+
+    The height is that of the margin box of the node. The subtree is laid
+    out in scratch boxes, so the layout of the document is untouched; the
+    height is retained until the subtree changes (see ``HeightMeasurer``).
+    """
+    return height_measurer(display).height(display, node, width)
+
+
+def narrowest_width(node, height, display, low=0, high=None):
+    """The narrowest width at which a subtree is no taller than ``height``.
+
+    The widths from ``low`` to ``high`` (by default, the width of the
+    display) are searched by bisection, on the assumption that the subtree
+    is no taller at a greater width. Returns None if the subtree is taller
+    than ``height`` at every width.
+    """
+    if high is None:
+        high = display.content_width
+    if measure_height(node, high, display) > height:
+        return None
+
+    while low < high:
+        middle = (low + high) // 2
+        if measure_height(node, middle, display) <= height:
+            high = middle
+        else:
+            low = middle + 1
+    return high
+
+
+class FloatExclusions:
+    """The space occupied by the floats in a block container (9.5).
+
+    The content box of the container is divided into horizontal bands at
+    the top and bottom edges of every float. In each band, the floats occupy
+    the space to the left of a left edge, and to the right of a right edge.
+    The bands are sorted by their top edge, so the space that is available
+    at any height is found with a binary search, rather than by visiting
+    every float that has been placed.
+    """
+
+    __slots__ = (
+        "width",
+        "_tops",
+        "_lefts",
+        "_rights",
+        "_float_top",
+        "left_bottom",
+        "right_bottom",
+    )
+
+    def __init__(self, width):
+        self.width = width
+
+        # The top, and the left and right edges of the space that is
+        # available, of each band. The last band extends indefinitely,
+        # and has no floats.
+        self._tops = [0]
+        self._lefts = [0]
+        self._rights = [width]
+
+        # The top of the most recently placed float.
+        self._float_top = 0
+
+        # The bottom of the lowest left and right floats.
+        self.left_bottom = 0
+        self.right_bottom = 0
+
+    def __len__(self):
+        "The number of bands."
+        return len(self._tops)
+
+    @property
+    def bottom(self):
+        "The bottom of the lowest float."
+        return max(self.left_bottom, self.right_bottom)
+
+    def available(self, y):
+        "The left and right edges of the space that is available at height y."
+        index = max(bisect_right(self._tops, y) - 1, 0)
+        return self._lefts[index], self._rights[index]
+
+    def bands(self, y):
+        """The (top, left, right) of each band at or below height y.
+
+        The top of each band is relative to y; the bands are a snapshot of
+        the space that is available beside a box whose top is at y (see
+        ``FloatContext``).
+        """
+        index = max(bisect_right(self._tops, y) - 1, 0)
+        return tuple(
+            (max(top - y, 0), left, right)
+            for top, left, right in zip(
+                self._tops[index:], self._lefts[index:], self._rights[index:]
+            )
+        )
+
+    def clearance(self, clear):
+        "The height that a box must be below to clear floats on the given side."
+        if clear is LEFT:
+            return self.left_bottom
+        elif clear is RIGHT:
+            return self.right_bottom
+        else:
+            return self.bottom
+
+    def _split(self, y):
+        "Start a band at height y, returning the index of the band."
+        index = bisect_right(self._tops, y) - 1
+        if self._tops[index] != y:
+            index += 1
+            self._tops.insert(index, y)
+            self._lefts.insert(index, self._lefts[index - 1])
+            self._rights.insert(index, self._rights[index - 1])
+        return index
+
+    def place(self, side, width, height, y):
+        """Place a float whose margin box has the given size.
+
+        The float is placed as high as possible, but no higher than y, and
+        as far to the given side as possible. Returns the left and top edges
+        of the margin box.
+        """
+        tops, lefts, rights = self._tops, self._lefts, self._rights
+
+        # 9.5.1 Rules 4 to 6: no higher than the top of the containing block,
+        # an earlier float, or the current position in the flow.
+        y = max(y, self._float_top, 0)
+
+        # Rules 7 and 8: as high as possible, shifting the float down past
+        # the bottom of a band until it fits, or there are no floats beside it.
+        index = bisect_right(tops, y) - 1
+        while True:
+            left, right = lefts[index], rights[index]
+            end = index + 1
+            while end < len(tops) and tops[end] < y + height:
+                left = max(left, lefts[end])
+                right = min(right, rights[end])
+                end += 1
+
+            if right - left >= width or (left <= 0 and right >= self.width):
+                break
+
+            index += 1
+            y = tops[index]
+
+        if side is LEFT:
+            x = left
+        else:
+            x = right - width
+
+        # Rules 2 and 3 are satisfied by the bands; record the new float.
+        if height > 0:
+            start = self._split(y)
+            stop = self._split(y + height)
+            for i in range(start, stop):
+                if side is LEFT:
+                    lefts[i] = max(lefts[i], x + width)
+                else:
+                    rights[i] = min(rights[i], x)
+
+        self._float_top = y
+        if side is LEFT:
+            self.left_bottom = max(self.left_bottom, y + height)
+        else:
+            self.right_bottom = max(self.right_bottom, y + height)
+
+        return x, y
+
+
+class FloatContext(SizingContext):
+    """The horizontal context of a block that is laid out beside floats.
+
+    ``bands`` are the (top, left, right) of the space that the floats leave
+    available, relative to the top of the border box of the block, and to
+    the content box of its containing block (see ``FloatExclusions``). The
+    line boxes of the block are shortened by the floats beside them (9.5).
+    """
+
+    __slots__ = ("bands", "_tops")
+
+    def __init__(self, display, font, size, bands):
+        super().__init__(display, font, size)
+        self.bands = bands
+        self._tops = [band[0] for band in bands]
+
+    def __repr__(self):
+        return f"<FloatContext {self.size} beside {self.bands} on {self.display}>"
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.bands == other.bands
+
+    def __hash__(self):
+        return hash((id(self.display), self.font, self.size, self.bands))
+
+    def available(self, y):
+        "The left and right edges of the space that is available at height y."
+        top, left, right = self.bands[max(bisect_right(self._tops, y) - 1, 0)]
+        return left, right
+
+
+###########################################################################
+# Section 9.4.2: Inline formatting contexts
+#
+# The content of a block container that establishes an inline formatting
+# context is broken into line boxes. Text is measured by the display, a
+# word at a time; as measuring text is the most expensive operation that a
+# display provides, every measurement is retained, so a paragraph that is
+# wrapped again (at a new width, for example) doesn't measure any text.
+###########################################################################
+class TextMeasurer:
+    """The sizes of the runs of text that have been measured on a display.
+
+    Text is measured by the ``measure_text(font, text)`` method of the
+    display, which returns the (width, height) of the text, set on a single
+    line. The size of every run is retained, keyed by the font and the text.
+    Once ``maxsize`` runs are retained, the least recently used run is
+    discarded. ``hits`` and ``misses`` count the lookups that found (and
+    didn't find) a retained size.
+    """
+
+    def __init__(self, measure, maxsize=65536):
+        self.measure = measure
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._sizes = OrderedDict()
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def clear(self):
+        "Discard every retained size, and reset the counters."
+        self._sizes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def size(self, font, text):
+        "The (width, height) of a run of text, set in the given font."
+        key = (font, text)
+        try:
+            size = self._sizes[key]
+        except KeyError:
+            self.misses += 1
+            size = self._sizes[key] = self.measure(font, text)
+            if len(self._sizes) > self.maxsize:
+                self._sizes.popitem(last=False)
+        else:
+            self.hits += 1
+            self._sizes.move_to_end(key)
+        return size
+
+    def width(self, font, text):
+        "The advance width of a run of text, set in the given font."
+        return self.size(font, text)[0]
+
+
+# The text measurer of each display.
+_text_measurers = WeakKeyDictionary()
+
+
+def text_measurer(display):
+    "The text measurer of a display, which is retained between layouts."
+    try:
+        return _text_measurers[display]
+    except KeyError:
+        measurer = _text_measurers[display] = TextMeasurer(display.measure_text)
+        return measurer
+
+
+def text_widths(node, context):
+    """The (minimum, maximum) width of a run of text.
+
+    The minimum is the width of the widest part of the text that can't be
+    broken, and the maximum is the width of its longest line. The divided
+    text (see ``InlineContent``) is retained by the classification of the
+    node, until the text, the font or the style of the node changes.
+    """
+    key = (node.intrinsic.text, context.font, node.style.computed._layout_key)
+    classification = getattr(node.layout, "_classification", None)
+    content = classification.content if classification is not None else None
+    if content is None or content.key != key:
+        content = InlineContent(key)
+        content.add_text(node, 0, context)
+        if classification is not None:
+            classification.content = content
+    return content.widths()
+
+
+def text_line_height(node, context):
+    "The height of each line of a run of text (10.8.1)."
+    line_height = node.style.computed.line_height
+    font = context.font
+    if line_height is NORMAL:
+        return text_measurer(context.display).size(font, " ")[1]
+    elif isinstance(line_height, (int, float)):
+        return round(line_height * font.em)
+    elif isinstance(line_height, Percent):
+        return line_height.px(context.display, font, font.em)
+    else:
+        return calculate_size(line_height, context)
+
+
+# The white space that can separate words (16.6.1).
+_WORDS = re.compile(r"([ \t\n\r\f]*)([^ \t\n\r\f]+)")
+
+
+def segment_text(text, white_space):
+    """Divide a run of text into words, as its white-space dictates (16.6).
+
+    Returns a list of (space, word, forced) for each word, the white space
+    after the last word, and whether a line break follows the last word.
+    ``space`` is the white space before the word, collapsed to a single
+    space unless white space is preserved, and ``forced`` is True if a
+    preserved line break comes before the word. A line that is otherwise
+    empty holds an empty word.
+    """
+    collapse = white_space is not PRE and white_space is not PRE_WRAP
+    if white_space is NORMAL or white_space is NOWRAP:
+        segments = [text]
+    else:
+        segments = text.split("\n")
+
+    words = []
+    space = ""
+    forced = False
+    for number, segment in enumerate(segments):
+        if number:
+            # White space at the end of a line is removed (or hangs).
+            forced = True
+            space = ""
+
+        end = 0
+        for match in _WORDS.finditer(segment):
+            space += match.group(1)
+            if collapse and space:
+                space = " "
+            words.append((space, match.group(2), forced))
+            space = ""
+            forced = False
+            end = match.end()
+        space += segment[end:]
+
+        if forced and number < len(segments) - 1:
+            words.append(("" if collapse else space, "", True))
+            space = ""
+
+    if collapse and space:
+        space = " "
+    return words, space, forced
+
+
+def is_inline_container(node):
+    """Is a box an inline box whose content is placed in the line boxes of
+    its block container (9.2.2)?
+
+    An inline box without children (like a run of text, or a replaced
+    element) is placed as a single box.
+    """
+    return (
+        is_inline_element(node)
+        and not is_float_positioned_element(node)
+        and not is_absolute_positioned_element(node)
+        and not is_flex_item(node)
+        and not is_grid_item(node)
+        and not node.intrinsic.is_replaced
+        and node.intrinsic.text is None
+        and node.intrinsic.measure is None
+        and any(child.style.computed.display is not None for child in node.children)
+    )
+
+
+def inline_flow(node):
+    """The boxes in the flow of an inline formatting context, in order.
+
+    The content of an inline box (see ``is_inline_container()``) follows
+    the box, so each box comes after the boxes that contain it. The boxes
+    are walked from an explicit stack, as inline boxes may be arbitrarily
+    deeply nested.
+    """
+    flow = []
+    stack = list(reversed(node.layout._classification.flow))
+    while stack:
+        child = stack.pop()
+        flow.append(child)
+        if is_inline_container(child):
+            stack.extend(reversed(child.layout._classification.flow))
+    return flow
+
+
+class InlineContent:
+    """The content of an inline formatting context, divided into runs.
+
+    Each word of a run of text, and each atomic inline-level box, is a run.
+    ``runs`` are (node, word, space, left, width, height), where ``word``
+    is None for an atomic box, ``space`` is the white space before the
+    run, and ``left`` is the position of the run when all the content is
+    set on a single line. The margins, borders and padding at the start
+    (and end) of each inline box are placed before its first run (and
+    after its last); ``edges`` are the width of the edges before each run
+    that follows the start of a box, by the index of the run. The runs between break opportunities (16.6) are
+    placed together, as a group; ``breaks`` are the index of the first run
+    of each group, and ``forced`` the index of each group that must start a
+    line. ``starts`` and ``ends`` are the positions at which each group
+    starts and ends; they are the prefix sums of the advance widths of the
+    runs, so the groups that fit on a line are found with a binary search,
+    and the content can be broken into lines of any width without
+    measuring, or dividing, any text again.
+
+    ``key`` identifies the inputs from which the content was divided.
+    """
+
+    __slots__ = (
+        "key",
+        "runs",
+        "edges",
+        "boxes",
+        "breaks",
+        "forced",
+        "starts",
+        "ends",
+        "_end",
+        "_space",
+        "_advance",
+        "_edge",
+        "_breakable",
+        "_forced",
+    )
+
+    def __init__(self, key=None):
+        self.key = key
+        self.runs = []
+        self.edges = {}
+        self.boxes = []
+        self.breaks = []
+        self.forced = []
+        self.starts = []
+        self.ends = []
+
+        # The end of the last run; the white space after it, and the width
+        # of a space in its font; the width of the edges of the boxes that
+        # start before the next run; and whether a line can (or must) break
+        # before the next run.
+        self._end = 0
+        self._space = ""
+        self._advance = 0
+        self._edge = 0
+        self._breakable = True
+        self._forced = False
+
+    def __repr__(self):
+        return f"<InlineContent of {len(self.runs)} runs>"
+
+    def _append(self, node, word, space, width, height, breakable, keep=False):
+        """Add a run, after the given white space.
+
+        If ``keep`` is True, the white space is kept at the start of a line.
+        """
+        start = self._end + len(space) * self._advance + self._edge
+        if breakable or not self.runs:
+            if self._forced:
+                self.forced.append(len(self.breaks))
+            self.breaks.append(len(self.runs))
+            self.starts.append(self._end if keep else start - self._edge)
+            self.ends.append(start + width)
+        else:
+            self.ends[-1] = start + width
+
+        if self._edge:
+            self.edges[len(self.runs)] = self._edge
+            self._edge = 0
+        self.runs.append((node, word, space, start, width, height))
+        self._end = start + width
+        self._space = ""
+        self._forced = False
+
+    def open_box(self, width):
+        "Start an inline box, whose start edges have the given width."
+        self._edge += width
+
+    def close_box(self, width):
+        "End an inline box, whose end edges have the given width."
+        if self._edge or not self.runs:
+            # The box is empty, so its edges are placed before the next run.
+            self._edge += width
+        else:
+            self._end += width
+            self.ends[-1] = self._end
+
+    def add_box(self, node, width, height):
+        "Add an atomic inline-level box, whose margin box has the given size."
+        self.boxes.append(len(self.runs))
+        space = "" if self._forced else self._space
+        self._append(node, None, space, width, height, True)
+        self._breakable = True
+
+    def add_text(self, node, height, context):
+        "Add a run of text, whose lines have the given height."
+        style = node.style.computed
+        font = context.font
+        measurer = text_measurer(context.display)
+        white_space = style.white_space
+        collapse = white_space is not PRE and white_space is not PRE_WRAP
+        wrap = white_space is not NOWRAP and white_space is not PRE
+
+        # 16.4 Letter and word spacing
+        if style.letter_spacing is NORMAL:
+            letter_spacing = 0
+        else:
+            letter_spacing = calculate_size(style.letter_spacing, context)
+        if style.word_spacing is NORMAL:
+            word_spacing = 0
+        else:
+            word_spacing = calculate_size(style.word_spacing, context)
+        self._advance = measurer.width(font, " ") + letter_spacing + word_spacing
+
+        words, space, forced = segment_text(node.intrinsic.text, white_space)
+        for before, word, breaks in words:
+            if breaks or self._forced:
+                self._forced = True
+            elif collapse:
+                before = " " if self._space or before else ""
+            else:
+                before = self._space + before
+
+            if word:
+                width = max(0, measurer.width(font, word) + letter_spacing * len(word))
+            else:
+                width = 0
+            self._append(
+                node,
+                word,
+                before,
+                width,
+                height,
+                self._forced or self._breakable or (wrap and before != ""),
+                keep=not collapse and (self._forced or not self.runs),
+            )
+            self._breakable = False
+
+        if collapse:
+            self._space = " " if self._space or space else ""
+        else:
+            self._space += space
+        self._forced = self._forced or forced
+
+    def group(self, index):
+        "The range of the runs in a group."
+        end = index + 1
+        return range(
+            self.breaks[index],
+            self.breaks[end] if end < len(self.breaks) else len(self.runs),
+        )
+
+    def break_line(self, first, width):
+        """The last group of a line of the given width, starting at group first.
+
+        A group that is wider than the line overflows it.
+        """
+        forced = self.forced
+        last = max(
+            bisect_right(self.ends, self.starts[first] + width, first) - 1, first
+        )
+        index = bisect_right(forced, first)
+        if index < len(forced) and forced[index] <= last:
+            last = forced[index] - 1
+        return last
+
+    def break_lines(self, available_width, indent=0):
+        """Break the content into lines of the given width.
+
+        The first line is indented by ``indent``. Returns the first and last
+        group of each line.
+        """
+        lines = []
+        first = 0
+        count = len(self.starts)
+        while first < count:
+            width = available_width if lines else available_width - indent
+            last = self.break_line(first, width)
+            lines.append((first, last))
+            first = last + 1
+        return lines
+
+    def widths(self):
+        """The (minimum, maximum) width of the content.
+
+        The minimum is the width of the widest group, and the maximum that
+        of the widest line, when lines are only broken where they must be.
+        """
+        starts, ends = self.starts, self.ends
+        minimum = max(
+            (end - start for start, end in zip(starts, ends)),
+            default=0,
+        )
+        maximum = max(
+            (
+                ends[last] - starts[first]
+                for first, last in self.break_lines(float("inf"))
+            ),
+            default=0,
+        )
+        return minimum, maximum
+
+
+class LineBox:
+    """A line box of an inline formatting context (9.4.2).
+
+    The top of the line is relative to the content box of the block
+    container; the width is the width of the content placed on the line.
+    """
+
+    __slots__ = ("top", "height", "width")
+
+    def __init__(self, top, height, width):
+        self.top = top
+        self.height = height
+        self.width = width
+
+    def __repr__(self):
+        return f"<LineBox {self.width}x{self.height} @ {self.top}>"
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, LineBox)
+            and self.top == other.top
+            and self.height == other.height
+            and self.width == other.width
+        )
+
+    @property
+    def bottom(self):
+        return self.top + self.height
+
+
+class TextFragment:
+    """The part of a run of text that is placed on a single line.
+
+    The position of the fragment is relative to the content box of the box
+    of the text.
+    """
+
+    __slots__ = ("text", "left", "top", "width", "height")
+
+    def __init__(self, text, left, top, width, height):
+        self.text = text
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return (
+            f"<TextFragment {self.text!r} {self.width}x{self.height}"
+            f" @ ({self.left}, {self.top})>"
+        )
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, TextFragment)
+            and self.text == other.text
+            and self.left == other.left
+            and self.top == other.top
+            and self.width == other.width
+            and self.height == other.height
+        )
+
+
+def layout_lines(display, node, sizing, viewport, font, cache=None):
+    """Lay out the content of a block container in line boxes (9.4.2).
+
+    Each child is laid out, and the content is divided into runs (see
+    ``InlineContent``); the content of an inline box that has children is
+    divided along with the content around it, so it can be broken across
+    lines. The content is retained by the classification of the
+    container, and only divided again when a child is laid out again,
+    or changes size. Lines are filled with as many groups of runs as fit
+    in the width of the container, less the text-indent of the first line
+    (16.1), and less the floats beside the top of the line, if the
+    container is laid out beside floats (see ``FloatContext``); each line is
+    as tall as its tallest run, and is aligned by the text-align of the
+    container (16.2). A run of text, or an inline box, is
+    the bounding box of its content on each line; the start (and end)
+    margin, border and padding of the box are placed before (and after) its
+    content.
+
+    Like ``layout_box()``, this is a generator that yields the arguments for
+    the layout of each child.
+
+    FIXME: Runs are aligned to the bottom of their line, rather than by
+    vertical-align, and the container has no strut (10.8). A line that is
+    too narrow for its content beside a float isn't moved below the float.
+    The top margin, border and padding of
+    an inline box move its content down, rather than extending above it
+    (10.6.1). Justified text is aligned to the left.
+    """
+    box = node.layout
+    classification = box._classification
+    content = classification.content
+    floats = sizing[0] if sizing[0].__class__ is FloatContext else None
+    horizontal, vertical = sizing_contexts(display, font, node)
+
+    stale = content is None or content.key != font
+    for child in classification.boxes:
+        if is_absolute_positioned_element(child):  # Section 9.6
+            queue_positioned(child, node, 0, 0)
+            continue
+
+        stale = stale or is_stale(child)
+        yield (display, child, node, viewport, font, (horizontal, vertical), cache)
+
+    flow = inline_flow(node)
+    for child in flow:
+        if child.intrinsic.text is not None:
+            child.layout.fragments = []
+
+    # An atomic box may have changed size, as its containing block has.
+    if not stale:
+        for index in content.boxes:
+            child, word, space, left, width, height = content.runs[index]
+            if (width, height) != (
+                child.layout.margin_box_width,
+                child.layout.margin_box_height,
+            ):
+                stale = True
+                break
+
+    if stale:
+        # The end of each inline box is found by returning to it, once its
+        # content has been added.
+        content = classification.content = InlineContent(font)
+        stack = [(child, False) for child in reversed(classification.flow)]
+        while stack:
+            child, end = stack.pop()
+            if end:
+                content.close_box(inline_edges(child.layout)[1])
+            elif child.intrinsic.text is not None or is_inline_container(child):
+                content.open_box(inline_edges(child.layout)[0])
+                stack.append((child, True))
+                if child.intrinsic.text is not None:
+                    content.add_text(
+                        child, text_line_height(child, vertical), horizontal
+                    )
+                else:
+                    stack.extend(
+                        (descendant, False)
+                        for descendant in reversed(child.layout._classification.flow)
+                    )
+            else:
+                content.add_box(
+                    child, child.layout.margin_box_width, child.layout.margin_box_height
+                )
+
+    # Break the content into lines, and move each run into place. Each box
+    # in the flow is placed relative to the content box of the container
+    # (see ``place_inline()``).
+    style = node.style.computed
+    indent = calculate_size(style.text_indent, horizontal)
+    runs = content.runs
+    line_boxes = []
+    texts = {}
+    extents = {}
+    top = 0
+    first = 0
+    number = 0
+    while first < len(content.starts):
+        # The floats beside the top of the line shorten it.
+        line_left = 0
+        line_right = box.content_width
+        if floats is not None:
+            left, right = floats.available(top + box.border_top_width + box.padding_top)
+            line_left = min(max(line_left, left - box.content_left), line_right)
+            line_right = max(min(line_right, right - box.content_left), line_left)
+
+        available = line_right - line_left
+        if number:
+            last = content.break_line(first, available)
+        else:
+            last = content.break_line(first, available - indent)
+        start = content.starts[first]
+        width = content.ends[last] - start
+        line = range(content.group(first).start, content.group(last).stop)
+        height = max(runs[index][5] for index in line)
+
+        if number:
+            free = max(0, available - width)
+            offset = line_left
+        else:
+            free = max(0, available - indent - width)
+            offset = line_left + indent
+        if style.text_align is RIGHT:
+            offset += free
+        elif style.text_align is CENTER:
+            offset += free // 2
+        offset -= start
+
+        for index in line:
+            child, word, space, left, run_width, run_height = runs[index]
+            left += offset
+            run_top = top + height - run_height
+            if word is None:
+                extents[id(child)] = (
+                    left,
+                    run_top,
+                    left + run_width,
+                    run_top + run_height,
+                )
+                continue
+            elif not word:
+                continue
+
+            # The runs of a text on the same line are a single fragment;
+            # white space that is kept at the start of a line is part of
+            # the first fragment.
+            fragments = child.layout.fragments
+            if texts.get(id(child)) == number:
+                fragment = fragments[-1]
+                fragment.text += space + word
+                fragment.width = left + run_width - fragment.left
+            else:
+                if index == line.start:
+                    lead = left - (start + offset) - content.edges.get(index, 0)
+                else:
+                    lead = 0
+                fragments.append(
+                    TextFragment(
+                        space + word if lead else word,
+                        left - lead,
+                        run_top,
+                        run_width + lead,
+                        run_height,
+                    )
+                )
+                texts[id(child)] = number
+
+        line_boxes.append(LineBox(top, height, width))
+        top += height
+        first = last + 1
+        number += 1
+
+    # The box of each text is the bounding box of its fragments, and that
+    # of each inline box, the bounding box of its content; a box that has
+    # no content is empty. The content of an inline box comes after it in
+    # the flow, so the flow is walked backwards, and each inline box is
+    # sized once its content has been placed.
+    for child in reversed(flow):
+        child_box = child.layout
+        fragments = child_box.fragments
+        if fragments is not None:
+            bounds = [
+                (
+                    fragment.left,
+                    fragment.top,
+                    fragment.left + fragment.width,
+                    fragment.top + fragment.height,
+                )
+                for fragment in fragments
+            ]
+        elif is_inline_container(child):
+            bounds = [
+                extents[id(descendant)]
+                for descendant in child_box._classification.flow
+                if id(descendant) in extents
+            ]
+        else:
+            continue
+
+        if not bounds:
+            child_box.content_width = 0
+            child_box.content_height = 0
+            continue
+
+        left = min(bound[0] for bound in bounds)
+        top = min(bound[1] for bound in bounds)
+        child_box.content_width = max(bound[2] for bound in bounds) - left
+        child_box.content_height = max(bound[3] for bound in bounds) - top
+        if fragments is not None:
+            for fragment in fragments:
+                fragment.left -= left
+                fragment.top -= top
+        else:
+            place_inline(child_box._classification.flow, extents, left, top)
+        start, end = inline_edges(child_box)
+        extents[id(child)] = (
+            left - start,
+            top,
+            left + child_box.content_width + end,
+            top + child_box.margin_box_height,
+        )
+
+    place_inline(classification.flow, extents, 0, 0)
+    box.lines = line_boxes
+
+
+def place_inline(boxes, extents, left, top):
+    """Move the boxes in the flow of an inline formatting context into place.
+
+    ``extents`` are the (left, top, right, bottom) of the margin box of
+    each box that has been placed, relative to the content box of the
+    block container. The boxes are moved relative to the content box of
+    their parent, which is at (``left``, ``top``). A box that hasn't been
+    placed is empty, and is left at the origin of its parent.
+    """
+    for child in boxes:
+        box = child.layout
+        extent = extents.get(id(child))
+        if extent is None:
+            box.content_left = box._layout_left
+            box.content_top = box._layout_top
+            continue
+
+        box.content_left = box._layout_left + extent[0] - left
+        box.content_top = box._layout_top + extent[1] - top
+        if box.fragments is not None or is_inline_container(child):
+            # The content of an inline box starts after its start edges;
+            # the edges of an atomic box are part of its layout.
+            box.content_left += inline_edges(box)[0]
+
+
+def inline_edges(box):
+    """The width of the (start, end) margins, borders and padding of an
+    inline box."""
+    return (
+        box.margin_left + box.border_left_width + box.padding_left,
+        box.padding_right + box.border_right_width + box.margin_right,
+    )
+
+
+###########################################################################
+# Absolute positioning
+#
+# An absolutely positioned box is taken out of the flow (9.6), and its size
+# and position depend on its containing block, which may be any ancestor.
+# When the box is found in the flow of its parent, it is queued on its
+# containing block, along with its static position; once the containing
+# block has been laid out, and its size is known, the queued boxes are laid
+# out and moved into place. The queue is retained between layouts, so a
+# positioned box can be laid out again without its containing block.
+###########################################################################
+class PositionedDescendant:
+    """An absolutely positioned box, queued on its containing block.
+
+    ``parent`` is the node in whose flow the box was found, and
+    ``classification`` is the classification of that node when the box was
+    queued. The static position of the box (the position the top left of
+    its margin box would have had in the flow) is relative to the content
+    box of the parent.
+    """
+
+    __slots__ = ("node", "parent", "classification", "static_top", "static_left")
+
+    def __init__(self, node, parent, static_top, static_left):
+        self.node = node
+        self.parent = parent
+        self.classification = parent.layout._classification
+        self.static_top = static_top
+        self.static_left = static_left
+
+
+def queue_positioned(node, parent, static_top, static_left):
+    "Queue an absolutely positioned node on its containing block."
+    containing_block = containing_block_of(node).layout
+    if containing_block._positioned is None:
+        containing_block._positioned = {}
+    containing_block._positioned[id(node)] = PositionedDescendant(
+        node, parent, static_top, static_left
+    )
+
+
+def static_position(descendant, containing_block):
+    """The static position of a queued box, relative to its containing block.
+
+    The position is relative to the content box of the containing block.
+    Returns None if the box is no longer positioned in the containing block,
+    or is no longer in the flow of the parent it was queued by.
+    """
+    node = descendant.node
+    if (
+        not is_absolute_positioned_element(node)
+        or containing_block_of(node) is not containing_block
+    ):
+        return None
+
+    parent = descendant.parent
+    if parent.layout is None or parent.layout._classification is not (
+        descendant.classification
+    ):
+        return None
+
+    # The parent must still be a descendant of the containing block.
+    child = parent
+    while child is not containing_block:
+        ancestor = child.parent
+        classification = ancestor.layout and ancestor.layout._classification
+        if classification is None or child not in classification.children:
+            return None
+        child = ancestor
+
+    top = descendant.static_top
+    left = descendant.static_left
+    box = parent.layout
+    while box is not containing_block.layout:
+        top += box.content_top
+        left += box.content_left
+        box = box._parent
+    return top, left
+
+
+def position_absolute(node, containing_block, sizing, static_top, static_left):
+    """Move a laid out, absolutely positioned box into place (10.3.7, 10.6.4).
+
+    The box is positioned against the padding box of its containing block,
+    by its top and left (or, if those are auto, by its bottom and right);
+    if both are auto, the box remains at its static position.
+    """
+    style = node.style.computed
+    horizontal, vertical = sizing
+    box = node.layout
+    containing_box = containing_block.layout
+
+    left = calculate_size(style.left, horizontal)
+    right = calculate_size(style.right, horizontal)
+    if left is not AUTO:
+        x = left - containing_box.padding_left
+    elif right is not AUTO:
+        x = (
+            containing_box.content_width
+            + containing_box.padding_right
+            - right
+            - box.margin_box_width
+        )
+    else:
+        x = static_left
+
+    top = calculate_size(style.top, vertical)
+    bottom = calculate_size(style.bottom, vertical)
+    if top is not AUTO:
+        y = top - containing_box.padding_top
+    elif bottom is not AUTO:
+        y = (
+            containing_box.content_height
+            + containing_box.padding_bottom
+            - bottom
+            - box.margin_box_height
+        )
+    else:
+        y = static_top
+
+    box.content_top += y
+    box.content_left += x
+
+
+def layout_positioned(display, node, viewport, font, cache=None):
+    """Lay out the boxes queued on a containing block, once its size is known.
+
+    Each box is laid out against the padding box of the containing block,
+    then moved into place. A box that is clean, and whose containing block
+    hasn't changed size, retains its previous layout. Boxes that are no
+    longer positioned in the containing block are discarded from the queue.
+
+    Like ``layout_box()``, this is a generator that yields the arguments for
+    the layout of each box.
+    """
+    queue = node.layout._positioned
+    if not queue:
+        return
+
+    sizing = (
+        SizingContext(display, font, node.layout.padding_box_width),
+        SizingContext(display, font, node.layout.padding_box_height),
+    )
+    for key, descendant in list(queue.items()):
+        position = static_position(descendant, node)
+        if position is None:
+            del queue[key]
+            continue
+
+        child = descendant.node
+        box = child.layout
+        if (
+            box is None
+            or box.dirty
+            or box._dirty_descendants
+            or box._layout_inputs != sizing
+        ):
+            yield (display, child, node, viewport, font, sizing, cache)
+            if child.layout is None:
+                continue
+        else:
+            box.content_top = box._layout_top
+            box.content_left = box._layout_left
+
+        position_absolute(child, node, sizing, *position)
+
+
+###########################################################################
+# Section 17: Tables
+#
+# The rows of a table are laid out once the widths of its columns are
+# known. The columns are sized from their cells: in the automatic layout,
+# from the content widths of every cell, which are retained so that only
+# the cells that change are measured again; in the fixed layout, from the
+# first row of the table alone. The positions of the columns are passed to
+# the rows as their horizontal sizing context, so a clean row is reused
+# for as long as the columns don't move.
+###########################################################################
+class ColumnContext(SizingContext):
+    """The horizontal context in which the rows of a table are laid out.
+
+    The size is the width of the grid of the table; ``columns`` are the
+    (left, width) of each column, relative to the content box of the
+    table, and ``spacing`` is the vertical spacing between rows. The sizing
+    contexts of the cells in each column are shared by every row.
+    """
+
+    __slots__ = ("columns", "spacing", "cells")
+
+    def __init__(self, display, font, size, columns, spacing, vertical):
+        super().__init__(display, font, size)
+        self.columns = columns
+        self.spacing = spacing
+        self.cells = tuple(
+            (SizingContext(display, font, width), vertical) for left, width in columns
+        )
+
+    def __repr__(self):
+        return f"<ColumnContext {self.columns} on {self.display}, {self.font}>"
+
+    def __eq__(self, other):
+        return (
+            super().__eq__(other)
+            and self.columns == other.columns
+            and self.spacing == other.spacing
+        )
+
+    def __hash__(self):
+        return hash((id(self.display), self.font, self.size, self.columns))
+
+
+def new_box(node):
+    """A new layout box for a node.
+
+    If the box of the parent keeps its geometry in a ``LayoutStore``, so
+    does the new box.
+    """
+    parent = getattr(node, "parent", None)
+    store = getattr(getattr(parent, "layout", None), "store", None)
+    return Box(node) if store is None else store.box(node)
+
+
+def generate_box(node):
+    """The layout box of a displayed node.
+
+    If the node was hidden, it has no box; a new box is created. (The boxes
+    of its descendants weren't laid out while the node was hidden.)
+    """
+    if node.layout is None:
+        node.layout = new_box(node)
+        node.layout.reset()
+    return node.layout
+
+
+def discard_box(node):
+    """Discard the layout box of a node that isn't displayed.
+
+    A box that keeps its geometry in a ``LayoutStore`` returns its row to
+    the store.
+    """
+    release = getattr(node.layout, "release", None)
+    if release is not None:
+        release()
+    node.layout = None
+
+
+def table_columns(children):
+    """The column boxes of a table, in order (17.3).
+
+    A column group without columns counts as one column.
+    FIXME: The span of columns and column groups is ignored.
+    """
+    columns = []
+    for child in children:
+        if not is_table_part(child):
+            continue
+        display = child.style.computed.display
+        if display is TABLE_COLUMN:
+            columns.append(child)
+        elif display is TABLE_COLUMN_GROUP:
+            group = [
+                column
+                for column in child.children
+                if column.style.computed.display is TABLE_COLUMN
+            ]
+            columns.extend(group if group else [child])
+    return columns
+
+
+def table_rows(sections):
+    "The (row, cells) of each row of a table, from its row groups and rows."
+    grid = []
+    for section in sections:
+        generate_box(section)
+        if section.style.computed.display is TABLE_ROW:
+            rows = [section]
+        else:
+            rows = classify(section).flow
+        for row in rows:
+            generate_box(row)
+            grid.append((row, classify(row).flow))
+    return grid
+
+
+def horizontal_frame(node, context):
+    "The width of the left and right borders and padding of a box."
+    style = node.style.computed
+    return (
+        calculate_size(style.border_left_width, context)
+        + calculate_size(style.padding_left, context)
+        + calculate_size(style.padding_right, context)
+        + calculate_size(style.border_right_width, context)
+    )
+
+
+def measured_children(node):
+    "The children of node that contribute to its content widths."
+    return [
+        child
+        for child in node.children
+        if child.style.computed.display is not None
+        and not is_absolute_positioned_element(child)
+    ]
+
+
+def content_widths(node, context, sized=True):
+    """The (minimum, maximum) width of the border box of a cell (17.5.2.2).
+
+    A box with a specified (or intrinsic) width is that wide. Otherwise, the
+    children of a block are stacked, and those of an inline box, row or
+    flex row are placed side by side; the minimum width is that of the
+    widest child, and the maximum width that of the widest child, or of all
+    the children side by side. If ``sized`` is False, the specified width
+    of the box itself is ignored, so the widths are those of its content.
+    The subtree is walked from an explicit stack, as it may be arbitrarily
+    deep.
+
+    A run of text may be broken between its words, so its minimum width is
+    that of its widest word. Absolutely positioned children are out of the
+    flow, so they don't contribute to the widths.
+
+    The widths of the content of each box are retained on the box, and
+    reused until the box, or any of its descendants, is dirtied (see
+    ``Box._discard_content_widths()``). Unless the content holds a
+    percentage, the widths don't depend on the size of the containing
+    block, so they are reused at any size; nested shrink-to-fit boxes
+    measure their content once, rather than once for each box that
+    contains them.
+    """
+    display = context.display
+    font = context.font
+    widths = {}
+    stack = [(node, False)]
+    while stack:
+        current, expanded = stack.pop()
+        style = current.style.computed
+        if expanded:
+            children = [widths[id(child)] for child in measured_children(current)]
+            minimum = max(width[0] for width in children)
+            if (
+                establishes_inline_formatting_context(current)
+                or style.display is TABLE_ROW
+                or (
+                    establishes_flex_formatting_context(current)
+                    and (
+                        style.flex_direction is ROW
+                        or style.flex_direction is ROW_REVERSE
+                    )
+                )
+            ):
+                maximum = sum(width[1] for width in children)
+            else:
+                maximum = max(width[1] for width in children)
+            relative = any(width[2] for width in children)
+            if current.layout is not None:
+                current.layout._content_widths = (
+                    display,
+                    font,
+                    context.size if relative else None,
+                    minimum,
+                    maximum,
+                )
+        else:
+            relative = False
+            width = calculate_size(style.width, context)
+            if width is AUTO or (current is node and not sized):
+                width = current.intrinsic.width
+            text = current.intrinsic.text
+            if text is not None:
+                # A run of text can be broken between its words.
+                minimum, maximum = text_widths(current, context)
+            elif width is None and current.intrinsic.measure is not None:
+                minimum = current.intrinsic.measured(0, AT_MOST, None, UNDEFINED)[0]
+                maximum = natural_size(current)[0]
+            elif width is None and measured_children(current):
+                box = current.layout
+                retained = None if box is None else box._content_widths
+                if (
+                    retained is not None
+                    and retained[0] is display
+                    and retained[1] == font
+                    and retained[2] in (None, context.size)
+                ):
+                    minimum, maximum = retained[3:]
+                    relative = retained[2] is not None
+                else:
+                    stack.append((current, True))
+                    stack.extend((child, False) for child in measured_children(current))
+                    continue
+            else:
+                minimum = maximum = width or 0
+
+        frame = horizontal_frame(current, context)
+        if current is not node:
+            # The margins of a cell don't apply (17.5).
+            for margin in (style.margin_left, style.margin_right):
+                margin = calculate_size(margin, context)
+                if margin is not AUTO:
+                    frame += margin
+        widths[id(current)] = (
+            minimum + frame,
+            maximum + frame,
+            relative or is_relative(style),
+        )
+
+    return widths[id(node)][:2]
+
+
+def is_relative(style):
+    "Does the width of a box depend on the width of its containing block?"
+    return (
+        style.width.__class__ is Percent
+        or style.padding_left.__class__ is Percent
+        or style.padding_right.__class__ is Percent
+        or style.margin_left.__class__ is Percent
+        or style.margin_right.__class__ is Percent
+    )
+
+
+class TableColumns:
+    """The minimum and maximum widths of the columns of a table (17.5.2.2).
+
+    The content widths of each cell are retained between layouts, along
+    with the widths of each column, which are those of its widest cells.
+    When the table is laid out again, only the dirty cells are measured
+    again, and only the columns in which a cell has changed width are
+    evaluated again; when one cell of a large table changes, one column is
+    visited, rather than the whole table.
+    """
+
+    __slots__ = ("context", "rows", "columns", "cells", "minimums", "maximums")
+
+    def __init__(self):
+        self.context = None
+        self.rows = []
+        self.columns = []
+        self.cells = {}
+        self.minimums = []
+        self.maximums = []
+
+    def __repr__(self):
+        return f"<TableColumns {list(zip(self.minimums, self.maximums))}>"
+
+    def measure(self, grid, columns, n_columns, context):
+        """Update the widths of the columns of a table.
+
+        ``grid`` is the (row, cells) of each row of the table, and
+        ``columns`` are the column boxes of the table.
+        """
+        rows = [row for row, cells in grid]
+        column_widths = [
+            calculate_size(column.style.computed.width, context) for column in columns
+        ]
+        # If the rows, or the columns, of the table have changed, every
+        # column is evaluated again, from the cells that are still clean.
+        rebuild = (
+            context != self.context
+            or rows != self.rows
+            or column_widths != self.columns
+            or n_columns != len(self.minimums)
+        )
+        previous = self.cells if context == self.context else {}
+        measured = {} if rebuild else self.cells
+        stale = set()
+        for row, cells in grid:
+            if not rebuild and not (row.layout.dirty or row.layout._dirty_descendants):
+                continue
+            for i, cell in enumerate(cells):
+                widths = previous.get(id(cell))
+                box = cell.layout
+                if widths is None or box is None or box.dirty or box._dirty_descendants:
+                    widths = content_widths(cell, context)
+                    if widths != previous.get(id(cell)):
+                        stale.add(i)
+                measured[id(cell)] = widths
+
+        if rebuild:
+            stale = range(n_columns)
+            self.cells = measured
+            self.minimums = [0] * n_columns
+            self.maximums = [0] * n_columns
+        self.context = context
+        self.rows = rows
+        self.columns = column_widths
+
+        for i in stale:
+            self.evaluate(i, grid, column_widths)
+
+    def evaluate(self, i, grid, column_widths):
+        "Evaluate the minimum and maximum width of a column."
+        if i < len(column_widths) and column_widths[i] is not AUTO:
+            minimum = maximum = column_widths[i]
+        else:
+            minimum = maximum = 0
+        cells = self.cells
+        for row, row_cells in grid:
+            if i < len(row_cells):
+                cell_minimum, cell_maximum = cells[id(row_cells[i])]
+                if cell_minimum > minimum:
+                    minimum = cell_minimum
+                if cell_maximum > maximum:
+                    maximum = cell_maximum
+        self.minimums[i] = minimum
+        self.maximums[i] = max(minimum, maximum)
+
+
+def distribute(total, weights):
+    """Share a width between columns, in proportion to their weights.
+
+    If every weight is 0, the width is shared equally. The shares add up to
+    the total; any remainder from rounding is given to the last column.
+    """
+    if not weights:
+        return []
+    weight = sum(weights)
+    if weight == 0:
+        weights = [1] * len(weights)
+        weight = len(weights)
+    shares = [total * share // weight for share in weights]
+    shares[-1] += total - sum(shares)
+    return shares
+
+
+def auto_column_widths(minimums, maximums, table_width, available_width):
+    """The widths of the columns in the automatic table layout (17.5.2.2).
+
+    The grid is as wide as the table, if it has a specified width, or as
+    wide as the columns would like to be, within the available width; but
+    never narrower than the minimum width of the columns. The widths
+    exclude the spacing between the columns.
+    """
+    minimum = sum(minimums)
+    maximum = sum(maximums)
+    if table_width is not None:
+        width = max(table_width, minimum)
+    else:
+        width = max(minimum, min(available_width, maximum))
+
+    if width >= maximum:
+        shares = distribute(width - maximum, maximums)
+        return [column + share for column, share in zip(maximums, shares)]
+
+    shares = distribute(
+        width - minimum, [high - low for low, high in zip(minimums, maximums)]
+    )
+    return [column + share for column, share in zip(minimums, shares)]
+
+
+def fixed_column_widths(columns, cells, n_columns, table_width, context):
+    """The widths of the columns in the fixed table layout (17.5.2.1).
+
+    A column is as wide as its column box or, failing that, as the border
+    box of its cell in the first row of the table; the other columns share
+    what remains of the width of the table equally. If every column has a
+    width, and the table is wider, the columns share the extra width. Only
+    the first row is inspected, however many rows the table has.
+    """
+    widths = [AUTO] * n_columns
+    for i, column in enumerate(columns):
+        widths[i] = calculate_size(column.style.computed.width, context)
+    for i, cell in enumerate(cells):
+        if widths[i] is AUTO:
+            width = calculate_size(cell.style.computed.width, context)
+            if width is not AUTO:
+                widths[i] = width + horizontal_frame(cell, context)
+
+    remaining = max(
+        0, table_width - sum(width for width in widths if width is not AUTO)
+    )
+    n_auto = widths.count(AUTO)
+    if n_auto:
+        shares = iter(distribute(remaining, [1] * n_auto))
+        return [next(shares) if width is AUTO else width for width in widths]
+    shares = distribute(remaining, [0] * n_columns)
+    return [width + share for width, share in zip(widths, shares)]
+
+
+def layout_table(display, node, sizing, viewport, font, cache=None):
+    """Lay out the captions and rows of a table (17.4, 17.5).
+
+    Once the widths of the columns are known, the rows and row groups are
+    stacked, separated by the vertical border spacing, between the captions
+    on each side of the table. Like ``layout_box()``, this is a generator
+    that yields the arguments for the layout of each caption, row group
+    and row.
+
+    FIXME: The captions are laid out in the table box, rather than beside
+    it in a table wrapper box; and in the collapsing border model, the
+    borders of adjacent cells aren't collapsed into one another.
+    """
+    style = node.style.computed
+    box = node.layout
+    horizontal, vertical = sizing
+    classification = box._classification
+
+    if style.border_collapse is COLLAPSE:  # 17.6.2
+        spacing_x = spacing_y = 0
+    else:  # 17.6.1
+        spacing_x = calculate_size(style.border_spacing.horizontal, horizontal)
+        spacing_y = calculate_size(style.border_spacing.vertical, vertical)
+
+    # Section 17.2 - The captions are placed on their side of the table, the
+    # header groups before the other rows, and the footer groups after them.
+    top_captions = []
+    bottom_captions = []
+    headers = []
+    bodies = []
+    footers = []
+    for child in classification.boxes:
+        if is_absolute_positioned_element(child):  # Section 9.6
+            queue_positioned(child, node, 0, 0)
+            continue
+
+        child_style = child.style.computed
+        if child_style.display is TABLE_CAPTION:
+            if child_style.caption_side is TOP:
+                top_captions.append(child)
+            else:
+                bottom_captions.append(child)
+        elif child_style.display is TABLE_HEADER_GROUP:
+            headers.append(child)
+        elif child_style.display is TABLE_FOOTER_GROUP:
+            footers.append(child)
+        else:
+            bodies.append(child)
+    sections = headers + bodies + footers
+
+    # Section 17.5.2 - The widths of the columns
+    grid = table_rows(sections)
+    columns = table_columns(classification.children)
+    n_columns = max([len(columns)] + [len(cells) for row, cells in grid])
+    spacing = spacing_x * (n_columns + 1) if n_columns else 0
+    table_width = None if style.width is AUTO else box.content_width
+    if style.table_layout is FIXED and table_width is not None:
+        widths = fixed_column_widths(
+            columns,
+            grid[0][1] if grid else [],
+            n_columns,
+            table_width - spacing,
+            horizontal,
+        )
+    else:
+        classification.columns.measure(grid, columns, n_columns, horizontal)
+        widths = auto_column_widths(
+            classification.columns.minimums,
+            classification.columns.maximums,
+            None if table_width is None else table_width - spacing,
+            box.content_width - spacing,
+        )
+
+    positions = []
+    left = spacing_x
+    for width in widths:
+        positions.append((left, width))
+        left += width + spacing_x
+    grid_width = left if n_columns else 0
+    calculate_table_width(node, max(grid_width, table_width or 0))
+
+    child_sizing = sizing_contexts(display, font, node)
+    row_sizing = (
+        ColumnContext(
+            display, font, grid_width, tuple(positions), spacing_y, child_sizing[1]
+        ),
+        child_sizing[1],
+    )
+
+    # Section 17.5.3 - The rows are stacked, between the captions.
+    offset = 0
+    for caption in top_captions:
+        yield (display, caption, node, viewport, font, child_sizing, cache)
+        offset = stack_caption(caption, offset)
+
+    if sections:
+        offset += spacing_y
+    for section in sections:
+        yield (display, section, node, viewport, font, row_sizing, cache)
+        section.layout.content_top += offset
+        offset += section.layout.border_box_height + spacing_y
+
+    for caption in bottom_captions:
+        yield (display, caption, node, viewport, font, child_sizing, cache)
+        offset = stack_caption(caption, offset)
+
+    # The height of the table is evaluated from the height of its content
+    # (see ``calculate_table_height()``).
+    box.content_height = offset
+
+
+def stack_caption(caption, offset):
+    "Place a laid out caption at an offset; returns the offset below it."
+    box = caption.layout
+    offset += box.margin_top
+    box.content_top += offset
+    return offset + box.border_box_height + box.margin_bottom
+
+
+def layout_table_row_group(display, node, sizing, viewport, font, cache=None):
+    """Lay out the rows of a row group (17.5.3).
+
+    The rows are stacked, separated by the vertical border spacing of the
+    table. Like ``layout_box()``, this is a generator that yields the
+    arguments for the layout of each row.
+    """
+    columns, vertical = sizing
+    offset = 0
+    for child in node.layout._classification.boxes:
+        if is_absolute_positioned_element(child):  # Section 9.6
+            queue_positioned(child, node, 0, 0)
+    for i, row in enumerate(node.layout._classification.flow):
+        if i:
+            offset += columns.spacing
+        yield (display, row, node, viewport, font, sizing, cache)
+        row.layout.content_top += offset
+        offset += row.layout.border_box_height
+
+
+def layout_table_row(display, node, sizing, viewport, font, cache=None):
+    """Lay out the cells of a row in the columns of the table (17.5).
+
+    Like ``layout_box()``, this is a generator that yields the arguments for
+    the layout of each cell.
+
+    FIXME: The cells aren't stretched to the height of the row, nor aligned
+    in it (17.5.3); and row and column spans aren't supported.
+    """
+    columns, vertical = sizing
+    for child in node.layout._classification.boxes:
+        if is_absolute_positioned_element(child):  # Section 9.6
+            queue_positioned(child, node, 0, 0)
+    cells = node.layout._classification.flow
+    for cell, (left, width), cell_sizing in zip(cells, columns.columns, columns.cells):
+        yield (display, cell, node, viewport, font, cell_sizing, cache)
+        cell.layout.content_left += left
+
+
+###########################################################################
+# CSS Flexible Box Layout Module Level 1
+#
+# The items of a flex container are sized together, along the main axis
+# of the container (9.7): in a row, the width of each item is resolved
+# before the items are laid out; in a column, each item is laid out at its
+# natural height, which is then flexed. The measured sizes of each item
+# are retained between layouts, so only the items that change are
+# measured again.
+###########################################################################
+class FlexItemContext(SizingContext):
+    """The context in which a flex item is laid out, along one axis.
+
+    The size is that of the content box of the container; ``used`` is the
+    content width of the item, as resolved by the container. (A grid item
+    is sized by its grid in the same way; its context is the grid area.)
+    """
+
+    __slots__ = ("used",)
+
+    def __init__(self, display, font, size, used):
+        super().__init__(display, font, size)
+        self.used = used
+
+    def __repr__(self):
+        return f"<FlexItemContext {self.used} in {self.size} on {self.display}>"
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.used == other.used
+
+    def __hash__(self):
+        return hash((id(self.display), self.font, self.size, self.used))
+
+
+def vertical_frame(node, context):
+    "The height of the top and bottom borders and padding of a box."
+    style = node.style.computed
+    return (
+        calculate_size(style.border_top_width, context)
+        + calculate_size(style.padding_top, context)
+        + calculate_size(style.padding_bottom, context)
+        + calculate_size(style.border_bottom_width, context)
+    )
+
+
+def fixed_margins(start, end, context):
+    "The sum of a pair of margins; auto margins are 0."
+    total = 0
+    for margin in (start, end):
+        margin = calculate_size(margin, context)
+        if margin is not AUTO:
+            total += margin
+    return total
+
+
+def definite_length(value, context, size):
+    """A length, resolved against a size that may be indefinite.
+
+    ``size`` is the size of the container along the axis of the length, or
+    None if it is indefinite, in which case a percentage is AUTO (CSS
+    Flexbox 9.8, CSS Grid 7.2).
+    """
+    if value.__class__ is Percent:
+        if size is None:
+            return AUTO
+        return value.px(context.display, context.font, size)
+    return calculate_size(value, context)
+
+
+def constrain_height(node, content_height, context):
+    "Constrain a content height by the min-height and max-height of a box (10.7)."
+    style = node.style.computed
+    if style.max_height is not None:
+        content_height = min(content_height, calculate_size(style.max_height, context))
+    if style.min_height is not AUTO:
+        content_height = max(content_height, calculate_size(style.min_height, context))
+    return content_height
+
+
+def definite_height(node, context):
+    """The specified content height of a box, or None if it is indefinite.
+
+    As in ``calculate_block_non_replaced_normal_flow_height()``, a
+    percentage is resolved against the specified height of the parent. The
+    height of a flex item that has been flexed, or stretched, is the height
+    resolved by its container.
+    """
+    if context.__class__ is FlexItemContext and context.used is not None:
+        return context.used
+    height = node.style.computed.height
+    if height is AUTO:
+        return None
+    if height.__class__ is Percent:
+        parent = getattr(node, "parent", None)
+        if parent is None:
+            size = context.size
+        else:
+            size = parent.style.computed.height
+            if size is AUTO or size.__class__ is Percent:
+                return None
+            size = calculate_size(size, context)
+        height = height.px(context.display, context.font, size)
+    else:
+        height = calculate_size(height, context)
+    return constrain_height(node, height, context)
+
+
+def align_self(node, container):
+    "The alignment of a flex item across its line (8.3)."
+    align = node.style.computed.align_self
+    if align is AUTO:
+        return container.style.computed.align_items
+    return align
+
+
+class FlexItem:
+    """The sizes of a flex item along the main axis of its container (9.2).
+
+    ``content`` is the (minimum, maximum) size of the content box of the
+    item, measured from its content; ``base`` and ``hypothetical`` are its
+    flex base size and hypothetical main size; ``minimum`` and ``maximum``
+    bound its main size; and ``frame`` is the size of its margins, borders
+    and padding along the main axis. ``target`` is the main size of the
+    content box, as resolved by the last layout of the container.
+    """
+
+    __slots__ = (
+        "node",
+        "content",
+        "base",
+        "hypothetical",
+        "minimum",
+        "maximum",
+        "frame",
+        "grow",
+        "shrink",
+        "target",
+    )
+
+    def __init__(self, node, context, row, main_size, content):
+        style = node.style.computed
+        self.node = node
+        self.content = content
+        self.grow = style.flex_grow
+        self.shrink = style.flex_shrink
+        if row:
+            self.frame = horizontal_frame(node, context) + fixed_margins(
+                style.margin_left, style.margin_right, context
+            )
+            size = definite_length(style.width, context, main_size)
+            minimum = style.min_width
+            maximum = style.max_width
+        else:
+            self.frame = vertical_frame(node, context) + fixed_margins(
+                style.margin_top, style.margin_bottom, context
+            )
+            size = definite_length(style.height, context, main_size)
+            minimum = style.min_height
+            maximum = style.max_height
+
+        # 9.2 3 The flex base size is the flex basis; failing that, the
+        # main size of the item; failing that, the size of its content.
+        if style.flex_basis is AUTO:
+            base = size
+        elif style.flex_basis is CONTENT:
+            base = AUTO
+        else:
+            base = definite_length(style.flex_basis, context, main_size)
+        self.base = content[1] if base is AUTO else base
+
+        # 4.5 The automatic minimum size is the size of the content, or the
+        # specified size, if that is smaller.
+        if minimum is not AUTO:
+            minimum = definite_length(minimum, context, main_size)
+        if minimum is AUTO:
+            if style.overflow is VISIBLE:
+                minimum = content[0] if size is AUTO else min(content[0], size)
+            else:
+                minimum = 0
+        self.minimum = minimum
+        if maximum is not None:
+            maximum = definite_length(maximum, context, main_size)
+        self.maximum = float("inf") if maximum in (None, AUTO) else maximum
+
+        # 9.2 3E The hypothetical main size is clamped by the min and max.
+        self.hypothetical = min(max(self.base, self.minimum), self.maximum)
+        self.target = self.hypothetical
+
+    def __repr__(self):
+        return f"<FlexItem {self.base} -> {self.hypothetical} of {self.node}>"
+
+
+class FlexMeasurements:
+    """The measured sizes of the items of a flex container.
+
+    The flex base size and hypothetical main size of each item (see
+    ``FlexItem``) are retained between layouts, keyed by the main axis
+    context of the container; when the container is laid out again, only
+    the items that are dirty, or have dirty descendants, are measured
+    again. A change to the cross size of a row doesn't measure any item.
+    ``heights`` are the natural heights of the items, as the layout of the
+    container replaces them; ``widths`` are the (minimum, maximum) content
+    widths of the items in a column.
+    """
+
+    __slots__ = ("context", "items", "heights", "widths")
+
+    def __init__(self):
+        self.context = None
+        self.items = {}
+        self.heights = {}
+        self.widths = {}
+
+    def __repr__(self):
+        return f"<FlexMeasurements of {len(self.items)} items>"
+
+    def start(self, context):
+        "Discard the measured items, if the main axis context has changed."
+        if context != self.context:
+            self.context = context
+            self.items = {}
+            self.widths = {}
+
+    def item(self, node, context, row, main_size, stale, natural=None):
+        """The measured sizes of a flex item.
+
+        In a row, the content of an item is measured without laying it out
+        (see ``content_widths()``); in a column, it is the natural height
+        of the item, once it has been laid out.
+        """
+        item = self.items.get(id(node))
+        if (
+            item is None
+            or item.node is not node
+            or stale
+            or (not row and item.content[0] != natural)
+        ):
+            if row:
+                minimum, maximum = content_widths(node, context, sized=False)
+                frame = horizontal_frame(node, context)
+                content = (minimum - frame, maximum - frame)
+            else:
+                content = (natural, natural)
+            item = self.items[id(node)] = FlexItem(
+                node, context, row, main_size, content
+            )
+        return item
+
+    def fit_content_width(self, node, context, available_width, stale):
+        "The width of an item in a column that isn't stretched (9.4 11)."
+        widths = self.widths.get(id(node))
+        if widths is None or stale:
+            minimum, maximum = content_widths(node, context)
+            frame = horizontal_frame(node, context)
+            widths = self.widths[id(node)] = (minimum - frame, maximum - frame)
+        return max(widths[0], min(available_width, widths[1]))
+
+
+def is_stale(node):
+    "Must the sizes of an item be measured again?"
+    box = node.layout
+    return box is None or box.dirty or box._dirty_descendants
+
+
+def break_lines(items, main_size):
+    "Collect flex items into lines, by their hypothetical main sizes (9.3 5)."
+    lines = []
+    line = []
+    extent = 0
+    for item in items:
+        size = item.hypothetical + item.frame
+        if line and main_size is not None and extent + size > main_size:
+            lines.append(line)
+            line = []
+            extent = 0
+        line.append(item)
+        extent += size
+    lines.append(line)
+    return lines
+
+
+def resolve_flexible_lengths(line, main_size):
+    """Resolve the main size of each item on a flex line (9.7).
+
+    Each pass sizes every unfrozen item on the line at once, from sums over
+    the line; as an item is only frozen by a min or max violation, the
+    sizes are usually resolved in a single pass. The sizes are rounded so
+    that they add up to the rounded sum of the sizes.
+    """
+    sizes = [item.hypothetical for item in line]
+    if main_size is not None and line:
+        frame = sum(item.frame for item in line)
+        # 9.7 1 The used flex factor
+        growing = frame + sum(sizes) < main_size
+        if growing:
+            factors = [item.grow for item in line]
+        else:
+            factors = [item.shrink * item.base for item in line]
+
+        # 9.7 2 Size inflexible items
+        frozen = [
+            factor == 0
+            or (growing and item.base > item.hypothetical)
+            or (not growing and item.base < item.hypothetical)
+            for factor, item in zip(factors, line)
+        ]
+
+        # 9.7 3 The initial free space
+        initial = main_size - frame
+        for is_frozen, size, item in zip(frozen, sizes, line):
+            initial -= size if is_frozen else item.base
+
+        while not all(frozen):
+            # 9.7 4b The remaining free space; if the flex factors add up to
+            # less than 1, only that fraction of the initial free space.
+            free = main_size - frame
+            total = 0
+            flex = 0
+            for is_frozen, size, factor, item in zip(frozen, sizes, factors, line):
+                if is_frozen:
+                    free -= size
+                else:
+                    free -= item.base
+                    total += factor
+                    flex += item.grow if growing else item.shrink
+            if flex < 1 and abs(initial * flex) < abs(free):
+                free = initial * flex
+
+            # 9.7 4c Distribute the free space in proportion to the flex
+            # factors, and 4d clamp each size by its min and max.
+            violation = 0
+            violations = []
+            for i, (is_frozen, factor, item) in enumerate(zip(frozen, factors, line)):
+                if is_frozen:
+                    violations.append(0)
+                    continue
+                target = item.base
+                if total:
+                    target += free * factor / total
+                clamped = max(min(max(target, item.minimum), item.maximum), 0)
+                sizes[i] = clamped
+                violations.append(clamped - target)
+                violation += clamped - target
+
+            # 9.7 4e Freeze the items that violate their bounds in the same
+            # direction as the total violation (or every item, if there is
+            # none).
+            for i, item_violation in enumerate(violations):
+                if (
+                    violation == 0
+                    or (violation > 0 and item_violation > 0)
+                    or (violation < 0 and item_violation < 0)
+                ):
+                    frozen[i] = True
+
+    total = 0
+    previous = 0
+    for item, size in zip(line, sizes):
+        total += size
+        rounded = round(total)
+        item.target = rounded - previous
+        previous = rounded
+
+
+def justify(free, count, justification):
+    """The (offset, gap) of the items on a line, or of the lines (8.2, 8.4).
+
+    ``free`` is the free space, once any auto margins have absorbed it.
+    """
+    if justification is SPACE_BETWEEN and free > 0 and count > 1:
+        shares = distribute(free, [1] * (count - 1))
+        return 0, shares
+    elif justification is SPACE_AROUND and free > 0:
+        shares = distribute(free, [1] * count)
+        return shares[0] // 2, [
+            shares[i] - shares[i] // 2 + shares[i + 1] // 2 for i in range(count - 1)
+        ]
+    elif justification is FLEX_END:
+        return free, None
+    elif justification is CENTER or justification is SPACE_AROUND:
+        return free // 2, None
+    return 0, None
+
+
+def layout_item(display, node, container, viewport, font, sizing, cache, heights):
+    """Lay out a flex or grid item, retaining its natural height.
+
+    The height of an item is replaced once it has been laid out (when it is
+    flexed, or stretched); when the previous layout of the item is reused,
+    its natural height is restored from ``heights``. Like ``layout_box()``,
+    this is a generator that yields the arguments for the layout of the
+    item.
+    """
+    if id(node) not in heights and node.layout is not None:
+        # The natural height of the item isn't known; lay it out again.
+        node.layout._dirty = True
+
+    yield (display, node, container, viewport, font, sizing, cache)
+
+    if node.layout._layout_inputs is sizing:
+        heights[id(node)] = node.layout.content_height
+    else:
+        node.layout.content_height = heights[id(node)]
+
+
+def measure_item(display, node, container, viewport, font, sizing, cache, heights):
+    """Find the natural height of a flex item.
+
+    The item is laid out at its natural height; once it has been flexed, or
+    stretched, it is laid out again at its resolved height (see
+    ``layout_flex()``). The natural height is retained in ``heights``,
+    along with the sizing contexts in which it was measured, so a clean
+    item that is measured in the same contexts isn't laid out again to
+    measure it. Like ``layout_box()``, this is a generator that yields the
+    arguments for the layout of the item; it returns the natural height.
+    """
+    measured = heights.get(id(node))
+    if measured is None or measured[0] != sizing or is_stale(node):
+        yield (display, node, container, viewport, font, sizing, cache)
+        measured = heights[id(node)] = (sizing, node.layout.content_height)
+    return measured[1]
+
+
+def natural_border_box_height(node, heights):
+    "The height of the border box of a flex item, at its natural height."
+    box = node.layout
+    return box.border_box_height - box.content_height + heights[id(node)][1]
+
+
+def layout_flex(display, node, sizing, viewport, font, cache=None):
+    """Lay out the items of a flex container (9).
+
+    The items are collected into lines, and flexed along the main axis of
+    each line; the lines are then stacked along the cross axis, and the
+    items aligned in them. Each item is laid out at its natural height
+    (see ``measure_item()``), then laid out again at the height to which it
+    is flexed, or stretched, so its content is laid out in the height of
+    the item; a clean item reuses its previous layout at that height. Like
+    ``layout_box()``, this is a generator that yields the arguments for the
+    layout of each item.
+
+    FIXME: Baseline alignment is treated as flex-start; the items of a
+    multi-line column aren't stretched to the width of their line; and
+    inline-level children are wrapped in an anonymous item, rather than
+    being blockified.
+    """
+    style = node.style.computed
+    box = node.layout
+    classification = box._classification
+    measurements = classification.flex
+    direction = style.flex_direction
+    row = direction is ROW or direction is ROW_REVERSE
+    reverse = direction is ROW_REVERSE or direction is COLUMN_REVERSE
+    wrap = style.flex_wrap is not NOWRAP
+
+    # 9.2 The available main and cross space of the container
+    horizontal, vertical = sizing_contexts(display, font, node)
+    inner_width = box.content_width
+    inner_height = definite_height(node, sizing[1])
+    if inner_height is not None:
+        vertical = SizingContext(display, font, inner_height)
+    item_vertical = FlexItemContext(display, font, vertical.size, None)
+
+    items = []
+    for child in classification.boxes:
+        if is_absolute_positioned_element(child):  # 4.1
+            queue_positioned(child, node, 0, 0)
+        else:
+            items.append(child)
+
+    if row:
+        main_size = inner_width
+        measurements.start(horizontal)
+
+        # 9.2 - 9.7 The width of each item is resolved, and the items are
+        # laid out at that width.
+        flex_items = [
+            measurements.item(item, horizontal, row, main_size, is_stale(item))
+            for item in items
+        ]
+        lines = break_lines(flex_items, main_size) if wrap else [flex_items]
+        for line in lines:
+            resolve_flexible_lengths(line, main_size)
+
+        for item in flex_items:
+            item_sizing = (
+                FlexItemContext(display, font, inner_width, item.target),
+                item_vertical,
+            )
+            yield from measure_item(
+                display,
+                item.node,
+                node,
+                viewport,
+                font,
+                item_sizing,
+                cache,
+                measurements.heights,
+            )
+    else:
+        main_size = inner_height
+        measurements.start((horizontal, inner_height))
+
+        # 9.4 11 Each item is laid out at its width; then its natural
+        # height is flexed.
+        flex_items = []
+        for item in items:
+            item_style = item.style.computed
+            stale = is_stale(item)
+            frame = horizontal_frame(item, horizontal) + fixed_margins(
+                item_style.margin_left, item_style.margin_right, horizontal
+            )
+            if item_style.width is not AUTO:
+                width = constrain_width(
+                    item, calculate_size(item_style.width, horizontal), horizontal
+                )
+            elif (
+                align_self(item, node) is STRETCH
+                and item_style.margin_left is not AUTO
+                and item_style.margin_right is not AUTO
+            ):
+                width = constrain_width(item, max(0, inner_width - frame), horizontal)
+            else:
+                width = measurements.fit_content_width(
+                    item, horizontal, inner_width - frame, stale
+                )
+
+            item_sizing = (
+                FlexItemContext(display, font, inner_width, width),
+                item_vertical,
+            )
+            natural = yield from measure_item(
+                display,
+                item,
+                node,
+                viewport,
+                font,
+                item_sizing,
+                cache,
+                measurements.heights,
+            )
+            flex_items.append(
+                measurements.item(item, horizontal, row, main_size, stale, natural)
+            )
+
+        lines = break_lines(flex_items, main_size) if wrap else [flex_items]
+        for line in lines:
+            resolve_flexible_lengths(line, main_size)
+
+    # 9.4 The cross size of each line is that of its largest item.
+    crosses = []
+    for line in lines:
+        cross = 0
+        for item in line:
+            item_style = item.node.style.computed
+            if row:
+                outer = natural_border_box_height(
+                    item.node, measurements.heights
+                ) + fixed_margins(
+                    item_style.margin_top, item_style.margin_bottom, horizontal
+                )
+            else:
+                outer = item.node.layout.border_box_width + fixed_margins(
+                    item_style.margin_left, item_style.margin_right, horizontal
+                )
+            cross = max(cross, outer)
+        crosses.append(cross)
+
+    cross_size = inner_height if row else inner_width
+    if not wrap and cross_size is not None:
+        # 9.4 15 The line of a single-line container fills the container.
+        crosses[0] = cross_size
+    elif cross_size is None:
+        cross_size = sum(crosses)
+
+    # 9.4 15 The lines of a multi-line container are packed by
+    # align-content.
+    free = cross_size - sum(crosses)
+    offset, gaps = 0, None
+    if wrap and style.align_content is STRETCH:
+        if free > 0:
+            crosses = [
+                cross + share
+                for cross, share in zip(crosses, distribute(free, [1] * len(lines)))
+            ]
+    elif wrap:
+        offset, gaps = justify(free, len(lines), style.align_content)
+
+    # Each item is laid out again at its main size (in a column), or at the
+    # cross size of its line, if it is stretched (in a row; 9.4 11); an item
+    # that keeps its natural height reuses its layout.
+    for line, line_cross in zip(lines, crosses):
+        for item in line:
+            child = item.node
+            item_sizing, natural = measurements.heights[id(child)]
+            if row:
+                height = natural
+                child_style = child.style.computed
+                if (
+                    child_style.height is AUTO
+                    and align_self(child, node) is STRETCH
+                    and child_style.margin_top is not AUTO
+                    and child_style.margin_bottom is not AUTO
+                ):
+                    cross_free = line_cross - (
+                        natural_border_box_height(child, measurements.heights)
+                        + fixed_margins(
+                            child_style.margin_top,
+                            child_style.margin_bottom,
+                            horizontal,
+                        )
+                    )
+                    height = constrain_height(
+                        child, max(0, natural + cross_free), vertical
+                    )
+            else:
+                height = item.target
+
+            if height != natural:
+                item_sizing = (
+                    item_sizing[0],
+                    FlexItemContext(display, font, vertical.size, height),
+                )
+            yield (display, child, node, viewport, font, item_sizing, cache)
+
+    positions = []
+    position = offset
+    for i, cross in enumerate(crosses):
+        if style.flex_wrap is WRAP_REVERSE:
+            positions.append(cross_size - position - cross)
+        else:
+            positions.append(position)
+        position += cross + (gaps[i] if gaps and i < len(gaps) else 0)
+
+    used_main = 0
+    for line, line_cross, line_position in zip(lines, crosses, positions):
+        # 9.5 Main-axis alignment; auto margins absorb any free space.
+        extent = sum(item.target + item.frame for item in line)
+        used_main = max(used_main, extent)
+        line_main = extent if main_size is None else main_size
+        free = line_main - extent
+
+        if row:
+            start, end = "margin_left", "margin_right"
+            cross_start, cross_end = "margin_top", "margin_bottom"
+        else:
+            start, end = "margin_top", "margin_bottom"
+            cross_start, cross_end = "margin_left", "margin_right"
+
+        auto_margins = []
+        for item in line:
+            item_style = item.node.style.computed
+            auto_margins.append(
+                (getattr(item_style, start) is AUTO, getattr(item_style, end) is AUTO)
+            )
+        n_auto = sum(before + after for before, after in auto_margins)
+        if n_auto and free > 0:
+            shares = iter(distribute(free, [1] * n_auto))
+            offset, gaps = 0, None
+        else:
+            shares = None
+            offset, gaps = justify(free, len(line), style.justify_content)
+
+        main = offset
+        for i, (item, (auto_start, auto_end)) in enumerate(zip(line, auto_margins)):
+            child = item.node
+            child_box = child.layout
+            if auto_start and shares:
+                setattr(child_box, start, next(shares))
+                main += getattr(child_box, start)
+            item_start = main
+            main += item.target + item.frame
+            if auto_end and shares:
+                setattr(child_box, end, next(shares))
+                main += getattr(child_box, end)
+            if gaps and i < len(gaps):
+                main += gaps[i]
+
+            # 9.6 Cross-axis alignment
+            child_style = child.style.computed
+            if row:
+                outer_cross = child_box.border_box_height + fixed_margins(
+                    child_style.margin_top, child_style.margin_bottom, horizontal
+                )
+            else:
+                outer_cross = child_box.border_box_width + fixed_margins(
+                    child_style.margin_left, child_style.margin_right, horizontal
+                )
+            cross_free = line_cross - outer_cross
+            align = align_self(child, node)
+            auto_cross_start = getattr(child_style, cross_start) is AUTO
+            auto_cross_end = getattr(child_style, cross_end) is AUTO
+
+            if auto_cross_start or auto_cross_end:
+                # 8.1 Auto margins absorb the free space across the line.
+                cross_free = max(0, cross_free)
+                if auto_cross_start and auto_cross_end:
+                    cross = cross_free // 2
+                    setattr(child_box, cross_start, cross)
+                    setattr(child_box, cross_end, cross_free - cross)
+                elif auto_cross_start:
+                    cross = cross_free
+                    setattr(child_box, cross_start, cross)
+                else:
+                    cross = 0
+                    setattr(child_box, cross_end, cross_free)
+            elif align is STRETCH:
+                # A stretched item has been laid out at the cross size of
+                # its line.
+                cross = 0
+            elif (align is FLEX_END) != (style.flex_wrap is WRAP_REVERSE):
+                cross = cross_free
+            elif align is CENTER:
+                cross = cross_free // 2
+            else:
+                cross = 0
 
+            if reverse:
+                item_start = line_main - item_start - item.target - item.frame
 
-def is_inline_element(node):
-    return node.style.display is INLINE
+            if row:
+                child_box.content_left += item_start
+                child_box.content_top += line_position + cross
+            else:
+                child_box.content_left += line_position + cross
+                child_box.content_top += item_start
 
+    # The height of the container is evaluated from the height of its
+    # content (see ``calculate_flex_container_height()``).
+    if inner_height is not None:
+        box.content_height = inner_height
+    else:
+        box.content_height = constrain_height(
+            node, cross_size if row else used_main, sizing[1]
+        )
 
-def is_float_positioned_element(node):
-    return node.style.float is not None
 
+###########################################################################
+# CSS Grid Layout Module Level 1
+#
+# The items of a grid are placed in its cells when the box tree of the
+# grid is classified (see ``GridPlacement``), and only placed again when
+# the box tree, or the placement of an item, changes. Each time the grid
+# is laid out, its tracks are sized from the items they hold (11), and
+# each item is laid out in its grid area.
+###########################################################################
+class GridOccupancy:
+    """The occupied cells of a grid, as a bitmap.
 
-def is_absolute_positioned_element(node):
-    return node.style.position is ABSOLUTE or node.style.position is FIXED
+    Each track along the major axis of the auto-placement (each row, in
+    the row flow) is an integer, whose bits are set for the occupied cells
+    of the track; the cells where an item fits in a track are found with a
+    few operations on those integers, rather than by testing each cell.
+    ``open`` is the first track that isn't full, before which a search for
+    a free cell doesn't need to start; ``limit`` is the number of tracks
+    along the minor axis, or None while it isn't known.
+    """
 
+    __slots__ = ("tracks", "limit", "open")
 
-def establishes_inline_formatting_context(node):
-    if is_block_container(node):
-        for child in node.children:
-            if is_block_level_element(child):
-                return False
-        return True
+    def __init__(self):
+        self.tracks = []
+        self.limit = None
+        self.open = 0
+
+    def __repr__(self):
+        return f"<GridOccupancy of {len(self.tracks)} x {self.limit} cells>"
+
+    def bound(self, limit):
+        "Set the number of tracks along the minor axis."
+        self.limit = limit
+        self.advance()
+
+    def advance(self):
+        "Move ``open`` past the tracks that are full."
+        if self.limit is None:
+            return
+        full = (1 << self.limit) - 1
+        tracks = self.tracks
+        while self.open < len(tracks) and tracks[self.open] & full == full:
+            self.open += 1
+
+    def occupy(self, major, major_span, minor, minor_span):
+        "Mark the cells of an item as occupied."
+        tracks = self.tracks
+        if len(tracks) < major + major_span:
+            tracks.extend([0] * (major + major_span - len(tracks)))
+        cells = ((1 << minor_span) - 1) << minor
+        for i in range(major, major + major_span):
+            tracks[i] |= cells
+        self.advance()
+
+    def occupied(self, major, major_span):
+        "The cells occupied in any of a span of tracks."
+        occupied = 0
+        for track in self.tracks[major : major + major_span]:
+            occupied |= track
+        return occupied
+
+    def fits(self, major, major_span, minor, minor_span):
+        "Does an item fit at a position?"
+        cells = ((1 << minor_span) - 1) << minor
+        return not self.occupied(major, major_span) & cells
+
+    def fit(self, major, major_span, minor, minor_span):
+        """The first position along the minor axis, from ``minor``, at which
+        an item fits in a span of tracks; or None if it doesn't fit.
+        """
+        free = ~self.occupied(major, major_span)
+        if self.limit is not None:
+            free &= (1 << self.limit) - 1
+        # The bits at which a run of minor_span free cells starts.
+        starts = free
+        for i in range(1, minor_span):
+            starts &= free >> i
+        starts = starts >> minor << minor
+        if not starts:
+            return None
+        return (starts & -starts).bit_length() - 1
+
+    def search(self, major, minor, major_span, minor_span):
+        """The first position, in reading order from (major, minor), at which
+        an item fits.
+        """
+        while True:
+            start = self.fit(major, major_span, minor, minor_span)
+            if start is not None:
+                return major, start
+            major += 1
+            minor = 0
+
+
+def grid_span(start, end, n_lines):
+    """The (start, span) of a grid item along one axis, in tracks (8.3).
+
+    The start is None if the item is auto-placed along the axis.
+    ``n_lines`` is the number of lines of the explicit grid, from which
+    negative lines are counted.
+
+    FIXME: Implicit tracks aren't created before the explicit grid; a line
+    before the start of the grid is its first line.
+    """
+
+    def track(value):
+        line = value.line
+        return max(0, line - 1 if line > 0 else n_lines + line)
+
+    start_line = None if start is AUTO or start.span is not None else track(start)
+    end_line = None if end is AUTO or end.span is not None else track(end)
+    if start_line is not None and end_line is not None:
+        if end_line < start_line:
+            start_line, end_line = end_line, start_line
+        return start_line, max(1, end_line - start_line)
+    elif start_line is not None:
+        return start_line, 1 if end is AUTO else end.span
+    elif end_line is not None:
+        span = 1 if start is AUTO else start.span
+        return max(0, end_line - span), span
+    elif start is not AUTO:
+        # 8.3.1 If both lines are spans, the end span is ignored.
+        return None, start.span
     else:
-        return True
-
-
-def establishes_table_formatting_context(node):
-    return False  # TODO
+        return None, 1 if end is AUTO else end.span
+
+
+def place_grid_items(areas, n_major, n_minor, dense):
+    """Place the items of a grid in its cells (8.5).
+
+    ``areas`` are the (major start, major span, minor start, minor span) of
+    each item, along the major axis of the auto-placement (the rows, in the
+    row flow) and the minor axis; a start is None if the item is
+    auto-placed along that axis. ``n_major`` and ``n_minor`` are the number
+    of tracks of the explicit grid. Returns the placed areas, and the
+    number of tracks of the implicit grid along each axis.
+
+    The occupancy of the cells is a bitmap (see ``GridOccupancy``); the
+    sparse placement never searches before the last item it placed, and
+    the dense placement never searches the tracks that are full, so a grid
+    is placed in close to linear time.
+    """
+    occupancy = GridOccupancy()
+    placed = list(areas)
+
+    # 8.5 1 The items with a definite position on both axes
+    for major, major_span, minor, minor_span in areas:
+        if major is not None and minor is not None:
+            occupancy.occupy(major, major_span, minor, minor_span)
+
+    # 8.5 2 The items locked to a track along the major axis
+    cursors = {}
+    for i, (major, major_span, minor, minor_span) in enumerate(areas):
+        if major is not None and minor is None:
+            start = 0 if dense else cursors.get(major, 0)
+            minor = occupancy.fit(major, major_span, start, minor_span)
+            occupancy.occupy(major, major_span, minor, minor_span)
+            cursors[major] = minor + minor_span
+            placed[i] = (major, major_span, minor, minor_span)
+
+    # 8.5 3 The number of tracks along the minor axis
+    for major, major_span, minor, minor_span in placed:
+        n_minor = max(n_minor, minor_span if minor is None else minor + minor_span)
+    occupancy.bound(n_minor)
+
+    # 8.5 4 The remaining items are placed by the auto-placement cursor.
+    cursor_major = cursor_minor = 0
+    for i, (major, major_span, minor, minor_span) in enumerate(placed):
+        if major is not None:
+            continue
+        if dense:
+            cursor_major, cursor_minor = occupancy.open, 0
+
+        if minor is not None:
+            if not dense and minor < cursor_minor:
+                cursor_major += 1
+            major = cursor_major
+            while not occupancy.fits(major, major_span, minor, minor_span):
+                major += 1
+        else:
+            major, minor = occupancy.search(
+                cursor_major, cursor_minor, major_span, minor_span
+            )
 
+        occupancy.occupy(major, major_span, minor, minor_span)
+        placed[i] = (major, major_span, minor, minor_span)
+        cursor_major, cursor_minor = major, minor + minor_span
+
+    return placed, max(n_major, len(occupancy.tracks)), n_minor
+
+
+class GridPlacement:
+    """The placement of the items of a grid in its cells (8).
+
+    ``items`` are the grid items, in order; ``areas`` are the (row, row
+    span, column, column span) of each item, in tracks from the start of
+    the grid; and ``rows`` and ``columns`` are the number of tracks of the
+    implicit grid. The placement only depends on the box tree of the grid,
+    its number of explicit tracks, its auto-placement flow, and the
+    placement of its items, which discard the classification of the grid
+    when they change; so the items are only placed again when one of those
+    does. The (minimum, maximum) ``widths`` and natural ``heights`` of the
+    items are retained between layouts.
+    """
+
+    __slots__ = ("items", "areas", "rows", "columns", "context", "widths", "heights")
+
+    def __init__(self, node, boxes):
+        style = node.style.computed
+        self.items = [box for box in boxes if not is_absolute_positioned_element(box)]
+        n_rows = len(style.grid_template_rows or ())
+        n_columns = len(style.grid_template_columns or ())
+
+        flow = style.grid_auto_flow
+        column_flow = flow is COLUMN or flow is COLUMN_DENSE
+        areas = []
+        for item in self.items:
+            item_style = item.style.computed
+            rows = grid_span(
+                item_style.grid_row_start, item_style.grid_row_end, n_rows + 1
+            )
+            columns = grid_span(
+                item_style.grid_column_start,
+                item_style.grid_column_end,
+                n_columns + 1,
+            )
+            areas.append(columns + rows if column_flow else rows + columns)
 
-class Viewport:
-    def __init__(self, display, root):
-        self.display = display
-        self.children = [root]
-        self.layout = self.display
+        if column_flow:
+            placed, n_columns, n_rows = place_grid_items(
+                areas, n_columns, n_rows, flow is not COLUMN
+            )
+            self.areas = [
+                (row, row_span, column, column_span)
+                for column, column_span, row, row_span in placed
+            ]
+        else:
+            placed, n_rows, n_columns = place_grid_items(
+                areas, n_rows, n_columns, flow is not ROW
+            )
+            self.areas = placed
+        self.rows = n_rows
+        self.columns = n_columns
+
+        self.context = None
+        self.widths = {}
+        self.heights = {}
+
+    def __repr__(self):
+        return f"<GridPlacement of {len(self.items)} items in {self.rows} x {self.columns}>"
+
+    def measure(self, context):
+        """The (minimum, maximum) outer widths of each item.
+
+        Only the items that are dirty, or have dirty descendants, are
+        measured again (see ``content_widths()``).
+        """
+        if context != self.context:
+            self.context = context
+            self.widths = {}
+
+        widths = []
+        for item in self.items:
+            width = self.widths.get(id(item))
+            if width is None or is_stale(item):
+                style = item.style.computed
+                margins = fixed_margins(style.margin_left, style.margin_right, context)
+                minimum, maximum = content_widths(item, context)
+                width = self.widths[id(item)] = (minimum + margins, maximum + margins)
+            widths.append(width)
+        return widths
+
+
+def grid_tracks(template, auto, count, context, size):
+    """The (minimum, maximum) sizing functions of the tracks of a grid (7.2).
+
+    The explicit tracks are sized by the template, and the implicit tracks
+    by ``auto``. A length is resolved to pixels, and a percentage of an
+    indefinite ``size`` is auto; a flexible minimum is auto.
+    """
+
+    def breadth(value):
+        if (
+            value is AUTO
+            or value is MIN_CONTENT
+            or value is MAX_CONTENT
+            or value.__class__ is Fr
+        ):
+            return value
+        return definite_length(value, context, size)
+
+    tracks = []
+    template = list(template or ())
+    for i in range(count):
+        track = template[i] if i < len(template) else auto
+        minimum = breadth(track.minimum)
+        tracks.append(
+            (AUTO if minimum.__class__ is Fr else minimum, breadth(track.maximum))
+        )
+    return tracks
+
+
+def is_intrinsic(value):
+    return value is AUTO or value is MIN_CONTENT or value is MAX_CONTENT
+
+
+def grow_tracks(sizes, tracks, space):
+    "Share space equally between some tracks."
+    if space > 0 and tracks:
+        share = space / len(tracks)
+        for i in tracks:
+            sizes[i] += share
+
+
+def grow_to_limits(bases, limits, tracks, space):
+    "Share space equally between some tracks, up to their growth limits."
+    tracks = [i for i in tracks if bases[i] < limits[i]]
+    while space > 0 and tracks:
+        share = space / len(tracks)
+        growing = [i for i in tracks if limits[i] - bases[i] > share]
+        if len(growing) == len(tracks):
+            for i in tracks:
+                bases[i] += share
+            return
+        for i in tracks:
+            if i not in growing:
+                space -= limits[i] - bases[i]
+                bases[i] = limits[i]
+        tracks = growing
+
+
+def size_grid_tracks(tracks, contributions, available, gap, stretch):
+    """Size the tracks of a grid along one axis (11.3 - 11.8).
+
+    ``tracks`` are the (minimum, maximum) sizing functions of each track,
+    and ``contributions`` the (start, span, minimum, maximum) outer sizes
+    of each item; ``available`` is the size of the grid, or None if it is
+    indefinite. The base sizes and growth limits of the tracks are held in
+    flat lists, and each step of the algorithm is one pass over them (or
+    over the items). Returns the size of each track, rounded so the sizes
+    add up to their rounded sum.
+
+    FIXME: The extra size of an item that spans several intrinsic tracks
+    is shared equally between them, rather than in the order of 11.5.
+    """
+    n = len(tracks)
+    bases = [0] * n
+    limits = [float("inf")] * n
+    flexes = [0] * n
+
+    # 11.4 Initialize each track
+    for i, (minimum, maximum) in enumerate(tracks):
+        if not is_intrinsic(minimum):
+            bases[i] = minimum
+        if maximum.__class__ is Fr:
+            flexes[i] = maximum.value
+        elif not is_intrinsic(maximum):
+            limits[i] = max(maximum, bases[i])
+
+    # 11.5 Resolve intrinsic track sizes, from the items that span the
+    # fewest tracks to those that span the most.
+    for start, span, minimum, maximum in sorted(contributions, key=lambda c: c[1]):
+        spanned = range(start, start + span)
+        spacing = gap * (span - 1)
+        if any(flexes[i] for i in spanned):
+            # 11.5 4 The items that cross flexible tracks only grow their
+            # intrinsic minimums.
+            grow_tracks(
+                bases,
+                [i for i in spanned if flexes[i] and is_intrinsic(tracks[i][0])],
+                minimum - spacing - sum(bases[i] for i in spanned),
+            )
+            continue
 
+        minimums = [i for i in spanned if is_intrinsic(tracks[i][0])]
+        if minimums and all(tracks[i][0] is MAX_CONTENT for i in minimums):
+            size = maximum
+        else:
+            size = minimum
+        grow_tracks(bases, minimums, size - spacing - sum(bases[i] for i in spanned))
 
-class DummyFont:
-    def __init__(self, size):
-        self.size = size
+        maximums = [i for i in spanned if is_intrinsic(tracks[i][1])]
+        if maximums and all(tracks[i][1] is MIN_CONTENT for i in maximums):
+            size = minimum
+        else:
+            size = maximum
+        for i in maximums:
+            if limits[i] == float("inf"):
+                limits[i] = bases[i]
+        spanned_limits = sum(
+            bases[i] if limits[i] == float("inf") else limits[i] for i in spanned
+        )
+        grow_tracks(limits, maximums, size - spacing - spanned_limits)
+
+    for i in range(n):
+        if limits[i] == float("inf") or limits[i] < bases[i]:
+            limits[i] = bases[i]
+
+    gaps = gap * (n - 1) if n else 0
+    # 11.6 Maximize the tracks, up to their growth limits.
+    if available is not None:
+        grow_to_limits(bases, limits, range(n), available - gaps - sum(bases))
+
+    # 11.7 Expand the flexible tracks, in proportion to their flex factors.
+    flexible = [i for i in range(n) if flexes[i]]
+    if flexible:
+        if available is not None:
+            # 11.7.1 The size of a fraction of the free space; a track that
+            # is larger than its share is treated as inflexible.
+            space = available - gaps - sum(bases[i] for i in range(n) if not flexes[i])
+            while True:
+                fraction = space / max(1, sum(flexes[i] for i in flexible))
+                inflexible = [i for i in flexible if flexes[i] * fraction < bases[i]]
+                if not inflexible:
+                    break
+                for i in inflexible:
+                    space -= bases[i]
+                flexible = [i for i in flexible if i not in inflexible]
+        else:
+            # 11.7 The largest fraction needed by a flexible track, or by
+            # an item that crosses flexible tracks.
+            fraction = 0
+            for i in flexible:
+                fraction = max(
+                    fraction, bases[i] / flexes[i] if flexes[i] > 1 else bases[i]
+                )
+            for start, span, minimum, maximum in contributions:
+                spanned = range(start, start + span)
+                factors = sum(flexes[i] for i in spanned)
+                if factors:
+                    rest = (
+                        maximum
+                        - gap * (span - 1)
+                        - sum(bases[i] for i in spanned if not flexes[i])
+                    )
+                    fraction = max(fraction, rest / max(1, factors))
+        for i in flexible:
+            bases[i] = max(bases[i], flexes[i] * fraction)
+
+    # 11.8 Stretch the auto tracks into the free space.
+    if stretch and available is not None:
+        grow_tracks(
+            bases,
+            [i for i in range(n) if tracks[i][1] is AUTO],
+            available - gaps - sum(bases),
+        )
 
-    @property
-    def em(self):
-        return self.size
+    sizes = []
+    total = 0
+    previous = 0
+    for base in bases:
+        total += base
+        rounded = round(total)
+        sizes.append(rounded - previous)
+        previous = rounded
+    return sizes
+
+
+def track_positions(sizes, gap, free, justification):
+    """The offset of each track of a grid, with the free space of the grid
+    distributed by a content alignment (10.5)."""
+    offset, gaps = justify(max(0, free), len(sizes), justification)
+    positions = []
+    for i, size in enumerate(sizes):
+        positions.append(offset)
+        offset += size + gap + (gaps[i] if gaps and i < len(gaps) else 0)
+    return positions
+
+
+def layout_grid(display, node, sizing, viewport, font, cache=None):
+    """Lay out the items of a grid container (11).
+
+    The columns are sized from the content widths of the items, and each
+    item is laid out in the columns of its grid area; the rows are then
+    sized from the heights of the items, and the items placed and aligned
+    in their grid areas. Like ``layout_box()``, this is a generator that
+    yields the arguments for the layout of each item.
+
+    FIXME: Items are aligned across the rows by align-self, but always fill
+    their columns (there is no justify-self); baseline alignment is treated
+    as flex-start; and the content of a stretched item isn't laid out again
+    at its new height.
+    """
+    style = node.style.computed
+    box = node.layout
+    placement = box._classification.grid
+
+    horizontal, vertical = sizing_contexts(display, font, node)
+    inner_width = box.content_width
+    inner_height = definite_height(node, sizing[1])
+    if inner_height is not None:
+        vertical = SizingContext(display, font, inner_height)
+    item_vertical = FlexItemContext(display, font, vertical.size, None)
+    column_gap = calculate_size(style.grid_column_gap, horizontal)
+    if style.grid_row_gap.__class__ is Percent and inner_height is None:
+        row_gap = 0
+    else:
+        row_gap = calculate_size(style.grid_row_gap, vertical)
+
+    for child in box._classification.boxes:
+        if is_absolute_positioned_element(child):
+            queue_positioned(child, node, 0, 0)
+
+    # 11.3 The columns are sized from the content widths of the items.
+    columns = size_grid_tracks(
+        grid_tracks(
+            style.grid_template_columns,
+            style.grid_auto_columns,
+            placement.columns,
+            horizontal,
+            inner_width,
+        ),
+        [
+            (column, column_span, minimum, maximum)
+            for (row, row_span, column, column_span), (minimum, maximum) in zip(
+                placement.areas, placement.measure(horizontal)
+            )
+        ],
+        inner_width,
+        column_gap,
+        True,
+    )
+    column_positions = track_positions(
+        columns,
+        column_gap,
+        inner_width - sum(columns) - column_gap * max(0, len(columns) - 1),
+        style.justify_content,
+    )
 
-    @property
-    def ex(self):
-        return 0.65 * self.size
+    # Each item is laid out in the columns of its grid area.
+    for item, (row, row_span, column, column_span) in zip(
+        placement.items, placement.areas
+    ):
+        item_style = item.style.computed
+        area = sum(columns[column : column + column_span]) + column_gap * (
+            column_span - 1
+        )
+        if item_style.width is AUTO:
+            width = max(
+                0,
+                area
+                - horizontal_frame(item, horizontal)
+                - fixed_margins(
+                    item_style.margin_left, item_style.margin_right, horizontal
+                ),
+            )
+        else:
+            width = calculate_size(item_style.width, horizontal)
+        item_sizing = (
+            FlexItemContext(
+                display, font, area, constrain_width(item, width, horizontal)
+            ),
+            item_vertical,
+        )
+        yield from layout_item(
+            display, item, node, viewport, font, item_sizing, cache, placement.heights
+        )
 
-    @property
-    def ch(self):
-        return 0.71 * self.size
+    # 11.4 - 11.8 The rows are sized from the heights of the items.
+    contributions = []
+    for item, (row, row_span, column, column_span) in zip(
+        placement.items, placement.areas
+    ):
+        item_style = item.style.computed
+        outer = item.layout.border_box_height + fixed_margins(
+            item_style.margin_top, item_style.margin_bottom, horizontal
+        )
+        contributions.append((row, row_span, outer, outer))
+    rows = size_grid_tracks(
+        grid_tracks(
+            style.grid_template_rows,
+            style.grid_auto_rows,
+            placement.rows,
+            vertical,
+            inner_height,
+        ),
+        contributions,
+        inner_height,
+        row_gap,
+        style.align_content is STRETCH,
+    )
+    grid_height = sum(rows) + row_gap * max(0, len(rows) - 1)
+    if inner_height is None:
+        row_positions = track_positions(rows, row_gap, 0, FLEX_START)
+    else:
+        row_positions = track_positions(
+            rows, row_gap, inner_height - grid_height, style.align_content
+        )
 
+    # 10.3 - 10.4 Each item is placed, and aligned, in its grid area.
+    for item, (row, row_span, column, column_span) in zip(
+        placement.items, placement.areas
+    ):
+        item_style = item.style.computed
+        item_box = item.layout
+        area_width = sum(columns[column : column + column_span]) + column_gap * (
+            column_span - 1
+        )
+        area_height = sum(rows[row : row + row_span]) + row_gap * (row_span - 1)
+
+        # Auto margins absorb the free space in the area.
+        left = 0
+        free = (
+            area_width
+            - item_box.border_box_width
+            - fixed_margins(item_style.margin_left, item_style.margin_right, horizontal)
+        )
+        if free > 0 and item_style.margin_left is AUTO:
+            if item_style.margin_right is AUTO:
+                left = free // 2
+                item_box.margin_right = free - left
+            else:
+                left = free
+            item_box.margin_left = left
+        elif free > 0 and item_style.margin_right is AUTO:
+            item_box.margin_right = free
+
+        top = 0
+        free = (
+            area_height
+            - item_box.border_box_height
+            - fixed_margins(item_style.margin_top, item_style.margin_bottom, horizontal)
+        )
+        align = align_self(item, node)
+        if item_style.margin_top is AUTO or item_style.margin_bottom is AUTO:
+            free = max(0, free)
+            if item_style.margin_top is AUTO and item_style.margin_bottom is AUTO:
+                top = free // 2
+                item_box.margin_top = top
+                item_box.margin_bottom = free - top
+            elif item_style.margin_top is AUTO:
+                top = item_box.margin_top = free
+            else:
+                item_box.margin_bottom = free
+        elif align is STRETCH:
+            if item_style.height is AUTO:
+                item_box.content_height = constrain_height(
+                    item, max(0, item_box.content_height + free), vertical
+                )
+        elif align is FLEX_END:
+            top = free
+        elif align is CENTER:
+            top = free // 2
+
+        item_box.content_left += column_positions[column] + left
+        item_box.content_top += row_positions[row] + top
+
+    # The height of the container is evaluated from the height of its
+    # content (see ``calculate_grid_height()``).
+    if inner_height is not None:
+        box.content_height = inner_height
+    else:
+        box.content_height = constrain_height(node, grid_height, sizing[1])
 
-def layout(display, node, standard=HTML5):
-    containing_block = Viewport(display, node)
-    font = DummyFont(-1)  # FIXME: default font
 
-    node.layout.reset()
+def outer_geometry(box):
+    "The parts of a laid out box that affect the layout of its parent."
+    return (
+        box._layout_top,
+        box._layout_left,
+        box.margin_top,
+        box.margin_right,
+        box.margin_bottom,
+        box.margin_left,
+        box.collapse_top,
+        box.collapse_bottom,
+        box.border_box_width,
+        box.border_box_height,
+    )
 
-    # 10.1 1
-    layout_box(display, node, containing_block, containing_block, font)
 
-    # The full collapsed extent of the top margin on the root element
-    # must be displayed, so move the default content position so that it is.
-    node.layout.content_top += node.layout.collapse_top
+def layout_tree(display, node, containing_block, viewport, font, sizing, cache=None):
+    """Lay out a box, and all its descendants.
 
-    # In HTML5, the final content height of the root element is fitted
-    # to the the display.
-    # FIXME: Find the actual line in the standard that causes this.
-    # It might be in the HTML5 spec, rather than the CSS spec.
-    if standard is HTML5:
-        node.layout.content_height = (
-            display.content_height
-            - node.layout.collapse_top
-            - node.layout.collapse_bottom
-        )
+    Rather than calling itself to lay out the children of a box,
+    ``layout_box()`` is a generator that yields the arguments of the
+    ``layout_box()`` for each child, and resumes when that child has been
+    laid out. The generators are driven by ``drive_layout()``, from an
+    explicit stack, so the depth of a document isn't limited by the depth
+    of the Python stack.
+    """
+    drive_layout(
+        layout_box(display, node, containing_block, viewport, font, sizing, cache)
+    )
 
 
-class AnonymousBlockBox:
-    def __init__(self):
-        self.children = []
+def drive_layout(generator):
+    "Run a layout generator, laying out each box that it yields."
+    stack = [generator]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+        else:
+            stack.append(layout_box(*child))
+
+
+def layout_dirty_descendants(display, node, viewport, font, cache=None):
+    """Lay out the dirty descendants of a clean box.
+
+    Each child that is dirty, or has dirty descendants, is laid out again
+    in the containing block of its previous layout, and returned to the
+    position the box had placed it at. Returns False if the outer geometry
+    of any child has changed, in which case the box must be laid out again.
+
+    Like ``layout_box()``, this is a generator that yields the arguments for
+    the layout of each child.
+    """
+    classification = node.layout._classification
+    if classify(node) is not classification:
+        # The box tree of the children has changed.
+        return False
+    elif classification.category & (TABLE_BOX | FLEX_BOX | GRID_BOX):
+        # The cells of a table (and the items of a flex or grid container)
+        # are sized together; the columns are measured again from the
+        # cells that have changed (see ``TableColumns``).
+        return False
+    elif classification.inline and classification.category & BLOCK_CONTAINER:
+        # The content of an inline formatting context is broken into lines
+        # together.
+        return False
+    elif node.layout._content_widths is None and is_shrink_to_fit(node):
+        # The content widths of the box have been discarded (see
+        # ``Box._discard_content_widths()``), so the box must be shrunk to
+        # fit its content again.
+        return False
+
+    for child in classification.boxes:
+        if child.layout is None:
+            return False
+        elif child.layout._moved and not child.layout.dirty:
+            # The child has only moved, which doesn't alter the flow.
+            move_relative(child, node, child.layout._layout_inputs)
+
+        if child.layout.dirty or child.layout._dirty_descendants:
+            if is_absolute_positioned_element(child):
+                # Laid out by the containing block.
+                continue
+            if child.layout._layout_inputs is None:
+                return False
 
-    def append(self, child):
-        self.children.append(child)
+            outer = outer_geometry(child.layout)
+            offset_top = child.layout.content_top - child.layout._layout_top
+            offset_left = child.layout.content_left - child.layout._layout_left
+
+            yield (
+                display,
+                child,
+                node,
+                viewport,
+                font,
+                child.layout._layout_inputs,
+                cache,
+            )
 
+            if child.layout is None or outer_geometry(child.layout) != outer:
+                return False
 
-class AnonymousInlineBox:
-    def __init__(self):
-        self.children = []
+            child.layout.content_top += offset_top
+            child.layout.content_left += offset_left
 
-    def append(self, child):
-        self.children.append(child)
+    # The root lays out its positioned descendants once it has been fitted
+    # to the display (see ``layout()``).
+    if getattr(node, "parent", None) is not None:
+        yield from layout_positioned(display, node, viewport, font, cache)
 
+    return True
 
-def anonymize(nodes):
-    anon_block = None
-    containers = []
-    for node in nodes:
-        if is_block_level_element(node):
-            if anon_block:
-                containers.append(anon_block)
-                anon_block = None
-            containers.append(node)
-        else:
-            if anon_block is None:
-                anon_block = AnonymousBlockBox()
-            anon_block.append(node)
 
-    return containers
+def layout_box(display, node, containing_block, viewport, font, sizing, cache=None):
+    """Lay out a box.
 
+    This is a generator (see ``layout_tree()``); it yields the arguments of
+    the ``layout_box()`` of each child that must be laid out.
+    """
+    style = node.style.computed
 
-def layout_box(display, node, containing_block, viewport, font):
     # If the node shouldn't be displayed, remove the layout box.
-    if node.style.display is None:
-        node.layout = None
+    if style.display is None:
+        discard_box(node)
         return
     else:
         # Make sure the node *has* a display box.
-        if node.layout is None:
-            node.layout = Box(node)
+        generate_box(node)
+
+    # A box that has been wrapped in an anonymous box is positioned in it,
+    # and an absolutely positioned box in its containing block.
+    if isinstance(containing_block, AnonymousBox) or (
+        (style.position is ABSOLUTE or style.position is FIXED)
+        and containing_block is not viewport
+    ):
+        node.layout._container = containing_block.layout
+    else:
+        node.layout._container = None
+
+    # If the layout of the box is clean, and it is being laid out in the
+    # same containing block as last time, the previous layout can be reused,
+    # once any dirty descendants have been laid out. Restore the position
+    # of the box so the parent can re-apply its offsets.
+    basis = height_basis(node)
+    if (
+        not node.layout.dirty
+        and node.layout._layout_inputs == sizing
+        and node.layout._layout_basis == basis
+    ):
+        if node.layout._dirty_descendants:
+            reusable = yield from layout_dirty_descendants(
+                display, node, viewport, font, cache
+            )
+        else:
+            reusable = True
+
+        if reusable:
+            node.layout._dirty_descendants = False
+            if node.layout._moved:
+                move_relative(node, containing_block, sizing)
+            node.layout.content_top = node.layout._layout_top
+            node.layout.content_left = node.layout._layout_left
+            return
+
+    laid_out = node.layout._layout_inputs is not None
+    if laid_out:
+        # The box has been laid out before; discard the old geometry,
+        # retaining any explicitly set origin.
+        node.layout._reset(origin=False)
+
+    # If an identical subtree has been laid out in the same conditions,
+    # copy its layout.
+    if cache is not None:
+        cache_key = cache._key(node, sizing)
+        if cache._restore(cache_key, node):
+            node.layout._layout_inputs = sizing
+            node.layout._layout_basis = basis
+            node.layout.dirty = False
+            return
+
+    classification = classify(node)
+    for child in classification.hidden:
+        discard_box(child)
+
+    # If the box has become (or is no longer) a containing block, its
+    # positioned descendants must be queued on their new containing block.
+    if establishes_containing_block(node):
+        moved = node.layout._positioned is None
+        if moved:
+            node.layout._positioned = {}
+    else:
+        moved = node.layout._positioned is not None
+        node.layout._positioned = None
+    if moved and laid_out:
+        for child in classification.boxes:
+            if child.layout is not None:
+                child.layout.reset()
 
     # Copy margin, border and padding attributes to the layout
-    horizontal = {
-        "display": display,
-        "font": font,
-        "size": containing_block.layout.content_width,
-    }
-
-    vertical = {
-        "display": display,
-        "font": font,
-        "size": containing_block.layout.content_height,
-    }
-    node.layout.margin_top = calculate_size(node.style.margin_top, vertical)
-    node.layout.margin_right = calculate_size(node.style.margin_right, horizontal)
-    node.layout.margin_bottom = calculate_size(node.style.margin_bottom, vertical)
-    node.layout.margin_left = calculate_size(node.style.margin_left, horizontal)
-
-    node.layout.border_top_width = calculate_size(
-        node.style.border_top_width, horizontal
-    )
-    node.layout.border_right_width = calculate_size(
-        node.style.border_right_width, vertical
-    )
+    horizontal, vertical = sizing
+    node.layout.margin_top = calculate_size(style.margin_top, vertical)
+    node.layout.margin_right = calculate_size(style.margin_right, horizontal)
+    node.layout.margin_bottom = calculate_size(style.margin_bottom, vertical)
+    node.layout.margin_left = calculate_size(style.margin_left, horizontal)
+
+    node.layout.border_top_width = calculate_size(style.border_top_width, horizontal)
+    node.layout.border_right_width = calculate_size(style.border_right_width, vertical)
     node.layout.border_bottom_width = calculate_size(
-        node.style.border_bottom_width, horizontal
-    )
-    node.layout.border_left_width = calculate_size(
-        node.style.border_left_width, vertical
+        style.border_bottom_width, horizontal
     )
+    node.layout.border_left_width = calculate_size(style.border_left_width, vertical)
+
+    node.layout.padding_top = calculate_size(style.padding_top, horizontal)
+    node.layout.padding_right = calculate_size(style.padding_right, vertical)
+    node.layout.padding_bottom = calculate_size(style.padding_bottom, horizontal)
+    node.layout.padding_left = calculate_size(style.padding_left, vertical)
 
-    node.layout.padding_top = calculate_size(node.style.padding_top, horizontal)
-    node.layout.padding_right = calculate_size(node.style.padding_right, vertical)
-    node.layout.padding_bottom = calculate_size(node.style.padding_bottom, horizontal)
-    node.layout.padding_left = calculate_size(node.style.padding_left, vertical)
+    if classification.category & TABLE_BOX and style.border_collapse is COLLAPSE:
+        # Section 17.6.2 - In the collapsing border model, a table has no
+        # padding.
+        node.layout.padding_top = 0
+        node.layout.padding_right = 0
+        node.layout.padding_bottom = 0
+        node.layout.padding_left = 0
 
     # print("NODE", node)
 
@@ -213,105 +4355,268 @@ def layout_box(display, node, containing_block, viewport, font):
     calculate_width_and_margins(node, horizontal)
 
     # Section 9.4.2 - relative positioning
-    if node.style.position is RELATIVE:
+    if style.position is RELATIVE:
         calculate_height_and_margins(node, vertical)
 
-    if node.style.position is ABSOLUTE or node.style.position is FIXED:  # Section 9.6
-        raise NotImplementedError(
-            "Section 9.6 - Absolute positioning"
-        )  # pragma: no cover
-    elif node.style.float is not None:
-        raise NotImplementedError("Section 9.5 - Floats")  # pragma: no cover
-    else:  # Section 9.4 - Normal flow
-        if establishes_inline_formatting_context(node):
-            # Section 9.4.2 - Inline formatting context
-            for child in node.children:
-                layout_box(display, child, node, viewport, font)
-        elif establishes_table_formatting_context(node):
-            # Section 17 - Table formatting context
-            raise NotImplementedError("Section 17")  # pragma: no cover
-        else:
-            # Section 9.4.1 - Block formatting context
-            children = anonymize(node.children)
-            offset_top = 0
-            bottom_margin = None
-
-            for child in children:
-                layout_box(display, child, node, viewport, font)
-                # If this is the first child, check if the first child's margin box
-                # extends higher than the node's margin box. If it does, the starting
-                # position for calculations of the parent node's box must be adjusted
-                # by that amount.
-                # Otherwise, collapse the bottom margin of the previous element
-                # with the top margin of this element, and offset by the result.
+    # CSS Flexbox 9.8 - An item that has been flexed, or stretched, has a
+    # definite height, in which its content is laid out.
+    if vertical.__class__ is FlexItemContext and vertical.used is not None:
+        node.layout.content_height = vertical.used
+
+    # Section 9.4 - Normal flow
+    # (The content of floats and absolutely positioned boxes is laid out
+    # in the same way; the box is placed by its parent - Section 9.5 - or
+    # by its containing block - Section 9.6)
+    exclusions = None
+    if classification.inline and classification.category & BLOCK_CONTAINER:
+        # Section 9.4.2 - Inline formatting context
+        yield from layout_lines(display, node, sizing, viewport, font, cache)
+    elif classification.inline:
+        # The children of an inline box are laid out in its content box;
+        # the containing block of the content of an inline box in the flow
+        # is its block container (10.1).
+        if is_inline_container(node):
+            child_sizing = sizing
+        else:
+            child_sizing = sizing_contexts(display, font, node)
+        for child in classification.boxes:
+            if is_absolute_positioned_element(child):  # Section 9.6
+                queue_positioned(child, node, 0, 0)
+                continue
+            yield (display, child, node, viewport, font, child_sizing, cache)
+    elif classification.category & TABLE_BOX:
+        # Section 17 - Table formatting context
+        yield from layout_table(display, node, sizing, viewport, font, cache)
+    elif classification.category & TABLE_INTERNAL and style.display is TABLE_ROW:
+        yield from layout_table_row(display, node, sizing, viewport, font, cache)
+    elif classification.category & TABLE_INTERNAL and style.display is not TABLE_CELL:
+        yield from layout_table_row_group(display, node, sizing, viewport, font, cache)
+    elif classification.category & FLEX_BOX:
+        # CSS Flexbox 9 - Flex formatting context
+        yield from layout_flex(display, node, sizing, viewport, font, cache)
+    elif classification.category & GRID_BOX:
+        # CSS Grid 11 - Grid formatting context
+        yield from layout_grid(display, node, sizing, viewport, font, cache)
+    else:
+        # Section 9.4.1 - Block formatting context
+        child_sizing = sizing_contexts(display, font, node)
+        offset_top = 0
+        bottom_margin = None
+
+        for child in classification.boxes:
+            if is_absolute_positioned_element(child):
+                # Section 9.6 - Absolutely positioned boxes are taken
+                # out of the flow, and laid out by their containing block.
                 if bottom_margin is None:
-                    node.layout.collapse_top = child.layout.collapse_top
+                    static_top = offset_top
                 else:
-                    offset_top += max(bottom_margin, child.layout.margin_top)
+                    static_top = offset_top + bottom_margin
+                queue_positioned(child, node, static_top, 0)
+                continue
+
+            # Section 9.5 - The line boxes of a block beside floats are
+            # shortened by the floats.
+            child_style = child.style.computed
+            child_context = child_sizing
+            if (
+                exclusions is not None
+                and child_style.float is None
+                and is_block_container(child)
+                and establishes_inline_formatting_context(child)
+                and not establishes_block_formatting_context(child)
+            ):
+                top = offset_top
+                if bottom_margin is not None:
+                    margin_top = calculate_size(child_style.margin_top, child_sizing[1])
+                    top += max(bottom_margin, 0 if margin_top is AUTO else margin_top)
+                if child_style.clear is not None:
+                    top = max(top, exclusions.clearance(child_style.clear))
+                if top < exclusions.bottom:
+                    child_context = (
+                        FloatContext(
+                            display, font, child_sizing[0].size, exclusions.bands(top)
+                        ),
+                        child_sizing[1],
+                    )
+
+            yield (display, child, node, viewport, font, child_context, cache)
+
+            if child_style.float is not None:
+                # Section 9.5 - Floats are taken out of the flow, and
+                # placed against the side of the content box.
+                if exclusions is None:
+                    exclusions = FloatExclusions(node.layout.content_width)
+
+                top = offset_top
+                if child_style.clear is not None:  # Section 9.5.2
+                    top = max(top, exclusions.clearance(child_style.clear))
+
+                left, top = exclusions.place(
+                    child_style.float,
+                    child.layout.margin_box_width,
+                    child.layout.margin_box_height,
+                    top,
+                )
+                child.layout.content_top += top
+                child.layout.content_left += left
+                continue
+
+            # If this is the first child, check if the first child's margin box
+            # extends higher than the node's margin box. If it does, the starting
+            # position for calculations of the parent node's box must be adjusted
+            # by that amount.
+            # Otherwise, collapse the bottom margin of the previous element
+            # with the top margin of this element, and offset by the result.
+            if bottom_margin is None:
+                node.layout.collapse_top = child.layout.collapse_top
+            else:
+                offset_top += max(bottom_margin, child.layout.margin_top)
 
-                # Offset the top of the child, relative to the parent.
-                child.layout.content_top += offset_top
+            # Section 9.5.2 - Clearance moves the border edge of the box
+            # below the floats on the cleared side.
+            if child_style.clear is not None and exclusions is not None:
+                offset_top = max(offset_top, exclusions.clearance(child_style.clear))
 
-                # Increase the offset by the height of the box,
-                # and record the margin so it can be collapsed with the
-                # next element
-                offset_top += child.layout.border_box_height
-                bottom_margin = child.layout.collapse_bottom
+            # Offset the top of the child, relative to the parent.
+            child.layout.content_top += offset_top
+
+            # Increase the offset by the height of the box,
+            # and record the margin so it can be collapsed with the
+            # next element
+            offset_top += child.layout.border_box_height
+            bottom_margin = child.layout.collapse_bottom
 
     # Section 10.6 - evaluate height and margins
     calculate_height_and_margins(node, vertical)
 
-    if node.style.position is RELATIVE:
-        # Section 9.4.3 - relative positioning
-        # Left/Right
-        if node.style.left == AUTO and node.style.right == AUTO:  # P4
-            value_left = 0
-        elif node.style.left == AUTO:  # P5
-            if node.style.right == INHERIT:
-                value_left = -containing_block.layout.content_right
-            else:
-                value_left = -node.style.right.px(**horizontal)
-        elif node.style.right == AUTO:  # P6
-            if node.style.left == INHERIT:
-                value_left = containing_block.layout.content_left
-            else:
-                value_left = node.style.left.px(**horizontal)
-        else:  # P7
-            value_left = node.style.left.px(**horizontal)
+    # Section 10.6.7 - The auto height of a block formatting context root
+    # extends to the bottom of its floats.
+    if (
+        exclusions is not None
+        and style.height is AUTO
+        and establishes_block_formatting_context(node)
+    ):
+        node.layout.content_height = max(node.layout.content_height, exclusions.bottom)
 
+    if style.position is RELATIVE:
+        # Section 9.4.3 - relative positioning
+        value_top, value_left = relative_offset(node, containing_block, sizing)
+        node.layout.content_top += value_top
         node.layout.content_left += value_left
+        node.layout._relative_offset = (value_top, value_left)
 
-        # Top/Bottom P8
-        if node.style.top == AUTO and node.style.bottom == AUTO:
-            value_top = 0
-        elif node.style.top == AUTO:
-            if node.style.bottom == INHERIT:
-                value_top = -containing_block.layout.content_bottom
-            else:
-                value_top = -node.style.bottom.px(**vertical)
-        elif node.style.bottom == AUTO:
-            if node.style.top == INHERIT:
-                value_top = containing_block.layout.content_top
-            else:
-                value_top = node.style.top.px(**vertical)
-        else:
-            value_top = node.style.top.px(**vertical)
+    # Section 9.6 - Once the size of a containing block is known, its
+    # positioned descendants can be laid out. The root lays them out once
+    # it has been fitted to the display (see ``layout()``).
+    if node.layout._positioned and getattr(node, "parent", None) is not None:
+        yield from layout_positioned(display, node, viewport, font, cache)
 
-        node.layout.content_top += value_top
+    # Record the inputs and result of this layout, and mark the box as clean.
+    node.layout._layout_inputs = sizing
+    node.layout._layout_basis = basis
+    node.layout._layout_top = node.layout.content_top
+    node.layout._layout_left = node.layout.content_left
+    node.layout.dirty = False
+
+    if cache is not None:
+        cache._store(cache_key, node)
 
     # print("END NODE", node)
 
 
+def relative_offset(node, containing_block, sizing):
+    "The (top, left) offset of a relatively positioned box (9.4.3)."
+    style = node.style.computed
+    horizontal, vertical = sizing
+    # Left/Right
+    if style.left == AUTO and style.right == AUTO:  # P4
+        value_left = 0
+    elif style.left == AUTO:  # P5
+        if style.right == INHERIT:
+            value_left = -containing_block.layout.content_right
+        else:
+            value_left = -style.right.px(
+                horizontal.display, horizontal.font, horizontal.size
+            )
+    elif style.right == AUTO:  # P6
+        if style.left == INHERIT:
+            value_left = containing_block.layout.content_left
+        else:
+            value_left = style.left.px(
+                horizontal.display, horizontal.font, horizontal.size
+            )
+    else:  # P7
+        value_left = style.left.px(horizontal.display, horizontal.font, horizontal.size)
+
+    # Top/Bottom P8
+    if style.top == AUTO and style.bottom == AUTO:
+        value_top = 0
+    elif style.top == AUTO:
+        if style.bottom == INHERIT:
+            value_top = -containing_block.layout.content_bottom
+        else:
+            value_top = -style.bottom.px(vertical.display, vertical.font, vertical.size)
+    elif style.bottom == AUTO:
+        if style.top == INHERIT:
+            value_top = containing_block.layout.content_top
+        else:
+            value_top = style.top.px(vertical.display, vertical.font, vertical.size)
+    else:
+        value_top = style.top.px(vertical.display, vertical.font, vertical.size)
+
+    return value_top, value_left
+
+
+def flow_bottom(node):
+    """The bottom of the border box of a box in the flow.
+
+    A relatively positioned box is placed in the flow as if it hadn't been
+    offset (9.4.3); its offset doesn't change the height of its parent.
+    """
+    box = node.layout
+    if node.style.computed.position is RELATIVE and box._relative_offset is not None:
+        return box.border_box_bottom - box._relative_offset[0]
+    return box.border_box_bottom
+
+
+def move_relative(node, containing_block, sizing):
+    """Apply a change to the relative offsets of a clean box (9.4.3).
+
+    The box is translated by the change in its offsets, along with the
+    position recorded by its last layout; nothing else has to be laid out.
+    """
+    box = node.layout
+    top, left = relative_offset(node, containing_block, sizing)
+    previous_top, previous_left = box._relative_offset
+    box._layout_top += top - previous_top
+    box._layout_left += left - previous_left
+    box.content_top += top - previous_top
+    box.content_left += left - previous_left
+    box._relative_offset = (top, left)
+    box._moved = False
+
+
+def natural_size(node):
+    """Return the natural width and height of a node.
+
+    A node with a measure callback is measured without constraints;
+    any other node has the size it was given.
+    """
+    if node.intrinsic.measure is not None:
+        return node.intrinsic.measured(None, UNDEFINED, None, UNDEFINED)
+    return node.intrinsic.width, node.intrinsic.height
+
+
 def calculate_size(value, context):
     if value is AUTO:
         return value
     if value is THIN or value is MEDIUM or value is THICK:
-        return context["display"].fixed_size(value)
+        return context.display.fixed_size(value)
     if value == 0 or value is None:
         # This will also catch 0px, so we need to return 0 literally
         # to ensure that the calulated size is either an integer or AUTO
         return 0
-    return value.px(**context)
+    return value.px(context.display, context.font, context.size)
 
 
 ###########################################################################
@@ -319,32 +4624,43 @@ def calculate_size(value, context):
 ###########################################################################
 def calculate_width_and_margins(node, context):
     "Implements S10.3"
-    if is_float_positioned_element(node):
+    category = node.layout._classification.category
+    if context.__class__ is FlexItemContext:  # CSS Flexbox 9.7
+        calculate_flex_item_width(node, context)
+    elif category & FLOAT_POSITIONED:
         if node.intrinsic.is_replaced:  # 10.3.6
             calculate_floating_replaced_width(node, context)
         else:  # 10.3.5
             calculate_floating_non_replaced_width(node, context)
-    elif is_absolute_positioned_element(node):
+    elif category & ABSOLUTE_POSITIONED:
         if node.intrinsic.is_replaced:  # 10.3.8
             calculate_absolute_position_replaced_width(node, context)
         else:  # 10.3.7
             calculate_absolute_position_non_replaced_width(node, context)
-    elif is_inline_element(node):
+    elif category & INLINE_ELEMENT:
         if node.intrinsic.is_replaced:  # 10.3.2
             calculate_inline_replaced_width(node, context)
         else:  # 10.3.1
             calculate_inline_non_replaced_width(node, context)
     else:  # Normal flow
-        if is_block_level_element(node):
+        if category & TABLE_INTERNAL:  # 17.5
+            calculate_table_internal_width(node, context)
+        elif category & BLOCK_LEVEL:
             if node.intrinsic.is_replaced:  # 10.3.4
                 calculate_block_replaced_normal_flow_width(node, context)
             else:  # 10.3.3
                 calculate_block_non_replaced_normal_flow_width(node, context)
-        elif is_inline_block_element(node):
+        elif category & INLINE_BLOCK_ELEMENT:
             if node.intrinsic.is_replaced:  # 10.3.10
                 calculate_inline_block_replaced_normal_flow_width(node, context)
             else:  # 10.3.9
                 calculate_inline_block_non_replaced_normal_flow_width(node, context)
+        elif category & TABLE_BOX:  # 17.4
+            calculate_inline_table_width(node, context)
+        elif category & FLEX_BOX:  # CSS Flexbox 3
+            calculate_inline_flex_width(node, context)
+        elif category & GRID_BOX:  # CSS Grid 5.1
+            calculate_inline_grid_width(node, context)
         else:
             # This branch should never execute.
             # If it does, we've missed something along the way.
@@ -359,30 +4675,58 @@ def calculate_inline_non_replaced_width(node, context):
     if node.layout.margin_right == AUTO:  # P1
         node.layout.margin_right = 0
 
-    # Use the actual width of the node.
-    node.layout.content_width = node.intrinsic.width
+    if node.intrinsic.text is not None:
+        # A run of text is as wide as its text, set on a single line; it is
+        # broken into lines by its block container (see ``layout_lines()``).
+        node.layout.content_width = text_widths(node, context)[1]
+    elif node.intrinsic.measure is not None:
+        # A measured node is no wider than the containing block.
+        node.layout.content_width = node.intrinsic.measured(
+            max(
+                0,
+                context.size
+                - node.layout.margin_left
+                - node.layout.border_left_width
+                - node.layout.padding_left
+                - node.layout.padding_right
+                - node.layout.border_right_width
+                - node.layout.margin_right,
+            ),
+            AT_MOST,
+            None,
+            UNDEFINED,
+        )[0]
+    elif is_inline_container(node):
+        # The content of an inline box is placed in the lines of its block
+        # container, which sizes the box (see ``layout_lines()``).
+        node.layout.content_width = 0
+    else:
+        # Use the actual width of the node.
+        node.layout.content_width = node.intrinsic.width
 
 
 def calculate_inline_replaced_width(node, context):
     "Implements S10.3.2"
+    style = node.style.computed
     if node.layout.margin_left == AUTO:  # P1
         node.layout.margin_left = 0
 
     if node.layout.margin_right == AUTO:  # P1
         node.layout.margin_right = 0
 
-    if node.style.width is AUTO:
+    if style.width is AUTO:
         content_width = None
-        if node.style.height is AUTO:
-            if node.intrinsic.width is not None:  # P2
-                content_width = node.intrinsic.width
+        intrinsic_width, intrinsic_height = natural_size(node)
+        if style.height is AUTO:
+            if intrinsic_width is not None:  # P2
+                content_width = intrinsic_width
             elif (
-                node.intrinsic.height is not None and node.intrinsic.ratio is not None
+                intrinsic_height is not None and node.intrinsic.ratio is not None
             ):  # P3
-                content_width = round(node.intrinsic.height * node.intrinsic.ratio)
+                content_width = round(intrinsic_height * node.intrinsic.ratio)
             elif node.intrinsic.ratio is not None:  # P4
                 content_width = (
-                    context["size"]
+                    context.size
                     - node.layout.margin_left
                     - node.layout.border_left_width
                     - node.layout.padding_left
@@ -392,12 +4736,12 @@ def calculate_inline_replaced_width(node, context):
                 )
 
         if content_width is None:
-            if node.intrinsic.width is not None:  # P5
-                content_width = node.intrinsic.width
+            if intrinsic_width is not None:  # P5
+                content_width = intrinsic_width
             else:  # P6
                 content_width = 300
     else:
-        content_width = node.style.width.px(**context)
+        content_width = style.width.px(context.display, context.font, context.size)
 
     node.layout.content_width = content_width
     node.layout.content_left = (
@@ -409,14 +4753,19 @@ def calculate_inline_replaced_width(node, context):
 
 def calculate_block_non_replaced_normal_flow_width(node, context):
     "Implements S10.3.3"
-    if node.style.width is not AUTO:  # P2
-        content_width = node.style.width.px(**context)
-        if node.style.max_width is not None:  # 10.4 Maximum width
-            content_max_width = node.style.max_width.px(**context)
+    style = node.style.computed
+    if style.width is not AUTO:  # P2
+        content_width = style.width.px(context.display, context.font, context.size)
+        if style.max_width is not None:  # 10.4 Maximum width
+            content_max_width = style.max_width.px(
+                context.display, context.font, context.size
+            )
             if content_width > content_max_width:
                 content_width = content_max_width
-        if node.style.min_width is not AUTO:  # 10.4 Minimum width
-            content_min_width = node.style.min_width.px(**context)
+        if style.min_width is not AUTO:  # 10.4 Minimum width
+            content_min_width = style.min_width.px(
+                context.display, context.font, context.size
+            )
             if content_width < content_min_width:
                 content_width = content_min_width
         size = (
@@ -430,7 +4779,7 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
             size += node.layout.margin_left
         if node.layout.margin_right is not AUTO:
             size += node.layout.margin_right
-        if size > context["size"]:
+        if size > context.size:
             if node.layout.margin_left is AUTO:
                 node.layout.margin_left = 0
             if node.layout.margin_right is AUTO:
@@ -438,12 +4787,12 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
 
     if (
         node.layout.margin_left is not AUTO
-        and node.style.width is not AUTO
+        and style.width is not AUTO
         and node.layout.margin_right is not AUTO
     ):  # P3
-        if node.style.direction is LTR:
+        if style.direction is LTR:
             node.layout.margin_right = (
-                context["size"]
+                context.size
                 - node.layout.margin_left
                 - node.layout.border_left_width
                 - node.layout.padding_left
@@ -453,7 +4802,7 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
             )
         else:
             node.layout.margin_left = (
-                context["size"]
+                context.size
                 - node.layout.border_left_width
                 - node.layout.padding_left
                 - content_width
@@ -464,11 +4813,11 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
 
     elif (
         node.layout.margin_left is AUTO
-        and node.style.width is not AUTO
+        and style.width is not AUTO
         and node.layout.margin_right is not AUTO
     ):  # P4
         node.layout.margin_left = (
-            context["size"]
+            context.size
             - node.layout.border_left_width
             - node.layout.padding_left
             - content_width
@@ -479,11 +4828,11 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
 
     elif (
         node.layout.margin_left is not AUTO
-        and node.style.width is AUTO
+        and style.width is AUTO
         and node.layout.margin_right is not AUTO
     ):  # P4
         content_width = (
-            context["size"]
+            context.size
             - node.layout.margin_left
             - node.layout.border_left_width
             - node.layout.padding_left
@@ -494,11 +4843,11 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
 
     elif (
         node.layout.margin_left is not AUTO
-        and node.style.width is not AUTO
+        and style.width is not AUTO
         and node.layout.margin_right is AUTO
     ):  # P4
         node.layout.margin_right = (
-            context["size"]
+            context.size
             - node.layout.margin_left
             - node.layout.border_left_width
             - node.layout.padding_left
@@ -507,14 +4856,14 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
             - node.layout.border_right_width
         )
 
-    elif node.style.width is AUTO:  # P5
+    elif style.width is AUTO:  # P5
         if node.layout.margin_left is AUTO:
             node.layout.margin_left = 0
         if node.layout.margin_right is AUTO:
             node.layout.margin_right = 0
 
         content_width = (
-            context["size"]
+            context.size
             - node.layout.margin_left
             - node.layout.border_left_width
             - node.layout.padding_left
@@ -525,7 +4874,7 @@ def calculate_block_non_replaced_normal_flow_width(node, context):
 
     elif node.layout.margin_left is AUTO and node.layout.margin_right is AUTO:
         avail_margin = (
-            context["size"]
+            context.size
             - node.layout.border_left_width
             - node.layout.padding_left
             - content_width
@@ -555,32 +4904,252 @@ def calculate_block_replaced_normal_flow_width(node, context):
 
 def calculate_floating_non_replaced_width(node, context):
     "Implements S10.3.5"
-    raise NotImplementedError("Section 10.3.5")  # pragma: no cover
+    style = node.style.computed
+    if node.layout.margin_left is AUTO:  # P1
+        node.layout.margin_left = 0
+
+    if node.layout.margin_right is AUTO:  # P1
+        node.layout.margin_right = 0
+
+    if style.width is AUTO:  # P2
+        content_width = shrink_to_fit_width(
+            node,
+            context.size
+            - node.layout.margin_left
+            - node.layout.border_left_width
+            - node.layout.padding_left
+            - node.layout.padding_right
+            - node.layout.border_right_width
+            - node.layout.margin_right,
+            context,
+        )
+    else:
+        content_width = style.width.px(context.display, context.font, context.size)
+
+    node.layout.content_width = constrain_width(node, content_width, context)
+    node.layout.content_left = (
+        node.layout.margin_left
+        + node.layout.border_left_width
+        + node.layout.padding_left
+    )
 
 
 def calculate_floating_replaced_width(node, context):
     "Implements S10.3.6"
-    raise NotImplementedError("Section 10.3.6")  # pragma: no cover
+    # Auto margins are 0, and the width is evaluated as for an inline
+    # replaced element.
+    calculate_inline_replaced_width(node, context)
 
 
 def calculate_absolute_position_non_replaced_width(node, context):
     "Implements S10.3.7"
-    raise NotImplementedError("Section 10.3.7")  # pragma: no cover
+    # The context is the padding box of the containing block. Only the
+    # width and margins are evaluated here; the box is moved into place
+    # once it has been laid out (see ``position_absolute()``).
+    style = node.style.computed
+    left = calculate_size(style.left, context)
+    right = calculate_size(style.right, context)
+    frame = (
+        node.layout.border_left_width
+        + node.layout.padding_left
+        + node.layout.padding_right
+        + node.layout.border_right_width
+    )
+
+    if left is AUTO or style.width is AUTO or right is AUTO:  # P3
+        if node.layout.margin_left is AUTO:
+            node.layout.margin_left = 0
+        if node.layout.margin_right is AUTO:
+            node.layout.margin_right = 0
+
+        if style.width is AUTO:
+            available_width = (
+                context.size
+                - node.layout.margin_left
+                - frame
+                - node.layout.margin_right
+            )
+            if left is not AUTO:
+                available_width -= left
+            if right is not AUTO:
+                available_width -= right
+
+            if left is AUTO or right is AUTO:  # Rules 1 and 3
+                content_width = shrink_to_fit_width(node, available_width, context)
+            else:  # Rule 5
+                content_width = available_width
+        else:  # Rules 2, 4 and 6
+            content_width = style.width.px(context.display, context.font, context.size)
+    else:  # P2
+        content_width = style.width.px(context.display, context.font, context.size)
+        available_margin = context.size - left - frame - content_width - right
+        if node.layout.margin_left is AUTO and node.layout.margin_right is AUTO:
+            if available_margin < 0 and style.direction is LTR:
+                node.layout.margin_left = 0
+                node.layout.margin_right = available_margin
+            else:
+                node.layout.margin_left = available_margin // 2
+                node.layout.margin_right = available_margin - available_margin // 2
+        elif node.layout.margin_left is AUTO:
+            node.layout.margin_left = available_margin - node.layout.margin_right
+        elif node.layout.margin_right is AUTO:
+            node.layout.margin_right = available_margin - node.layout.margin_left
+        # Otherwise, the box is over-constrained; the value of 'right' is
+        # ignored when the box is positioned.
+
+    node.layout.content_width = constrain_width(node, content_width, context)
+    node.layout.content_left = (
+        node.layout.margin_left
+        + node.layout.border_left_width
+        + node.layout.padding_left
+    )
 
 
 def calculate_absolute_position_replaced_width(node, context):
     "Implements S10.3.8"
-    raise NotImplementedError("Section 10.3.8")  # pragma: no cover
+    # Auto margins are 0, and the width is evaluated as for an inline
+    # replaced element.
+    calculate_inline_replaced_width(node, context)
+
+
+def is_shrink_to_fit(node):
+    """Is the width of a box found from the content widths of the box?
+
+    Floats, absolutely positioned boxes and atomic inline-level boxes with
+    an auto width are shrunk to fit their content (10.3.5, 10.3.7, 10.3.9).
+    """
+    if node.style.computed.width is not AUTO or node.intrinsic.is_replaced:
+        return False
+    category = node.layout._classification.category
+    return bool(
+        category & (FLOAT_POSITIONED | ABSOLUTE_POSITIONED)
+        or (category & INLINE_LEVEL and not category & INLINE_ELEMENT)
+    )
+
+
+def shrink_to_fit_width(node, available_width, context):
+    """The shrink-to-fit width of a box (10.3.5), in the given available width.
+
+    The preferred minimum and preferred widths are the content widths of
+    the box (see ``content_widths()``), which are retained between
+    layouts; the content isn't laid out to find them.
+    """
+    if node.intrinsic.measure is not None:
+        return node.intrinsic.measured(
+            max(0, available_width), AT_MOST, None, UNDEFINED
+        )[0]
+    minimum, maximum = content_widths(node, context, sized=False)
+    frame = horizontal_frame(node, context)
+    return min(max(minimum - frame, available_width), maximum - frame)
+
+
+def constrain_width(node, content_width, context):
+    "Constrain a content width by the min-width and max-width of a box (10.4)."
+    style = node.style.computed
+    if style.max_width is not None:  # 10.4 Maximum width
+        content_max_width = style.max_width.px(
+            context.display, context.font, context.size
+        )
+        if content_width > content_max_width:
+            content_width = content_max_width
+    if style.min_width is not AUTO:  # 10.4 Minimum width
+        content_min_width = style.min_width.px(
+            context.display, context.font, context.size
+        )
+        if content_width < content_min_width:
+            content_width = content_min_width
+    return content_width
 
 
 def calculate_inline_block_non_replaced_normal_flow_width(node, context):
     "Implements S10.3.9"
-    raise NotImplementedError("Section 10.3.9")  # pragma: no cover
+    # An inline-block is sized as a float would be (10.3.5): auto margins
+    # are 0, and an auto width is shrink-to-fit.
+    calculate_floating_non_replaced_width(node, context)
 
 
 def calculate_inline_block_replaced_normal_flow_width(node, context):
     "Implements S10.3.10"
-    raise NotImplementedError("Section 10.3.10")  # pragma: no cover
+    # The width is evaluated as for an inline replaced element.
+    calculate_inline_replaced_width(node, context)
+
+
+def calculate_inline_table_width(node, context):
+    "Implements S17.4"
+    # An inline table is sized as a float would be (10.3.5): auto margins
+    # are 0, and an auto width is shrink-to-fit. The width is then fitted
+    # to the columns (see ``calculate_table_width()``).
+    calculate_floating_non_replaced_width(node, context)
+
+
+def calculate_inline_flex_width(node, context):
+    "Implements CSS Flexbox 3"
+    # An inline flex container is sized as a float would be (10.3.5).
+    calculate_floating_non_replaced_width(node, context)
+
+
+def calculate_inline_grid_width(node, context):
+    "Implements CSS Grid 5.1"
+    # An inline grid container is sized as a float would be (10.3.5).
+    calculate_floating_non_replaced_width(node, context)
+
+
+def calculate_flex_item_width(node, context):
+    "Implements CSS Flexbox 9.7"
+    # The width of the item has been resolved by its container (see
+    # ``layout_flex()``); auto margins are 0 until the item is aligned.
+    if node.layout.margin_left is AUTO:
+        node.layout.margin_left = 0
+
+    if node.layout.margin_right is AUTO:
+        node.layout.margin_right = 0
+
+    node.layout.content_width = context.used
+    node.layout.content_left = (
+        node.layout.margin_left
+        + node.layout.border_left_width
+        + node.layout.padding_left
+    )
+
+
+def calculate_table_width(node, content_width):
+    "Implements S17.5.2"
+    # The table box has been sized as any other box; once the widths of
+    # its columns are known, the used width of the table is the width of
+    # its grid, and any auto margins of a table in the normal flow absorb
+    # the difference.
+    style = node.style.computed
+    box = node.layout
+    slack = box.content_width - content_width
+    box.content_width = content_width
+    if box._classification.category & BLOCK_LEVEL and not (
+        box._classification.category & (FLOAT_POSITIONED | ABSOLUTE_POSITIONED)
+    ):
+        if style.margin_left is AUTO and style.margin_right is AUTO:
+            box.margin_left += slack // 2
+            box.margin_right += slack - slack // 2
+        elif style.margin_left is AUTO:
+            box.margin_left += slack
+        else:
+            box.margin_right += slack
+
+    box.content_left = box.margin_left + box.border_left_width + box.padding_left
+
+
+def calculate_table_internal_width(node, context):
+    "Implements S17.5"
+    # Margins don't apply to the internal boxes of a table; a row group or
+    # row spans the grid of the table, and a cell its column.
+    node.layout.margin_left = 0
+    node.layout.margin_right = 0
+    node.layout.content_width = (
+        context.size
+        - node.layout.border_left_width
+        - node.layout.padding_left
+        - node.layout.padding_right
+        - node.layout.border_right_width
+    )
+    node.layout.content_left = node.layout.border_left_width + node.layout.padding_left
 
 
 ###########################################################################
@@ -588,28 +5157,39 @@ def calculate_inline_block_replaced_normal_flow_width(node, context):
 ###########################################################################
 def calculate_height_and_margins(node, context):
     "Implements S10.6"
-    if is_float_positioned_element(node):
+    category = node.layout._classification.category
+    if category & TABLE_BOX:  # 17.5.3
+        calculate_table_height(node, context)
+    elif category & FLEX_BOX:  # CSS Flexbox 9.4
+        calculate_flex_container_height(node, context)
+    elif category & GRID_BOX:  # CSS Grid 11
+        calculate_grid_container_height(node, context)
+    elif context.__class__ is FlexItemContext:  # CSS Flexbox 9.4
+        calculate_flex_item_height(node, context)
+    elif category & FLOAT_POSITIONED:
         if node.intrinsic.is_replaced:  # 10.6.6
             calculate_floating_replaced_height(node, context)
         else:  # 10.6.5
             calculate_floating_non_replaced_height(node, context)
-    elif is_absolute_positioned_element(node):
+    elif category & ABSOLUTE_POSITIONED:
         if node.intrinsic.is_replaced:  # 10.6.8
             calculate_absolute_position_replaced_height(node, context)
         else:  # 10.6.7
             calculate_absolute_position_non_replaced_height(node, context)
-    elif is_inline_element(node):
+    elif category & INLINE_ELEMENT:
         if node.intrinsic.is_replaced:  # 10.6.2
             calculate_inline_replaced_height(node, context)
         else:  # 10.6.1
             calculate_inline_non_replaced_height(node, context)
     else:  # Normal flow
-        if is_block_level_element(node):
+        if category & TABLE_INTERNAL:  # 17.5.3
+            calculate_table_internal_height(node, context)
+        elif category & BLOCK_LEVEL:
             if node.intrinsic.is_replaced:  # 10.6.4
                 calculate_block_replaced_normal_flow_height(node, context)
             else:  # 10.6.3
                 calculate_block_non_replaced_normal_flow_height(node, context)
-        elif is_inline_block_element(node):
+        elif category & INLINE_BLOCK_ELEMENT:
             if node.intrinsic.is_replaced:  # 10.6.10
                 calculate_inline_block_replaced_normal_flow_height(node, context)
             else:  # 10.6.9
@@ -624,7 +5204,16 @@ def calculate_height_and_margins(node, context):
 
 def calculate_inline_non_replaced_height(node, context):
     "Implements S10.6.1"
-    node.layout.content_height = node.intrinsic.height
+    if node.intrinsic.text is not None:
+        node.layout.content_height = text_line_height(node, context)
+    elif node.intrinsic.measure is not None:
+        node.layout.content_height = node.intrinsic.measured(
+            node.layout.content_width, EXACTLY, None, UNDEFINED
+        )[1]
+    elif is_inline_container(node):
+        node.layout.content_height = 0
+    else:
+        node.layout.content_height = node.intrinsic.height
     node.layout.content_top += (
         node.layout.margin_top + node.layout.border_top_width + node.layout.padding_top
     )
@@ -632,26 +5221,30 @@ def calculate_inline_non_replaced_height(node, context):
 
 def calculate_inline_replaced_height(node, context):
     "Implements S10.6.2"
+    style = node.style.computed
     if node.layout.margin_top is AUTO:  # P1
         node.layout.margin_top = 0
 
     if node.layout.margin_bottom is AUTO:  # P1
         node.layout.margin_bottom = 0
 
-    if (
-        node.style.width is AUTO
-        and node.style.height is AUTO
-        and node.intrinsic.height is not None
-    ):  # P2
-        content_height = node.intrinsic.height
-    elif node.style.height is AUTO and node.intrinsic.ratio:  # P3
+    intrinsic_height = natural_size(node)[1]
+    if style.width is AUTO and style.height is AUTO and intrinsic_height is not None:
+        # P2
+        content_height = intrinsic_height
+    elif style.height is AUTO and node.intrinsic.ratio:  # P3
         content_height = node.layout.content_width * node.intrinsic.ratio
-    elif node.style.height is AUTO and node.intrinsic.height:  # P4
-        content_height = node.intrinsic.height
-    elif node.style.height is AUTO:  # P5
+    elif style.height is AUTO and node.intrinsic.measure is not None:
+        # The height of a measured node, at its width.
+        content_height = node.intrinsic.measured(
+            node.layout.content_width, EXACTLY, None, UNDEFINED
+        )[1]
+    elif style.height is AUTO and intrinsic_height:  # P4
+        content_height = intrinsic_height
+    elif style.height is AUTO:  # P5
         content_height = min(node.layout.content_width // 2, 150)
     else:
-        content_height = node.style.height.px(**context)
+        content_height = style.height.px(context.display, context.font, context.size)
 
     node.layout.content_height = content_height
     node.layout.content_top += (
@@ -661,19 +5254,21 @@ def calculate_inline_replaced_height(node, context):
 
 def calculate_block_non_replaced_normal_flow_height(node, context):
     "Implements S10.6.3"
+    style = node.style.computed
     if node.layout.margin_top is AUTO:  # P2
         node.layout.margin_top = 0
 
     if node.layout.margin_bottom is AUTO:  # P2
         node.layout.margin_bottom = 0
 
-    if node.style.height is AUTO:  # P3
-        # if node.children and node.has_inline_formatting_content: # P4.1
-        #     content_height = bottom edge of last line box
+    if style.height is AUTO:  # P3
+        flow = node.layout._classification.flow
+        if node.layout.lines:  # P4.1
+            content_height = node.layout.lines[-1].bottom
         # elif node.children and node.children[-1] non collapsing with bottom margin:
-        if node.children and node.children[-1]:
-            last_child = node.children[-1]
-            content_height = last_child.layout.border_box_bottom
+        elif flow:
+            last_child = flow[-1]
+            content_height = flow_bottom(last_child)
 
             # Merge the margin of the last child with
             # the margin of the last child.
@@ -681,21 +5276,34 @@ def calculate_block_non_replaced_normal_flow_height(node, context):
 
         # elif node.children and node.children[-1] top margin non collapsing with bottom margin:
         #     content_height = bottom border edge of bottom margin
+        elif node.intrinsic.measure is not None:
+            # A measured leaf is as tall as it is at its width.
+            content_height = node.intrinsic.measured(
+                node.layout.content_width, EXACTLY, None, UNDEFINED
+            )[1]
         else:
-            if node.style.min_height is not AUTO:  # 10.7 Minimum height
-                content_height = node.style.min_height.px(**context)
+            if style.min_height is not AUTO:  # 10.7 Minimum height
+                content_height = style.min_height.px(
+                    context.display, context.font, context.size
+                )
             else:
                 content_height = 0
     else:
-        if node.parent is not None and node.parent.style.height is not AUTO:
-            parent_height = node.parent.style.height.px(**context)
-            content_height = node.style.height.px(
-                display=context["display"], font=context["font"], size=parent_height
+        if node.parent is not None and node.parent.style.computed.height is not AUTO:
+            parent_height = node.parent.style.computed.height.px(
+                context.display, context.font, context.size
+            )
+            content_height = style.height.px(
+                context.display, context.font, parent_height
             )
         else:
-            content_height = node.style.height.px(**context)
-        if node.style.max_height is not None:  # 10.7 Maximum height
-            content_max_height = node.style.max_height.px(**context)
+            content_height = style.height.px(
+                context.display, context.font, context.size
+            )
+        if style.max_height is not None:  # 10.7 Maximum height
+            content_max_height = style.max_height.px(
+                context.display, context.font, context.size
+            )
             if content_height > content_max_height:
                 content_height = content_max_height
 
@@ -710,29 +5318,200 @@ def calculate_block_replaced_normal_flow_height(node, context):
 
 def calculate_floating_non_replaced_height(node, context):
     "Implements S10.6.5"
-    raise NotImplementedError("Section 10.6.5")  # pragma: no cover
+    # Auto margins are 0, and an auto height is evaluated as for a block
+    # formatting context root (10.6.7; the floats it contains are added by
+    # the layout of the box).
+    calculate_block_non_replaced_normal_flow_height(node, context)
+
+    # A float is placed by the top of its margin box.
+    node.layout.content_top += node.layout.margin_top
 
 
 def calculate_floating_replaced_height(node, context):
     "Implements S10.6.6"
-    raise NotImplementedError("Section 10.6.6")  # pragma: no cover
+    # Auto margins are 0, and the height is evaluated as for an inline
+    # replaced element.
+    calculate_inline_replaced_height(node, context)
 
 
 def calculate_absolute_position_non_replaced_height(node, context):
     "Implements S10.6.7"
-    raise NotImplementedError("Section 10.6.7")  # pragma: no cover
+    # The context is the padding box of the containing block. As for the
+    # width, the box is moved into place once it has been laid out.
+    style = node.style.computed
+    top = calculate_size(style.top, context)
+    bottom = calculate_size(style.bottom, context)
+    frame = (
+        node.layout.border_top_width
+        + node.layout.padding_top
+        + node.layout.padding_bottom
+        + node.layout.border_bottom_width
+    )
+
+    if top is AUTO or style.height is AUTO or bottom is AUTO:  # P3
+        if node.layout.margin_top is AUTO:
+            node.layout.margin_top = 0
+        if node.layout.margin_bottom is AUTO:
+            node.layout.margin_bottom = 0
+
+        if style.height is not AUTO:  # Rules 2, 4 and 6
+            content_height = style.height.px(
+                context.display, context.font, context.size
+            )
+        elif top is not AUTO and bottom is not AUTO:  # Rule 5
+            content_height = (
+                context.size
+                - top
+                - node.layout.margin_top
+                - frame
+                - node.layout.margin_bottom
+                - bottom
+            )
+        else:  # Rules 1 and 3
+            # The height is based on the content (10.6.7; the floats it
+            # contains are added by the layout of the box).
+            flow = node.layout._classification.flow
+            if node.layout.lines:
+                content_height = node.layout.lines[-1].bottom
+            elif flow:
+                content_height = flow_bottom(flow[-1])
+            else:
+                content_height = 0
+    else:  # P2
+        content_height = style.height.px(context.display, context.font, context.size)
+        available_margin = context.size - top - frame - content_height - bottom
+        if node.layout.margin_top is AUTO and node.layout.margin_bottom is AUTO:
+            node.layout.margin_top = available_margin // 2
+            node.layout.margin_bottom = available_margin - available_margin // 2
+        elif node.layout.margin_top is AUTO:
+            node.layout.margin_top = available_margin - node.layout.margin_bottom
+        elif node.layout.margin_bottom is AUTO:
+            node.layout.margin_bottom = available_margin - node.layout.margin_top
+        # Otherwise, the box is over-constrained; the value of 'bottom' is
+        # ignored when the box is positioned.
+
+    if style.max_height is not None:  # 10.7 Maximum height
+        content_max_height = style.max_height.px(
+            context.display, context.font, context.size
+        )
+        if content_height > content_max_height:
+            content_height = content_max_height
+    if style.min_height is not AUTO:  # 10.7 Minimum height
+        content_min_height = style.min_height.px(
+            context.display, context.font, context.size
+        )
+        if content_height < content_min_height:
+            content_height = content_min_height
+
+    node.layout.content_height = content_height
+    node.layout.content_top += (
+        node.layout.margin_top + node.layout.border_top_width + node.layout.padding_top
+    )
 
 
 def calculate_absolute_position_replaced_height(node, context):
     "Implements S10.6.8"
-    raise NotImplementedError("Section 10.6.8")  # pragma: no cover
+    # Auto margins are 0, and the height is evaluated as for an inline
+    # replaced element.
+    calculate_inline_replaced_height(node, context)
 
 
 def calculate_inline_block_non_replaced_normal_flow_height(node, context):
     "Implements S10.6.9"
-    raise NotImplementedError("Section 10.6.9")  # pragma: no cover
+    # Auto margins are 0, and an auto height is evaluated as for a block
+    # formatting context root, as for a float (10.6.6).
+    calculate_floating_non_replaced_height(node, context)
 
 
 def calculate_inline_block_replaced_normal_flow_height(node, context):
     "Implements S10.6.10"
-    raise NotImplementedError("Section 10.6.10")  # pragma: no cover
+    # The height is evaluated as for an inline replaced element.
+    calculate_inline_replaced_height(node, context)
+
+
+def calculate_table_height(node, context):
+    "Implements S17.5.3"
+    style = node.style.computed
+    box = node.layout
+    if box.margin_top is AUTO:
+        box.margin_top = 0
+
+    if box.margin_bottom is AUTO:
+        box.margin_bottom = 0
+
+    # The height of the captions and rows has been found by the layout of
+    # the table; a specified height is a minimum.
+    if style.height is not AUTO:
+        box.content_height = max(
+            box.content_height, calculate_size(style.height, context)
+        )
+
+    box.content_top += box.border_top_width + box.padding_top
+    if box._classification.category & (FLOAT_POSITIONED | ABSOLUTE_POSITIONED):
+        # A float, or an absolutely positioned box, is placed by the top
+        # of its margin box.
+        box.content_top += box.margin_top
+
+
+def calculate_table_internal_height(node, context):
+    "Implements S17.5.3"
+    # Margins don't apply to the internal boxes of a table. A row group,
+    # row or cell is as tall as its content, and a specified height is a
+    # minimum.
+    style = node.style.computed
+    box = node.layout
+    box.margin_top = 0
+    box.margin_bottom = 0
+
+    content_height = 0
+    for child in box._classification.flow:
+        content_height = max(content_height, flow_bottom(child))
+    if style.height is not AUTO:
+        content_height = max(content_height, calculate_size(style.height, context))
+
+    box.content_height = content_height
+    box.content_top += box.border_top_width + box.padding_top
+
+
+def calculate_flex_container_height(node, context):
+    "Implements CSS Flexbox 9.4"
+    box = node.layout
+    if box.margin_top is AUTO:
+        box.margin_top = 0
+
+    if box.margin_bottom is AUTO:
+        box.margin_bottom = 0
+
+    # The height has been found by the layout of the flex container.
+    box.content_top += box.border_top_width + box.padding_top
+    if context.__class__ is not FlexItemContext and box._classification.category & (
+        FLOAT_POSITIONED | ABSOLUTE_POSITIONED
+    ):
+        # A float, or an absolutely positioned box, is placed by the top
+        # of its margin box.
+        box.content_top += box.margin_top
+
+
+def calculate_grid_container_height(node, context):
+    "Implements CSS Grid 11"
+    # The height has been found by the layout of the grid container, as
+    # for a flex container.
+    calculate_flex_container_height(node, context)
+
+
+def calculate_flex_item_height(node, context):
+    "Implements CSS Flexbox 9.4"
+    # The natural height of an item is found as for a block (or, for a
+    # replaced item, an inline replaced box); it is then flexed or
+    # stretched by the container (see ``layout_flex()``).
+    if node.intrinsic.is_replaced:
+        calculate_inline_replaced_height(node, context)
+    else:
+        calculate_block_non_replaced_normal_flow_height(node, context)
+
+        # An item is placed by the top of its margin box.
+        node.layout.content_top += node.layout.margin_top
+
+    # The item is laid out again at the height resolved by its container.
+    if context.used is not None:
+        node.layout.content_height = context.used
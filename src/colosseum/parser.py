@@ -5,7 +5,16 @@ from .colors import NAMED_COLOR, hsl, rgb
 from .exceptions import ValidationError
 from .shapes import Rect
 from .units import Unit, px
-from .wrappers import BorderSpacing, Cursor, Quotes, Uri
+from .wrappers import (
+    BorderSpacing,
+    Cursor,
+    Fr,
+    GridLine,
+    Quotes,
+    TrackList,
+    TrackSize,
+    Uri,
+)
 
 
 def units(value):
@@ -156,12 +165,15 @@ def border_spacing(value):
     Parse a border spacing value.
 
     Accepts:
+    * A border spacing (returned as is).
     * A sequence object different that a string.
     * An integer (interpreted as pixels).
     * A float (interpreted as pixels).
     * A string with of 1 or 2 length items separated by spaces.
     """
-    if isinstance(value, Sequence) and not isinstance(value, str):
+    if isinstance(value, BorderSpacing):
+        return value
+    elif isinstance(value, Sequence) and not isinstance(value, str):
         values = value
     elif isinstance(value, (int, float)):
         values = (value,)
@@ -179,6 +191,158 @@ def border_spacing(value):
     raise ValueError(f"Unknown border spacing {str(value)}")
 
 
+##############################################################################
+# Grid tracks and lines
+##############################################################################
+def _split_tracks(value):
+    """Split a track list into its track sizes, on the spaces that aren't
+    inside parentheses."""
+    tracks = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(value):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"Unbalanced parentheses in {value}")
+        elif char.isspace() and depth == 0:
+            if value[start:index].strip():
+                tracks.append(value[start:index].strip())
+            start = index + 1
+    if depth:
+        raise ValueError(f"Unbalanced parentheses in {value}")
+    if value[start:].strip():
+        tracks.append(value[start:].strip())
+    return tracks
+
+
+def _track_breadth(value):
+    """Parse a track breadth: a length, a percentage, a flexible length, or a
+    keyword."""
+    from .constants import AUTO, MAX_CONTENT, MIN_CONTENT
+
+    if isinstance(value, Fr):
+        return value
+    elif isinstance(value, str):
+        value = value.strip()
+        for keyword in (AUTO, MIN_CONTENT, MAX_CONTENT):
+            if value == keyword:
+                return keyword
+        if value.endswith("fr"):
+            try:
+                factor = float(value[:-2])
+            except ValueError:
+                raise ValueError(f"Unknown flexible length {value}")
+            if factor < 0:
+                raise ValueError(f"Flexible length {value} can not be negative")
+            return Fr(factor)
+    return units(value)
+
+
+def track_size(value):
+    """Parse a grid track size.
+
+    Accepts:
+    * A track size (returned as is).
+    * A length, percentage or flexible length ('1fr').
+    * 'auto', 'min-content' or 'max-content'.
+    * 'minmax(<min>, <max>)'; the minimum can't be a flexible length.
+    """
+    if isinstance(value, TrackSize):
+        return value
+    elif isinstance(value, str) and value.strip().startswith("minmax("):
+        value = value.strip()
+        if not value.endswith(")") or value.count(",") != 1:
+            raise ValueError(f"Unknown track size {value}")
+        minimum, maximum = value[len("minmax(") : -1].split(",")
+        minimum = _track_breadth(minimum)
+        if isinstance(minimum, Fr):
+            raise ValueError(f"The minimum of {value} can not be a flexible length")
+        return TrackSize(minimum, _track_breadth(maximum))
+
+    return TrackSize(_track_breadth(value))
+
+
+def track_list(value):
+    """Parse a grid track list.
+
+    Accepts:
+    * A track list (returned as is).
+    * A sequence of track sizes.
+    * A string of track sizes separated by spaces, which may include
+      'repeat(<count>, <track sizes>)'.
+    """
+    if isinstance(value, TrackList):
+        return value
+    elif isinstance(value, str):
+        values = _split_tracks(value)
+    elif isinstance(value, Sequence):
+        values = value
+    else:
+        raise ValueError(f"Unknown track list {value}")
+
+    tracks = []
+    for item in values:
+        if isinstance(item, str) and item.startswith("repeat("):
+            if not item.endswith(")") or "," not in item:
+                raise ValueError(f"Unknown track repetition {item}")
+            count, repeated = item[len("repeat(") : -1].split(",", 1)
+            try:
+                count = int(count)
+            except ValueError:
+                raise ValueError(f"Unknown repetition count {count}")
+            if count < 1:
+                raise ValueError(f"Repetition count {count} must be positive")
+            tracks.extend(
+                [track_size(size) for size in _split_tracks(repeated)] * count
+            )
+        else:
+            tracks.append(track_size(item))
+
+    if not tracks:
+        raise ValueError(f"Empty track list {value}")
+    return TrackList(tracks)
+
+
+def grid_line(value):
+    """Parse a grid line.
+
+    Accepts:
+    * A grid line (returned as is).
+    * A non-zero integer, or a string holding one; negative lines are
+      counted from the end of the explicit grid.
+    * 'span <integer>', with a positive integer.
+
+    Named lines aren't supported.
+    """
+    if isinstance(value, GridLine):
+        return value
+    elif isinstance(value, int) and not isinstance(value, bool):
+        line = value
+    elif isinstance(value, str):
+        parts = value.split()
+        if len(parts) == 2 and parts[0] == "span":
+            try:
+                span = int(parts[1])
+            except ValueError:
+                raise ValueError(f"Unknown grid span {value}")
+            if span < 1:
+                raise ValueError(f"Grid span {value} must be positive")
+            return GridLine(span=span)
+        try:
+            line = int(value)
+        except ValueError:
+            raise ValueError(f"Unknown grid line {value}")
+    else:
+        raise ValueError(f"Unknown grid line {value}")
+
+    if line == 0:
+        raise ValueError("Grid line 0 is not valid")
+    return GridLine(line)
+
+
 def rect(value):
     """Parse a given rect shape."""
     value = " ".join(val.strip() for val in value.split())
@@ -1,6 +1,8 @@
 class Rect:
     """Representation of a rectangular shape."""
 
+    __slots__ = ("_top", "_right", "_left", "_bottom")
+
     def __init__(self, top, right, left, bottom):
         self._top = top
         self._right = right
@@ -27,6 +27,8 @@ LU_PER_PIXEL = 64
 class BaseUnit:
     UNITS = []
 
+    __slots__ = ("suffix", "val")
+
     def __init__(self, suffix, val=None):
         BaseUnit.UNITS.append((suffix, self))
         self.suffix = suffix
@@ -52,17 +54,21 @@ class BaseUnit:
 
 
 class Unit(BaseUnit):
+    __slots__ = ()
+
     def lu(self, display=None, font=None, size=None):
         return round(LU_PER_PIXEL * self.val)
 
     def px(self, display=None, font=None, size=None):
-        logical_units = self.lu(display=display, font=font, size=size)
+        logical_units = self.lu(display, font, size)
         value = logical_units / LU_PER_PIXEL
         int_value = int(value)
         return int_value if value == int_value else value
 
 
 class AngleUnit(BaseUnit):
+    __slots__ = ("scale",)
+
     def __init__(self, suffix, scale, val=None):
         super().__init__(suffix, val)
         self.scale = scale
@@ -80,8 +86,13 @@ class AngleUnit(BaseUnit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    def __hash__(self):
+        return hash((self.val, self.suffix))
+
 
 class PixelUnit(Unit):
+    __slots__ = ()
+
     def __init__(self, val=None):
         super().__init__("px", val)
 
@@ -95,8 +106,13 @@ class PixelUnit(Unit):
             return self.val == other.val
         return False
 
+    def __hash__(self):
+        return hash(self.val)
+
 
 class FontUnit(Unit):
+    __slots__ = ()
+
     def lu(self, display=None, font=None, size=None):
         return round(
             LU_PER_PIXEL * self.val * (getattr(font, self.suffix) / 72) * display.dpi
@@ -110,8 +126,13 @@ class FontUnit(Unit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    def __hash__(self):
+        return hash((self.val, self.suffix))
+
 
 class AbsoluteUnit(Unit):
+    __slots__ = ("scale",)
+
     def __init__(self, suffix, scale, val=None):
         super().__init__(suffix, val)
         self.scale = scale
@@ -127,8 +148,13 @@ class AbsoluteUnit(Unit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    def __hash__(self):
+        return hash((self.val, self.suffix))
+
 
 class ViewportUnit(Unit):
+    __slots__ = ("scale",)
+
     def __init__(self, suffix, scale, val=None):
         super().__init__(suffix, val)
         self.scale = scale
@@ -144,8 +170,13 @@ class ViewportUnit(Unit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    def __hash__(self):
+        return hash((self.val, self.suffix))
+
 
 class Percent(Unit):
+    __slots__ = ()
+
     def __init__(self, val=None):
         super().__init__("%", val)
 
@@ -160,6 +191,9 @@ class Percent(Unit):
             return self.val == other.val and self.suffix == other.suffix
         return False
 
+    def __hash__(self):
+        return hash((self.val, self.suffix))
+
     def __lt__(self, other):
         return self.val < other.val
 
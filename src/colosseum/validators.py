@@ -135,6 +135,45 @@ def is_border_spacing(value):
 is_border_spacing.description = "<length> <length>?"
 
 
+def is_track_size(value):
+    """Check if value is a grid track size, and return it."""
+    try:
+        value = parser.track_size(value)
+    except ValueError as error:
+        raise ValidationError(str(error))
+
+    return value
+
+
+is_track_size.description = "<track-size>"
+
+
+def is_track_list(value):
+    """Check if value is a grid track list, and return it."""
+    try:
+        value = parser.track_list(value)
+    except ValueError as error:
+        raise ValidationError(str(error))
+
+    return value
+
+
+is_track_list.description = "<track-list>"
+
+
+def is_grid_line(value):
+    """Check if value is a grid line, and return it."""
+    try:
+        value = parser.grid_line(value)
+    except ValueError as error:
+        raise ValidationError(str(error))
+
+    return value
+
+
+is_grid_line.description = "<integer> | span <integer>"
+
+
 def is_rect(value):
     """Check if given value is a rect shape and return it."""
     try:
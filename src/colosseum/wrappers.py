@@ -10,6 +10,8 @@ class BorderSpacing:
         BorderSpacing(1px, 2px)
     """
 
+    __slots__ = ("_horizontal", "_vertical")
+
     def __init__(self, horizontal, vertical=None):
         self._horizontal = horizontal
         self._vertical = vertical
@@ -29,6 +31,16 @@ class BorderSpacing:
 
         return string
 
+    def __eq__(self, other):
+        return (
+            self.__class__ == other.__class__
+            and self.horizontal == other.horizontal
+            and self.vertical == other.vertical
+        )
+
+    def __hash__(self):
+        return hash((self.horizontal, self.vertical))
+
     @property
     def horizontal(self):
         """Return the horizontal border spacing."""
@@ -50,6 +62,8 @@ class Quotes:
         Quotes([('<', '>'), ('{', '}'), ('[', ']')])
     """
 
+    __slots__ = ("_quotes",)
+
     def __init__(self, values):
         self._quotes = values
 
@@ -70,6 +84,9 @@ class Quotes:
     def __eq__(self, other):
         return self.__class__ == other.__class__ and self._quotes == other._quotes
 
+    def __hash__(self):
+        return hash(tuple(self._quotes))
+
     def opening(self, level):
         """Return the opening quote for the given level."""
         try:
@@ -88,6 +105,9 @@ class Quotes:
 class Shorthand:
     VALID_KEYS = []
 
+    # Subclasses define a slot for each of their VALID_KEYS.
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         if self.VALID_KEYS:
             for key in kwargs:
@@ -125,39 +145,49 @@ class Shorthand:
         """Return dictionary of the defined properties."""
         properties = OrderedDict()
         for key in self.VALID_KEYS:
-            if key in self.__dict__:
-                properties[key] = self.__dict__[key]
+            try:
+                properties[key] = getattr(self, key)
+            except AttributeError:
+                pass
 
         return properties
 
 
 class Outline(Shorthand):
     VALID_KEYS = ["outline_color", "outline_style", "outline_width"]
+    __slots__ = VALID_KEYS
 
 
 class BorderTop(Shorthand):
     VALID_KEYS = ["border_top_width", "border_top_style", "border_top_color"]
+    __slots__ = VALID_KEYS
 
 
 class BorderRight(Shorthand):
     VALID_KEYS = ["border_right_width", "border_right_style", "border_right_color"]
+    __slots__ = VALID_KEYS
 
 
 class BorderBottom(Shorthand):
     VALID_KEYS = ["border_bottom_width", "border_bottom_style", "border_bottom_color"]
+    __slots__ = VALID_KEYS
 
 
 class BorderLeft(Shorthand):
     VALID_KEYS = ["border_left_width", "border_left_style", "border_left_color"]
+    __slots__ = VALID_KEYS
 
 
 class Border(Shorthand):
     VALID_KEYS = ["border_width", "border_style", "border_color"]
+    __slots__ = VALID_KEYS
 
 
 class Uri:
     """Wrapper for a url."""
 
+    __slots__ = ("_url",)
+
     def __init__(self, url):
         self._url = url
 
@@ -237,3 +267,147 @@ class ImmutableList(list):
 
 class Cursor(ImmutableList):
     """Immutable list to store cursor property."""
+
+
+class Fr:
+    """
+    Flexible length wrapper; a fraction of the free space in a grid.
+
+    Examples:
+        Fr(1)
+        Fr(2.5)
+    """
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value):
+        self._value = value
+
+    def __repr__(self):
+        return f"Fr({self._value})"
+
+    def __str__(self):
+        value = int(self._value) if self._value == int(self._value) else self._value
+        return f"{value}fr"
+
+    def __eq__(self, other):
+        return self.__class__ == other.__class__ and self._value == other._value
+
+    def __hash__(self):
+        return hash((self.__class__.__name__, self._value))
+
+    @property
+    def value(self):
+        """Return the flex factor."""
+        return self._value
+
+
+class TrackSize:
+    """
+    Grid track size wrapper.
+
+    A track with a single size has no separate maximum.
+
+    Examples:
+        TrackSize(10px)
+        TrackSize(Fr(1))
+        TrackSize(10px, Fr(1))
+    """
+
+    __slots__ = ("_minimum", "_maximum")
+
+    def __init__(self, minimum, maximum=None):
+        self._minimum = minimum
+        self._maximum = maximum
+
+    def __repr__(self):
+        if self._maximum is None:
+            string = f"TrackSize({repr(self._minimum)})"
+        else:
+            string = f"TrackSize({repr(self._minimum)}, {repr(self._maximum)})"
+        return string
+
+    def __str__(self):
+        if self._maximum is None:
+            string = f"{self._minimum}"
+        else:
+            string = f"minmax({self._minimum}, {self._maximum})"
+        return string
+
+    def __eq__(self, other):
+        return (
+            self.__class__ == other.__class__
+            and self._minimum == other._minimum
+            and self._maximum == other._maximum
+        )
+
+    def __hash__(self):
+        return hash((self._minimum, self._maximum))
+
+    @property
+    def minimum(self):
+        """Return the minimum track sizing function."""
+        return self._minimum
+
+    @property
+    def maximum(self):
+        """Return the maximum track sizing function."""
+        return self._minimum if self._maximum is None else self._maximum
+
+
+class TrackList(ImmutableList):
+    """Immutable list to store the track sizes of a grid."""
+
+    def __str__(self):
+        return " ".join(str(v) for v in self)
+
+
+class GridLine:
+    """
+    Grid placement wrapper; a line, or a span of tracks.
+
+    Examples:
+        GridLine(2)
+        GridLine(-1)
+        GridLine(span=2)
+    """
+
+    __slots__ = ("_line", "_span")
+
+    def __init__(self, line=None, span=None):
+        self._line = line
+        self._span = span
+
+    def __repr__(self):
+        if self._span is None:
+            string = f"GridLine({self._line})"
+        else:
+            string = f"GridLine(span={self._span})"
+        return string
+
+    def __str__(self):
+        if self._span is None:
+            string = f"{self._line}"
+        else:
+            string = f"span {self._span}"
+        return string
+
+    def __eq__(self, other):
+        return (
+            self.__class__ == other.__class__
+            and self._line == other._line
+            and self._span == other._span
+        )
+
+    def __hash__(self):
+        return hash((self.__class__.__name__, self._line, self._span))
+
+    @property
+    def line(self):
+        """Return the line number, or None for a span."""
+        return self._line
+
+    @property
+    def span(self):
+        """Return the number of tracks spanned, or None for a line."""
+        return self._span
@@ -0,0 +1,236 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import ABSOLUTE, BLOCK, FIXED, RELATIVE, STATIC
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import build_tree, geometry
+
+
+def block(height=10, **style):
+    return ExampleNode(style=CSS(display=BLOCK, height=height, **style))
+
+
+def positioned(**style):
+    return ExampleNode(style=CSS(display=BLOCK, position=ABSOLUTE, **style))
+
+
+def position(node):
+    return (node.layout.absolute_border_box_left, node.layout.absolute_border_box_top)
+
+
+def build_document(overlay):
+    "A document with a positioned container, holding an overlay in its flow."
+    container = ExampleNode(
+        style=CSS(display=BLOCK, position=RELATIVE, padding=10, border_width=5),
+        children=[
+            block(20),
+            ExampleNode(style=CSS(display=BLOCK), children=[block(30), overlay]),
+            block(40),
+        ],
+    )
+    return ExampleNode(
+        style=CSS(display=BLOCK, padding=8), children=[block(50), container]
+    )
+
+
+def padding_box(node):
+    "The top left corner of the padding box of a node."
+    return (node.layout.absolute_padding_box_left, node.layout.absolute_padding_box_top)
+
+
+def offset(node, left, top):
+    "The position of a node, offset from the padding box of another."
+    x, y = padding_box(node)
+    return (x + left, y + top)
+
+
+class AbsolutePositioningTests(LayoutTestCase):
+    def test_offsets(self):
+        overlay = positioned(top=5, left=15, width=100, height=60, margin=2)
+        root = build_document(overlay)
+        container = root.children[1]
+        layout(self.display, root)
+
+        # The overlay is taken out of the flow...
+        self.assertEqual(container.layout.content_height, 90)
+        self.assertEqual(
+            position(container.children[2]),
+            (
+                container.layout.absolute_content_left,
+                container.layout.absolute_content_top + 50,
+            ),
+        )
+
+        # ... and is placed against the padding box of its containing block.
+        self.assertEqual(position(overlay), offset(container, 15 + 2, 5 + 2))
+        self.assertEqual(overlay.layout.content_width, 100)
+        self.assertEqual(overlay.layout.content_height, 60)
+
+        # The bottom and right are measured from the other side.
+        overlay.style.update(top="auto", left="auto", bottom=5, right=15)
+        layout(self.display, root)
+        self.assertEqual(
+            position(overlay),
+            offset(container, 1024 - 16 - 10 - 15 - 2 - 100, 110 - 5 - 2 - 60),
+        )
+
+    def test_static_position(self):
+        # Without offsets, the overlay stays where it would have been in the
+        # flow.
+        overlay = positioned(width=100, height=60)
+        root = build_document(overlay)
+        layout(self.display, root)
+
+        parent = root.children[1].children[1]
+        self.assertEqual(
+            position(overlay),
+            (
+                parent.layout.absolute_content_left,
+                parent.layout.absolute_content_top + 30,
+            ),
+        )
+
+    def test_stretch(self):
+        # With both offsets on an axis, an auto size fills the padding box
+        # of the containing block...
+        overlay = positioned(top=10, bottom=20, left=30, right=40)
+        root = build_document(overlay)
+        container = root.children[1]
+        layout(self.display, root)
+
+        self.assertEqual(position(overlay), offset(container, 30, 10))
+        self.assertEqual(overlay.layout.content_width, 1024 - 16 - 10 - 30 - 40)
+        self.assertEqual(overlay.layout.content_height, 110 - 10 - 20)
+
+        # ... and auto margins center a box with a definite size.
+        overlay.style.update(width=100, height=50, margin="auto")
+        layout(self.display, root)
+        self.assertEqual(overlay.layout.margin_left, (1024 - 26 - 70 - 100) // 2)
+        self.assertEqual(overlay.layout.margin_top, 15)
+
+    def test_shrink_to_fit(self):
+        overlay = positioned(left=10)
+        overlay.intrinsic.width = 120
+        root = build_document(overlay)
+        layout(self.display, root)
+
+        self.assertEqual(overlay.layout.content_width, 120)
+        self.assertEqual(overlay.layout.content_height, 0)
+
+    def test_containing_block(self):
+        # The containing block is the nearest positioned ancestor; if there
+        # isn't one, the overlay is placed against the root.
+        overlay = positioned(top=0, left=0)
+        root = build_document(overlay)
+        container = root.children[1]
+        container.style.position = STATIC
+        layout(self.display, root)
+        self.assertEqual(position(overlay), (0, 0))
+
+        container.children[1].style.position = RELATIVE
+        layout(self.display, root)
+        self.assertEqual(position(overlay), padding_box(container.children[1]))
+
+        # A fixed position box is placed against the root.
+        overlay.style.position = FIXED
+        layout(self.display, root)
+        self.assertEqual(position(overlay), (0, 0))
+
+    def test_nested(self):
+        inner = positioned(top=3, left=4, width=10, height=10)
+        outer = positioned(top=10, left=20, width=100, height=100, padding=1)
+        outer.children.append(inner)
+        inner.parent = outer
+        root = build_document(outer)
+        layout(self.display, root)
+
+        self.assertEqual(position(outer), offset(root.children[1], 20, 10))
+        self.assertEqual(position(inner), offset(outer, 4, 3))
+
+
+class IncrementalAbsolutePositioningTests(LayoutTestCase):
+    def count_layout_box_calls(self, root, **kwargs):
+        with mock.patch(
+            "colosseum.engine.layout_box", wraps=engine.layout_box
+        ) as layout_box:
+            layout(self.display, root, **kwargs)
+        return layout_box.call_count
+
+    def assertIncrementalLayout(self, root):
+        "Check that an incremental layout matches a full layout."
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
+
+    def test_move_overlay(self):
+        overlay = positioned(top=10, left=10, width=300)
+        overlay.children.extend([block(), block()])
+        for child in overlay.children:
+            child.parent = overlay
+
+        root = build_tree()
+        root.children[3].children.append(overlay)
+        overlay.parent = root.children[3]
+        root.children[3].style.position = RELATIVE
+        layout(self.display, root)
+
+        # Moving (or resizing) the overlay only lays out the overlay and its
+        # children, on the path from the root.
+        overlay.style.update(top=100, left=50, width=200)
+        self.assertEqual(self.count_layout_box_calls(root, incremental=True), 5)
+        self.assertEqual(position(overlay), offset(root.children[3], 50, 100))
+        self.assertEqual(overlay.children[0].layout.content_width, 200)
+
+        overlay.style.update(top=20, left=30)
+        self.assertIncrementalLayout(root)
+
+    def test_flow_change(self):
+        # The static position of an overlay follows the flow.
+        overlay = positioned(width=100, height=60)
+        root = build_document(overlay)
+        layout(self.display, root)
+
+        root.children[1].children[1].children[0].style.height = 70
+        self.assertIncrementalLayout(root)
+        parent = root.children[1].children[1]
+        self.assertEqual(
+            position(overlay),
+            (
+                parent.layout.absolute_content_left,
+                parent.layout.absolute_content_top + 70,
+            ),
+        )
+
+    def test_containing_block_change(self):
+        overlay = positioned(top=0, left=0)
+        root = build_document(overlay)
+        layout(self.display, root)
+
+        root.children[1].children[1].style.position = RELATIVE
+        self.assertIncrementalLayout(root)
+        self.assertEqual(position(overlay), padding_box(root.children[1].children[1]))
+
+        root.children[1].children[1].style.position = STATIC
+        root.children[1].style.position = STATIC
+        self.assertIncrementalLayout(root)
+        self.assertEqual(position(overlay), (0, 0))
+
+    def test_position_change(self):
+        overlay = positioned(top=0, left=0, height=60)
+        root = build_document(overlay)
+        layout(self.display, root)
+
+        # The overlay returns to the flow...
+        overlay.style.position = STATIC
+        self.assertIncrementalLayout(root)
+        self.assertEqual(root.children[1].layout.content_height, 150)
+
+        # ... and leaves it again.
+        overlay.style.position = ABSOLUTE
+        self.assertIncrementalLayout(root)
+        self.assertEqual(root.children[1].layout.content_height, 90)
@@ -0,0 +1,151 @@
+from colosseum.constants import BLOCK, INLINE
+from colosseum.declaration import CSS
+from colosseum.engine import AnonymousBlockBox, LayoutCache, classify, layout
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+
+
+def inline(width=20, height=10):
+    node = ExampleNode(name="span", style=CSS(display=INLINE))
+    node.intrinsic.width = width
+    node.intrinsic.height = height
+    return node
+
+
+def block(height=10):
+    return ExampleNode(name="p", style=CSS(display=BLOCK, height=height))
+
+
+def build_mixed():
+    "A block container with runs of inline children between block children."
+    return ExampleNode(
+        name="div",
+        style=CSS(display=BLOCK, padding=5),
+        children=[
+            inline(),
+            inline(height=15),
+            block(),
+            inline(),
+            block(height=20),
+            inline(height=12),
+        ],
+    )
+
+
+class AnonymousBoxTests(LayoutTestCase):
+    def test_box_tree(self):
+        root = build_mixed()
+        layout(self.display, root)
+
+        # Each run of inline children is wrapped in an anonymous block box,
+        # including the run at the end of the container.
+        boxes = classify(root).boxes
+        self.assertEqual(
+            [type(box) for box in boxes],
+            [AnonymousBlockBox, ExampleNode, AnonymousBlockBox, ExampleNode]
+            + [AnonymousBlockBox],
+        )
+        self.assertEqual(boxes[0].children, root.children[0:2])
+        self.assertEqual(boxes[2].children, root.children[3:4])
+        self.assertEqual(boxes[4].children, root.children[5:6])
+
+        # The anonymous boxes are part of the box tree, but not of the document.
+        for box in boxes:
+            self.assertIs(box.parent, root)
+        for child in root.children:
+            self.assertIs(child.parent, root)
+
+    def test_layout(self):
+        root = build_mixed()
+        layout(self.display, root)
+        boxes = classify(root).boxes
+
+        # The anonymous boxes are laid out in the flow of their parent...
+        self.assertEqual(
+            [
+                (box.layout.absolute_content_top, box.layout.content_height)
+                for box in boxes
+            ],
+            [(5, 15), (20, 10), (30, 10), (40, 20), (60, 12)],
+        )
+        self.assertEqual(boxes[0].layout.content_width, 1024 - 10)
+
+        # ... and their children are positioned inside them. (Until line
+        # boxes are implemented, inline boxes are all placed at the top of
+        # their container.)
+        self.assertEqual(root.children[1].layout.absolute_content_top, 5)
+        self.assertEqual(root.children[3].layout.absolute_content_top, 30)
+        self.assertEqual(root.children[5].layout.absolute_content_top, 60)
+        self.assertEqual(root.children[5].layout.absolute_content_left, 5)
+
+    def test_hidden_children(self):
+        root = build_mixed()
+        root.children[1].style.display = None
+        root.children[5].style.display = None
+        layout(self.display, root)
+
+        # Children that aren't displayed don't generate a box.
+        boxes = classify(root).boxes
+        self.assertEqual(boxes[0].children, root.children[0:1])
+        self.assertEqual(len(boxes), 4)
+        self.assertIsNone(root.children[1].layout)
+        self.assertIsNone(root.children[5].layout)
+        self.assertEqual(boxes[-1].layout.absolute_content_top, 35)
+
+    def test_reused(self):
+        root = build_mixed()
+        layout(self.display, root)
+        boxes = classify(root).boxes
+
+        # The anonymous boxes are retained between layouts...
+        layout(self.display, root)
+        self.assertEqual(classify(root).boxes, boxes)
+
+        # ... until the display of a child changes.
+        root.children[2].style.display = INLINE
+        root.children[2].intrinsic.width = 20
+        root.children[2].intrinsic.height = 10
+        layout(self.display, root)
+        anonymous = classify(root).boxes[0]
+        self.assertIsInstance(anonymous, AnonymousBlockBox)
+        self.assertIsNot(anonymous, boxes[0])
+        self.assertEqual(anonymous.children, root.children[0:4])
+
+    def test_incremental(self):
+        root = build_mixed()
+        layout(self.display, root)
+
+        # A change to a child of an anonymous box dirties the anonymous box,
+        # and the boxes that contain it.
+        root.children[3].intrinsic.height = 30
+        self.assertTrue(classify(root).boxes[2].layout.dirty)
+        self.assertTrue(root.layout.dirty)
+
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+        self.assertEqual(classify(root).boxes[3].layout.absolute_content_top, 60)
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
+
+    def test_cache(self):
+        root = ExampleNode(
+            style=CSS(display=BLOCK),
+            children=[build_mixed() for i in range(3)],
+        )
+        cache = LayoutCache()
+        layout(self.display, root, cache=cache)
+        # The second and third copies, and a repeated span of the first.
+        self.assertEqual(cache.hits, 3)
+        cached = geometry(root)
+
+        # The copies have their own anonymous boxes.
+        first, second = root.children[0:2]
+        self.assertIsNot(classify(first).boxes[0], classify(second).boxes[0])
+        self.assertIs(
+            second.children[0].layout._container, classify(second).boxes[0].layout
+        )
+
+        layout(self.display, root)
+        self.assertEqual(cached, geometry(root))
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from colosseum.constants import BLOCK, INLINE, LEFT, LIST_ITEM
+from colosseum.declaration import CSS
+from colosseum.engine import (
+    BLOCK_CONTAINER,
+    BLOCK_LEVEL,
+    FLOAT_POSITIONED,
+    INLINE_ELEMENT,
+    INLINE_LEVEL,
+    Classification,
+    classify,
+    layout,
+)
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import build_tree
+
+
+class ClassificationTests(LayoutTestCase):
+    def count_classifications(self, root, **kwargs):
+        with mock.patch(
+            "colosseum.engine.Classification", wraps=Classification
+        ) as classification:
+            layout(self.display, root, **kwargs)
+        return classification.call_count
+
+    def test_category(self):
+        block = ExampleNode(style=CSS(display=BLOCK))
+        self.assertEqual(classify(block).category, BLOCK_LEVEL | BLOCK_CONTAINER)
+
+        inline = ExampleNode(style=CSS(display=INLINE))
+        self.assertEqual(classify(inline).category, INLINE_LEVEL | INLINE_ELEMENT)
+
+        floated = ExampleNode(style=CSS(display=BLOCK, float=LEFT))
+        self.assertTrue(classify(floated).category & FLOAT_POSITIONED)
+
+    def test_reused(self):
+        root = build_tree()
+
+        # The first layout classifies every box...
+        self.assertEqual(self.count_classifications(root), 111)
+        boxes = classify(root).boxes
+
+        # ... and later layouts reuse the classification.
+        self.assertEqual(self.count_classifications(root), 0)
+        self.assertIs(classify(root).boxes, boxes)
+
+        # Changes that don't alter the box tree don't discard it.
+        root.children[5].style.width = 100
+        root.children[5].style.color = "red"
+        self.assertEqual(self.count_classifications(root, incremental=True), 0)
+
+    def test_display_change(self):
+        child = ExampleNode(style=CSS(display=BLOCK, height=10))
+        parent = ExampleNode(style=CSS(display=BLOCK), children=[child])
+        root = ExampleNode(style=CSS(display=BLOCK), children=[parent])
+        layout(self.display, root)
+        self.assertFalse(classify(parent).inline)
+
+        # A change of display discards the classification of the box,
+        # and of its parent, but nothing else.
+        child.style.display = LIST_ITEM
+        self.assertIsNone(child.layout._classification)
+        self.assertIsNone(parent.layout._classification)
+        self.assertIsNotNone(root.layout._classification)
+        self.assertEqual(self.count_classifications(root, incremental=True), 2)
+
+        child.style.display = INLINE
+        self.assertTrue(classify(parent).inline)
+        child.style.display = BLOCK
+        self.assertFalse(classify(parent).inline)
+
+        # The parent is laid out again, even if the box is a relayout
+        # boundary.
+        child.style.width = 50
+        layout(self.display, root)
+        self.assertTrue(child.layout.is_relayout_boundary)
+
+        child.style.display = LIST_ITEM
+        self.assertTrue(parent.layout.dirty)
+        self.assertEqual(self.count_classifications(root, incremental=True), 2)
+
+    def test_children_change(self):
+        root = build_tree()
+        layout(self.display, root)
+
+        # A change to the list of children is detected when the box is
+        # laid out again.
+        parent = root.children[5]
+        child = ExampleNode(style=CSS(display=BLOCK, height=10))
+        child.parent = parent
+        parent.children.append(child)
+        parent.layout.dirty = True
+
+        self.assertEqual(self.count_classifications(root, incremental=True), 2)
+        self.assertEqual(classify(parent).boxes[-1:], [child])
+        self.assertEqual(parent.layout.content_height, 110)
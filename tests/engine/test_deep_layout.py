@@ -0,0 +1,66 @@
+import sys
+
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from ..utils import ExampleNode, LayoutTestCase, summarize
+from .test_incremental_layout import geometry
+
+
+def build_chain(depth):
+    "A document that nests one box inside the next, depth times."
+    root = node = ExampleNode(name="div", style=CSS(display=BLOCK, padding_top=1))
+    for i in range(depth):
+        child = ExampleNode(name="div", style=CSS(display=BLOCK, padding_top=1))
+        child.parent = node
+        node.children.append(child)
+        node = child
+    return root
+
+
+class DeepLayoutTests(LayoutTestCase):
+    # Deeper than the default recursion limit allows.
+    DEPTH = 2 * sys.getrecursionlimit()
+
+    def assertChainLayout(self, root, innermost_height=0):
+        for level, node in enumerate(self.levels(root)):
+            self.assertEqual(node.layout.absolute_content_top, level + 1)
+            # The root fills the viewport; every other box fits its content.
+            if level > 0:
+                self.assertEqual(
+                    node.layout.content_height, self.DEPTH - level + innermost_height
+                )
+
+    def levels(self, root):
+        node = root
+        while True:
+            yield node
+            if not node.children:
+                break
+            node = node.children[0]
+
+    def test_full_layout(self):
+        root = build_chain(self.DEPTH)
+
+        layout(self.display, root)
+        self.assertChainLayout(root)
+
+        # The summary of the document can be built, too.
+        summary = summarize(root)
+        self.assertEqual(summary["content"]["position"], (0, 1))
+
+    def test_incremental_layout(self):
+        root = build_chain(self.DEPTH)
+        layout(self.display, root)
+        *ancestors, innermost = self.levels(root)
+
+        innermost.style.height = 10
+        layout(self.display, root, incremental=True)
+        self.assertChainLayout(root, innermost_height=10)
+
+        # The result is the same as a full layout.
+        incremental = geometry(root)
+        root.layout.reset()
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
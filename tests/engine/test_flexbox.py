@@ -0,0 +1,371 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import (
+    BLOCK,
+    CENTER,
+    COLUMN,
+    FLEX,
+    FLEX_END,
+    FLEX_START,
+    HIDDEN,
+    INLINE,
+    ROW_REVERSE,
+    SPACE_AROUND,
+    SPACE_BETWEEN,
+    WRAP,
+    WRAP_REVERSE,
+)
+from colosseum.declaration import CSS
+from colosseum.engine import AnonymousBlockBox, LayoutCache, classify, layout
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+
+
+def content(width, height=10):
+    "An inline box of a given size."
+    node = ExampleNode(name="span", style=CSS(display=INLINE))
+    node.intrinsic.width = width
+    node.intrinsic.height = height
+    return node
+
+
+def item(text=20, height=10, **style):
+    "A flex item, holding an inline box of a given size."
+    return ExampleNode(
+        name="div",
+        style=CSS(display=BLOCK, **style),
+        children=[content(text, height)],
+    )
+
+
+def flex(*items, **style):
+    return ExampleNode(name="flex", style=CSS(display=FLEX, **style), children=items)
+
+
+def document(*children):
+    return ExampleNode(style=CSS(display=BLOCK, padding=10), children=children)
+
+
+def widths(container):
+    return [child.layout.border_box_width for child in container.children]
+
+
+def heights(container):
+    return [child.layout.border_box_height for child in container.children]
+
+
+def lefts(container):
+    return [child.layout.absolute_border_box_left for child in container.children]
+
+
+def tops(container):
+    return [child.layout.absolute_border_box_top for child in container.children]
+
+
+class FlexBoxTreeTests(LayoutTestCase):
+    def test_order(self):
+        first, second, third = item(), item(order=-1), item(order=1)
+        container = flex(first, second, third)
+        self.assertEqual(classify(container).boxes, [second, first, third])
+
+        layout(self.display, document(container))
+        self.assertEqual(
+            [first.layout.content_left, second.layout.content_left], [20, 0]
+        )
+
+        # Changing the order rebuilds the box tree.
+        second.style.order = 2
+        layout(self.display, document(container), incremental=True)
+        self.assertEqual(classify(container).boxes, [first, third, second])
+        self.assertEqual(second.layout.content_left, 40)
+
+    def test_anonymous_item(self):
+        # A run of text is wrapped in an anonymous item.
+        text = content(30)
+        container = flex(item(), text)
+        boxes = classify(container).boxes
+        self.assertEqual(type(boxes[1]), AnonymousBlockBox)
+        self.assertEqual(boxes[1].children, [text])
+
+        layout(self.display, document(container))
+        self.assertEqual(boxes[1].layout.border_box_width, 30)
+        self.assertEqual(text.layout.absolute_border_box_left, 30)
+
+
+class FlexLayoutTests(LayoutTestCase):
+    def test_row(self):
+        # Items are placed side by side, at their content width, and
+        # stretched to the height of the line.
+        container = flex(item(50), item(30, height=20, padding=5), item(10, margin=3))
+        layout(self.display, document(container))
+
+        self.assertEqual(widths(container), [50, 40, 10])
+        self.assertEqual(lefts(container), [10, 60, 103])
+        self.assertEqual(heights(container), [30, 30, 24])
+        self.assertEqual(tops(container), [10, 10, 13])
+        self.assertEqual(container.layout.content_height, 30)
+
+    def test_grow(self):
+        # Free space is shared in proportion to the grow factors...
+        container = flex(item(100), item(100, flex_grow=1), item(100, flex_grow=3))
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [100, 100 + 176, 100 + 528])
+
+        # ... unless an item reaches its maximum size.
+        container.children[2].style.max_width = 150
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [100, 754, 150])
+
+        # A basis replaces the width of the content.
+        container.children[2].style.update(max_width=None, flex_basis=0)
+        container.children[1].style.flex_basis = 0
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [100, 226, 678])
+
+    def test_partial_grow(self):
+        # If the grow factors add up to less than 1, only that part of the
+        # free space is shared.
+        container = flex(item(100, flex_grow=0.25), item(100, flex_grow=0.25))
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [301, 301])
+
+    def test_shrink(self):
+        # Items are shrunk in proportion to their shrink factors, and
+        # their bases...
+        container = flex(
+            item(100, width=600),
+            item(100, width=600, flex_shrink=2),
+            width=800,
+        )
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [467, 333])
+
+        # ... but not below the width of their content...
+        container.children[1].style.width = 300
+        container.children[0].style.width = 900
+        container.children[1].children[0].intrinsic.width = 280
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [520, 280])
+
+        # ... unless they clip their content.
+        container.children[1].style.overflow = HIDDEN
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [660, 140])
+
+    def test_justify_content(self):
+        container = flex(item(100), item(100), item(100), width=600)
+        root = document(container)
+        for justify_content, expected in [
+            (FLEX_START, [10, 110, 210]),
+            (FLEX_END, [310, 410, 510]),
+            (CENTER, [160, 260, 360]),
+            (SPACE_BETWEEN, [10, 260, 510]),
+            (SPACE_AROUND, [60, 260, 460]),
+        ]:
+            container.style.justify_content = justify_content
+            layout(self.display, root)
+            self.assertEqual(lefts(container), expected)
+
+        # Auto margins absorb the free space first.
+        container.children[1].style.margin_left = "auto"
+        layout(self.display, root)
+        self.assertEqual(lefts(container), [10, 410, 510])
+
+    def test_reverse(self):
+        container = flex(item(100), item(50), flex_direction=ROW_REVERSE, width=600)
+        layout(self.display, document(container))
+        self.assertEqual(lefts(container), [510, 460])
+
+    def test_align_items(self):
+        container = flex(item(10, height=40), item(10), item(10, align_self=FLEX_START))
+        root = document(container)
+        for align_items, expected in [
+            (FLEX_START, [10, 10, 10]),
+            (FLEX_END, [10, 40, 10]),
+            (CENTER, [10, 25, 10]),
+        ]:
+            container.style.align_items = align_items
+            layout(self.display, root)
+            self.assertEqual(tops(container), expected)
+            self.assertEqual(heights(container), [40, 10, 10])
+
+        # A definite height is the height of the line.
+        container.style.height = 100
+        layout(self.display, root)
+        self.assertEqual(tops(container), [40, 55, 10])
+
+        # Auto margins center an item across the line.
+        container.children[1].style.margin = "auto"
+        layout(self.display, root)
+        self.assertEqual(tops(container)[1], 55)
+        self.assertEqual(lefts(container)[1], 20 + (1004 - 30) // 2)
+
+    def test_wrap(self):
+        # Items are collected into lines, by their hypothetical widths...
+        container = flex(
+            item(400, height=20),
+            item(400),
+            item(400, height=30),
+            item(100, flex_grow=1),
+            flex_wrap=WRAP,
+        )
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [400, 400, 400, 604])
+        self.assertEqual(tops(container), [10, 10, 30, 30])
+        self.assertEqual(heights(container), [20, 20, 30, 30])
+        self.assertEqual(container.layout.content_height, 50)
+
+        # ... and the lines are packed by align-content.
+        container.style.update(height=100, align_content=SPACE_BETWEEN)
+        layout(self.display, document(container))
+        self.assertEqual(tops(container), [10, 10, 80, 80])
+
+        container.style.align_content = "stretch"
+        layout(self.display, document(container))
+        self.assertEqual(tops(container), [10, 10, 55, 55])
+        self.assertEqual(heights(container), [45, 45, 55, 55])
+
+        container.style.update(flex_wrap=WRAP_REVERSE, align_content=FLEX_START)
+        layout(self.display, document(container))
+        self.assertEqual(tops(container), [90, 90, 60, 60])
+
+    def test_column(self):
+        # Items are stacked, and stretched to the width of the container...
+        container = flex(item(50), item(30, height=20, margin=5), flex_direction=COLUMN)
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [1004, 994])
+        self.assertEqual(tops(container), [10, 25])
+        self.assertEqual(container.layout.content_height, 40)
+
+        # ... their heights are flexed in a definite height...
+        container.style.height = 200
+        container.children[0].style.flex_grow = 1
+        layout(self.display, document(container))
+        self.assertEqual(heights(container), [170, 20])
+        self.assertEqual(tops(container), [10, 185])
+
+        # ... and they fit their content when they aren't stretched.
+        container.style.align_items = CENTER
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [50, 30])
+        self.assertEqual(lefts(container), [10 + 477, 10 + 487])
+
+    def test_stretched_content(self):
+        # A stretched item is laid out again at its stretched height, so the
+        # percentage heights of its content, and the content of a nested
+        # container, are resolved against that height.
+        half = ExampleNode(style=CSS(display=BLOCK, height="50%"))
+        stretched = ExampleNode(style=CSS(display=BLOCK), children=[half])
+        nested = flex(item(10), flex_direction=COLUMN, justify_content=FLEX_END)
+        container = flex(
+            stretched, nested, item(10, height=30, align_self=FLEX_START), height=100
+        )
+        layout(self.display, document(container))
+
+        self.assertEqual(heights(container), [100, 100, 30])
+        self.assertEqual(half.layout.content_height, 50)
+        self.assertEqual(nested.children[0].layout.absolute_border_box_top, 10 + 90)
+
+        # Items that are flexed in a column are laid out again in the same
+        # way.
+        container.style.update(flex_direction=COLUMN, height=400)
+        stretched.style.flex_grow = 1
+        layout(self.display, document(container))
+        self.assertEqual(heights(container), [360, 10, 30])
+        self.assertEqual(half.layout.content_height, 180)
+
+
+class IncrementalFlexLayoutTests(LayoutTestCase):
+    def assertIncrementalLayout(self, root):
+        "Check that an incremental layout matches a full layout."
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
+
+    def build_toolbar(self, n_items=100):
+        container = flex(
+            *[item(5 + i % 7, flex_grow=i % 2) for i in range(n_items)],
+            flex_wrap=WRAP,
+        )
+        return container, document(container)
+
+    def test_cross_size_change(self):
+        container, root = self.build_toolbar()
+        layout(self.display, root)
+
+        # A change to the height of the row doesn't measure any item.
+        container.style.update(height=100)
+        with mock.patch(
+            "colosseum.engine.content_widths", side_effect=engine.content_widths
+        ) as content_widths:
+            layout(self.display, root, incremental=True)
+        self.assertEqual(content_widths.call_count, 0)
+        self.assertEqual(container.layout.content_height, 100)
+
+        container.style.update(height="auto", align_items=CENTER)
+        self.assertIncrementalLayout(root)
+
+    def test_stretched_items(self):
+        half = ExampleNode(style=CSS(display=BLOCK, height="50%"))
+        stretched = ExampleNode(style=CSS(display=BLOCK), children=[half])
+        container = flex(stretched, item(10, height=30), height=100)
+        root = document(container)
+        layout(self.display, root)
+
+        # The stretched layout of a clean item is reused.
+        with mock.patch(
+            "colosseum.engine.layout_box", wraps=engine.layout_box
+        ) as layout_box:
+            layout(self.display, root, incremental=True)
+        self.assertEqual(layout_box.call_count, 1)
+
+        container.style.height = 60
+        self.assertIncrementalLayout(root)
+        self.assertEqual(half.layout.content_height, 30)
+
+        half.style.height = "25%"
+        self.assertIncrementalLayout(root)
+        self.assertEqual(half.layout.content_height, 15)
+
+    def test_change_one_item(self):
+        container, root = self.build_toolbar()
+        layout(self.display, root)
+
+        # Only the changed item is measured again.
+        changed = container.children[40]
+        changed.children[0].style.width = 300
+        with mock.patch(
+            "colosseum.engine.content_widths", side_effect=engine.content_widths
+        ) as content_widths:
+            layout(self.display, root, incremental=True)
+        self.assertEqual(content_widths.call_count, 1)
+        self.assertEqual(changed.layout.border_box_width, 300)
+
+        changed.children[0].style.width = "auto"
+        self.assertIncrementalLayout(root)
+
+        container.children[10].style.flex_grow = 5
+        self.assertIncrementalLayout(root)
+
+        container.style.flex_direction = COLUMN
+        self.assertIncrementalLayout(root)
+        container.children[3].children[0].intrinsic.height = 30
+        container.children[3].layout.dirty = True
+        self.assertIncrementalLayout(root)
+
+    def test_cache(self):
+        # Identical items are copies of each other; the container, which
+        # resizes its items, isn't stored.
+        container = flex(*[item(20) for i in range(10)])
+        root = document(container)
+        cache = LayoutCache()
+        layout(self.display, root, cache=cache)
+        self.assertEqual(cache.hits, 9)
+
+        cached = geometry(root)
+        layout(self.display, root)
+        self.assertEqual(cached, geometry(root))
@@ -0,0 +1,221 @@
+from unittest import TestCase
+
+from colosseum.constants import BLOCK, BOTH, HIDDEN, INLINE, LEFT, RIGHT
+from colosseum.declaration import CSS
+from colosseum.engine import FloatExclusions, layout
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+from .test_intrinsic_sizing import TextDisplay, text
+
+
+def floated(side, width, height, **style):
+    return ExampleNode(
+        style=CSS(display=BLOCK, float=side, width=width, height=height, **style)
+    )
+
+
+def block(height=10, **style):
+    return ExampleNode(style=CSS(display=BLOCK, height=height, **style))
+
+
+def position(node):
+    return (node.layout.absolute_border_box_left, node.layout.absolute_border_box_top)
+
+
+class FloatExclusionsTests(TestCase):
+    def test_empty(self):
+        exclusions = FloatExclusions(100)
+        self.assertEqual(exclusions.available(0), (0, 100))
+        self.assertEqual(exclusions.available(1000), (0, 100))
+        self.assertEqual(exclusions.bottom, 0)
+
+    def test_place(self):
+        exclusions = FloatExclusions(100)
+
+        # Floats are placed against their side, next to earlier floats...
+        self.assertEqual(exclusions.place(LEFT, 30, 20, 0), (0, 0))
+        self.assertEqual(exclusions.place(RIGHT, 30, 10, 0), (70, 0))
+        self.assertEqual(exclusions.place(LEFT, 30, 10, 0), (30, 0))
+        self.assertEqual(exclusions.available(5), (60, 70))
+        self.assertEqual(exclusions.available(15), (30, 100))
+        self.assertEqual(exclusions.available(20), (0, 100))
+
+        # ... or moved down until they fit.
+        self.assertEqual(exclusions.place(LEFT, 50, 10, 0), (30, 10))
+
+        # A float is never placed above an earlier float, nor the position
+        # it is given.
+        self.assertEqual(exclusions.place(RIGHT, 10, 10, 0), (90, 10))
+        self.assertEqual(exclusions.place(RIGHT, 10, 10, 50), (90, 50))
+
+        self.assertEqual(exclusions.left_bottom, 20)
+        self.assertEqual(exclusions.right_bottom, 60)
+        self.assertEqual(exclusions.clearance(LEFT), 20)
+        self.assertEqual(exclusions.clearance(BOTH), 60)
+
+    def test_too_wide(self):
+        exclusions = FloatExclusions(100)
+        exclusions.place(LEFT, 30, 20, 0)
+
+        # A float that is wider than the container is placed below any
+        # other floats.
+        self.assertEqual(exclusions.place(LEFT, 150, 10, 0), (0, 20))
+
+    def test_bands(self):
+        exclusions = FloatExclusions(1000)
+        for i in range(100):
+            exclusions.place(LEFT, 100, 10, 0)
+
+        # Each row of floats shares a pair of bands.
+        self.assertEqual(exclusions.bottom, 100)
+        self.assertEqual(len(exclusions), 11)
+        self.assertEqual(exclusions.available(95), (1000, 1000))
+
+
+class FloatLayoutTests(LayoutTestCase):
+    def test_floats(self):
+        root = ExampleNode(
+            style=CSS(display=BLOCK, padding=10),
+            children=[
+                floated(LEFT, 100, 50),
+                floated(RIGHT, 200, 30, margin=5),
+                block(),
+                floated(LEFT, 100, 20),
+            ],
+        )
+        layout(self.display, root)
+
+        self.assertEqual(position(root.children[0]), (10, 10))
+        self.assertEqual(root.children[0].layout.content_width, 100)
+        self.assertEqual(position(root.children[1]), (1024 - 10 - 5 - 200, 15))
+
+        # Floats are taken out of the flow...
+        self.assertEqual(position(root.children[2]), (10, 10))
+        self.assertEqual(root.children[2].layout.content_width, 1024 - 20)
+
+        # ... but are placed at the current position in it.
+        self.assertEqual(position(root.children[3]), (110, 20))
+
+    def test_clear(self):
+        parent = ExampleNode(
+            style=CSS(display=BLOCK),
+            children=[
+                floated(LEFT, 100, 50),
+                floated(RIGHT, 100, 80),
+                block(clear=LEFT),
+                block(clear=RIGHT),
+                block(),
+                floated(LEFT, 100, 10, clear=BOTH),
+            ],
+        )
+        root = ExampleNode(style=CSS(display=BLOCK), children=[parent])
+        layout(self.display, root)
+
+        self.assertEqual(position(parent.children[2]), (0, 50))
+        self.assertEqual(position(parent.children[3]), (0, 80))
+        self.assertEqual(position(parent.children[4]), (0, 90))
+        self.assertEqual(position(parent.children[5]), (0, 100))
+
+        # Floats don't extend the height of a block box...
+        self.assertEqual(parent.layout.content_height, 100)
+
+    def test_formatting_context_root_height(self):
+        # ... but they do extend the height of a block formatting context root.
+        parent = ExampleNode(
+            style=CSS(display=BLOCK, overflow=HIDDEN),
+            children=[block(), floated(LEFT, 100, 50)],
+        )
+        root = ExampleNode(style=CSS(display=BLOCK), children=[parent])
+        layout(self.display, root)
+        self.assertEqual(parent.layout.content_height, 60)
+
+        # A float is a formatting context root, too.
+        outer = floated(RIGHT, 300, "auto")
+        outer.children.extend([block(), floated(LEFT, 100, 50)])
+        for child in outer.children:
+            child.parent = outer
+        root = ExampleNode(style=CSS(display=BLOCK), children=[outer])
+        layout(self.display, root)
+        self.assertEqual(outer.layout.content_height, 60)
+        self.assertEqual(position(outer.children[1]), (1024 - 300, 10))
+
+    def test_shrink_to_fit(self):
+        node = ExampleNode(style=CSS(display=BLOCK, float=LEFT, margin=5))
+        node.intrinsic.width = 120
+        root = ExampleNode(style=CSS(display=BLOCK), children=[node])
+        layout(self.display, root)
+        self.assertEqual(node.layout.content_width, 120)
+
+        # An intrinsic width can't be broken, so it overflows...
+        node.intrinsic.width = 2000
+        layout(self.display, root)
+        self.assertEqual(node.layout.content_width, 2000)
+
+        # ... but content that can be broken fills the available width.
+        node.intrinsic.width = None
+        for width in [600, 600]:
+            child = ExampleNode(style=CSS(display=INLINE))
+            child.intrinsic.width = width
+            child.intrinsic.height = 10
+            child.parent = node
+            node.children.append(child)
+        layout(self.display, root)
+        self.assertEqual(node.layout.content_width, 1024 - 10)
+
+        # Content that is narrower than the available width is shrunk to.
+        node.children[1].intrinsic.width = 100
+        layout(self.display, root)
+        self.assertEqual(node.layout.content_width, 700)
+
+    def test_incremental(self):
+        root = ExampleNode(
+            style=CSS(display=BLOCK),
+            children=[floated(LEFT, 100 + 10 * i, 20) for i in range(20)],
+        )
+        layout(self.display, root)
+
+        root.children[3].style.width = 500
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
+
+    def test_line_boxes(self):
+        # The lines beside a float are shortened by it; the lines below the
+        # float fill the width of the block.
+        display = TextDisplay(dpi=96, width=1024, height=768)
+        words = text("aa bb cc dd ee ff gg hh ii jj kk ll mm nn oo")
+        node = ExampleNode(
+            style=CSS(display=BLOCK, width=200),
+            children=[floated(LEFT, 100, 20), words],
+        )
+        root = ExampleNode(style=CSS(display=BLOCK), children=[node])
+        layout(display, root)
+
+        self.assertEqual(position(node.children[0]), (0, 0))
+        self.assertEqual(
+            [
+                (fragment.text, fragment.left, fragment.top)
+                for fragment in words.layout.fragments
+            ],
+            [
+                ("aa bb cc", 100, 0),
+                ("dd ee ff", 100, 12),
+                ("gg hh ii jj kk ll mm", 0, 24),
+                ("nn oo", 0, 36),
+            ],
+        )
+
+        # A change to the float moves the lines beside it.
+        node.children[0].style.float = RIGHT
+        layout(display, root, incremental=True)
+        incremental = geometry(root)
+        self.assertEqual(
+            [(fragment.text, fragment.left) for fragment in words.layout.fragments][:2],
+            [("aa bb cc", 0), ("dd ee ff", 0)],
+        )
+
+        layout(display, root)
+        self.assertEqual(incremental, geometry(root))
@@ -0,0 +1,325 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import (
+    BLOCK,
+    CENTER,
+    COLUMN,
+    COLUMN_DENSE,
+    FLEX_END,
+    GRID,
+    INLINE,
+    ROW_DENSE,
+    SPACE_BETWEEN,
+)
+from colosseum.declaration import CSS
+from colosseum.engine import GridOccupancy, LayoutCache, classify, layout
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+
+
+def content(width, height=10):
+    "An inline box of a given size."
+    node = ExampleNode(name="span", style=CSS(display=INLINE))
+    node.intrinsic.width = width
+    node.intrinsic.height = height
+    return node
+
+
+def item(text=20, height=10, **style):
+    "A grid item, holding an inline box of a given size."
+    return ExampleNode(
+        name="div",
+        style=CSS(display=BLOCK, **style),
+        children=[content(text, height)],
+    )
+
+
+def grid(*items, **style):
+    return ExampleNode(name="grid", style=CSS(display=GRID, **style), children=items)
+
+
+def document(*children):
+    return ExampleNode(style=CSS(display=BLOCK, padding=10), children=children)
+
+
+def areas(container):
+    return classify(container).grid.areas
+
+
+def widths(container):
+    return [child.layout.border_box_width for child in container.children]
+
+
+def heights(container):
+    return [child.layout.border_box_height for child in container.children]
+
+
+def lefts(container):
+    return [child.layout.absolute_border_box_left for child in container.children]
+
+
+def tops(container):
+    return [child.layout.absolute_border_box_top for child in container.children]
+
+
+class GridOccupancyTests(LayoutTestCase):
+    def test_fit(self):
+        occupancy = GridOccupancy()
+        occupancy.occupy(0, 2, 1, 2)
+        occupancy.occupy(1, 1, 4, 1)
+
+        self.assertEqual(occupancy.fit(0, 1, 0, 1), 0)
+        self.assertEqual(occupancy.fit(0, 1, 1, 1), 3)
+        self.assertEqual(occupancy.fit(0, 2, 0, 2), 5)
+        self.assertTrue(occupancy.fits(1, 1, 3, 1))
+        self.assertFalse(occupancy.fits(0, 2, 3, 2))
+
+        # Once the number of tracks is known, a track can be full...
+        occupancy.bound(5)
+        self.assertIsNone(occupancy.fit(1, 1, 0, 2))
+        self.assertEqual(occupancy.search(0, 4, 1, 2), (2, 0))
+
+        # ... and the search starts after the tracks that are.
+        occupancy.occupy(0, 2, 0, 5)
+        self.assertEqual(occupancy.open, 2)
+
+
+class GridPlacementTests(LayoutTestCase):
+    def build_grid(self, **style):
+        return grid(
+            item(grid_column_start="span 2"),
+            item(grid_column_start="span 2"),
+            item(),
+            item(),
+            grid_template_columns="repeat(3, 50px)",
+            **style,
+        )
+
+    def test_sparse(self):
+        # Each item is placed after the previous item, leaving holes.
+        container = self.build_grid()
+        self.assertEqual(
+            areas(container),
+            [(0, 1, 0, 2), (1, 1, 0, 2), (1, 1, 2, 1), (2, 1, 0, 1)],
+        )
+        self.assertEqual(classify(container).grid.rows, 3)
+
+    def test_dense(self):
+        # Each item fills the first hole it fits in.
+        container = self.build_grid(grid_auto_flow=ROW_DENSE)
+        self.assertEqual(
+            areas(container),
+            [(0, 1, 0, 2), (1, 1, 0, 2), (0, 1, 2, 1), (1, 1, 2, 1)],
+        )
+        self.assertEqual(classify(container).grid.rows, 2)
+
+    def test_column_flow(self):
+        container = self.build_grid(grid_template_rows="repeat(3, 20px)")
+        container.style.grid_auto_flow = COLUMN
+        self.assertEqual(
+            areas(container),
+            [(0, 1, 0, 2), (1, 1, 0, 2), (2, 1, 0, 1), (2, 1, 1, 1)],
+        )
+
+        container.style.grid_auto_flow = COLUMN_DENSE
+        self.assertEqual(
+            areas(container),
+            [(0, 1, 0, 2), (1, 1, 0, 2), (2, 1, 0, 1), (2, 1, 1, 1)],
+        )
+        self.assertEqual(classify(container).grid.columns, 3)
+
+    def test_definite_positions(self):
+        container = grid(
+            item(),
+            item(grid_row_start=2),
+            item(grid_column_start=-2),
+            item(grid_row_start=1, grid_column_start=1),
+            item(grid_row_start="span 2", grid_column_start=2, grid_column_end=4),
+            grid_template_columns="repeat(3, 50px)",
+        )
+        # Items locked to a row are placed before the other auto-placed
+        # items, and the cursor never moves back.
+        self.assertEqual(
+            areas(container),
+            [(0, 1, 1, 1), (1, 1, 0, 1), (0, 1, 2, 1), (0, 1, 0, 1), (1, 2, 1, 2)],
+        )
+
+    def test_implicit_columns(self):
+        # An item beyond the explicit grid adds implicit columns, which are
+        # sized by grid-auto-columns.
+        container = grid(
+            item(),
+            item(grid_column_start=4),
+            grid_template_columns="50px",
+            grid_auto_columns="30px",
+        )
+        layout(self.display, document(container))
+        self.assertEqual(classify(container).grid.columns, 4)
+        self.assertEqual(lefts(container), [10, 10 + 50 + 30 + 30])
+        self.assertEqual(widths(container), [50, 30])
+
+
+class GridLayoutTests(LayoutTestCase):
+    def test_fixed_and_flexible(self):
+        # Fixed tracks are sized first, and the free space is shared in
+        # proportion to the flex factors; the gaps are left between tracks.
+        container = grid(
+            item(),
+            item(height=30),
+            item(),
+            item(grid_column_start=2, grid_column_end="span 2"),
+            item(),
+            grid_template_columns="100px 1fr 2fr",
+            grid_column_gap=4,
+            grid_row_gap=2,
+        )
+        layout(self.display, document(container))
+
+        self.assertEqual(widths(container), [100, 299, 597, 900, 100])
+        self.assertEqual(lefts(container), [10, 114, 417, 114, 10])
+        self.assertEqual(tops(container), [10, 10, 10, 42, 54])
+        self.assertEqual(heights(container), [30, 30, 30, 10, 10])
+        self.assertEqual(container.layout.content_height, 54)
+
+    def test_auto_tracks(self):
+        # Auto tracks fit their widest item, and share the free space.
+        container = grid(
+            item(50),
+            item(100),
+            item(30),
+            item(200, height=30),
+            grid_template_columns="auto auto",
+        )
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [427, 577, 427, 577])
+        self.assertEqual(tops(container), [10, 10, 20, 20])
+
+        # Content-sized tracks don't grow.
+        container.style.update(
+            grid_template_columns="max-content min-content", justify_content=CENTER
+        )
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [50, 200, 50, 200])
+        self.assertEqual(lefts(container), [387, 437, 387, 437])
+
+    def test_minmax(self):
+        # A track grows up to its maximum, before flexible tracks take the
+        # rest of the space.
+        container = grid(
+            item(50),
+            item(100),
+            item(30),
+            item(200, height=30),
+            grid_template_columns="minmax(100px, 200px) 1fr",
+            grid_template_rows="50px",
+        )
+        layout(self.display, document(container))
+        self.assertEqual(widths(container), [200, 804, 200, 804])
+        self.assertEqual(heights(container), [50, 50, 30, 30])
+        self.assertEqual(container.layout.content_height, 80)
+
+    def test_align_self(self):
+        container = grid(
+            item(height=40),
+            item(align_self=CENTER),
+            item(align_self=FLEX_END),
+            item(margin="auto", width=50),
+            grid_template_columns="repeat(4, 100px)",
+        )
+        layout(self.display, document(container))
+        self.assertEqual(tops(container), [10, 25, 40, 25])
+        self.assertEqual(heights(container), [40, 10, 10, 10])
+
+        # Auto margins center an item in its area.
+        self.assertEqual(lefts(container)[3], 10 + 300 + 25)
+
+    def test_align_content(self):
+        container = grid(
+            item(),
+            item(),
+            item(),
+            grid_template_columns="repeat(3, 100px)",
+            grid_template_rows="20px 20px",
+            grid_auto_flow=COLUMN,
+            height=100,
+            align_content=SPACE_BETWEEN,
+        )
+        layout(self.display, document(container))
+        self.assertEqual(lefts(container), [10, 10, 110])
+        self.assertEqual(tops(container), [10, 90, 10])
+        self.assertEqual(container.layout.content_height, 100)
+
+
+class IncrementalGridLayoutTests(LayoutTestCase):
+    def assertIncrementalLayout(self, root):
+        "Check that an incremental layout matches a full layout."
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
+
+    def build_gallery(self, n_items=100):
+        container = grid(
+            *[item(5 + i % 7, height=10 + i % 3) for i in range(n_items)],
+            grid_template_columns="repeat(4, auto)",
+            grid_column_gap=2,
+        )
+        return container, document(container)
+
+    def test_change_one_item(self):
+        container, root = self.build_gallery()
+        layout(self.display, root)
+        placement = classify(container).grid
+
+        # Only the changed item is measured again, and the items aren't
+        # placed again.
+        changed = container.children[40]
+        changed.children[0].style.width = 300
+        with mock.patch(
+            "colosseum.engine.content_widths", side_effect=engine.content_widths
+        ) as content_widths:
+            layout(self.display, root, incremental=True)
+        self.assertEqual(content_widths.call_count, 1)
+        self.assertIs(classify(container).grid, placement)
+        self.assertEqual(changed.layout.border_box_width, 300 + 166)
+
+        changed.children[0].style.width = "auto"
+        self.assertIncrementalLayout(root)
+
+        changed.children[0].intrinsic.height = 30
+        changed.layout.dirty = True
+        self.assertIncrementalLayout(root)
+
+    def test_placement_change(self):
+        container, root = self.build_gallery()
+        layout(self.display, root)
+        placement = classify(container).grid
+
+        # Moving an item places the items again.
+        container.children[10].style.grid_column_start = "span 3"
+        self.assertIncrementalLayout(root)
+        self.assertIsNot(classify(container).grid, placement)
+
+        container.style.grid_auto_flow = ROW_DENSE
+        self.assertIncrementalLayout(root)
+        self.assertEqual(classify(container).grid.rows, 26)
+
+        container.style.grid_template_columns = "repeat(5, 1fr)"
+        self.assertIncrementalLayout(root)
+        self.assertEqual(classify(container).grid.rows, 21)
+
+    def test_cache(self):
+        # Identical items are copies of each other; the container, which
+        # resizes its items, isn't stored.
+        container = grid(*[item(20) for i in range(10)])
+        root = document(container)
+        cache = LayoutCache()
+        layout(self.display, root, cache=cache)
+        self.assertEqual(cache.hits, 9)
+
+        cached = geometry(root)
+        layout(self.display, root)
+        self.assertEqual(cached, geometry(root))
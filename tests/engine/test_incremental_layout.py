@@ -0,0 +1,230 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import BLOCK, RELATIVE
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from ..utils import Display, ExampleNode, LayoutTestCase
+
+
+def build_tree(n_children=10, n_grandchildren=10):
+    return ExampleNode(
+        name="div",
+        style=CSS(display=BLOCK),
+        children=[
+            ExampleNode(
+                name="div",
+                style=CSS(display=BLOCK, margin=5),
+                children=[
+                    ExampleNode(name="div", style=CSS(display=BLOCK, height=10))
+                    for j in range(n_grandchildren)
+                ],
+            )
+            for i in range(n_children)
+        ],
+    )
+
+
+def geometry(node):
+    result = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        result.append(
+            (
+                node.layout.absolute_content_left,
+                node.layout.absolute_content_top,
+                node.layout.content_width,
+                node.layout.content_height,
+            )
+        )
+        stack.extend(reversed(node.children))
+    return result
+
+
+class IncrementalLayoutTests(LayoutTestCase):
+    def count_layout_box_calls(self, root, **kwargs):
+        with mock.patch(
+            "colosseum.engine.layout_box", wraps=engine.layout_box
+        ) as layout_box:
+            layout(self.display, root, **kwargs)
+        return layout_box.call_count
+
+    def test_full_layout(self):
+        root = build_tree()
+
+        # A full layout visits every node, every time.
+        self.assertEqual(self.count_layout_box_calls(root), 111)
+        self.assertEqual(self.count_layout_box_calls(root), 111)
+
+    def test_clean_tree(self):
+        root = build_tree()
+        layout(self.display, root)
+        expected = geometry(root)
+
+        # Nothing has changed, so only the root is visited.
+        self.assertEqual(self.count_layout_box_calls(root, incremental=True), 1)
+        self.assertEqual(geometry(root), expected)
+
+    def test_leaf_change(self):
+        root = build_tree()
+        layout(self.display, root)
+
+        leaf = root.children[3].children[4]
+        leaf.style.height = 20
+
+        # The root, the children of the root, and the children of
+        # the modified leaf's parent are visited; the clean subtrees
+        # of every other child of the root are reused.
+        self.assertEqual(self.count_layout_box_calls(root, incremental=True), 21)
+
+        # The result is the same as a full layout of the same document.
+        reference = build_tree()
+        reference.children[3].children[4].style.height = 20
+        layout(self.display, reference)
+        self.assertEqual(geometry(root), geometry(reference))
+        self.assertEqual(leaf.layout.content_height, 20)
+        self.assertEqual(root.children[4].layout.absolute_content_top, 435)
+
+        # Once laid out, the tree is clean again.
+        self.assertEqual(self.count_layout_box_calls(root, incremental=True), 1)
+
+    def test_display_change(self):
+        root = build_tree()
+        layout(self.display, root)
+
+        # A change in the size of the display changes the containing block
+        # of the root, so every node must be laid out again.
+        display = Display(dpi=96, width=800, height=600)
+        with mock.patch(
+            "colosseum.engine.layout_box", wraps=engine.layout_box
+        ) as layout_box:
+            layout(display, root, incremental=True)
+        self.assertEqual(layout_box.call_count, 111)
+        self.assertEqual(root.children[0].children[0].layout.content_width, 790)
+
+    def test_relayout_boundary(self):
+        root = build_tree()
+        # The fourth child has a definite size, so it is a relayout boundary.
+        root.children[3].style.update(width=500, height=100)
+        layout(self.display, root)
+
+        leaf = root.children[3].children[4]
+        leaf.style.height = 20
+        self.assertFalse(root.layout.dirty)
+        self.assertTrue(root.children[3].layout.dirty)
+
+        # Only the relayout boundary, and its children, are laid out again.
+        self.assertEqual(self.count_layout_box_calls(root, incremental=True), 12)
+
+        reference = build_tree()
+        reference.children[3].style.update(width=500, height=100)
+        reference.children[3].children[4].style.height = 20
+        layout(self.display, reference)
+        self.assertEqual(geometry(root), geometry(reference))
+        self.assertEqual(root.children[4].layout.absolute_content_top, 425)
+
+    def test_relayout_boundary_outer_change(self):
+        root = build_tree()
+        root.children[3].style.update(width=500, height=100)
+        layout(self.display, root)
+
+        # Changing the margin of the relayout boundary alters its
+        # outer geometry, so the parent must be laid out again.
+        root.children[3].style.margin = 15
+        self.assertEqual(self.count_layout_box_calls(root, incremental=True), 22)
+
+        reference = build_tree()
+        reference.children[3].style.update(width=500, height=100, margin=15)
+        layout(self.display, reference)
+        self.assertEqual(geometry(root), geometry(reference))
+        self.assertEqual(root.children[4].layout.absolute_content_top, 445)
+
+    def test_relative_offset_change(self):
+        root = build_tree()
+        moved = root.children[3]
+        moved.style.position = RELATIVE
+        leaf = root.children[5].children[4]
+        leaf.style.position = RELATIVE
+        layout(self.display, root)
+
+        # Changing the offsets of a relatively positioned box only moves it;
+        # the box isn't dirtied, and nothing is laid out again, other than
+        # the boxes on the path from the root.
+        moved.style.update(top=20, left=-5)
+        leaf.style.bottom = 3
+        self.assertFalse(moved.layout.dirty)
+        self.assertFalse(leaf.layout.dirty)
+        self.assertEqual(self.count_layout_box_calls(root, incremental=True), 2)
+
+        reference = build_tree()
+        reference.children[3].style.update(position=RELATIVE, top=20, left=-5)
+        reference.children[5].children[4].style.update(position=RELATIVE, bottom=3)
+        layout(self.display, reference)
+        self.assertEqual(geometry(root), geometry(reference))
+        self.assertEqual(moved.layout.absolute_content_top, 320 + 20)
+        self.assertEqual(moved.layout.absolute_content_left, 5 - 5)
+
+        # A change that alters the size of the box lays it out again.
+        with moved.style.batch():
+            moved.style.top = 10
+            moved.style.height = 120
+        self.assertTrue(moved.layout.dirty)
+        layout(self.display, root, incremental=True)
+        self.assertEqual(moved.layout.absolute_content_top, 320 + 10)
+        self.assertEqual(moved.layout.content_height, 120)
+
+    def test_relative_offset_of_last_child(self):
+        root = build_tree()
+        parent = root.children[0]
+        last = parent.children[9]
+        last.style.position = RELATIVE
+        layout(self.display, root)
+        self.assertEqual(parent.layout.content_height, 100)
+
+        # The offset of the last child doesn't change the height of its
+        # parent, whether the child is only moved, or laid out again.
+        last.style.top = 20
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+        self.assertEqual(last.layout.absolute_content_top, 95 + 20)
+
+        layout(self.display, root)
+        self.assertEqual(geometry(root), incremental)
+        self.assertEqual(parent.layout.content_height, 100)
+
+    def test_percentage_height_basis_change(self):
+        def build():
+            return ExampleNode(
+                name="div",
+                style=CSS(display=BLOCK),
+                children=[
+                    ExampleNode(
+                        name="div",
+                        style=CSS(display=BLOCK, height=30),
+                        children=[
+                            ExampleNode(
+                                name="div", style=CSS(display=BLOCK, height="50%")
+                            )
+                        ],
+                    )
+                ],
+            )
+
+        root = build()
+        layout(self.display, root)
+        self.assertEqual(root.children[0].children[0].layout.content_height, 15)
+
+        # The percentage height of the child is resolved against the height
+        # of its parent; changing that height lays the child out again,
+        # even though the child itself is clean.
+        root.children[0].style.height = 100
+        self.assertFalse(root.children[0].children[0].layout.dirty)
+        layout(self.display, root, incremental=True)
+
+        reference = build()
+        reference.children[0].style.height = 100
+        layout(self.display, reference)
+        self.assertEqual(geometry(root), geometry(reference))
+        self.assertEqual(root.children[0].children[0].layout.content_height, 50)
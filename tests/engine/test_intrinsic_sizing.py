@@ -0,0 +1,233 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import (
+    ABSOLUTE,
+    BLOCK,
+    FLEX,
+    INLINE,
+    INLINE_BLOCK,
+    LEFT,
+    RELATIVE,
+    TABLE,
+    TABLE_CELL,
+    TABLE_ROW,
+)
+from colosseum.declaration import CSS
+from colosseum.engine import content_widths, layout
+
+from ..utils import Display, ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+
+
+class TextDisplay(Display):
+    "A display on which every character is 10px wide, and 12px tall."
+
+    def measure_text(self, font, text):
+        return 10 * len(text), 12
+
+
+def text(value):
+    node = ExampleNode(name="text", style=CSS(display=INLINE))
+    node.intrinsic.text = value
+    return node
+
+
+def nested(depth, **style):
+    "Floats nested ``depth`` deep, each holding a paragraph of text."
+    node = text("innermost words")
+    for i in range(depth):
+        node = ExampleNode(
+            style=CSS(display=BLOCK, float=LEFT, **style),
+            children=[
+                ExampleNode(style=CSS(display=BLOCK), children=[text(f"level {i}")]),
+                node,
+            ],
+        )
+    return node
+
+
+def document(*children):
+    return ExampleNode(style=CSS(display=BLOCK, width=500), children=children)
+
+
+class IntrinsicSizingTests(LayoutTestCase):
+    def setUp(self):
+        super().setUp()
+        self.display = TextDisplay(dpi=96, width=1024, height=768)
+
+    def count_text_widths(self, function, *args, **kwargs):
+        "The number of runs of text that are measured by a function."
+        with mock.patch(
+            "colosseum.engine.text_widths", side_effect=engine.text_widths
+        ) as text_widths:
+            function(*args, **kwargs)
+        return text_widths.call_count
+
+    def measure(self, node, size=500):
+        return content_widths(
+            node, engine.SizingContext(self.display, engine.DummyFont(-1), size), False
+        )
+
+    def test_nested_shrink_to_fit(self):
+        # Each float is as wide as its widest run of text, but the content
+        # of the floats is only measured once, however deeply the floats
+        # are nested: each run of text is measured once by the intrinsic
+        # sizing, and once as it is laid out.
+        outer = nested(10)
+        root = document(outer)
+        self.assertEqual(self.count_text_widths(layout, self.display, root), 2 * 11)
+        self.assertEqual(outer.layout.content_width, 150)
+
+        inner = outer
+        while inner.children[1].children:
+            inner = inner.children[1]
+        self.assertEqual(inner.layout.content_width, 150)
+
+        # The measurements are retained...
+        self.assertEqual(self.count_text_widths(self.measure, outer), 0)
+
+        # ... until the content changes; only the measurements of the
+        # changed text, and of the boxes that contain it, are discarded.
+        inner.children[1].intrinsic.text = "even more innermost words"
+        self.assertIsNone(outer.layout._content_widths)
+        self.assertIsNotNone(outer.children[0].layout._content_widths)
+        self.assertEqual(self.count_text_widths(self.measure, outer), 1)
+        self.assertEqual(self.measure(outer), (90, 250))
+
+        layout(self.display, root, incremental=True)
+        self.assertEqual(outer.layout.content_width, 250)
+        incremental = geometry(root)
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
+
+    def test_retained(self):
+        outer = nested(3)
+        root = document(outer)
+        layout(self.display, root)
+
+        # The measurements of the content don't depend on the width of the
+        # containing block...
+        self.assertEqual(self.count_text_widths(self.measure, outer, 100), 0)
+        root.style.width = 100
+        layout(self.display, root, incremental=True)
+        self.assertEqual(outer.layout.content_width, 100)
+
+        # ... unless the content holds a percentage.
+        innermost = outer.children[1].children[1].children[1]
+        innermost.style.padding_left = "10%"
+        self.assertEqual(self.measure(outer, 200), (90 + 20, 150 + 20))
+        self.assertEqual(self.count_text_widths(self.measure, outer, 200), 0)
+        self.assertEqual(self.count_text_widths(self.measure, outer, 100), 1)
+        self.assertEqual(self.measure(outer, 100), (90 + 10, 150 + 10))
+
+    def test_inline_block(self):
+        # An inline-block shrinks to fit its content.
+        box = ExampleNode(
+            style=CSS(display=INLINE_BLOCK, padding=5),
+            children=[text("one two three")],
+        )
+        root = document(ExampleNode(style=CSS(display=BLOCK), children=[box]))
+        layout(self.display, root)
+        self.assertEqual(box.layout.content_width, 130)
+        self.assertEqual(box.layout.content_height, 12)
+
+        root.style.width = 100
+        layout(self.display, root)
+        self.assertEqual(box.layout.content_width, 90)
+        self.assertEqual(box.layout.content_height, 24)
+
+    def test_absolute(self):
+        # An absolutely positioned box with an auto width, and an auto
+        # left or right, shrinks to fit its content.
+        box = ExampleNode(
+            style=CSS(display=BLOCK, position=ABSOLUTE, left=10),
+            children=[text("one two three")],
+        )
+        root = document(box)
+        root.style.position = "relative"
+        layout(self.display, root)
+        self.assertEqual(box.layout.content_width, 130)
+
+    def test_absolute_positioned_content(self):
+        # Absolutely positioned children don't contribute to the width of a
+        # box that shrinks to fit its content.
+        def positioned():
+            return ExampleNode(
+                style=CSS(display=BLOCK, position=ABSOLUTE, width=300, height=10)
+            )
+
+        box = ExampleNode(
+            style=CSS(display=BLOCK, float=LEFT),
+            children=[text("ab"), positioned()],
+        )
+        cell = ExampleNode(
+            style=CSS(display=TABLE_CELL), children=[text("ab"), positioned()]
+        )
+        grid = ExampleNode(
+            style=CSS(display=TABLE),
+            children=[ExampleNode(style=CSS(display=TABLE_ROW), children=[cell])],
+        )
+        root = document(box, grid)
+        root.style.position = RELATIVE
+        layout(self.display, root)
+
+        self.assertEqual(self.measure(box), (20, 20))
+        self.assertEqual(box.layout.content_width, 20)
+        self.assertEqual(cell.layout.content_width, 20)
+        self.assertEqual(box.children[1].layout.content_width, 300)
+        self.assertEqual(cell.children[1].layout.content_width, 300)
+
+    def test_relayout_boundary(self):
+        # A change to a descendant that is a relayout boundary resizes a box
+        # that is shrunk to fit it, even though the box between them keeps
+        # its size.
+        for style in [
+            {"display": BLOCK, "float": LEFT},
+            {"display": INLINE_BLOCK},
+            {"display": BLOCK, "position": ABSOLUTE},
+        ]:
+            with self.subTest(**style):
+                leaf = ExampleNode(style=CSS(display=BLOCK, width=20, height=30))
+                middle = ExampleNode(
+                    style=CSS(display=BLOCK, height=40), children=[leaf]
+                )
+                box = ExampleNode(style=CSS(**style), children=[middle])
+                root = document(box)
+                root.style.position = RELATIVE
+                layout(self.display, root)
+                self.assertEqual(box.layout.content_width, 20)
+
+                leaf.style.width = 120
+                layout(self.display, root, incremental=True)
+                self.assertEqual(box.layout.content_width, 120)
+                incremental = geometry(root)
+
+                layout(self.display, root)
+                self.assertEqual(incremental, geometry(root))
+
+    def test_anonymous_flex_item(self):
+        # The runs of text of a flex container are wrapped in an anonymous
+        # item, whose content widths are discarded when a run changes.
+        runs = [text("aaaa"), text("bbbb")]
+        last = ExampleNode(style=CSS(display=BLOCK, width=30))
+        container = ExampleNode(
+            style=CSS(display=FLEX, height=80), children=[*runs, last]
+        )
+        root = document(container)
+        layout(self.display, root)
+        self.assertEqual(last.layout.absolute_border_box_left, 80)
+
+        runs[1].style.margin = 12
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+        self.assertEqual(last.layout.absolute_border_box_left, 104)
+
+        # The lines of the item are as wide as its content widths.
+        item = container.layout._classification.boxes[0].layout
+        self.assertEqual(item.content_width, 104)
+        self.assertEqual([line.width for line in item.lines], [104])
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
@@ -0,0 +1,91 @@
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import LayoutCache, layout
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import build_tree, geometry
+
+
+def build_rows(n_rows=10):
+    "A list of rows, each with a label and some padding."
+    return ExampleNode(
+        name="ul",
+        style=CSS(display=BLOCK, padding=5),
+        children=[
+            ExampleNode(
+                name="li",
+                style=CSS(display=BLOCK, margin=(2, 4), padding="1em"),
+                children=[
+                    ExampleNode(name="span", style=CSS(display=BLOCK, height=20)),
+                    ExampleNode(name="span", style=CSS(display=BLOCK, height="50%")),
+                ],
+            )
+            for i in range(n_rows)
+        ],
+    )
+
+
+class LayoutCacheTests(LayoutTestCase):
+    def assertCachedLayout(self, root, cache, **kwargs):
+        "Check that a layout using the cache matches a layout that doesn't."
+        layout(self.display, root, cache=cache, **kwargs)
+        cached = geometry(root)
+
+        layout(self.display, root)
+        self.assertEqual(cached, geometry(root))
+
+    def test_repeated_subtrees(self):
+        root = build_rows()
+        cache = LayoutCache()
+
+        # The first row is laid out, and every other row is a copy of it.
+        self.assertCachedLayout(root, cache)
+        self.assertEqual(cache.hits, 9)
+        self.assertEqual(cache.misses, 4)
+
+        # On the next layout, the whole document is a copy.
+        self.assertCachedLayout(root, cache)
+        self.assertEqual(cache.hits, 10)
+        self.assertEqual(cache.misses, 4)
+
+    def test_style_change(self):
+        root = build_rows()
+        cache = LayoutCache()
+        layout(self.display, root, cache=cache)
+
+        # A row with a different style isn't a copy of the others...
+        root.children[3].style.padding = 10
+        self.assertCachedLayout(root, cache)
+
+        # ... nor is a row in a different containing block.
+        root.style.padding = 20
+        self.assertCachedLayout(root, cache)
+
+        # Paint-only changes don't prevent a copy.
+        hits = cache.hits
+        root.children[3].style.color = "red"
+        self.assertCachedLayout(root, cache)
+        self.assertEqual(cache.hits, hits + 1)
+
+    def test_incremental(self):
+        root = build_tree()
+        cache = LayoutCache()
+        layout(self.display, root, cache=cache)
+
+        root.children[5].children[3].style.height = 20
+        self.assertCachedLayout(root, cache, incremental=True)
+
+        root.children[5].children[3].style.height = 10
+        self.assertCachedLayout(root, cache, incremental=True)
+
+    def test_eviction(self):
+        root = build_tree()
+        cache = LayoutCache(maxsize=2)
+        layout(self.display, root, cache=cache)
+
+        self.assertEqual(len(cache), 2)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
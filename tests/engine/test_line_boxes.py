@@ -0,0 +1,474 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import (
+    BLOCK,
+    CENTER,
+    INLINE,
+    NOWRAP,
+    PRE,
+    PRE_LINE,
+    PRE_WRAP,
+    RIGHT,
+)
+from colosseum.declaration import CSS
+from colosseum.engine import (
+    InlineContent,
+    LayoutCache,
+    LineBox,
+    TextFragment,
+    TextMeasurer,
+    layout,
+    segment_text,
+    text_measurer,
+)
+
+from ..utils import Display, ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+
+
+class TextDisplay(Display):
+    "A display on which every character is 10px wide, and 12px tall."
+
+    def measure_text(self, font, text):
+        return 10 * len(text), 12
+
+
+def text(value, **style):
+    "A run of text."
+    node = ExampleNode(name="text", style=CSS(display=INLINE, **style))
+    node.intrinsic.text = value
+    return node
+
+
+def image(width, height):
+    "An atomic inline box of a given size."
+    node = ExampleNode(name="img", style=CSS(display=INLINE))
+    node.intrinsic.width = width
+    node.intrinsic.height = height
+    return node
+
+
+def inline(*children, **style):
+    "An inline box holding the given content."
+    return ExampleNode(
+        name="span", style=CSS(display=INLINE, **style), children=children
+    )
+
+
+def paragraph(*children, **style):
+    return ExampleNode(name="p", style=CSS(display=BLOCK, **style), children=children)
+
+
+def document(*children):
+    return ExampleNode(style=CSS(display=BLOCK, padding=10), children=children)
+
+
+def fragments(node):
+    return [
+        (fragment.text, fragment.left, fragment.top, fragment.width)
+        for fragment in node.layout.fragments
+    ]
+
+
+class TextMeasurerTests(LayoutTestCase):
+    def test_cache(self):
+        calls = []
+
+        def measure(font, text):
+            calls.append(text)
+            return len(text), 1
+
+        measurer = TextMeasurer(measure, maxsize=2)
+        self.assertEqual(measurer.width(None, "one"), 3)
+        self.assertEqual(measurer.size(None, "one"), (3, 1))
+        self.assertEqual(measurer.width(None, "three"), 5)
+        self.assertEqual(calls, ["one", "three"])
+        self.assertEqual((measurer.hits, measurer.misses), (1, 2))
+
+        # Once the measurer is full, the least recently used text is
+        # discarded.
+        measurer.width(None, "one")
+        measurer.width(None, "four")
+        self.assertEqual(len(measurer), 2)
+        measurer.width(None, "three")
+        self.assertEqual(calls, ["one", "three", "four", "three"])
+
+        measurer.clear()
+        self.assertEqual((len(measurer), measurer.hits, measurer.misses), (0, 0, 0))
+
+
+class InlineContentTests(LayoutTestCase):
+    def setUp(self):
+        super().setUp()
+        self.display = TextDisplay(dpi=96, width=1024, height=768)
+        self.context = engine.SizingContext(self.display, engine.DummyFont(-1), 0)
+
+    def test_segment_text(self):
+        self.assertEqual(
+            segment_text(" one  two\n\n three ", PRE),
+            (
+                [
+                    (" ", "one", False),
+                    ("  ", "two", False),
+                    ("", "", True),
+                    (" ", "three", True),
+                ],
+                " ",
+                False,
+            ),
+        )
+        self.assertEqual(
+            segment_text(" one  two\n\n three\n", PRE_LINE),
+            (
+                [
+                    (" ", "one", False),
+                    (" ", "two", False),
+                    ("", "", True),
+                    (" ", "three", True),
+                ],
+                "",
+                True,
+            ),
+        )
+        self.assertEqual(
+            segment_text(" one  two\n\n three ", NOWRAP),
+            (
+                [(" ", "one", False), (" ", "two", False), (" ", "three", False)],
+                " ",
+                False,
+            ),
+        )
+
+    def test_break_lines(self):
+        # The prefix sums of the content are found once; the lines are then
+        # found by a binary search, at any width.
+        content = InlineContent()
+        content.add_text(text("one two three"), 12, self.context)
+        content.add_box(image(30, 20), 30, 20)
+        content.add_text(text("four"), 12, self.context)
+
+        self.assertEqual(content.breaks, [0, 1, 2, 3, 4])
+        self.assertEqual(content.starts, [0, 40, 80, 130, 160])
+        self.assertEqual(content.ends, [30, 70, 130, 160, 200])
+        self.assertEqual(content.break_lines(100), [(0, 1), (2, 3), (4, 4)])
+        self.assertEqual(content.break_lines(100, indent=40), [(0, 0), (1, 2), (3, 4)])
+        self.assertEqual(
+            content.break_lines(10), [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)]
+        )
+        self.assertEqual(content.widths(), (50, 200))
+
+        # Forced breaks end a line.
+        content = InlineContent()
+        content.add_text(text("one two\nthree", white_space=PRE_LINE), 12, self.context)
+        self.assertEqual(content.forced, [2])
+        self.assertEqual(content.break_lines(1000), [(0, 1), (2, 2)])
+        self.assertEqual(content.widths(), (50, 70))
+
+    def test_edges(self):
+        # The start edges of an inline box are placed before its first run,
+        # and its end edges after its last, without a break between them.
+        content = InlineContent()
+        content.add_text(text("one "), 12, self.context)
+        content.open_box(5)
+        content.add_text(text("two three"), 12, self.context)
+        content.close_box(7)
+        # An empty box places its edges before the next run.
+        content.open_box(3)
+        content.close_box(4)
+        content.add_text(text(" four"), 12, self.context)
+
+        self.assertEqual(content.edges, {1: 5, 3: 7})
+        self.assertEqual(content.starts, [0, 40, 85, 152])
+        self.assertEqual(content.ends, [30, 75, 142, 199])
+        self.assertEqual(content.widths(), (57, 199))
+
+
+class LineBoxTests(LayoutTestCase):
+    def setUp(self):
+        super().setUp()
+        self.display = TextDisplay(dpi=96, width=1024, height=768)
+
+    def test_wrap(self):
+        # Lines are broken between words, and a text is as wide as its
+        # fragments.
+        first = text("The quick brown fox ")
+        second = text(" jumps over the lazy dog")
+        root = paragraph(first, second, width=200)
+        layout(self.display, document(root))
+
+        self.assertEqual(
+            root.layout.lines,
+            [LineBox(0, 12, 190), LineBox(12, 12, 190), LineBox(24, 12, 30)],
+        )
+        self.assertEqual(root.layout.content_height, 36)
+        self.assertEqual(fragments(first), [("The quick brown fox", 0, 0, 190)])
+        self.assertEqual(
+            fragments(second), [("jumps over the lazy", 0, 0, 190), ("dog", 0, 12, 30)]
+        )
+        self.assertEqual(second.layout.absolute_content_top, 22)
+        self.assertEqual(second.layout.content_width, 190)
+        self.assertEqual(second.layout.content_height, 24)
+
+    def test_unbreakable(self):
+        # Text isn't broken where there is no white space, and a word that
+        # is wider than the line overflows it.
+        root = paragraph(text("one"), text("two three"), text("fourteen"), width=60)
+        layout(self.display, document(root))
+        self.assertEqual([line.width for line in root.layout.lines], [60, 130])
+        self.assertEqual(
+            fragments(root.children[1]), [("two", 30, 0, 30), ("three", 0, 12, 50)]
+        )
+
+    def test_atomic_boxes(self):
+        # A line can break before and after an atomic box; the runs on a
+        # line are aligned to its bottom.
+        words = text("abcdef ghi")
+        picture = image(30, 20)
+        root = paragraph(words, picture, text("jk"), width=140)
+        layout(self.display, document(root))
+
+        self.assertEqual(root.layout.lines, [LineBox(0, 20, 130), LineBox(20, 12, 20)])
+        self.assertEqual(fragments(words), [("abcdef ghi", 0, 0, 100)])
+        self.assertEqual(words.layout.absolute_content_top, 10 + 8)
+        self.assertEqual(picture.layout.absolute_content_left, 10 + 100)
+        self.assertEqual(root.children[2].layout.absolute_content_top, 10 + 20)
+
+    def test_inline_boxes(self):
+        # The content of an inline box is broken into lines along with the
+        # content around it, however deeply the box is nested; each box is
+        # the bounding box of its content.
+        words = text("world wide web")
+        emphasis = inline(words)
+        strong = inline(emphasis)
+        root = paragraph(text("Hello "), strong, text(" again"), width=150)
+        document_root = document(root)
+        layout(self.display, document_root)
+
+        self.assertEqual(root.layout.lines, [LineBox(0, 12, 110), LineBox(12, 12, 140)])
+        self.assertEqual(
+            fragments(words), [("world", 60, 0, 50), ("wide web", 0, 12, 80)]
+        )
+        for box in [strong.layout, emphasis.layout, words.layout]:
+            self.assertEqual(
+                (
+                    box.absolute_content_left,
+                    box.absolute_content_top,
+                    box.content_width,
+                    box.content_height,
+                ),
+                (10, 10, 110, 24),
+            )
+        self.assertEqual(root.children[2].layout.absolute_content_left, 10 + 90)
+
+        # A change to the content of an inline box breaks the lines again.
+        words.intrinsic.text = "world"
+        layout(self.display, document_root, incremental=True)
+        incremental = geometry(document_root)
+        self.assertEqual(root.layout.lines, [LineBox(0, 12, 110), LineBox(12, 12, 50)])
+        self.assertEqual(strong.layout.absolute_content_left, 10 + 60)
+
+        layout(self.display, document_root)
+        self.assertEqual(incremental, geometry(document_root))
+
+    def test_inline_edges(self):
+        # The margins, borders and padding of a run of text, or of an inline
+        # box, are placed before its first fragment, and after its last.
+        runs = [text("aaaa"), text("bbbb", margin_left=12, margin_right=12)]
+        root = paragraph(*runs, text("cccc"), width=200)
+        layout(self.display, document(root))
+        self.assertEqual(
+            [child.layout.absolute_content_left for child in root.children],
+            [10, 10 + 52, 10 + 104],
+        )
+        self.assertEqual(root.layout.lines, [LineBox(0, 12, 144)])
+
+        words = text("one two three")
+        strong = inline(words, padding_left=5, margin_right=7)
+        root = paragraph(text("Hello "), strong, text("end"), width=100)
+        layout(self.display, document(root))
+        self.assertEqual(
+            root.layout.lines,
+            [LineBox(0, 12, 95), LineBox(12, 12, 30), LineBox(24, 12, 87)],
+        )
+        self.assertEqual(
+            fragments(words),
+            [("one", 65, 0, 30), ("two", 0, 12, 30), ("three", 0, 24, 50)],
+        )
+        self.assertEqual(root.children[2].layout.absolute_content_left, 10 + 57)
+
+    def test_text_align(self):
+        root = paragraph(text("one two three"), width=100)
+        for text_align, expected in [
+            (RIGHT, [("one two", 30, 0, 70), ("three", 50, 12, 50)]),
+            (CENTER, [("one two", 15, 0, 70), ("three", 25, 12, 50)]),
+        ]:
+            root.style.text_align = text_align
+            layout(self.display, document(root))
+            self.assertEqual(
+                [
+                    (
+                        fragment.text,
+                        fragment.left + root.children[0].layout.content_left,
+                        fragment.top,
+                        fragment.width,
+                    )
+                    for fragment in root.children[0].layout.fragments
+                ],
+                expected,
+            )
+
+    def test_line_height(self):
+        root = paragraph(text("one two", line_height="20px"), text(" three"), width=80)
+        layout(self.display, document(root))
+        self.assertEqual(root.layout.lines, [LineBox(0, 20, 70), LineBox(20, 12, 50)])
+        self.assertEqual(
+            root.children[0].layout.fragments, [TextFragment("one two", 0, 0, 70, 20)]
+        )
+
+    def test_white_space(self):
+        words = text("one  two\n  three four five")
+        root = paragraph(words, width=100)
+        for white_space, expected in [
+            (NOWRAP, [("one two three four five", 0, 0, 230)]),
+            (PRE, [("one  two", 0, 0, 80), ("  three four five", 0, 12, 170)]),
+            (
+                PRE_WRAP,
+                [
+                    ("one  two", 0, 0, 80),
+                    ("  three", 0, 12, 70),
+                    ("four five", 0, 24, 90),
+                ],
+            ),
+            (
+                PRE_LINE,
+                [
+                    ("one two", 0, 0, 70),
+                    ("three four", 0, 12, 100),
+                    ("five", 0, 24, 40),
+                ],
+            ),
+        ]:
+            words.style.white_space = white_space
+            layout(self.display, document(root))
+            self.assertEqual(fragments(words), expected)
+
+    def test_spacing_and_indent(self):
+        # Letters are 2px further apart, and words 7px; the first line is
+        # indented.
+        words = text("one two three", letter_spacing=2, word_spacing=5)
+        root = paragraph(words, width=100, text_indent=20)
+        layout(self.display, document(root))
+        self.assertEqual([line.width for line in root.layout.lines], [36, 36, 60])
+        self.assertEqual(
+            fragments(words),
+            [("one", 20, 0, 36), ("two", 0, 12, 36), ("three", 0, 24, 60)],
+        )
+
+    def test_rebreak(self):
+        # When only the width of a paragraph changes, the lines are broken
+        # again without dividing, or measuring, the text again.
+        root = paragraph(text("The quick brown fox jumps over the lazy dog"), width=200)
+        document_root = document(root)
+        layout(self.display, document_root)
+        measurer = text_measurer(self.display)
+        misses = measurer.misses
+
+        root.style.width = 120
+        with mock.patch(
+            "colosseum.engine.segment_text", side_effect=engine.segment_text
+        ) as segment:
+            layout(self.display, document_root, incremental=True)
+        self.assertEqual(segment.call_count, 0)
+        self.assertEqual(measurer.misses, misses)
+        self.assertEqual(
+            [fragment.text for fragment in root.children[0].layout.fragments],
+            ["The quick", "brown fox", "jumps over", "the lazy dog"],
+        )
+
+        # An atomic box that changes size, as the width changes, divides the
+        # content again.
+        picture = image(30, 20)
+        picture.intrinsic.is_replaced = True
+        picture.style.width = "10%"
+        root = paragraph(text("one two "), picture, width=300)
+        document_root = document(root)
+        layout(self.display, document_root)
+        self.assertEqual(root.layout.lines[0].width, 80 + 30)
+
+        root.style.width = 100
+        layout(self.display, document_root, incremental=True)
+        self.assertEqual(root.layout.lines[0].width, 80 + 10)
+        self.assertEqual(picture.layout.absolute_content_left, 10 + 80)
+
+    def test_rewrap(self):
+        # Wrapping a paragraph at a new width doesn't measure any text.
+        root = paragraph(text("The quick brown fox jumps over the lazy dog"), width=200)
+        document_root = document(root)
+        layout(self.display, document_root)
+        measurer = text_measurer(self.display)
+        misses = measurer.misses
+
+        for width in [100, 150, 300]:
+            root.style.width = width
+            layout(self.display, document_root, incremental=True)
+            incremental = geometry(document_root)
+            lines = root.layout.lines
+
+            layout(self.display, document_root)
+            self.assertEqual(incremental, geometry(document_root))
+            self.assertEqual(lines, root.layout.lines)
+
+        self.assertEqual(measurer.misses, misses)
+        self.assertEqual(len(root.layout.lines), 2)
+
+    def test_incremental_change(self):
+        words = text("one two three")
+        root = paragraph(words, image(30, 20), text("four"), width=100)
+        document_root = document(root)
+        layout(self.display, document_root)
+
+        # A change to the text of a paragraph breaks it into lines again.
+        words.intrinsic.text = "one two three four five"
+        layout(self.display, document_root, incremental=True)
+        incremental = geometry(document_root)
+        self.assertEqual(len(root.layout.lines), 4)
+
+        layout(self.display, document_root)
+        self.assertEqual(incremental, geometry(document_root))
+
+    def test_cache(self):
+        # Identical paragraphs are copies of each other.
+        root = document(
+            *[paragraph(text("Hello world, hello again"), width=200) for i in range(5)]
+        )
+        cache = LayoutCache()
+        layout(self.display, root, cache=cache)
+        self.assertEqual(cache.hits, 4)
+        self.assertEqual(
+            fragments(root.children[4].children[0]),
+            [("Hello world, hello", 0, 0, 180), ("again", 0, 12, 50)],
+        )
+
+        cached = geometry(root)
+        layout(self.display, root)
+        self.assertEqual(cached, geometry(root))
+
+        # The content of an inline box is copied as it was placed in the
+        # lines of the paragraph.
+        root = document(
+            *[
+                paragraph(text("Hello "), inline(text("world, hello")), width=100)
+                for i in range(3)
+            ]
+        )
+        cache = LayoutCache()
+        layout(self.display, root, cache=cache)
+        self.assertEqual(cache.hits, 2)
+        strong = root.children[2].children[1].layout
+        self.assertEqual(strong.absolute_content_top, 10 + 72 + 12)
+        self.assertEqual((strong.content_width, strong.content_height), (60, 24))
+
+        cached = geometry(root)
+        layout(self.display, root)
+        self.assertEqual(cached, geometry(root))
@@ -0,0 +1,94 @@
+from colosseum.constants import BLOCK, EXACTLY, INLINE, LEFT, UNDEFINED
+from colosseum.declaration import CSS
+from colosseum.engine import layout
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+
+
+class Paragraph:
+    "Measures a paragraph of 300px of text, 20px tall per 100px line."
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, available_width, width_mode, available_height, height_mode):
+        self.calls.append((available_width, width_mode))
+        if width_mode is UNDEFINED:
+            return 300, 20
+        width = max(100, min(300, available_width))
+        lines = -(-300 // width)
+        return (width if width_mode is EXACTLY else -(-300 // lines)), 20 * lines
+
+
+def measured(display=BLOCK, **style):
+    node = ExampleNode(name="leaf", style=CSS(display=display, **style))
+    node.intrinsic.measure = Paragraph()
+    return node
+
+
+def container(child, width):
+    return ExampleNode(style=CSS(display=BLOCK, width=width), children=[child])
+
+
+def document(*children):
+    return ExampleNode(style=CSS(display=BLOCK, padding=10), children=children)
+
+
+class MeasureFunctionTests(LayoutTestCase):
+    def test_block_leaf(self):
+        # A block leaf is as tall as it is at its width.
+        leaf = measured(width=150)
+        layout(self.display, document(leaf))
+        self.assertEqual(leaf.layout.content_width, 150)
+        self.assertEqual(leaf.layout.content_height, 40)
+        self.assertEqual(leaf.intrinsic.measure.calls, [(150, EXACTLY)])
+
+    def test_inline_leaf(self):
+        # An inline leaf is no wider than its containing block.
+        leaf = measured(INLINE)
+        layout(self.display, document(container(leaf, 200)))
+        self.assertEqual(leaf.layout.content_width, 150)
+        self.assertEqual(leaf.layout.content_height, 40)
+
+    def test_float(self):
+        # A float shrinks to fit its content.
+        leaf = measured(float=LEFT)
+        layout(self.display, document(container(leaf, 500)))
+        self.assertEqual(leaf.layout.content_width, 300)
+        self.assertEqual(leaf.layout.content_height, 20)
+
+        leaf.style.margin_right = 250
+        layout(self.display, document(container(leaf, 500)))
+        # Given less space, it is measured again, as two balanced lines.
+        self.assertEqual(leaf.layout.content_width, 150)
+        self.assertEqual(leaf.layout.content_height, 40)
+
+    def test_not_displayed(self):
+        leaf = measured(display="none")
+        layout(self.display, document(leaf))
+        self.assertEqual(leaf.intrinsic.measure.calls, [])
+
+    def test_incremental(self):
+        leaf = measured()
+        parent = container(leaf, 200)
+        root = document(parent)
+        layout(self.display, root)
+        self.assertEqual(leaf.layout.content_height, 40)
+
+        # A measurement is reused whenever the leaf is laid out again at a
+        # width it was measured at.
+        parent.style.width = 300
+        layout(self.display, root, incremental=True)
+        parent.style.width = 200
+        layout(self.display, root, incremental=True)
+        self.assertEqual(leaf.intrinsic.measure.calls, [(200, EXACTLY), (300, EXACTLY)])
+
+        # Dirtying the leaf measures it again.
+        leaf.intrinsic.dirty = True
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+        self.assertEqual(len(leaf.intrinsic.measure.calls), 3)
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
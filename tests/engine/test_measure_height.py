@@ -0,0 +1,141 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import ABSOLUTE, BLOCK, INLINE, RELATIVE
+from colosseum.declaration import CSS
+from colosseum.engine import (
+    HeightMeasurer,
+    height_measurer,
+    layout,
+    measure_height,
+    narrowest_width,
+)
+
+from ..utils import Display, ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+
+
+class TextDisplay(Display):
+    "A display on which every character is 10px wide, and 12px tall."
+
+    def measure_text(self, font, text):
+        return 10 * len(text), 12
+
+
+def text(value):
+    node = ExampleNode(name="text", style=CSS(display=INLINE))
+    node.intrinsic.text = value
+    return node
+
+
+def row(value, **style):
+    "A row of a list, holding a paragraph of text."
+    return ExampleNode(
+        name="row",
+        style=CSS(display=BLOCK, padding=5, margin_bottom=2, **style),
+        children=[text(value)],
+    )
+
+
+def document(*children):
+    return ExampleNode(style=CSS(display=BLOCK, width=500), children=children)
+
+
+class HeightMeasurerTests(LayoutTestCase):
+    def setUp(self):
+        super().setUp()
+        self.display = TextDisplay(dpi=96, width=1024, height=768)
+
+    def test_measure_height(self):
+        first = row("The quick brown fox jumps over the lazy dog")
+        root = document(first, row("Hello"))
+        layout(self.display, root)
+        laid_out = geometry(root)
+        box = first.layout
+
+        # The row is laid out in a containing block of each width, but the
+        # layout of the document is untouched.
+        self.assertEqual(measure_height(first, 500, self.display), 12 + 10 + 2)
+        self.assertEqual(measure_height(first, 200, self.display), 36 + 10 + 2)
+        self.assertEqual(measure_height(first, 100, self.display), 60 + 10 + 2)
+        self.assertIs(first.layout, box)
+        self.assertEqual(laid_out, geometry(root))
+
+        # The document can still be laid out incrementally.
+        first.children[0].intrinsic.text = "Hello world"
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
+
+    def test_retained(self):
+        rows = [row("Hello world, hello again") for i in range(10)]
+        document(*rows)
+        measurer = height_measurer(self.display)
+        measurer.clear()
+
+        # Identical rows are only laid out once at each width.
+        with mock.patch(
+            "colosseum.engine.scratch_layout", side_effect=engine.scratch_layout
+        ) as scratch_layout:
+            for child in rows:
+                self.assertEqual(measure_height(child, 200, self.display), 36)
+                self.assertEqual(measure_height(child, 300, self.display), 24)
+        self.assertEqual(scratch_layout.call_count, 2)
+        self.assertEqual((measurer.hits, measurer.misses), (18, 2))
+
+        # A row that changes is laid out again.
+        rows[3].children[0].intrinsic.text = "Hello"
+        self.assertEqual(measure_height(rows[3], 200, self.display), 24)
+        self.assertEqual(measurer.misses, 3)
+
+        rows[4].style.padding_top = 10
+        self.assertEqual(measure_height(rows[4], 200, self.display), 41)
+        self.assertEqual(measurer.misses, 4)
+
+    def test_maxsize(self):
+        measurer = HeightMeasurer(maxsize=2)
+        node = row("Hello world")
+        for width in [100, 200, 300]:
+            measurer.height(self.display, node, width)
+        self.assertEqual(len(measurer), 2)
+
+        measurer.clear()
+        self.assertEqual((len(measurer), measurer.hits, measurer.misses), (0, 0, 0))
+
+    def test_narrowest_width(self):
+        node = row("one two three four five six")
+        document(node)
+        # The row has 10px of padding, and 2px of margin. Two lines are
+        # needed at a width of 130px (for "one two three"), plus the padding.
+        self.assertEqual(narrowest_width(node, 24 + 12, self.display), 140)
+        self.assertEqual(narrowest_width(node, 12 + 12, self.display), 280)
+        self.assertEqual(narrowest_width(node, 12 + 12, self.display, high=200), None)
+
+        # The narrowest width is found from a handful of measurements.
+        measurer = height_measurer(self.display)
+        misses = measurer.misses
+        narrowest_width(node, 48 + 12, self.display)
+        self.assertLessEqual(measurer.misses - misses, 12)
+
+    def test_positioned_descendants(self):
+        # An absolutely positioned descendant that is laid out by a
+        # containing block outside the subtree is left in its queue.
+        positioned = ExampleNode(
+            style=CSS(display=BLOCK, position=ABSOLUTE, top=5, width=20, height=10)
+        )
+        measured = ExampleNode(
+            style=CSS(display=BLOCK),
+            children=[row("Hello world"), positioned],
+        )
+        root = document(measured)
+        root.style.position = RELATIVE
+        layout(self.display, root)
+        queue = dict(root.layout._positioned)
+
+        self.assertEqual(measure_height(measured, 100, self.display), 24 + 10)
+        self.assertEqual(root.layout._positioned, queue)
+
+        positioned.style.top = 15
+        layout(self.display, root, incremental=True)
+        self.assertEqual(positioned.layout.absolute_border_box_top, 15)
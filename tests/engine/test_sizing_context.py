@@ -0,0 +1,84 @@
+import tracemalloc
+from unittest import TestCase
+
+from colosseum import engine
+from colosseum.constants import BLOCK
+from colosseum.declaration import CSS
+from colosseum.engine import SizingContext, layout
+
+from ..utils import Display, ExampleNode
+
+
+def build_wide(n_children):
+    return ExampleNode(
+        style=CSS(display=BLOCK),
+        children=[
+            ExampleNode(style=CSS(display=BLOCK, margin=1, padding=1, height=10))
+            for i in range(n_children)
+        ],
+    )
+
+
+def build_deep(depth):
+    root = node = ExampleNode(style=CSS(display=BLOCK, margin=1, padding=1))
+    for i in range(depth):
+        child = ExampleNode(style=CSS(display=BLOCK, margin=1, padding=1))
+        child.parent = node
+        node.children.append(child)
+        node = child
+    return root
+
+
+class SizingContextTests(TestCase):
+    def setUp(self):
+        # A small display, so every length is a (cached) small integer.
+        self.display = Display(dpi=96, width=200, height=200)
+
+    def peak_memory(self, root):
+        "The peak memory used while laying out the document again."
+        # Lay the document out once, so any state that is retained between
+        # layouts (such as the computed styles of the nodes) exists already.
+        layout(self.display, root)
+
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            layout(self.display, root)
+            return tracemalloc.get_traced_memory()[1] - before
+        finally:
+            tracemalloc.stop()
+
+    def test_equality(self):
+        font = engine.DummyFont(10)
+        context = SizingContext(self.display, font, 100)
+
+        self.assertEqual(
+            context, SizingContext(self.display, engine.DummyFont(10), 100)
+        )
+        self.assertEqual(hash(context), hash(SizingContext(self.display, font, 100)))
+        self.assertNotEqual(context, SizingContext(self.display, font, 200))
+        self.assertNotEqual(
+            context, SizingContext(self.display, engine.DummyFont(8), 100)
+        )
+        self.assertNotEqual(
+            context, SizingContext(Display(dpi=96, width=200, height=200), font, 100)
+        )
+
+    def test_siblings_share_contexts(self):
+        root = build_wide(5)
+        layout(self.display, root)
+
+        sizing = root.children[0].layout._layout_inputs
+        for child in root.children:
+            self.assertIs(child.layout._layout_inputs, sizing)
+
+    def test_peak_memory_per_level(self):
+        # Each box that is being laid out holds a pair of sizing contexts
+        # for its children; it doesn't build dictionaries of sizing
+        # arguments for itself. (Those dictionaries needed over 500 bytes
+        # for each level of the document.) The suspended ``layout_box()``
+        # generator of each level, about 400 bytes, is traced as well.
+        peak_small = self.peak_memory(build_deep(100))
+        peak_large = self.peak_memory(build_deep(300))
+
+        self.assertLess((peak_large - peak_small) / 200, 800)
@@ -0,0 +1,370 @@
+from unittest import mock
+
+from colosseum import engine
+from colosseum.constants import (
+    ABSOLUTE,
+    BLOCK,
+    BOTTOM,
+    COLLAPSE,
+    FIXED,
+    INLINE,
+    RELATIVE,
+    TABLE,
+    TABLE_CAPTION,
+    TABLE_CELL,
+    TABLE_COLUMN,
+    TABLE_FOOTER_GROUP,
+    TABLE_HEADER_GROUP,
+    TABLE_ROW,
+    TABLE_ROW_GROUP,
+)
+from colosseum.declaration import CSS
+from colosseum.engine import (
+    AnonymousTable,
+    AnonymousTableCell,
+    AnonymousTableRow,
+    LayoutCache,
+    classify,
+    layout,
+)
+
+from ..utils import ExampleNode, LayoutTestCase
+from .test_incremental_layout import geometry
+
+
+def content(width, height=10):
+    "An inline box of a given size."
+    node = ExampleNode(name="span", style=CSS(display=INLINE))
+    node.intrinsic.width = width
+    node.intrinsic.height = height
+    return node
+
+
+def cell(text=20, **style):
+    "A cell, holding an inline box of a given width."
+    return ExampleNode(
+        name="td", style=CSS(display=TABLE_CELL, **style), children=[content(text)]
+    )
+
+
+def row(*cells, **style):
+    return ExampleNode(name="tr", style=CSS(display=TABLE_ROW, **style), children=cells)
+
+
+def table(*children, **style):
+    return ExampleNode(
+        name="table", style=CSS(display=TABLE, **style), children=children
+    )
+
+
+def build_table(n_rows=10, **style):
+    "A table of three columns, each wider than the last."
+    return table(
+        ExampleNode(
+            name="tbody",
+            style=CSS(display=TABLE_ROW_GROUP),
+            children=[row(cell(30), cell(60), cell(90)) for i in range(n_rows)],
+        ),
+        **style,
+    )
+
+
+def document(*children):
+    return ExampleNode(style=CSS(display=BLOCK, padding=10), children=children)
+
+
+def widths(row):
+    return [cell.layout.border_box_width for cell in row.children]
+
+
+def lefts(row):
+    return [cell.layout.absolute_border_box_left for cell in row.children]
+
+
+class TableBoxTreeTests(LayoutTestCase):
+    def test_anonymous_boxes(self):
+        # A stray cell is wrapped in a row, and stray content in a cell.
+        text = content(20)
+        root = table(cell(), cell(), row(text), text)
+        boxes = classify(root).boxes
+        self.assertEqual(
+            [type(box) for box in boxes],
+            [AnonymousTableRow, ExampleNode, AnonymousTableRow],
+        )
+        self.assertEqual(boxes[0].children, root.children[0:2])
+        self.assertEqual(
+            [type(box) for box in classify(root.children[2]).boxes],
+            [AnonymousTableCell],
+        )
+        self.assertEqual(boxes[2].children[0].children, [text])
+
+        # Columns don't generate a box.
+        root = table(ExampleNode(style=CSS(display=TABLE_COLUMN)), row(cell()))
+        self.assertEqual(classify(root).boxes, root.children[1:])
+
+    def test_anonymous_table(self):
+        # Table boxes outside a table are wrapped in an anonymous table.
+        root = document(
+            ExampleNode(style=CSS(display=BLOCK, height=10)),
+            cell(),
+            cell(),
+            content(20),
+        )
+        boxes = classify(root).boxes
+        self.assertEqual(type(boxes[1]), AnonymousTable)
+        self.assertEqual(boxes[1].children, root.children[1:3])
+
+        layout(self.display, root)
+        self.assertEqual(widths(boxes[1]), [20, 20])
+        self.assertEqual(root.children[1].layout.absolute_border_box_top, 20)
+
+
+class TableLayoutTests(LayoutTestCase):
+    def test_auto_layout(self):
+        # Each column is as wide as its widest cell, and the columns are
+        # separated by the border spacing.
+        grid = table(
+            row(cell(50), cell(30), cell(100)),
+            row(cell(70), cell(10, padding=5), cell(20, height=20)),
+            border_spacing=(2, 3),
+            padding=1,
+        )
+        root = document(grid)
+        layout(self.display, root)
+
+        self.assertEqual(widths(grid.children[0]), [70, 30, 100])
+        self.assertEqual(widths(grid.children[1]), [70, 30, 100])
+        self.assertEqual(lefts(grid.children[1]), [13, 85, 117])
+        self.assertEqual(grid.layout.content_width, 2 + 70 + 2 + 30 + 2 + 100 + 2)
+
+        # The rows are stacked, and a row is as tall as its tallest cell.
+        self.assertEqual(grid.children[0].layout.absolute_border_box_top, 11 + 3)
+        self.assertEqual(grid.children[1].layout.absolute_border_box_top, 11 + 16)
+        self.assertEqual(grid.children[1].layout.content_height, 20)
+        self.assertEqual(grid.layout.content_height, 3 + 10 + 3 + 20 + 3)
+
+    def test_auto_margins(self):
+        grid = build_table(n_rows=1, margin="auto")
+        root = document(grid)
+        layout(self.display, root)
+        self.assertEqual(grid.layout.border_box_width, 180)
+        self.assertEqual(grid.layout.margin_left, (1004 - 180) // 2)
+
+    def test_specified_width(self):
+        # The extra width is shared in proportion to the widths of the
+        # columns...
+        grid = build_table(n_rows=2, width=360)
+        layout(self.display, document(grid))
+        self.assertEqual(widths(grid.children[0].children[0]), [60, 120, 180])
+
+        # ... and a table is never narrower than its columns.
+        grid.style.width = 100
+        layout(self.display, document(grid))
+        self.assertEqual(widths(grid.children[0].children[0]), [30, 60, 90])
+        self.assertEqual(grid.layout.content_width, 180)
+
+    def test_narrow(self):
+        # Columns share the available width, but are never narrower than
+        # their widest unbreakable content.
+        grid = table(row(cell(600), cell(600)))
+        layout(self.display, document(grid))
+        self.assertEqual(widths(grid.children[0]), [600, 600])
+
+    def test_fixed_layout(self):
+        # Only the columns, and the first row, are inspected.
+        grid = table(
+            ExampleNode(style=CSS(display=TABLE_COLUMN, width=100)),
+            row(cell(10), cell(10, width=50, padding=5), cell(10), cell(10)),
+            row(cell(900), cell(900), cell(900), cell(900)),
+            table_layout=FIXED,
+            width=500,
+        )
+        root = document(grid)
+        layout(self.display, root)
+
+        self.assertEqual(widths(grid.children[1]), [100, 60, 170, 170])
+        self.assertEqual(widths(grid.children[2]), [100, 60, 170, 170])
+
+        # Without a width, a table is laid out automatically.
+        grid.style.width = "auto"
+        layout(self.display, root)
+        self.assertEqual(widths(grid.children[2]), [900, 900, 900, 900])
+
+    def test_captions_and_groups(self):
+        header = ExampleNode(
+            style=CSS(display=TABLE_HEADER_GROUP), children=[row(cell(height=15))]
+        )
+        footer = ExampleNode(
+            style=CSS(display=TABLE_FOOTER_GROUP), children=[row(cell(height=12))]
+        )
+        body = row(cell(height=20))
+        grid = table(
+            ExampleNode(style=CSS(display=TABLE_CAPTION, height=20)),
+            footer,
+            body,
+            header,
+            ExampleNode(
+                style=CSS(display=TABLE_CAPTION, height=4, caption_side=BOTTOM)
+            ),
+        )
+        layout(self.display, document(grid))
+
+        # The header and footer are placed around the other rows, and the
+        # captions on their side of the table.
+        self.assertEqual(header.layout.content_top, 20)
+        self.assertEqual(body.layout.content_top, 35)
+        self.assertEqual(footer.layout.content_top, 55)
+        self.assertEqual(grid.children[4].layout.content_top, 67)
+        self.assertEqual(grid.layout.content_height, 71)
+
+    def test_border_collapse(self):
+        # In the collapsing border model, there is no spacing, and no
+        # padding on the table.
+        grid = build_table(n_rows=2, border_spacing=5, padding=10)
+        grid.style.border_collapse = COLLAPSE
+        layout(self.display, document(grid))
+
+        self.assertEqual(grid.layout.padding_left, 0)
+        self.assertEqual(grid.layout.content_width, 180)
+        self.assertEqual(grid.layout.content_height, 20)
+
+    def test_absolute_positioned_children(self):
+        # Absolutely positioned children of a table, or of a row, aren't
+        # wrapped in an anonymous cell; they are laid out by their
+        # containing block, and don't widen the table.
+        def positioned():
+            return ExampleNode(
+                style=CSS(
+                    display=BLOCK,
+                    position=ABSOLUTE,
+                    top=5,
+                    left=7,
+                    width=300,
+                    height=40,
+                )
+            )
+
+        first = row(cell(30), cell(60), positioned())
+        grid = table(first, row(cell(30), cell(60)), positioned(), position=RELATIVE)
+        root = document(grid)
+        layout(self.display, root)
+
+        self.assertEqual(classify(grid).boxes, grid.children)
+        self.assertEqual(classify(first).boxes, first.children)
+        self.assertEqual(grid.layout.content_width, 90)
+        for child in (first.children[2], grid.children[2]):
+            self.assertEqual(child.layout.content_width, 300)
+            self.assertEqual(child.layout.content_height, 40)
+            self.assertEqual(child.layout.absolute_border_box_top, 10 + 5)
+            self.assertEqual(child.layout.absolute_border_box_left, 10 + 7)
+
+
+class IncrementalTableLayoutTests(LayoutTestCase):
+    def assertIncrementalLayout(self, root):
+        "Check that an incremental layout matches a full layout."
+        layout(self.display, root, incremental=True)
+        incremental = geometry(root)
+
+        layout(self.display, root)
+        self.assertEqual(incremental, geometry(root))
+
+    def test_change_one_cell(self):
+        grid = build_table(n_rows=100)
+        root = document(grid)
+        layout(self.display, root)
+
+        # Only the changed cell is measured again, and only its column is
+        # evaluated.
+        changed = grid.children[0].children[40].children[1]
+        changed.children[0].style.width = 200
+        with (
+            mock.patch(
+                "colosseum.engine.content_widths", side_effect=engine.content_widths
+            ) as content_widths,
+            mock.patch.object(
+                engine.TableColumns,
+                "evaluate",
+                autospec=True,
+                side_effect=engine.TableColumns.evaluate,
+            ) as evaluate,
+        ):
+            layout(self.display, root, incremental=True)
+
+        self.assertEqual(content_widths.call_count, 1)
+        self.assertEqual([call.args[1] for call in evaluate.call_args_list], [1])
+        self.assertEqual(widths(grid.children[0].children[0]), [30, 200, 90])
+
+        changed.children[0].style.width = 10
+        self.assertIncrementalLayout(root)
+        self.assertEqual(widths(grid.children[0].children[0]), [30, 60, 90])
+
+    def test_fixed_layout(self):
+        grid = build_table(n_rows=100, table_layout=FIXED, width=300)
+        root = document(grid)
+        layout(self.display, root)
+
+        # The fixed layout doesn't measure any cells; when a row changes
+        # height, the other rows are reused.
+        rows = grid.children[0].children
+        rows[40].children[1].style.height = 30
+        with (
+            mock.patch(
+                "colosseum.engine.content_widths", side_effect=engine.content_widths
+            ) as content_widths,
+            mock.patch(
+                "colosseum.engine.layout_table_row", side_effect=engine.layout_table_row
+            ) as layout_table_row,
+        ):
+            layout(self.display, root, incremental=True)
+
+        self.assertEqual(content_widths.call_count, 0)
+        self.assertEqual(layout_table_row.call_count, 1)
+        self.assertEqual(rows[41].layout.content_top, rows[40].layout.content_top + 30)
+
+        rows[40].children[1].style.height = "auto"
+        self.assertIncrementalLayout(root)
+
+    def test_relayout_boundary(self):
+        # A change to the content of a cell that is a relayout boundary
+        # only dirties the content, but the columns are measured again.
+        block = ExampleNode(style=CSS(display=BLOCK, height=20))
+        grid = table(row(ExampleNode(style=CSS(display=TABLE_CELL), children=[block])))
+        root = document(grid)
+        layout(self.display, root)
+        self.assertEqual(grid.layout.content_width, 0)
+
+        block.style.width = 40
+        self.assertIncrementalLayout(root)
+        self.assertEqual(grid.layout.content_width, 40)
+        self.assertEqual(widths(grid.children[0]), [40])
+
+    def test_structure_change(self):
+        grid = build_table(n_rows=5)
+        root = document(grid)
+        layout(self.display, root)
+
+        body = grid.children[0]
+        wide = row(cell(30), cell(60), cell(90), cell(300))
+        wide.parent = body
+        body.children.append(wide)
+        body.layout.dirty = True
+        self.assertIncrementalLayout(root)
+        self.assertEqual(widths(body.children[0]), [30, 60, 90])
+        self.assertEqual(widths(wide), [30, 60, 90, 300])
+
+        body.children.remove(wide)
+        body.layout.dirty = True
+        self.assertIncrementalLayout(root)
+        self.assertEqual(grid.layout.content_width, 180)
+
+    def test_cache(self):
+        # Identical rows in the same columns are copies of each other.
+        grid = build_table(n_rows=10)
+        root = document(grid)
+        cache = LayoutCache()
+        layout(self.display, root, cache=cache)
+        self.assertEqual(cache.hits, 9)
+
+        cached = geometry(root)
+        layout(self.display, root)
+        self.assertEqual(cached, geometry(root))
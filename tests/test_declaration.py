@@ -1,14 +1,21 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 
 from colosseum import engine as css_engine
 from colosseum.colors import GOLDENROD, NAMED_COLOR, REBECCAPURPLE
 from colosseum.constants import (
+    ABSOLUTE,
     AUTO,
     BLOCK,
+    FIXED,
+    FORMATTING,
     INHERIT,
     INITIAL,
     INLINE,
+    INLINE_TABLE,
+    LAYOUT,
     LEFT,
+    PAINT,
+    POSITION,
     REVERT,
     RIGHT,
     RTL,
@@ -17,7 +24,8 @@ from colosseum.constants import (
     Choices,
     OtherProperty,
 )
-from colosseum.declaration import CSS, validated_property
+from colosseum.declaration import CSS, batch, validated_property
+from colosseum.dimensions import Box
 from colosseum.units import percent, px
 from colosseum.validators import (
     is_color,
@@ -353,6 +361,209 @@ class CssDeclarationTests(TestCase):
         node = ExampleNode(style=CSS())
         self.assertEqual(node.style.engine(), css_engine)
 
+    def test_slots(self):
+        node = ExampleNode(style=CSS(width=10))
+
+        # Declarations don't have a per-instance dictionary of attributes.
+        self.assertFalse(hasattr(node.style, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.style.not_a_property = 10
+
+        self.assertFalse(hasattr(node.layout, "__dict__"))
+        self.assertFalse(hasattr(node.intrinsic, "__dict__"))
+
+    def test_computed(self):
+        node = ExampleNode(style=CSS(width=10, display=BLOCK, direction=RTL))
+        node.layout.dirty = None
+
+        computed = node.style.computed
+
+        # The snapshot holds the same values as the declaration, including
+        # initial values and values derived from other properties.
+        self.assertEqual(computed.width, 10)
+        self.assertIs(computed.display, BLOCK)
+        self.assertIs(computed.height, AUTO)
+        self.assertEqual(computed.text_align, RIGHT)
+
+        # The snapshot can't be modified.
+        with self.assertRaises(AttributeError):
+            computed.width = 20
+        with self.assertRaises(AttributeError):
+            del computed.width
+
+        # The snapshot is reused until the declaration changes.
+        self.assertIs(node.style.computed, computed)
+        self.assertIsNone(node.style.dirty)
+
+        node.style.width = 20
+
+        self.assertEqual(computed.width, 10)
+        self.assertIsNot(node.style.computed, computed)
+        self.assertEqual(node.style.computed.width, 20)
+
+        # Snapshots of equal declarations are equal.
+        self.assertEqual(
+            CSS(width=10, display=BLOCK).computed, CSS(display=BLOCK, width=10).computed
+        )
+        self.assertNotEqual(CSS(width=10).computed, CSS(width=20).computed)
+
+    def test_computed_display(self):
+        # 9.7 Floated and absolutely positioned boxes are blockified...
+        self.assertIs(CSS(display=INLINE, float=LEFT).computed.display, BLOCK)
+        self.assertIs(CSS(display=INLINE_TABLE, float=LEFT).computed.display, TABLE)
+        self.assertIs(CSS(display=INLINE, position=ABSOLUTE).computed.display, BLOCK)
+
+        # ... and absolutely positioned boxes don't float.
+        computed = CSS(display=BLOCK, float=LEFT, position=FIXED).computed
+        self.assertIsNone(computed.float)
+
+        # The declaration isn't altered.
+        style = CSS(display=INLINE, float=LEFT)
+        self.assertIs(style.display, INLINE)
+
+    def test_invalidation(self):
+        node = ExampleNode(style=CSS())
+        node.layout.dirty = None
+        self.assertIsNone(node.style.invalidation)
+
+        # Paint-only changes don't dirty the layout...
+        node.style.color = "red"
+        node.style.outline = "thin solid red"
+        node.style.border_color = "blue"
+        self.assertEqual(node.style.invalidation, PAINT)
+        self.assertIsNone(node.style.dirty)
+
+        # ... but they do update the computed style.
+        self.assertEqual(node.style.computed.color, NAMED_COLOR["red"])
+
+        # Position changes are stronger than paint-only changes...
+        node.style.top = 10
+        self.assertEqual(node.style.invalidation, POSITION)
+        self.assertTrue(node.style.dirty)
+
+        # ... and layout changes are stronger again.
+        node.layout.dirty = None
+        node.style.width = 10
+        node.style.visibility = "hidden"
+        self.assertEqual(node.style.invalidation, LAYOUT)
+        self.assertTrue(node.style.dirty)
+
+        # Changes to the way the box is formatted are the strongest.
+        node.style.display = BLOCK
+        self.assertEqual(node.style.invalidation, FORMATTING)
+
+        # Once the invalidation is cleared, it only reflects new changes.
+        node.style.invalidation = None
+        node.layout.dirty = None
+        del node.style.color
+        self.assertEqual(node.style.invalidation, PAINT)
+        self.assertIsNone(node.style.dirty)
+
+        # Setting a property to its current value isn't a change.
+        node.style.invalidation = None
+        node.style.width = 10
+        self.assertIsNone(node.style.invalidation)
+
+    def test_batch(self):
+        node = ExampleNode(style=CSS())
+        root = ExampleNode(children=[node])
+        node.layout.dirty = None
+        root.layout.dirty = None
+
+        with mock.patch.object(
+            Box, "_dirty_ancestors", autospec=True, side_effect=Box._dirty_ancestors
+        ) as dirty_ancestors:
+            # The layout isn't invalidated until the end of the batch...
+            with node.style.batch():
+                node.style.width = 10
+                node.style.margin = (1, 2, 3, 4)
+                with node.style.batch():
+                    node.style.border = "1px solid red"
+                self.assertIsNone(node.style.dirty)
+                self.assertEqual(node.style.computed.width, 10)
+
+            # ... and then, it's invalidated once.
+            self.assertTrue(node.style.dirty)
+            self.assertTrue(root.layout.dirty)
+            self.assertEqual(dirty_ancestors.call_count, 1)
+
+            # Updating many properties invalidates the layout once.
+            node.layout.dirty = None
+            dirty_ancestors.reset_mock()
+            node.style.update(height=10, padding=(1, 2), outline="thin solid red")
+            self.assertTrue(node.style.dirty)
+            self.assertEqual(dirty_ancestors.call_count, 1)
+
+            # Paint-only changes don't invalidate the layout at all.
+            node.layout.dirty = None
+            dirty_ancestors.reset_mock()
+            with node.style.batch():
+                node.style.color = "red"
+            self.assertIsNone(node.style.dirty)
+            self.assertEqual(dirty_ancestors.call_count, 0)
+
+    def test_batch_formatting(self):
+        node = ExampleNode(style=CSS())
+        root = ExampleNode(children=[node])
+        node.layout.dirty = None
+        root.layout.dirty = None
+
+        with mock.patch.object(
+            Box, "_dirty_ancestors", autospec=True, side_effect=Box._dirty_ancestors
+        ) as dirty_ancestors:
+            # Changes to the formatting of a node don't invalidate the layout
+            # of the node or its parent until the end of the batch...
+            with node.style.batch():
+                node.style.display = BLOCK
+                node.style.float = LEFT
+                self.assertIsNone(node.style.dirty)
+                self.assertIsNone(root.layout.dirty)
+
+            # ... and then, they're both invalidated once.
+            self.assertTrue(node.style.dirty)
+            self.assertTrue(root.layout.dirty)
+            self.assertEqual(dirty_ancestors.call_count, 1)
+
+            # The same is true of a batch of many declarations.
+            node.layout.dirty = None
+            root.layout.dirty = None
+            dirty_ancestors.reset_mock()
+            with batch():
+                node.style.position = ABSOLUTE
+                self.assertIsNone(node.style.dirty)
+                self.assertIsNone(root.layout.dirty)
+
+            self.assertTrue(node.style.dirty)
+            self.assertTrue(root.layout.dirty)
+            self.assertEqual(dirty_ancestors.call_count, 1)
+
+    def test_batch_many(self):
+        leaves = [ExampleNode(style=CSS()) for i in range(3)]
+        branches = [
+            ExampleNode(style=CSS(), children=leaves[:2]),
+            ExampleNode(style=CSS(), children=leaves[2:]),
+        ]
+        root = ExampleNode(style=CSS(), children=branches)
+        nodes = [root] + branches + leaves
+        for node in nodes:
+            node.layout.dirty = None
+
+        with mock.patch.object(
+            Box, "_dirty_ancestors", autospec=True, side_effect=Box._dirty_ancestors
+        ) as dirty_ancestors:
+            with batch():
+                for node in nodes:
+                    node.style.update(width=10, margin=5)
+                    node.style.height = 20
+
+                for node in nodes:
+                    self.assertIsNone(node.layout.dirty)
+
+        # Every layout has been invalidated, once.
+        for node in nodes:
+            self.assertTrue(node.layout.dirty)
+        self.assertEqual(dirty_ancestors.call_count, len(nodes))
+
     def test_auto_default_property(self):
         node = ExampleNode(style=CSS())
         node.layout.dirty = None
@@ -623,6 +834,13 @@ class CssDeclarationTests(TestCase):
         self.assertEqual(repr(node.style.border_spacing), "BorderSpacing(1px, 2px)")
         self.assertEqual(str(node.style.border_spacing), "1px 2px")
 
+    def test_property_border_spacing_valid_copy(self):
+        # A declaration can be copied to another node.
+        node = ExampleNode(style=CSS(border_spacing=(1, 2)))
+        self.assertEqual(node.style.border_spacing.horizontal, 1 * px)
+        self.assertEqual(node.style.border_spacing.vertical, 2 * px)
+        self.assertEqual(repr(node.style.border_spacing), "BorderSpacing(1px, 2px)")
+
     def test_property_border_spacing_invalid_empty_item(self):
         node = ExampleNode(style=CSS())
         node.layout.dirty = None
@@ -867,6 +1085,25 @@ class CssDeclarationTests(TestCase):
         with self.assertRaises(ValueError):
             node.style.cursor = [AUTO, "url(google.com)"]
 
+    def test_validated_property_line_height(self):
+        node = ExampleNode(style=CSS())
+        node.layout.dirty = None
+
+        self.assertEqual(str(node.style.line_height), "normal")
+
+        node.style.line_height = "1.5"
+        self.assertEqual(node.style.line_height, 1.5)
+        self.assertTrue(node.style.dirty)
+
+        node.style.line_height = "20px"
+        self.assertEqual(str(node.style.line_height), "20px")
+
+        node.style.line_height = "120%"
+        self.assertEqual(str(node.style.line_height), "120%")
+
+        with self.assertRaises(ValueError):
+            node.style.line_height = "boom"
+
     def test_set_multiple_properties(self):
         node = ExampleNode(style=CSS())
         node.layout.dirty = None
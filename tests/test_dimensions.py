@@ -1,8 +1,12 @@
+import sys
 from unittest import TestCase
 
-from colosseum.dimensions import Box
+from colosseum.constants import AT_MOST, AUTO, BLOCK, EXACTLY, UNDEFINED
+from colosseum.declaration import CSS
+from colosseum.dimensions import Box, LayoutStore, Size, StoredBox
+from colosseum.engine import layout
 
-from .utils import ExampleNode
+from .utils import Display, ExampleNode
 
 
 class SizeTests(TestCase):
@@ -172,6 +176,47 @@ class SizeTests(TestCase):
         # Layout has been dirtied.
         self.assertTrue(self.node.intrinsic.dirty)
 
+    def test_measure(self):
+        calls = []
+
+        def measure(available_width, width_mode, available_height, height_mode):
+            calls.append((available_width, width_mode))
+            # A paragraph of 100px of text, 10px tall per 50px line.
+            if width_mode is UNDEFINED:
+                return 100, 10
+            width = min(100, available_width)
+            return width, 10 * -(-100 // max(width, 50))
+
+        self.node.intrinsic.measure = measure
+        self.assertTrue(self.node.intrinsic.dirty)
+        self.node.layout.dirty = False
+
+        intrinsic = self.node.intrinsic
+        self.assertEqual(
+            intrinsic.measured(None, UNDEFINED, None, UNDEFINED), (100, 10)
+        )
+        # The natural size satisfies any upper bound it fits in, and the
+        # exact width that was measured.
+        self.assertEqual(intrinsic.measured(200, AT_MOST, None, UNDEFINED), (100, 10))
+        self.assertEqual(intrinsic.measured(100, EXACTLY, None, UNDEFINED), (100, 10))
+        self.assertEqual(len(calls), 1)
+
+        # A tighter bound is measured again...
+        self.assertEqual(intrinsic.measured(60, AT_MOST, None, UNDEFINED), (60, 20))
+        self.assertEqual(intrinsic.measured(60, AT_MOST, None, UNDEFINED), (60, 20))
+        self.assertEqual(intrinsic.measured(80, EXACTLY, None, UNDEFINED), (80, 20))
+        self.assertEqual(calls, [(None, UNDEFINED), (60, AT_MOST), (80, EXACTLY)])
+
+        # ... and the measurements are discarded when the size is dirtied.
+        intrinsic.dirty = True
+        self.assertEqual(intrinsic.measured(200, AT_MOST, None, UNDEFINED), (100, 10))
+        self.assertEqual(len(calls), 4)
+
+        # Only the most recent measurements are retained.
+        for width in range(50, 50 + Size.MAX_MEASUREMENTS + 1):
+            intrinsic.measured(width, EXACTLY, None, UNDEFINED)
+        self.assertEqual(len(intrinsic._measurements), Size.MAX_MEASUREMENTS)
+
 
 class BoxTests(TestCase):
     def setUp(self):
@@ -193,7 +238,11 @@ class BoxTests(TestCase):
         self.grandchild1_2 = ExampleNode()
 
         self.node.children = [self.child1, self.child2]
+        self.child1.parent = self.node
+        self.child2.parent = self.node
         self.child1.children = [self.grandchild1_1, self.grandchild1_2]
+        self.grandchild1_1.parent = self.child1
+        self.grandchild1_2.parent = self.child1
 
     def assertLayout(self, box, expected):
         actual = {}
@@ -511,35 +560,103 @@ class BoxTests(TestCase):
             },
         )
 
+    def test_lazy_origin(self):
+        self.node.layout._origin_top = 100
+        self.node.layout._origin_left = 200
+        self.assertEqual(self.grandchild1_1.layout.absolute_content_top, 100)
+        self.assertEqual(self.grandchild1_1.layout.absolute_content_left, 200)
+
+        # Moving a box doesn't alter the stored origin of its descendants...
+        self.child1.layout.content_top = 10
+        self.child1.layout.content_left = 20
+        self.assertEqual(self.grandchild1_1.layout._BaseBox__computed_origin_top, 100)
+        self.assertEqual(self.grandchild1_1.layout._BaseBox__computed_origin_left, 200)
+
+        # ... but the new position is used when the origin is next read.
+        self.assertEqual(self.grandchild1_1.layout.absolute_content_top, 110)
+        self.assertEqual(self.grandchild1_1.layout.absolute_content_left, 220)
+        self.assertEqual(self.grandchild1_2.layout._origin_top, 110)
+        self.assertEqual(self.grandchild1_2.layout._origin_left, 220)
+        self.assertEqual(self.child2.layout._origin_top, 100)
+        self.assertEqual(self.child2.layout._origin_left, 200)
+
+    def test_deep_origin(self):
+        # Evaluating an origin doesn't recurse through the ancestors of a box.
+        root = ExampleNode()
+        node = root
+        for i in range(5000):
+            child = ExampleNode()
+            child.layout.content_top = 1
+            child.parent = node
+            node.children = [child]
+            node = child
+
+        self.assertEqual(node.layout.absolute_content_top, 5000)
+        root.layout.content_top = 10
+        self.assertEqual(node.layout.absolute_content_top, 5010)
+
     def test_dirty_handling(self):
+        # Cleaning a box doesn't alter any other box.
         self.node.layout.dirty = None
         self.assertIsNone(self.node.layout.dirty)
-        self.assertIsNone(self.child1.layout.dirty)
-        self.assertIsNone(self.child2.layout.dirty)
-        self.assertIsNone(self.grandchild1_1.layout.dirty)
-        self.assertIsNone(self.grandchild1_2.layout.dirty)
-
-        self.node.layout.dirty = True
-        self.assertTrue(self.node.layout.dirty)
         self.assertTrue(self.child1.layout.dirty)
         self.assertTrue(self.child2.layout.dirty)
         self.assertTrue(self.grandchild1_1.layout.dirty)
         self.assertTrue(self.grandchild1_2.layout.dirty)
 
-        self.node.layout.dirty = None
-        self.grandchild1_2.layout.dirty = False
-        self.assertIsNone(self.node.layout.dirty)
-        self.assertIsNone(self.child1.layout.dirty)
-        self.assertIsNone(self.child2.layout.dirty)
-        self.assertIsNone(self.grandchild1_1.layout.dirty)
+        for node in [
+            self.node,
+            self.child1,
+            self.child2,
+            self.grandchild1_1,
+            self.grandchild1_2,
+        ]:
+            node.layout.dirty = False
+
+        # Dirtying a box dirties its ancestors, but not its descendants
+        # or siblings.
+        self.child1.layout.dirty = True
+        self.assertTrue(self.node.layout.dirty)
+        self.assertTrue(self.child1.layout.dirty)
+        self.assertFalse(self.child2.layout.dirty)
+        self.assertFalse(self.grandchild1_1.layout.dirty)
         self.assertFalse(self.grandchild1_2.layout.dirty)
 
-        self.node.layout.dirty = None
+        self.node.layout.dirty = False
         self.child1.layout.dirty = False
-        self.assertIsNone(self.node.layout.dirty)
-        self.assertFalse(self.child1.layout.dirty)
-        self.assertIsNone(self.child2.layout.dirty)
+
+        self.grandchild1_2.layout.dirty = True
+        self.assertTrue(self.node.layout.dirty)
+        self.assertTrue(self.child1.layout.dirty)
+        self.assertFalse(self.child2.layout.dirty)
         self.assertFalse(self.grandchild1_1.layout.dirty)
+        self.assertTrue(self.grandchild1_2.layout.dirty)
+
+    def test_dirty_relayout_boundary(self):
+        for node in [
+            self.node,
+            self.child1,
+            self.child2,
+            self.grandchild1_1,
+            self.grandchild1_2,
+        ]:
+            node.layout.dirty = False
+
+        # child1 has a definite size, so the layout of its children can't
+        # alter the layout of its parent.
+        self.child1.style.update(width=10, height=16)
+        self.child1.layout.dirty = False
+        self.node.layout.dirty = False
+        self.node.layout._dirty_descendants = False
+        self.assertTrue(self.child1.layout.is_relayout_boundary)
+
+        self.grandchild1_1.layout.dirty = True
+        self.assertFalse(self.node.layout.dirty)
+        self.assertTrue(self.node.layout._dirty_descendants)
+        self.assertTrue(self.child1.layout.dirty)
+        self.assertFalse(self.child1.layout._dirty_descendants)
+        self.assertFalse(self.child2.layout.dirty)
+        self.assertTrue(self.grandchild1_1.layout.dirty)
         self.assertFalse(self.grandchild1_2.layout.dirty)
 
     def test_margins_and_borders(self):
@@ -834,3 +951,137 @@ class BoxTests(TestCase):
         self.node.layout.margin_left = 10
         self.assertEqual(self.node.layout.margin_left, 10)
         self.assertEqual(self.node.layout.collapse_left, 15)
+
+
+class LayoutStoreTests(TestCase):
+    def setUp(self):
+        self.store = LayoutStore()
+
+    def test_allocate(self):
+        node1 = ExampleNode()
+        node1.layout = self.store.box(node1)
+        node2 = ExampleNode()
+        node2.layout = self.store.box(node2)
+
+        self.assertIsInstance(node1.layout, StoredBox)
+        self.assertEqual(node1.layout.row, 0)
+        self.assertEqual(node2.layout.row, 1)
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.nbytes, 2 * 8 * len(LayoutStore.COLUMNS))
+
+        # A released row is re-used by the next box.
+        node1.layout.release()
+        self.assertEqual(len(self.store), 1)
+
+        node3 = ExampleNode()
+        node3.layout = self.store.box(node3)
+        self.assertEqual(node3.layout.row, 0)
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(node3.layout.content_width, 0)
+
+    def test_slots(self):
+        # A stored box has no slots for the geometry it keeps in the store.
+        node = ExampleNode()
+        stored = self.store.box(node)
+        slots = [
+            name for cls in StoredBox.__mro__ for name in getattr(cls, "__slots__", ())
+        ]
+        for name in LayoutStore.COLUMNS:
+            self.assertNotIn(name, slots)
+            self.assertNotIn(f"_{name}", slots)
+        self.assertLess(sys.getsizeof(stored), sys.getsizeof(Box(node)))
+
+    def test_stored_values(self):
+        node = ExampleNode()
+        node.layout = self.store.box(node)
+
+        node.layout.content_width = 10
+        node.layout.content_height = 12.5
+        node.layout.content_top = 3
+        node.layout.margin_left = AUTO
+        node.layout.margin_top = 7
+
+        self.assertEqual(node.layout.content_width, 10)
+        self.assertIsInstance(node.layout.content_width, int)
+        self.assertEqual(node.layout.content_height, 12.5)
+        self.assertEqual(node.layout.content_top, 3)
+        self.assertIs(node.layout.margin_left, AUTO)
+        self.assertEqual(node.layout.margin_top, 7)
+        self.assertEqual(node.layout.collapse_top, 7)
+        self.assertEqual(node.layout.border_box_bottom, 15.5)
+
+        # Columns are the underlying storage, not a copy.
+        self.assertEqual(self.store.column("content_width")[node.layout.row], 10.0)
+        self.assertEqual(self.store.column("collapse_top")[node.layout.row], 7.0)
+
+        self.store.column("content_width")[node.layout.row] = 42
+        self.assertEqual(node.layout.content_width, 42)
+
+    def test_layout(self):
+        def build():
+            return ExampleNode(
+                style=CSS(display=BLOCK, padding=3),
+                children=[
+                    ExampleNode(style=CSS(display=BLOCK, height=10, margin=5)),
+                    ExampleNode(
+                        style=CSS(display=BLOCK, width="50%", height=20, margin=7)
+                    ),
+                ],
+            )
+
+        def geometry(node):
+            return [
+                (
+                    node.layout.absolute_content_left,
+                    node.layout.absolute_content_top,
+                    node.layout.content_width,
+                    node.layout.content_height,
+                )
+            ] + [value for child in node.children for value in geometry(child)]
+
+        display = Display(dpi=96, width=1024, height=768)
+
+        reference = build()
+        layout(display, reference)
+
+        stored = build()
+        for node in [stored] + stored.children:
+            node.layout = self.store.box(node)
+        layout(display, stored)
+
+        self.assertEqual(geometry(stored), geometry(reference))
+        self.assertEqual(
+            list(self.store.column("content_height")),
+            [node.layout.content_height for node in [reference] + reference.children],
+        )
+
+    def test_display_toggle(self):
+        display = Display(dpi=96, width=1024, height=768)
+        root = ExampleNode(
+            style=CSS(display=BLOCK),
+            children=[
+                ExampleNode(style=CSS(display=BLOCK, height=10)),
+                ExampleNode(style=CSS(display=BLOCK, height=20)),
+            ],
+        )
+        for node in [root] + root.children:
+            node.layout = self.store.box(node)
+        layout(display, root)
+        self.assertEqual(len(self.store), 3)
+
+        # The row of a box that is no longer displayed is returned to the
+        # store...
+        hidden = root.children[0]
+        hidden.style.display = None
+        layout(display, root, incremental=True)
+        self.assertIsNone(hidden.layout)
+        self.assertEqual(len(self.store), 2)
+
+        # ... and a box that is displayed again is allocated from the store.
+        hidden.style.display = BLOCK
+        layout(display, root, incremental=True)
+        self.assertIsInstance(hidden.layout, StoredBox)
+        self.assertIs(hidden.layout.store, self.store)
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(hidden.layout.content_height, 10)
+        self.assertEqual(root.children[1].layout.absolute_content_top, 10)
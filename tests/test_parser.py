@@ -30,7 +30,7 @@ from colosseum.units import (
     vmin,
     vw,
 )
-from colosseum.wrappers import Cursor
+from colosseum.wrappers import Cursor, Fr, GridLine, TrackList, TrackSize
 
 
 class ParseUnitTests(TestCase):
@@ -949,3 +949,51 @@ class ParseCursorTests(TestCase):
 
             with self.assertRaises(ValueError):
                 parser.cursor([option1, "url(some.url)", option2])
+
+
+class ParseGridTests(TestCase):
+    def test_track_size_valid(self):
+        self.assertEqual(parser.track_size("10px"), TrackSize(10 * px))
+        self.assertEqual(parser.track_size("25%"), TrackSize(25 * percent))
+        self.assertEqual(parser.track_size("2fr"), TrackSize(Fr(2)))
+        self.assertEqual(parser.track_size("auto"), TrackSize("auto"))
+        self.assertEqual(parser.track_size("min-content"), TrackSize("min-content"))
+        self.assertEqual(
+            parser.track_size("minmax(100px, 1fr)"), TrackSize(100 * px, Fr(1))
+        )
+
+    def test_track_size_invalid(self):
+        for value in ["minmax(1fr, 100px)", "minmax(100px)", "-1fr", "xfr", "big"]:
+            with self.assertRaises(ValueError):
+                parser.track_size(value)
+
+    def test_track_list_valid(self):
+        tracks = parser.track_list("100px minmax(10px, auto) 1fr")
+        self.assertIsInstance(tracks, TrackList)
+        self.assertEqual(
+            tracks,
+            TrackList(
+                [TrackSize(100 * px), TrackSize(10 * px, "auto"), TrackSize(Fr(1))]
+            ),
+        )
+        self.assertEqual(str(tracks), "100px minmax(10px, auto) 1fr")
+
+        self.assertEqual(
+            parser.track_list("repeat(2, 10px 1fr) auto"),
+            parser.track_list(["10px", "1fr", "10px", "1fr", "auto"]),
+        )
+
+    def test_track_list_invalid(self):
+        for value in ["", "repeat(0, 10px)", "repeat(x, 10px)", "repeat(2)", 10]:
+            with self.assertRaises(ValueError):
+                parser.track_list(value)
+
+    def test_grid_line_valid(self):
+        self.assertEqual(parser.grid_line(3), GridLine(3))
+        self.assertEqual(parser.grid_line("-1"), GridLine(-1))
+        self.assertEqual(parser.grid_line("span 2"), GridLine(span=2))
+
+    def test_grid_line_invalid(self):
+        for value in [0, "0", "span 0", "span", "first", 1.5]:
+            with self.assertRaises(ValueError):
+                parser.grid_line(value)
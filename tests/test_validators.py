@@ -6,14 +6,17 @@ from colosseum.validators import (
     ValidationError,
     is_border_spacing,
     is_cursor,
+    is_grid_line,
     is_integer,
     is_number,
     is_percentage,
     is_quote,
     is_rect,
+    is_track_list,
+    is_track_size,
     is_uri,
 )
-from colosseum.wrappers import Quotes
+from colosseum.wrappers import Fr, GridLine, Quotes, TrackList, TrackSize
 
 
 class PercentTests(TestCase):
@@ -279,3 +282,26 @@ class CursorTests(TestCase):
 
         with self.assertRaises(ValidationError):
             is_cursor(["url(something)", "auto", "url(something)"])
+
+
+class GridTests(TestCase):
+    """
+    Comprehensive grid tests are found in the parser tests.
+
+    This test checks basic cases work as expected.
+    """
+
+    def test_grid_valid(self):
+        self.assertEqual(is_track_size("1fr"), TrackSize(Fr(1)))
+        self.assertEqual(
+            is_track_list("1fr 1fr"), TrackList([TrackSize(Fr(1)), TrackSize(Fr(1))])
+        )
+        self.assertEqual(is_grid_line("span 2"), GridLine(span=2))
+
+    def test_grid_invalid(self):
+        with self.assertRaises(ValidationError):
+            is_track_size("minmax(1fr, 1fr)")
+        with self.assertRaises(ValidationError):
+            is_track_list("")
+        with self.assertRaises(ValidationError):
+            is_grid_line(0)
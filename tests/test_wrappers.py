@@ -11,10 +11,14 @@ from colosseum.wrappers import (
     BorderSpacing,
     BorderTop,
     Cursor,
+    Fr,
+    GridLine,
     ImmutableList,
     Outline,
     Quotes,
     Shorthand,
+    TrackList,
+    TrackSize,
 )
 
 
@@ -461,3 +465,34 @@ class CursorTests(TestCase):
         self.assertEqual(str(ilist), "1, 2")
         self.assertEqual(repr(ilist), "Cursor(['1', '2'])")
         self.assertEqual(len(ilist), 2)
+
+
+class GridTests(TestCase):
+    def test_fr(self):
+        fr = Fr(2)
+        self.assertEqual(fr.value, 2)
+        self.assertEqual(str(fr), "2fr")
+        self.assertEqual(repr(fr), "Fr(2)")
+        self.assertEqual(fr, Fr(2))
+        self.assertNotEqual(fr, Fr(1))
+
+    def test_track_size(self):
+        size = TrackSize(10 * px)
+        self.assertEqual(size.minimum, 10 * px)
+        self.assertEqual(size.maximum, 10 * px)
+        self.assertEqual(str(size), "10px")
+
+        size = TrackSize(10 * px, Fr(1))
+        self.assertEqual(size.maximum, Fr(1))
+        self.assertEqual(str(size), "minmax(10px, 1fr)")
+
+    def test_track_list(self):
+        tracks = TrackList([TrackSize(10 * px), TrackSize(Fr(1))])
+        self.assertEqual(str(tracks), "10px 1fr")
+        self.assertEqual(len(tracks), 2)
+
+    def test_grid_line(self):
+        self.assertEqual(str(GridLine(3)), "3")
+        self.assertEqual(str(GridLine(-1)), "-1")
+        self.assertEqual(str(GridLine(span=2)), "span 2")
+        self.assertNotEqual(GridLine(2), GridLine(span=2))
@@ -40,7 +40,19 @@ class ExampleNode:
 
 
 def build_document(data, parent=None):
-    if "tag" in data:
+    # The document is built from an explicit stack, rather than recursively,
+    # so that very deep documents can be built.
+    if "tag" not in data:
+        #     # TODO - add proper handling for anonymous boxes.
+        #     node = ExampleNode(name='<anon>')
+        #     node.intrinsic.width = ...
+        #     node.intrinsic.height = ...
+        return None
+
+    document = None
+    stack = [(data, parent)]
+    while stack:
+        data, parent = stack.pop()
         node = ExampleNode(name=data["tag"])
         node.parent = parent
         node.style.update(
@@ -50,23 +62,30 @@ def build_document(data, parent=None):
                 if hasattr(node.style, attr)
             }
         )
+        if document is None:
+            document = node
+        else:
+            parent.children.append(node)
 
-        if "children" in data:
-            for child in data["children"]:
-                subdocument = build_document(child, parent=node)
-                if subdocument:
-                    node.children.append(subdocument)
-    else:
-        node = None
-    #     # TODO - add proper handling for anonymous boxes.
-    #     node = ExampleNode(name='<anon>')
-    #     node.intrinsic.width = ...
-    #     node.intrinsic.height = ...
-    return node
+        for child in reversed(data.get("children", [])):
+            if "tag" in child:
+                stack.append((child, node))
+
+    return document
 
 
 def summarize(node):
-    if node.layout:
+    # The summary is built from an explicit stack, rather than recursively,
+    # so that very deep documents can be summarized.
+    if not node.layout:
+        #     # TODO - add proper handling for anonymous boxes.
+        #     layout = 'NOT DISPLAYED'
+        return None
+
+    summary = None
+    stack = [(node, None)]
+    while stack:
+        node, parent_layout = stack.pop()
         layout = {
             "content": {
                 "position": (
@@ -92,19 +111,16 @@ def summarize(node):
         }
         if node.name:
             layout["tag"] = node.name
-        children = []
-        for child in node.children:
-            sublayout = summarize(child)
-            if sublayout:
-                children.append(sublayout)
-        if children:
-            layout["children"] = children
-    else:
-        layout = None
-    #     # TODO - add proper handling for anonymous boxes.
-    #     layout = 'NOT DISPLAYED'
+        if parent_layout is None:
+            summary = layout
+        else:
+            parent_layout.setdefault("children", []).append(layout)
+
+        for child in reversed(node.children):
+            if child.layout:
+                stack.append((child, layout))
 
-    return layout
+    return summary
 
 
 def clean_layout(layout):